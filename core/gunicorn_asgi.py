@@ -0,0 +1,38 @@
+# core/gunicorn_asgi.py
+"""
+Gunicorn profile for serving TradeMind over ASGI:
+
+    gunicorn core.asgi:application -c core/gunicorn_asgi.py
+
+Each worker process runs one uvicorn event loop. The async views
+(dashboard, ai_insight, trade_history, the insight stream) await the
+database and the AI providers instead of holding a thread, so one worker
+keeps many slow LLM calls in flight; scale with processes (WEB_CONCURRENCY),
+not threads. The async client's pool per worker is
+AI_TRANSPORT['ASYNC_MAX_CONNECTIONS'].
+
+The WSGI entry point (gunicorn core.wsgi) keeps working; there the insight
+page polls instead of streaming.
+"""
+import multiprocessing
+import os
+
+# --- SERVER ---
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', min(4, multiprocessing.cpu_count())))
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+# --- LIFECYCLE ---
+# The worker heartbeat runs on the event loop, so `timeout` only catches a
+# blocked loop; a slow provider call does not count against it.
+timeout = 30
+# Open insight streams get this long to finish on restart/deploy
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then (per-process caches and pools stay bounded)
+max_requests = 2000
+max_requests_jitter = 200
+
+# --- LOGGING ---
+accesslog = '-'
+errorlog = '-'
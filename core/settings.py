@@ -26,12 +26,27 @@ ALLOWED_HOSTS = [
     'trademindjournal.onrender.com',  # For Render deployment
 ]
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'trade-mind-unique',
+# One cache for every worker process on the host (locks, version counters and
+# snapshots are shared): a SQLite file in WAL mode (trademind_app/cache_backend.py).
+# With workers on several hosts set REDIS_URL instead (needs `pip install redis`).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'trademind_app.cache_backend.SQLiteCache',
+            'LOCATION': os.getenv('CACHE_PATH', str(BASE_DIR / 'cache.sqlite3')),
+            'OPTIONS': {
+                'MAX_ENTRIES': 50000,
+                'CULL_FREQUENCY': 4,  # over MAX_ENTRIES, drop a quarter (soonest to expire first)
+            },
+        }
     }
-}
 
 # --- PROJECT CONFIG ---
 # Add your custom settings here
@@ -50,6 +65,140 @@ EMOTION_CHOICES = [
     ('chill', '🧘‍♂️ Chill'),
 ]
 
+# --- AI INSIGHT QUEUE ---
+# Background generation via `python manage.py run_insight_worker`
+INSIGHT_QUEUE = {
+    'VISIBILITY_TIMEOUT': int(os.getenv('INSIGHT_VISIBILITY_TIMEOUT', 60)),  # seconds before a crashed worker's job is retried
+    'MAX_ATTEMPTS': int(os.getenv('INSIGHT_MAX_ATTEMPTS', 4)),  # provider attempts before the mock insight
+    'BACKOFF_BASE': 5,  # seconds, doubled per attempt
+    'BACKOFF_MAX': 300,
+}
+
+# --- AI TRANSPORT ---
+# Pooled HTTP session, retries and circuit breaker for AI providers (trademind_app/ai_transport.py)
+AI_TRANSPORT = {
+    'POOL_MAXSIZE': 16,  # keep-alive connections per provider host; >= run_insight_worker --threads
+    'ASYNC_MAX_CONNECTIONS': 200,  # provider connections per ASGI worker (async views; see core/gunicorn_asgi.py)
+    'TIMEOUT': 10,
+    'MAX_RETRIES': 2,
+    'MAX_RETRY_WAIT': 20,  # cap on waiting for a cold HF model (estimated_time)
+    'BREAKER_FAILURE_THRESHOLD': 5,
+    'BREAKER_RESET_TIMEOUT': 30,
+    'BREAKER_TRIAL_TIMEOUT': 60,
+}
+
+# --- AI PROVIDERS ---
+# Backends the AI coach routes between (trademind_app/ai_router.py), in preference order.
+# A provider without its API key (DEEPSEEK_API_KEY, HF_API_KEY) is skipped.
+AI_PROVIDERS = {
+    'deepseek': {
+        'TIMEOUT': 10,               # seconds per attempt
+        'BUDGET_PER_MINUTE': 30,     # paid API: calls started per minute, hedges included
+        'EXPECTED_LATENCY': 2.0,     # prior p50 until enough calls were seen
+    },
+    'huggingface': {
+        'TIMEOUT': 10,
+        'BUDGET_PER_MINUTE': None,
+        'EXPECTED_LATENCY': 3.0,
+    },
+    'mock': {
+        'FALLBACK': True,            # only when every remote provider failed
+    },
+}
+
+# Hedged requests: a second request once the first is slower than its rolling p95
+AI_ROUTER = {
+    'HEDGE': True,
+    'HEDGE_PERCENTILE': 95,
+    'HEDGE_BUDGET': 0.1,             # at most ~10% extra provider calls
+    'MIN_SAMPLES': 20,
+    'MAX_ERROR_RATE': 0.5,
+}
+
+# Prompt size; batch mode packs several trades into one prompt (backfill_insights --prompt-batch)
+AI_PROMPT = {
+    'REASON_TOKENS': 80,             # journal reasons trimmed to about this many tokens
+    'BATCH_SIZE': 10,
+    'BATCH_TOKENS_PER_TRADE': 120,   # completion budget per trade in a packed prompt
+    'BATCH_TIMEOUT': 60,             # seconds per attempt: a packed answer takes longer
+}
+
+# --- AI INSIGHT CACHE ---
+# Provider responses keyed by a fingerprint of the prompt inputs (trademind_app/insight_cache.py)
+# Inspect/clear with `python manage.py insight_cache stats|list|evict|clear`
+INSIGHT_CACHE = {
+    'ENABLED': os.getenv('INSIGHT_CACHE_ENABLED', 'True') == 'True',
+    'TTL': 7 * 24 * 3600,  # seconds
+    'MAX_ENTRIES': 10000,
+    'LRU_SIZE': 512,  # per process
+}
+
+# --- PAGE CACHE ---
+# Rendered dashboard fragments and history pages per user generation, bumped on
+# every Trade/StrategyRule/AIInsight write (trademind_app/page_cache.py)
+PAGE_CACHE = {
+    'ENABLED': os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True',
+    'TIMEOUT': 3600,  # seconds; pages of old generations are never read again
+}
+
+# --- PROFILING ---
+# Opt-in request profiling: Server-Timing headers + slowest requests at /staff/profiling/ (trademind_app/profiling.py)
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING_ENABLED', 'False') == 'True',
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', 0.1)),
+    'BUFFER_SIZE': 500,  # sampled requests kept per process
+    'SLOWEST': 50,
+}
+
+# --- METRICS ---
+# Prometheus text at /metrics, aggregated across worker processes via a shared SQLite file (trademind_app/metrics.py)
+METRICS = {
+    'ENABLED': os.getenv('METRICS_ENABLED', 'True') == 'True',
+    'PATH': os.getenv('METRICS_PATH', str(BASE_DIR / 'metrics.sqlite3')),
+    'FLUSH_INTERVAL': 1.0,  # seconds
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),  # scrapers send "Authorization: Bearer <token>"; else staff only
+}
+# Tests write metrics to a scratch store, not METRICS['PATH']
+TEST_RUNNER = 'trademind_app.tests.TestRunner'
+
+# --- SCREENSHOTS ---
+# WebP renditions of trade screenshots, made by the worker (trademind_app/screenshots.py)
+SCREENSHOTS = {
+    'THUMB_SIZE': (320, 200),  # trade history
+    'DISPLAY_SIZE': (1280, 800),  # insight page / "View"
+    'THUMB_QUALITY': 70,
+    'DISPLAY_QUALITY': 82,
+}
+
+# --- SIMILAR TRADES ---
+# Per-trader nearest-neighbour index giving the AI coach history (trademind_app/similar.py)
+SIMILAR_TRADES = {
+    'TOP_K': 5,  # similar past trades summarised in each prompt
+    'MAX_INDEXES': 256,  # traders kept in memory per process
+}
+
+# --- LOGGING ---
+# key=value lines; TRADEMIND_LOG_LEVEL=WARNING silences the per-call debug/info lines
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            'format': 'ts=%(asctime)s level=%(levelname)s logger=%(name)s msg="%(message)s"',
+        },
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'structured'},
+    },
+    'loggers': {
+        'trademind_app': {
+            'handlers': ['console'],
+            'level': os.getenv('TRADEMIND_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # --- APPS ---
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -67,8 +216,9 @@ INSTALLED_APPS = [
 # --- MIDDLEWARE ---
 # Security + Session + CSRF built-in
 MIDDLEWARE = [
+    'trademind_app.profiling.ProfilingMiddleware',  # no-op unless PROFILING['ENABLED']
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'trademind_app.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise, async-capable under ASGI
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -108,9 +258,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections between requests (core/asgi.py sets 0: there each
+        # request's sync code runs in a thread of its own)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Pragmas applied to every SQLite connection (trademind_app/sqlite_tuning.py)
+SQLITE = {
+    'ENABLED': os.getenv('SQLITE_TUNING_ENABLED', 'True') == 'True',
+    'JOURNAL_MODE': 'WAL',
+    'SYNCHRONOUS': 'NORMAL',
+    'BUSY_TIMEOUT': 5000,             # ms a writer waits for the lock
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    'CACHE_SIZE': -64000,             # KiB per connection
+}
+
 # --- PASSWORD VALIDATION ---
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -144,6 +308,19 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'  # Collected for production
 
+# css/app.css, vendor/ and fonts/ are built by `python manage.py build_assets`
+# (after `npm install`). collectstatic then writes content-hashed copies with
+# precompressed .gz/.br versions (brotli needs the Brotli package); WhiteNoise
+# serves hashed names with "Cache-Control: immutable".
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # --- MEDIA FILES (User uploads) ---
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -157,6 +334,3 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Redirect after logout
 LOGOUT_REDIRECT_URL = 'trademind_app:landing'
-
-# Serve static files with whitenoise
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
\ No newline at end of file
@@ -18,4 +18,80 @@ function initAILoader() {
     });
   }
   
-  document.addEventListener('DOMContentLoaded', initAILoader);
\ No newline at end of file
+  function showInsightFields(card, fields) {
+    Object.entries(fields).forEach(([field, value]) => {
+      const el = card.querySelector(`[data-insight-field="${field}"]`);
+      if (el) el.textContent = value;
+    });
+    card.querySelector('[data-insight-body]').hidden = false;
+  }
+
+  function clearPending(card) {
+    const pending = card.querySelector('[data-insight-pending]');
+    if (pending) pending.remove();
+  }
+
+  // Poll the insight status endpoint while the background worker generates it
+  function pollInsight(card) {
+    const url = card.dataset.insightStatusUrl;
+    let delay = 1000;
+
+    function poll() {
+      fetch(url, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(data => {
+          if (data.status === 'done' && data.insight) {
+            showInsightFields(card, data.insight);
+            clearPending(card);
+            return;
+          }
+          delay = Math.min(delay * 1.5, 10000);  // back off while the worker retries
+          setTimeout(poll, delay);
+        })
+        .catch(() => setTimeout(poll, 10000));
+    }
+
+    setTimeout(poll, delay);
+  }
+
+  // Stream the insight over Server-Sent Events: fields fill in as the model
+  // completes them. Falls back to polling when the server says so or the
+  // stream breaks.
+  function streamInsight(card) {
+    const source = new EventSource(card.dataset.insightStreamUrl);
+    let settled = false;
+
+    function fallBack() {
+      if (settled) return;
+      settled = true;
+      source.close();
+      pollInsight(card);
+    }
+
+    source.addEventListener('field', event => {
+      const data = JSON.parse(event.data);
+      showInsightFields(card, { [data.name]: data.value });
+    });
+    source.addEventListener('done', event => {
+      settled = true;
+      source.close();
+      showInsightFields(card, JSON.parse(event.data).insight);
+      clearPending(card);
+    });
+    source.addEventListener('pending', fallBack);
+    source.onerror = fallBack;  // EventSource would otherwise reconnect and restart
+  }
+
+  function initInsight() {
+    const card = document.getElementById('insight-card');
+    if (!card || !card.dataset.insightStatusUrl) return;
+
+    if (card.dataset.insightStreamUrl && window.EventSource) {
+      streamInsight(card);
+    } else {
+      pollInsight(card);
+    }
+  }
+
+  document.addEventListener('DOMContentLoaded', initAILoader);
+  document.addEventListener('DOMContentLoaded', initInsight);
@@ -0,0 +1,107 @@
+// static/js/charts.js
+// Charts for the pages that have them (the dashboard). Chart.js is self-hosted
+// (build_assets) and only fetched once a <canvas data-chart> nears the viewport.
+
+function loadScript(src) {
+  return new Promise((resolve, reject) => {
+    const script = document.createElement('script');
+    script.src = src;
+    script.onload = resolve;
+    script.onerror = reject;
+    document.head.appendChild(script);
+  });
+}
+
+let chartLibrary = null;
+function loadChartLibrary(src) {
+  if (!chartLibrary) {
+    chartLibrary = window.Chart ? Promise.resolve() : loadScript(src);
+  }
+  return chartLibrary;
+}
+
+function whenNearViewport(element, callback) {
+  if (!('IntersectionObserver' in window)) {
+    callback();
+    return;
+  }
+  const observer = new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) {
+      observer.disconnect();
+      callback();
+    }
+  }, { rootMargin: '200px' });
+  observer.observe(element);
+}
+
+// Average P&L per pre-trade emotion (data: #emotion-pnl-data, from TraderStats)
+function renderEmotionPnl(canvas) {
+  const emotionData = JSON.parse(document.getElementById('emotion-pnl-data').textContent);
+  const labels = ['Fear', 'Angry', 'Sad', 'Neutral', 'Happy', 'Chill'];
+  const data = labels.map(label => {
+    const key = label.toLowerCase();
+    return emotionData[key] !== undefined ? parseFloat(emotionData[key].toFixed(2)) : 0;
+  });
+
+  const backgroundColor = data.map(value =>
+    value < 0 ? 'rgba(255, 69, 69, 0.5)' : 'rgba(57, 255, 20, 0.5)'
+  );
+  const borderColor = data.map(value =>
+    value < 0 ? '#ff4545' : '#39FF14'
+  );
+
+  new Chart(canvas.getContext('2d'), {
+    type: 'bar',
+    data: {
+      labels: labels,
+      datasets: [{
+        label: 'Average P&L ($)',
+        data: data,
+        backgroundColor: backgroundColor,
+        borderColor: borderColor,
+        borderWidth: 1
+      }]
+    },
+    options: {
+      responsive: true,
+      plugins: {
+        legend: { display: false },
+        tooltip: {
+          callbacks: {
+            label: function(context) {
+              return `Avg P&L: $${context.parsed.y}`;
+            }
+          }
+        }
+      },
+      scales: {
+        y: {
+          beginAtZero: true,
+          grid: { color: 'rgba(255, 255, 255, 0.1)' },
+          ticks: {
+            callback: function(value) {
+              return '$' + value;
+            }
+          }
+        },
+        x: { grid: { display: false } }
+      }
+    }
+  });
+}
+
+const CHARTS = {
+  'emotion-pnl': renderEmotionPnl,
+};
+
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('canvas[data-chart]').forEach(canvas => {
+    const render = CHARTS[canvas.dataset.chart];
+    if (!render) return;
+    whenNearViewport(canvas, () => {
+      loadChartLibrary(canvas.dataset.chartSrc)
+        .then(() => render(canvas))
+        .catch(() => console.error('Chart.js failed to load'));
+    });
+  });
+});
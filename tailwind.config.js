@@ -0,0 +1,19 @@
+// tailwind.config.js
+// Used by `python manage.py build_assets` (Tailwind CLI, see package.json).
+// Classes are kept only if they appear in these files: build class names
+// in full (no string concatenation) so the scan finds them.
+module.exports = {
+  content: [
+    './templates/**/*.html',
+    './trademind_app/**/*.py',
+    './static/js/**/*.js',
+  ],
+  theme: {
+    extend: {
+      fontFamily: {
+        sans: ['Poppins', 'sans-serif'],
+        mono: ['"JetBrains Mono"', 'monospace'],
+      },
+    },
+  },
+};
@@ -1,9 +1,18 @@
 # trademind_app/ai_coach.py
 import os
-import requests
+import asyncio
 import json
+import logging
+import time
+import httpx
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from . import ai_router, ai_transport, insight_cache, metrics
+from .profiling import ai_timer
+
+logger = logging.getLogger(__name__)
+
 # --- CONFIG ---
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 DEEPSEEK_ENDPOINT = "https://api.deepseek.com/v1/chat/completions"
@@ -13,71 +22,290 @@ HF_API_KEY = os.getenv('HF_API_KEY')
 HF_MODEL = "meta-llama/Llama-3.1-8B-Instruct"
 HF_ENDPOINT = f"https://huggingface.co/models/{HF_MODEL}"
 
+# Prompt size and batch mode (get_batch_insights); overridden by settings.AI_PROMPT
+DEFAULT_PROMPT_SETTINGS = {
+    'REASON_TOKENS': 80,            # journal reason trimmed to about this many tokens
+    'BATCH_SIZE': 10,               # trades packed into one prompt
+    'BATCH_TOKENS_PER_TRADE': 120,  # completion budget per packed trade
+    'BATCH_TIMEOUT': 60,            # seconds per attempt for a packed prompt
+}
+
+def prompt_setting(name):
+    return getattr(settings, 'AI_PROMPT', {}).get(name, DEFAULT_PROMPT_SETTINGS[name])
+
 def get_ai_insight(trade_data):
     """
-    Main entry point. Tries Deepseek first, falls back to Hugging Face.
+    Main entry point. The router (ai_router.py) sends the call to the
+    fastest healthy provider (Deepseek, Hugging Face), hedging slow calls,
+    and the mock answers when every provider failed.
     Returns a dict with:
         - insight
         - risk_pattern
         - discipline_score (1-10)
         - coaching_tip
     """
-    
-    # Try Deepseek (Commented since it needs payment but it fully works)
-    #result = _call_deepseek(trade_data)
-    #if result:
-    #    return result
+    result = get_provider_insight(trade_data)
+    if result:
+        return result
+
+    # Final fallback: mock insight (built in when no fallback backend is configured)
+    return ai_router.fallback(trade_data) or _mock_insight_on_failure(trade_data)
+
+def get_provider_insight(trade_data):
+    """
+    Runs the remote provider chain only.
+    Returns the parsed insight dict, or None when every provider failed,
+    so callers (e.g. the background job queue) can retry before settling
+    for the mock insight.
+    Identical prompts are served from the insight cache first.
+    """
+    with ai_timer():
+        cached = insight_cache.lookup(trade_data)
+        if cached:
+            return cached
+
+        result = _call_providers(trade_data)
+        if result:
+            insight_cache.store(trade_data, result)
+        return result
 
-    # Fallback to Hugging Face
-    result = _call_huggingface(trade_data)
+def _call_providers(trade_data):
+    # Ranked and hedged across the configured providers (settings.AI_PROVIDERS)
+    result, _provider = ai_router.route(trade_data)
+    return result
+
+# --- ASYNC CLIENT ---
+async def aget_ai_insight(trade_data):
+    """
+    Async get_ai_insight for async views (ASGI): the same chain of insight
+    cache -> provider -> mock, but the provider call awaits a socket on the
+    event loop instead of blocking a worker thread.
+    """
+    result = await aget_provider_insight(trade_data)
     if result:
         return result
+    return ai_router.fallback(trade_data) or _mock_insight_on_failure(trade_data)
+
+async def aget_provider_insight(trade_data):
+    """
+    Async get_provider_insight: cached response, else the provider chain.
+    Returns None when every provider failed.
+    """
+    with ai_timer():
+        cached = await sync_to_async(insight_cache.lookup)(trade_data)
+        if cached:
+            return cached
+
+        result = await _acall_providers(trade_data)
+        if result:
+            await sync_to_async(insight_cache.store)(trade_data, result)
+        return result
+
+async def _acall_providers(trade_data):
+    # As _call_providers; the losing request of a hedged pair is cancelled
+    result, _provider = await ai_router.aroute(trade_data)
+    return result
+
+# --- BATCH MODE ---
+def get_batch_insights(trade_datas, batch_size=None):
+    """
+    get_provider_insight for many trades at once (bulk and periodic
+    regeneration): up to `batch_size` (AI_PROMPT['BATCH_SIZE']) cache misses
+    are packed into one prompt that carries the instructions once, each
+    trade under a stable ID (a prefix of its cache fingerprint). Items of
+    the JSON array answer that are missing or malformed go through the
+    single-trade path, so one bad item costs one extra call, not the batch.
+    Returns a list aligned with `trade_datas`: insight dicts, or None where
+    every provider failed.
+    """
+    batch_size = max(1, batch_size or prompt_setting('BATCH_SIZE'))
+    results = [None] * len(trade_datas)
+    pending = {}  # fingerprint -> indexes; identical prompts are asked once
+    for i, trade_data in enumerate(trade_datas):
+        cached = insight_cache.lookup(trade_data)
+        if cached:
+            results[i] = cached
+        else:
+            pending.setdefault(insight_cache.fingerprint(trade_data), []).append(i)
+
+    keys = list(pending)
+    for start in range(0, len(keys), batch_size):
+        chunk = {key: trade_datas[pending[key][0]] for key in keys[start:start + batch_size]}
+        answers = _call_batch(chunk) if len(chunk) > 1 else {}
+        for key, trade_data in chunk.items():
+            result = answers.get(key)
+            if result:
+                insight_cache.store(trade_data, result)
+            else:
+                result = get_provider_insight(trade_data)
+            for i in pending[key]:
+                results[i] = result
+    return results
 
-    # Final fallback: mock insight
-    return _mock_insight_on_failure(trade_data)
-
-#Works but you have to pay
-#def _call_deepseek(trade_data):
-#    if not DEEPSEEK_API_KEY:
-#        print("[AI Coach] DEEPSEEK_API_KEY not set")
-#        return None
-#
-#    prompt = _build_prompt(trade_data)
-#
-#    headers = {
-#        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-#        "Content-Type": "application/json"
-#    }
-#
-#    payload = {
-#        "model": "deepseek-chat",
-#        "messages": [
-#            {"role": "system", "content": "You are TradeMind AI, a behavioral finance coach for traders. Respond in strict JSON."},
-#            {"role": "user", "content": prompt}
-#        ],
-#        "temperature": 0.6,
-#        "max_tokens": 300
-#    }
-#
-#    try:
-#        print("[AI Coach] Calling Deepseek API...")
-#        response = requests.post(DEEPSEEK_ENDPOINT, headers=headers, json=payload, timeout=10)
-#        print(f"[AI Coach] Response status: {response.status_code}")
-#        print(f"[AI Coach] Response body: {response.text}")
-#        if response.status_code == 200:
-#            content = response.json()['choices'][0]['message']['content']
-#            return _parse_json_response(content)
-#    except Exception as e:
-#        print(f"[AI Coach] Deepseek error: {e}")
-#    return None
+def _call_batch(chunk):
+    """
+    One packed prompt for `chunk` ({fingerprint: trade_data}); returns
+    {fingerprint: insight} for the items that came back well-formed.
+    """
+    ids = {}
+    for key in chunk:
+        ids.setdefault(_batch_id(key), key)  # an ID clash (8 hex chars) just goes single
+    prompt = _build_batch_prompt({batch_id: chunk[key] for batch_id, key in ids.items()})
+    max_tokens = prompt_setting('BATCH_TOKENS_PER_TRADE') * len(ids)
+    with ai_timer():
+        answers, _provider = ai_router.route_batch(prompt, max_tokens, list(ids))
+    answers = answers or {}
+    metrics.inc('ai_batch_items_total', len(answers), result='parsed')
+    metrics.inc('ai_batch_items_total', len(chunk) - len(answers), result='fallback')
+    return {ids[batch_id]: insight for batch_id, insight in answers.items()}
+
+def _batch_id(fingerprint):
+    return fingerprint[:8]
+
+# --- PROVIDERS ---
+# Deepseek needs a paid key; without DEEPSEEK_API_KEY the router skips it.
+def _call_deepseek(trade_data):
+    if not DEEPSEEK_API_KEY:
+        logger.info("[AI Coach] DEEPSEEK_API_KEY not set")
+        metrics.record_ai_call('deepseek', metrics.NOT_CONFIGURED)
+        return None
+    payload, headers = _deepseek_request(_build_prompt(trade_data))
+    return _call_provider('deepseek', DEEPSEEK_ENDPOINT, payload, headers, _deepseek_content)
+
+async def _acall_deepseek(trade_data):
+    if not DEEPSEEK_API_KEY:
+        logger.info("[AI Coach] DEEPSEEK_API_KEY not set")
+        metrics.record_ai_call('deepseek', metrics.NOT_CONFIGURED)
+        return None
+    payload, headers = _deepseek_request(_build_prompt(trade_data))
+    return await _acall_provider('deepseek', DEEPSEEK_ENDPOINT, payload, headers, _deepseek_content)
 
 def _call_huggingface(trade_data):
     if not HF_API_KEY:
-        print("[AI Coach] HF_API_KEY not set")
+        logger.info("[AI Coach] HF_API_KEY not set")
+        metrics.record_ai_call('huggingface', metrics.NOT_CONFIGURED)
+        return None
+    payload, headers = _hf_request(_build_prompt(trade_data))
+    return _call_provider('huggingface', HF_ENDPOINT, payload, headers, _hf_content)
+
+async def _acall_huggingface(trade_data):
+    if not HF_API_KEY:
+        logger.info("[AI Coach] HF_API_KEY not set")
+        metrics.record_ai_call('huggingface', metrics.NOT_CONFIGURED)
         return None
+    payload, headers = _hf_request(_build_prompt(trade_data))
+    return await _acall_provider('huggingface', HF_ENDPOINT, payload, headers, _hf_content)
+
+def _call_deepseek_batch(prompt, max_tokens, ids):
+    # A packed multi-trade prompt (get_batch_insights): {id: insight} or None
+    if not DEEPSEEK_API_KEY:
+        metrics.record_ai_call('deepseek', metrics.NOT_CONFIGURED)
+        return None
+    payload, headers = _deepseek_request(prompt, max_tokens)
+    return _call_provider(
+        'deepseek', DEEPSEEK_ENDPOINT, payload, headers, _deepseek_content,
+        parse=lambda content: _parse_batch_response(content, ids), timeout=prompt_setting('BATCH_TIMEOUT'),
+    )
+
+def _call_huggingface_batch(prompt, max_tokens, ids):
+    if not HF_API_KEY:
+        metrics.record_ai_call('huggingface', metrics.NOT_CONFIGURED)
+        return None
+    payload, headers = _hf_request(prompt, max_tokens)
+    return _call_provider(
+        'huggingface', HF_ENDPOINT, payload, headers, _hf_content,
+        parse=lambda content: _parse_batch_response(content, ids), timeout=prompt_setting('BATCH_TIMEOUT'),
+    )
+
+def _call_provider(provider, url, payload, headers, content_of, parse=None, timeout=None):
+    """
+    POST one provider request and parse the insight out of its completion
+    (`content_of(json)`, then `parse`, by default _parse_json_response).
+    Returns None on failure; outcomes go to metrics.
+    """
+    start = time.perf_counter()
+    outcome = metrics.SUCCESS
+    options = _transport_options(provider)
+    if timeout:
+        options['timeout'] = timeout
+    try:
+        logger.debug("[AI Coach] Calling %s: %s", provider, url)
+        response = ai_transport.post_json(provider, url, payload, headers=headers, **options)
+        result = (parse or _parse_json_response)(content_of(response.json()))
+        if result is None:
+            outcome = metrics.PARSE_ERROR
+        return result
+    except ai_transport.ProviderError as e:
+        outcome = _failure_outcome(provider, e)
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        outcome = metrics.BAD_PAYLOAD
+        logger.warning("[AI Coach] Unexpected %s payload: %s", provider, e)
+    finally:
+        metrics.record_ai_call(provider, outcome, time.perf_counter() - start)
+    return None
+
+async def _acall_provider(provider, url, payload, headers, content_of):
+    # Async _call_provider, over the event loop's pooled client
+    start = time.perf_counter()
+    outcome = metrics.SUCCESS
+    try:
+        logger.debug("[AI Coach] Calling %s (async): %s", provider, url)
+        response = await ai_transport.apost_json(
+            provider, url, payload, headers=headers, **_transport_options(provider)
+        )
+        result = _parse_json_response(content_of(response.json()))
+        if result is None:
+            outcome = metrics.PARSE_ERROR
+        return result
+    except ai_transport.ProviderError as e:
+        outcome = _failure_outcome(provider, e)
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        outcome = metrics.BAD_PAYLOAD
+        logger.warning("[AI Coach] Unexpected %s payload: %s", provider, e)
+    except asyncio.CancelledError:
+        outcome = metrics.CANCELLED  # the request went away, or lost a hedged race
+        raise
+    finally:
+        metrics.record_ai_call(provider, outcome, time.perf_counter() - start)
+    return None
+
+def _transport_options(provider):
+    # Per-provider timeout and retries from settings.AI_PROVIDERS
+    return {
+        'timeout': ai_router.provider_setting(provider, 'TIMEOUT'),
+        'max_retries': ai_router.provider_setting(provider, 'MAX_RETRIES'),
+    }
+
+def _failure_outcome(provider, error):
+    if isinstance(error, ai_transport.CircuitOpenError):
+        logger.info("[AI Coach] %s circuit open, skipping remote call", provider)
+        return metrics.CIRCUIT_OPEN
+    logger.warning("[AI Coach] %s unavailable: %s", provider, error)
+    if error.timeout:
+        return metrics.TIMEOUT
+    return metrics.http_outcome(error.status) if error.status else metrics.ERROR
+
+def _deepseek_request(prompt, max_tokens=300):
+    headers = {
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    payload = {
+        "model": "deepseek-chat",
+        "messages": [
+            {"role": "system", "content": "You are TradeMind AI, a behavioral finance coach for traders. Respond in strict JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.6,
+        "max_tokens": max_tokens
+    }
+    return payload, headers
 
-    prompt = _build_prompt(trade_data)
+def _deepseek_content(body):
+    return body['choices'][0]['message']['content']
 
+def _hf_request(prompt, max_new_tokens=300):
     headers = {
         "Authorization": f"Bearer {HF_API_KEY}",
         "Content-Type": "application/json"
@@ -86,29 +314,104 @@ def _call_huggingface(trade_data):
     payload = {
         "inputs": prompt,
         "parameters": {
-            "max_new_tokens": 300,
+            "max_new_tokens": max_new_tokens,
             "temperature": 0.6,
             "return_full_text": False
         }
     }
+    return payload, headers
 
+def _hf_content(body):
+    return body[0]['generated_text']
+
+# --- STREAMING ---
+def stream_provider_insight(trade_data):
+    """
+    Streaming variant of the provider chain for the SSE endpoint
+    (insight_stream.py): an async generator of the completion's text as
+    tokens arrive, over the async client. The router picks the provider
+    (ai_router.Router.astream) and fails over until one starts streaming.
+    Raises ai_transport.ProviderError when no provider can be reached or
+    the stream breaks; the caller decides on the fallback.
+    """
+    return ai_router.astream(trade_data)
+
+def _stream_deepseek(trade_data):
+    if not DEEPSEEK_API_KEY:
+        metrics.record_ai_call('deepseek', metrics.NOT_CONFIGURED)
+        raise ai_transport.ProviderError("DEEPSEEK_API_KEY not set")
+    payload, headers = _deepseek_request(_build_prompt(trade_data))
+    payload["stream"] = True  # OpenAI-style chunks: choices[0].delta.content
+    return _stream_provider('deepseek', DEEPSEEK_ENDPOINT, payload, headers, _deepseek_token, _deepseek_content)
+
+def _stream_huggingface(trade_data):
+    if not HF_API_KEY:
+        metrics.record_ai_call('huggingface', metrics.NOT_CONFIGURED)
+        raise ai_transport.ProviderError("HF_API_KEY not set")
+    payload, headers = _hf_request(_build_prompt(trade_data))
+    payload["stream"] = True  # text-generation-inference: one SSE event per token
+    return _stream_provider('huggingface', HF_ENDPOINT, payload, headers, _hf_token, _hf_content)
+
+def _deepseek_token(event):
+    return (event['choices'][0].get('delta') or {}).get('content')
+
+def _hf_token(event):
+    token = event.get('token') or {}
+    return None if token.get('special') else token.get('text')
+
+async def _stream_provider(provider, url, payload, headers, token_of, content_of):
+    """
+    The text of a streamed completion (`token_of(event)` per SSE event), or
+    the whole completion at once (`content_of(json)`) from an endpoint that
+    doesn't stream.
+    """
+    start = time.perf_counter()
+    outcome = metrics.SUCCESS
     try:
-        print(f"[AI Coach] Calling Hugging Face: {HF_ENDPOINT}")
-        response = requests.post(HF_ENDPOINT, headers=headers, json=payload, timeout=10)
-        print(f"[AI Coach] Response status: {response.status_code}")
-        print(f"[AI Coach] Response body: {response.text}")
-        
-        if response.status_code == 200:
-            content = response.json()[0]['generated_text']
-            return _parse_json_response(content)
-        elif response.status_code == 503:
-            print("[AI Coach] Model is loading, try again in 30-60 seconds.")
+        response = await ai_transport.apost_json(
+            provider, url, payload, headers=headers, stream=True, **_transport_options(provider)
+        )
+        try:
+            if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+                # Endpoint without streaming support: the whole completion at once
+                await response.aread()
+                yield content_of(response.json())
+                return
+            async for line in response.aiter_lines():
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                event = json.loads(data)
+                if 'error' in event:
+                    raise ai_transport.ProviderError(f"{provider} stream error: {event['error']}")
+                text = token_of(event)
+                if text:
+                    yield text
+        finally:
+            await response.aclose()
+    except ai_transport.CircuitOpenError:
+        outcome = metrics.CIRCUIT_OPEN
+        raise
+    except ai_transport.ProviderError as e:
+        if e.timeout:
+            outcome = metrics.TIMEOUT
         else:
-            print(f"[AI Coach connection not reached]: {response.status_code}")
-        
-    except Exception as e:
-        print(f"[AI Coach] Hugging Face error: {e}")
-    return None
+            outcome = metrics.http_outcome(e.status) if e.status else metrics.ERROR
+        raise
+    except httpx.HTTPError as e:
+        # The connection broke (or timed out) mid-stream
+        outcome = metrics.TIMEOUT if isinstance(e, httpx.TimeoutException) else metrics.ERROR
+        raise ai_transport.ProviderError(f"{provider} stream interrupted: {e}", timeout=outcome == metrics.TIMEOUT)
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        outcome = metrics.BAD_PAYLOAD
+        raise ai_transport.ProviderError(f"Unexpected {provider} stream payload: {e}")
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = metrics.CANCELLED  # the browser went away
+        raise
+    finally:
+        metrics.record_ai_call(provider, outcome, time.perf_counter() - start)
 
 def _build_prompt(trade_data):
     return f"""
@@ -129,15 +432,100 @@ def _build_prompt(trade_data):
     - Pre-Trade Emotion: {trade_data.get('pre_trade_emotion')}
     - Post-Trade Emotion: {trade_data.get('post_trade_emotion')}
     - Rules Followed: {trade_data.get('rules_followed_count')}/{trade_data.get('rules_total')}
-    - Journal Reason: "{trade_data.get('reason')}"
-
+    - Journal Reason: "{_trim_reason(trade_data.get('reason'))}"
+{_history_section(trade_data.get('history'))}
     Rules:
     - Be clinical, concise, and trader-focused.
     - Use terms: discipline, emotional leakage, risk, edge.
+    - If the history shows a repeated pattern, name it (e.g. "3rd time"), without quoting P&L figures.
     - No markdown, no extra text.
     - Return ONLY JSON.
     """
 
+def _build_batch_prompt(trades):
+    # `trades`: {id: trade_data}; the instructions once, then one compact block per trade
+    blocks = "\n".join(_batch_trade_block(trade_id, trade_data) for trade_id, trade_data in trades.items())
+    return f"""
+    You are TradeMind AI, a behavioral finance psychologist for traders.
+    Analyze each trade below on its own and return ONLY a valid JSON array with one object per trade:
+
+    [
+      {{
+        "id": "the trade's id, as given in brackets",
+        "insight": "1 sentence on emotional/behavioral leak",
+        "risk_pattern": "1 phrase: e.g., 'Revenge trading', 'FOMO entry'",
+        "discipline_score": 1-10,
+        "coaching_tip": "1 actionable tip, supportive tone"
+      }}
+    ]
+
+    Trades:
+{blocks}
+    Rules:
+    - Be clinical, concise, and trader-focused.
+    - Use terms: discipline, emotional leakage, risk, edge.
+    - If a trade's history shows a repeated pattern, name it (e.g. "3rd time"), without quoting P&L figures.
+    - No markdown, no extra text.
+    - Return ONLY the JSON array.
+    """
+
+def _batch_trade_block(trade_id, trade_data):
+    lines = [
+        f"    [{trade_id}] {trade_data.get('entry')} {trade_data.get('pair')}, "
+        f"Profit/Loss: {trade_data.get('profit')} / {trade_data.get('loss')}, "
+        f"Emotion: {trade_data.get('pre_trade_emotion')} -> {trade_data.get('post_trade_emotion')}, "
+        f"Rules Followed: {trade_data.get('rules_followed_count')}/{trade_data.get('rules_total')}",
+        f"      Journal Reason: \"{_trim_reason(trade_data.get('reason'))}\"",
+    ]
+    history = trade_data.get('history')
+    if history:
+        # The history summary lines of _history_section, without the per-trade list
+        setup, same, similar = history['setup'], history['same_setup'], history['similar']
+        lines.append(
+            f"      History: same setup ({setup['pre_trade_emotion']} on {setup['pair']} in the "
+            f"{setup['session']}) {same['count']} earlier, {same['wins']} won, net {same['net_pnl']}; "
+            f"{similar['count']} most similar: {similar['wins']} won, average P&L {similar['avg_pnl']}"
+        )
+    return "\n".join(lines)
+
+def _estimate_tokens(text):
+    # ~4 characters per token for English text on Llama/Deepseek tokenizers
+    return (len(text or '') + 3) // 4
+
+def _trim_reason(reason, budget=None):
+    """
+    The journal reason cut to about `budget` tokens (AI_PROMPT['REASON_TOKENS'])
+    at a word boundary, so one long entry doesn't dominate the prompt.
+    """
+    budget = budget or prompt_setting('REASON_TOKENS')
+    if not reason or _estimate_tokens(reason) <= budget:
+        return reason
+    words = reason[:budget * 4].rsplit(None, 1)
+    return (words[0] if words else '').rstrip(' ,;:.') + " …"
+
+def _ordinal(n):
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+def _history_section(history):
+    # Similar past trades from the trader's own journal (similar.history_for)
+    if not history:
+        return ''
+    setup, same, similar = history['setup'], history['same_setup'], history['similar']
+    lines = [
+        "",
+        "    Trader History (similar past trades from their journal):",
+        f"    - Same setup ({setup['pre_trade_emotion']} on {setup['pair']} in the {setup['session']}): "
+        f"{same['count']} earlier trade(s), {same['wins']} won, net {same['net_pnl']}",
+        f"    - {similar['count']} most similar trades: {similar['wins']} won, average P&L {similar['avg_pnl']}",
+    ]
+    for trade in similar['trades']:
+        lines.append(
+            f"      * {trade['date']} {trade['pair']} {trade['session']}: "
+            f"{trade['pre']} -> {trade['post']}, P&L {trade['pnl']}"
+        )
+    return "\n".join(lines) + "\n"
+
 def _parse_json_response(raw_content):
     try:
         start = raw_content.find('{')
@@ -146,17 +534,67 @@ def _parse_json_response(raw_content):
             raise ValueError("No JSON found")
         json_str = raw_content[start:end]
         data = json.loads(json_str)
-        required = ['insight', 'risk_pattern', 'discipline_score', 'coaching_tip']
-        for key in required:
-            if key not in data:
-                raise ValueError(f"Missing key: {key}")
-        data['discipline_score'] = max(1, min(10, data['discipline_score']))
-        return data
+        return _validate_insight(data)
     except Exception as e:
-        print(f"[AI Coach] Parse error: {e}, Raw: {raw_content}")
+        logger.warning("[AI Coach] Parse error: %s, Raw: %.200s", e, raw_content)
         return None
 
+def _validate_insight(data):
+    required = ['insight', 'risk_pattern', 'discipline_score', 'coaching_tip']
+    for key in required:
+        if key not in data:
+            raise ValueError(f"Missing key: {key}")
+    data['discipline_score'] = max(1, min(10, data['discipline_score']))
+    return data
+
+def _parse_batch_response(raw_content, ids):
+    """
+    {id: insight} for the well-formed items of a batch completion, or None
+    when there are none. Objects are decoded one at a time from each "{",
+    so a malformed or truncated item only loses its own trade; items with
+    an unknown id or a missing key are dropped the same way. Also accepts
+    an object keyed by id, or the array wrapped in an object.
+    """
+    wanted = set(ids)
+    results = {}
+    decoder = json.JSONDecoder()
+    pos = raw_content.find('{')
+    while pos != -1:
+        try:
+            data, end = decoder.raw_decode(raw_content, pos)
+        except ValueError:
+            pos = raw_content.find('{', pos + 1)
+            continue
+        for item in _batch_items(data):
+            try:
+                trade_id = str(item.pop('id')).strip().strip('[]')
+                if trade_id in wanted and trade_id not in results:
+                    results[trade_id] = _validate_insight(item)
+            except (KeyError, ValueError, TypeError) as e:
+                logger.info("[AI Coach] Dropped batch item: %s", e)
+        pos = raw_content.find('{', end)
+    if not results:
+        logger.warning("[AI Coach] Parse error: no batch items, Raw: %.200s", raw_content)
+    elif len(results) < len(wanted):
+        logger.info("[AI Coach] Batch answered %d of %d trades", len(results), len(wanted))
+    return results or None
+
+def _batch_items(data):
+    # The insight objects in a decoded batch value
+    if not isinstance(data, dict):
+        return
+    if 'id' in data:
+        yield data
+        return
+    for key, value in data.items():
+        if isinstance(value, dict):
+            yield {'id': key, **value}
+        elif isinstance(value, list):
+            for item in value:
+                yield from _batch_items(item)
+
 def _mock_insight_on_failure(trade_data):
+    metrics.record_ai_call('mock', metrics.MOCK_FALLBACK)
     # Generate insight based on actual trade data
     pre_emotion = trade_data.get('pre_trade_emotion', 'neutral')
     post_emotion = trade_data.get('post_trade_emotion', 'neutral')
@@ -182,6 +620,24 @@ def _mock_insight_on_failure(trade_data):
         discipline_score = max(1, 4 - (rules_followed / rules_total) * 3)  # 1-4
         coaching_tip = "Pause for 10 minutes after a loss. Recheck your rules before re-entering."
 
+    # History-aware wording from the similar-trades index
+    history = trade_data.get('history')
+    if history:
+        setup, same, similar = history['setup'], history['same_setup'], history['similar']
+        if same['count'] >= 2:
+            insight = (
+                f"This is the {_ordinal(same['count'] + 1)} time you entered {setup['pre_trade_emotion']} "
+                f"on {setup['pair']} in the {setup['session']}; those trades won "
+                f"{same['wins']}/{same['count']} (net {same['net_pnl']:+.2f}). " + insight
+            )
+            if same['wins'] * 2 < same['count']:
+                risk_pattern = "Repeated losing setup" if risk_pattern == "None" else f"{risk_pattern} (repeated setup)"
+        if similar['count'] >= 3 and similar['wins'] * 10 < similar['count'] * 4:
+            coaching_tip = (
+                f"Your {similar['count']} most similar past trades won only {similar['wins']}: "
+                f"treat this setup as a signal to stand aside. " + coaching_tip
+            )
+
     return {
         "insight": insight,
         "risk_pattern": risk_pattern,
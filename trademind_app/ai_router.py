@@ -0,0 +1,634 @@
+# trademind_app/ai_router.py
+"""
+Provider routing for the AI coach, with hedged requests.
+
+Backends are registered by name and configured in settings.AI_PROVIDERS
+(Deepseek, Hugging Face and the local mock are built in). For each call:
+
+    rank     remote providers by expected time to a valid insight:
+             rolling p50 / (1 - error rate), the EXPECTED_LATENCY prior
+             until MIN_SAMPLES successes; unhealthy ones (error rate over
+             MAX_ERROR_RATE, circuit open) go last, disabled/unconfigured
+             ones and those over their BUDGET_PER_MINUTE are skipped
+    send     to the best provider
+    hedge    if it hasn't answered by its rolling p95, one more request to
+             the next provider (or the same one when it is the only one),
+             within HEDGE_BUDGET of routed calls
+    answer   the first valid parsed insight; the other request is cancelled
+    failover a failed call starts the next provider straight away
+
+Streamed completions (`astream`, the SSE insight endpoint) go to the
+ranked stream-capable providers one at a time: a provider that fails
+before its first token hands over to the next, one that fails mid-stream
+ends the stream (the browser already shows its text). They are not hedged
+and, like batches, stay out of the rolling stats: a stream's duration is
+the completion's length, not the provider's latency.
+
+Fallback backends (the mock, or any provider with FALLBACK set) never
+race: `fallback()` answers once every remote provider failed.
+
+Packed multi-trade prompts (`route_batch`, ai_coach.get_batch_insights) go
+to the ranked batch-capable providers one at a time, without hedging: they
+are throughput work, and their latency (and their partial answers) would
+skew the per-call stats, so they stay out of them.
+
+`aroute` (async views) cancels the losing request outright. `route` (queue
+workers, backfill) races on a thread pool; a blocking call that lost can't
+be interrupted, so it is left to finish and its answer dropped.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import aclosing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import ai_coach, ai_transport, metrics
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIG ---
+DEFAULT_ROUTER_SETTINGS = {
+    'HEDGE': True,
+    'HEDGE_PERCENTILE': 95,       # send the hedge once the primary is slower than this percentile
+    'HEDGE_BUDGET': 0.1,          # fraction of routed calls that may send a hedge
+    'HEDGE_SAME_PROVIDER': True,  # hedge to the same provider when no other one is usable
+    'WINDOW': 200,                # recent calls per provider in the rolling stats
+    'MIN_SAMPLES': 20,            # successes before the rolling stats replace the prior
+    'MAX_ERROR_RATE': 0.5,        # above this a provider is only used for failover
+    'SYNC_POOL_SIZE': 32,         # threads racing blocking calls (route())
+}
+
+DEFAULT_PROVIDER_SETTINGS = {
+    'ENABLED': True,
+    'BACKEND': None,              # dotted path to a Provider subclass; built-ins by name
+    'TIMEOUT': None,              # seconds per attempt (None: AI_TRANSPORT['TIMEOUT'])
+    'MAX_RETRIES': None,          # None: AI_TRANSPORT['MAX_RETRIES']
+    'BUDGET_PER_MINUTE': None,    # calls started per minute, hedges included (None: unlimited)
+    'EXPECTED_LATENCY': 3.0,      # seconds; prior p50 until MIN_SAMPLES successes (p95 prior: twice that)
+    'FALLBACK': None,             # only answers when every remote provider failed (None: the backend's `fallback`)
+}
+
+
+def router_setting(name):
+    return getattr(settings, 'AI_ROUTER', {}).get(name, DEFAULT_ROUTER_SETTINGS[name])
+
+
+def provider_setting(provider, name):
+    configured = getattr(settings, 'AI_PROVIDERS', {}).get(provider, {})
+    return configured.get(name, DEFAULT_PROVIDER_SETTINGS[name])
+
+
+def is_fallback(provider):
+    configured = provider_setting(provider.name, 'FALLBACK')
+    return provider.fallback if configured is None else configured
+
+
+# --- BACKENDS ---
+class Provider:
+    """
+    A backend. `call` / `acall` return the parsed insight dict, or None when
+    the provider failed; they record their own ai_requests_total metrics.
+    Backends with only a blocking `call` get an `acall` that runs it in a
+    thread. Batch-capable backends also answer `call_batch`, stream-capable
+    ones `astream`.
+    """
+    batch_capable = False
+    stream_capable = False
+    fallback = False
+
+    def __init__(self, name):
+        self.name = name
+
+    def configured(self):
+        return True
+
+    def call(self, trade_data):
+        raise NotImplementedError
+
+    async def acall(self, trade_data):
+        return await sync_to_async(self.call, thread_sensitive=False)(trade_data)
+
+    def call_batch(self, prompt, max_tokens, ids):
+        """
+        A packed multi-trade prompt: {id: insight} for the items answered,
+        or None when the provider failed.
+        """
+        raise NotImplementedError
+
+    def astream(self, trade_data):
+        """
+        An async generator of the completion's text as it arrives; raises
+        ai_transport.ProviderError when the provider fails.
+        """
+        raise NotImplementedError
+
+
+class DeepseekProvider(Provider):
+    batch_capable = True
+    stream_capable = True
+
+    def configured(self):
+        return bool(ai_coach.DEEPSEEK_API_KEY)
+
+    def call(self, trade_data):
+        return ai_coach._call_deepseek(trade_data)
+
+    async def acall(self, trade_data):
+        return await ai_coach._acall_deepseek(trade_data)
+
+    def call_batch(self, prompt, max_tokens, ids):
+        return ai_coach._call_deepseek_batch(prompt, max_tokens, ids)
+
+    def astream(self, trade_data):
+        return ai_coach._stream_deepseek(trade_data)
+
+
+class HuggingFaceProvider(Provider):
+    batch_capable = True
+    stream_capable = True
+
+    def configured(self):
+        return bool(ai_coach.HF_API_KEY)
+
+    def call(self, trade_data):
+        return ai_coach._call_huggingface(trade_data)
+
+    async def acall(self, trade_data):
+        return await ai_coach._acall_huggingface(trade_data)
+
+    def call_batch(self, prompt, max_tokens, ids):
+        return ai_coach._call_huggingface_batch(prompt, max_tokens, ids)
+
+    def astream(self, trade_data):
+        return ai_coach._stream_huggingface(trade_data)
+
+
+class MockProvider(Provider):
+    fallback = True
+
+    def call(self, trade_data):
+        return ai_coach._mock_insight_on_failure(trade_data)
+
+    async def acall(self, trade_data):
+        return self.call(trade_data)
+
+
+BUILTIN_BACKENDS = {
+    'deepseek': DeepseekProvider,
+    'huggingface': HuggingFaceProvider,
+    'mock': MockProvider,
+}
+
+# Used when settings.AI_PROVIDERS doesn't list the provider at all
+DEFAULT_PROVIDERS = ('deepseek', 'huggingface', 'mock')
+
+
+# --- ROLLING STATS ---
+class ProviderStats:
+    """
+    Latency of a provider's recent successful calls and the outcome of its
+    recent calls (a failure's latency says little: circuit-open and 4xx
+    answers are instant). Thread-safe: async views and sync workers share it.
+    """
+
+    def __init__(self, window):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.cancelled = 0
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(seconds)
+
+    def record_cancelled(self):
+        with self._lock:
+            self.cancelled += 1
+
+    def percentile(self, pct):
+        """
+        Seconds, or None until MIN_SAMPLES successes.
+        """
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if len(ordered) < router_setting('MIN_SAMPLES'):
+            return None
+        return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+    @property
+    def error_rate(self):
+        with self._lock:
+            outcomes = list(self.outcomes)
+        if len(outcomes) < router_setting('MIN_SAMPLES'):
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def snapshot(self):
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            'calls': self.calls,
+            'cancelled': self.cancelled,
+            'error_rate': round(self.error_rate, 3),
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# --- ROUTER ---
+class _Race:
+    """
+    Bookkeeping of one routed call, shared by the async and sync loops:
+    which provider goes next, and whether the hedge was sent.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self.queue = router.ranked()
+        self.first = None
+        self.hedge = None          # provider of the hedged request
+        self.hedge_closed = False  # hedge sent, or none possible
+
+    def next_provider(self):
+        while self.queue:
+            provider = self.queue.pop(0)
+            if self.router._take_budget(provider):
+                self.first = self.first or provider
+                return provider
+        return None
+
+    def hedge_provider(self):
+        self.hedge_closed = True
+        if not self.router._take_hedge():
+            return None
+        provider = self.next_provider()
+        if provider is None and router_setting('HEDGE_SAME_PROVIDER') and self.first:
+            provider = self.first if self.router._take_budget(self.first) else None
+        self.hedge = provider
+        return provider
+
+    def hedge_delay(self, provider):
+        if self.hedge_closed or not router_setting('HEDGE'):
+            return None
+        return self.router.hedge_delay(provider)
+
+    def finished(self, answered, by_hedge):
+        if self.hedge is not None:
+            result = 'hedge_won' if by_hedge else 'primary_won' if answered else 'no_answer'
+            metrics.inc('ai_hedges_total', result=result)
+
+
+class Router:
+    def __init__(self, providers):
+        self.providers = providers
+        window = router_setting('WINDOW')
+        self.stats = {provider.name: ProviderStats(window) for provider in providers}
+        self._budgets = {}
+        for provider in providers:
+            per_minute = provider_setting(provider.name, 'BUDGET_PER_MINUTE')
+            if per_minute:
+                self._budgets[provider.name] = ai_transport.RateLimiter(per_minute / 60, burst=per_minute)
+        # Hedge allowance: each routed call earns HEDGE_BUDGET, a hedge spends 1
+        self._hedge_lock = threading.Lock()
+        self._hedge_tokens = 1.0
+
+    # --- Selection ---
+    def remote(self):
+        return [
+            provider for provider in self.providers
+            if not is_fallback(provider)
+            and provider_setting(provider.name, 'ENABLED') and provider.configured()
+        ]
+
+    def ranked(self):
+        """
+        Remote providers, most promising first (ties keep settings order).
+        """
+        return sorted(self.remote(), key=lambda provider: (self._unhealthy(provider), self.expected(provider)))
+
+    def expected(self, provider):
+        """
+        Expected seconds to a valid answer: p50 inflated by the error rate.
+        """
+        stats = self.stats[provider.name]
+        p50 = stats.percentile(50)
+        if p50 is None:
+            p50 = provider_setting(provider.name, 'EXPECTED_LATENCY')
+        return p50 / max(0.05, 1 - stats.error_rate)
+
+    def hedge_delay(self, provider):
+        delay = self.stats[provider.name].percentile(router_setting('HEDGE_PERCENTILE'))
+        if delay is None:
+            delay = 2 * provider_setting(provider.name, 'EXPECTED_LATENCY')
+        return delay
+
+    def _unhealthy(self, provider):
+        # Open, or half-open with its single trial call already in flight
+        if ai_transport.get_breaker(provider.name).state != ai_transport.CircuitBreaker.CLOSED:
+            return True
+        return self.stats[provider.name].error_rate > router_setting('MAX_ERROR_RATE')
+
+    def _take_budget(self, provider):
+        limiter = self._budgets.get(provider.name)
+        if limiter is None or limiter.try_acquire():
+            return True
+        metrics.record_ai_call(provider.name, metrics.BUDGET_EXHAUSTED)
+        return False
+
+    def _take_hedge(self):
+        with self._hedge_lock:
+            if self._hedge_tokens < 1:
+                return False
+            self._hedge_tokens -= 1
+            return True
+
+    def _start_routing(self):
+        budget = router_setting('HEDGE_BUDGET')
+        with self._hedge_lock:
+            ceiling = max(1.0, budget * router_setting('WINDOW'))
+            self._hedge_tokens = min(ceiling, self._hedge_tokens + budget)
+        return _Race(self)
+
+    # --- Async ---
+    async def aroute(self, trade_data):
+        """
+        (insight, provider name) from the first remote provider to answer,
+        or (None, None) when all failed.
+        """
+        race = self._start_routing()
+        loop = asyncio.get_running_loop()
+        pending = {}
+
+        def start(provider):
+            task = loop.create_task(self._acall(provider, trade_data))
+            pending[task] = provider
+            delay = race.hedge_delay(provider)
+            return task, None if delay is None else loop.time() + delay
+
+        provider = race.next_provider()
+        if provider is None:
+            return None, None
+        _, hedge_at = start(provider)
+        hedge_task, answered = None, None
+        try:
+            while pending:
+                timeout = None if hedge_at is None or race.hedge_closed else max(0, hedge_at - loop.time())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge = race.hedge_provider()
+                    if hedge is not None:
+                        hedge_task, _ = start(hedge)
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    result = task.result()
+                    if result:
+                        answered = task
+                        return result, provider.name
+                if not pending:
+                    provider = race.next_provider()
+                    if provider is not None:
+                        _, hedge_at = start(provider)
+            return None, None
+        finally:
+            race.finished(answered is not None, answered is not None and answered is hedge_task)
+            for task, provider in pending.items():
+                if not task.done():
+                    task.cancel()
+                    self.stats[provider.name].record_cancelled()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def _acall(self, provider, trade_data):
+        start = time.perf_counter()
+        try:
+            result = await provider.acall(trade_data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("[AI Router] %s backend crashed", provider.name)
+            result = None
+        self.stats[provider.name].record(time.perf_counter() - start, bool(result))
+        return result
+
+    # --- Sync ---
+    def route(self, trade_data):
+        """
+        Blocking `aroute` for sync callers.
+        """
+        race = self._start_routing()
+        pool = _get_pool()
+        pending = {}
+
+        def start(provider):
+            future = pool.submit(self._call, provider, trade_data)
+            pending[future] = provider
+            delay = race.hedge_delay(provider)
+            return future, None if delay is None else time.monotonic() + delay
+
+        provider = race.next_provider()
+        if provider is None:
+            return None, None
+        _, hedge_at = start(provider)
+        hedge_future, answered = None, None
+        try:
+            while pending:
+                timeout = None if hedge_at is None or race.hedge_closed else max(0, hedge_at - time.monotonic())
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    hedge = race.hedge_provider()
+                    if hedge is not None:
+                        hedge_future, _ = start(hedge)
+                    continue
+                for future in done:
+                    provider = pending.pop(future)
+                    result = future.result()
+                    if result:
+                        answered = future
+                        return result, provider.name
+                if not pending:
+                    provider = race.next_provider()
+                    if provider is not None:
+                        _, hedge_at = start(provider)
+            return None, None
+        finally:
+            race.finished(answered is not None, answered is not None and answered is hedge_future)
+            for future, provider in pending.items():
+                if not future.done():
+                    future.cancel()  # not started yet: dropped; running: finishes unobserved
+                    self.stats[provider.name].record_cancelled()
+
+    def _call(self, provider, trade_data):
+        start = time.perf_counter()
+        try:
+            result = provider.call(trade_data)
+        except Exception:
+            logger.exception("[AI Router] %s backend crashed", provider.name)
+            result = None
+        self.stats[provider.name].record(time.perf_counter() - start, bool(result))
+        return result
+
+    # --- Batch ---
+    def route_batch(self, prompt, max_tokens, ids):
+        """
+        ({id: insight}, provider name) from the first batch-capable provider
+        to answer a packed prompt, in ranked order; (None, None) when none did.
+        """
+        for provider in self.ranked():
+            if not provider.batch_capable or not self._take_budget(provider):
+                continue
+            try:
+                result = provider.call_batch(prompt, max_tokens, ids)
+            except Exception:
+                logger.exception("[AI Router] %s backend crashed", provider.name)
+                result = None
+            if result:
+                return result, provider.name
+        return None, None
+
+    # --- Streaming ---
+    async def astream(self, trade_data):
+        """
+        The completion's text from the first stream-capable provider, in
+        ranked order, to start streaming. Raises ai_transport.ProviderError
+        when none did, or when the stream broke after text was sent.
+        """
+        error = None
+        for provider in self.ranked():
+            if not provider.stream_capable or not self._take_budget(provider):
+                continue
+            started = False
+            try:
+                async with aclosing(provider.astream(trade_data)) as tokens:
+                    async for text in tokens:
+                        started = True
+                        yield text
+                return
+            except ai_transport.ProviderError as e:
+                if started:
+                    raise
+                logger.info("[AI Router] %s could not stream (%s), trying the next provider", provider.name, e)
+                error = e
+        raise error or ai_transport.ProviderError("No provider can stream")
+
+    # --- Fallback ---
+    def fallback(self, trade_data):
+        """
+        The first answer of the enabled fallback backends (the mock), or None.
+        """
+        for provider in self.providers:
+            if is_fallback(provider) and provider_setting(provider.name, 'ENABLED'):
+                result = self._call(provider, trade_data)
+                if result:
+                    return result
+        return None
+
+    def snapshot(self):
+        return {provider.name: self.stats[provider.name].snapshot() for provider in self.providers}
+
+
+# --- REGISTRY ---
+_router = None
+_router_lock = threading.Lock()
+_registered = {}
+
+
+def register(name, backend):
+    """
+    Add a backend class (a Provider subclass) under `name`; configure it in
+    settings.AI_PROVIDERS like the built-ins.
+    """
+    _registered[name] = backend
+    reset()
+
+
+def _build():
+    names = list(getattr(settings, 'AI_PROVIDERS', {}) or DEFAULT_PROVIDERS)
+    names += [name for name in _registered if name not in names]
+    providers = []
+    for name in names:
+        backend = provider_setting(name, 'BACKEND')
+        if backend:
+            backend = import_string(backend)
+        else:
+            backend = _registered.get(name) or BUILTIN_BACKENDS.get(name)
+        if backend is None:
+            logger.warning("[AI Router] No backend for provider %r, skipping", name)
+            continue
+        providers.append(backend(name))
+    return Router(providers)
+
+
+def get_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = _build()
+    return _router
+
+
+def reset():
+    """
+    Forget the router (and its rolling stats); the next call rebuilds it
+    from settings.
+    """
+    global _router
+    with _router_lock:
+        _router = None
+
+
+@receiver(setting_changed)
+def _settings_changed(setting, **kwargs):
+    if setting in ('AI_PROVIDERS', 'AI_ROUTER'):
+        reset()
+
+
+def route(trade_data):
+    return get_router().route(trade_data)
+
+
+async def aroute(trade_data):
+    return await get_router().aroute(trade_data)
+
+
+def route_batch(prompt, max_tokens, ids):
+    return get_router().route_batch(prompt, max_tokens, ids)
+
+
+def astream(trade_data):
+    return get_router().astream(trade_data)
+
+
+def fallback(trade_data):
+    return get_router().fallback(trade_data)
+
+
+# --- SYNC POOL ---
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # Threads don't survive a fork (gunicorn preloading): one pool per PID
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ThreadPoolExecutor(max_workers=router_setting('SYNC_POOL_SIZE'), thread_name_prefix='ai-route')
+                _pool_pid = pid
+    return _pool
@@ -0,0 +1,372 @@
+# trademind_app/ai_transport.py
+"""
+Shared HTTP transport for the AI coach providers.
+
+- One pooled `requests.Session` per process (re-created after a gunicorn fork),
+  so provider calls reuse keep-alive TCP+TLS connections.
+- Retries with jittered exponential backoff; a Hugging Face 503 "model is
+  loading" waits for the advertised `estimated_time` (within a budget).
+- A per-provider circuit breaker: after repeated failures the remote call is
+  skipped outright for a cool-down period instead of burning the full timeout.
+- `apost_json`: the same retries and breakers over one pooled
+  `httpx.AsyncClient` per event loop, for async views (ASGI): a slow provider
+  call then holds a socket, not a thread.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIG ---
+DEFAULT_TRANSPORT_SETTINGS = {
+    'POOL_CONNECTIONS': 4,             # distinct hosts kept in the pool
+    'POOL_MAXSIZE': 16,                # keep-alive connections per host (>= worker threads)
+    'ASYNC_MAX_CONNECTIONS': 200,      # concurrent provider connections per event loop (async client)
+    'TIMEOUT': 10,                     # seconds per attempt
+    'MAX_RETRIES': 2,                  # extra attempts after the first
+    'BACKOFF_BASE': 0.5,               # seconds, doubled per retry
+    'MAX_RETRY_WAIT': 20,              # total seconds a call may spend sleeping between attempts
+    'BREAKER_FAILURE_THRESHOLD': 5,    # consecutive failed calls before the breaker opens
+    'BREAKER_RESET_TIMEOUT': 30,       # seconds the breaker stays open before a trial call
+    'BREAKER_TRIAL_TIMEOUT': 60,       # seconds a trial call may run before another one is let through
+}
+
+RETRIABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def transport_setting(name):
+    return getattr(settings, 'AI_TRANSPORT', {}).get(name, DEFAULT_TRANSPORT_SETTINGS[name])
+
+
+class ProviderError(Exception):
+    """The provider could not produce a usable response."""
+
+    def __init__(self, message, status=None, timeout=False):
+        super().__init__(message)
+        self.status = status      # last HTTP status, if a response was received
+        self.timeout = timeout    # the last attempt timed out
+
+
+class CircuitOpenError(ProviderError):
+    """The provider's circuit breaker is open; no request was sent."""
+
+
+# --- SESSION POOL ---
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    The process-wide pooled session. Sessions are not fork-safe, so a new one
+    is built when the PID changes (gunicorn preloading).
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=transport_setting('POOL_CONNECTIONS'),
+                    pool_maxsize=transport_setting('POOL_MAXSIZE'),
+                    max_retries=0,  # retries are handled in post_json so we can honour estimated_time
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def reset_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+# --- CIRCUIT BREAKER ---
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker. While open, `allow()` is False
+    until `reset_timeout` has passed; then a single trial call is let through,
+    and its outcome closes or re-opens the breaker. A trial that never reports
+    back (its caller was cancelled) is `abandon_trial()`ed, and in any case
+    expires after `trial_timeout`.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, trial_timeout=None,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold or transport_setting('BREAKER_FAILURE_THRESHOLD')
+        self.reset_timeout = reset_timeout or transport_setting('BREAKER_RESET_TIMEOUT')
+        self.trial_timeout = trial_timeout or transport_setting('BREAKER_TRIAL_TIMEOUT')
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = self._clock()
+            if (self.state == self.OPEN and now - self.opened_at >= self.reset_timeout) or \
+                    (self.state == self.HALF_OPEN and now - self.trial_started >= self.trial_timeout):
+                self.state = self.HALF_OPEN
+                self.trial_started = now
+                return True
+            return False  # open, or a half-open trial is already in flight
+
+    def abandon_trial(self):
+        """
+        The half-open trial ended without an outcome: open again, with the
+        next call allowed straight away as a new trial.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = self._clock() - self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit breaker for %s opened after %s failures", self.name, self.failures)
+                self.state = self.OPEN
+                self.opened_at = self._clock()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider):
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def reset_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+# --- REQUESTS ---
+def _retry_delay(response, attempt):
+    """
+    Seconds to wait before the next attempt: HF's `estimated_time` when the
+    model is loading, otherwise exponential backoff, both with jitter.
+    """
+    if response is not None and response.status_code == 503:
+        try:
+            estimated = float(response.json().get('estimated_time', 0))
+        except (ValueError, AttributeError):
+            estimated = 0
+        if estimated > 0:
+            return estimated * random.uniform(1.0, 1.2)
+    if response is not None and response.headers.get('Retry-After', '').isdigit():
+        return float(response.headers['Retry-After'])
+    base = transport_setting('BACKOFF_BASE') * 2 ** attempt
+    return random.uniform(base / 2, base)
+
+
+def post_json(provider, url, payload, headers=None, timeout=None, max_retries=None, sleep=time.sleep,
+              stream=False):
+    """
+    POST `payload` as JSON through the pooled session and return the
+    successful `requests.Response`.
+    Raises CircuitOpenError without touching the network while the provider's
+    breaker is open, and ProviderError once retries are exhausted.
+    With `stream=True` the body is left unread for `iter_lines()`; retries
+    only cover getting a 200, not failures mid-body.
+    """
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{provider} circuit open")
+
+    timeout = timeout or transport_setting('TIMEOUT')
+    max_retries = transport_setting('MAX_RETRIES') if max_retries is None else max_retries
+    wait_budget = transport_setting('MAX_RETRY_WAIT')
+    session = get_session()
+
+    attempt = 0
+    while True:
+        response, error = None, None
+        try:
+            response = session.post(url, json=payload, headers=headers, timeout=timeout, stream=stream)
+        except requests.RequestException as e:
+            error = e
+
+        if response is not None and response.status_code == 200:
+            breaker.record_success()
+            return response
+
+        if response is not None and response.status_code not in RETRIABLE_STATUS:
+            # 4xx: our request is wrong and retrying won't help, but the provider is reachable
+            breaker.record_success()
+            response.close()
+            raise ProviderError(f"{provider} returned {response.status_code}", status=response.status_code)
+
+        reason = error or f"status {response.status_code}"
+        delay = _retry_delay(response, attempt)
+        if response is not None:
+            response.close()  # back to the pool (a streamed body isn't read otherwise)
+        if attempt >= max_retries or delay > wait_budget:
+            breaker.record_failure()
+            raise ProviderError(
+                f"{provider} failed after {attempt + 1} attempt(s): {reason}",
+                status=response.status_code if response is not None else None,
+                timeout=isinstance(error, requests.Timeout),
+            )
+
+        logger.info("%s attempt %s failed (%s), retrying in %.1fs", provider, attempt + 1, reason, delay)
+        wait_budget -= delay
+        sleep(delay)
+        attempt += 1
+
+
+# --- ASYNC REQUESTS ---
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """
+    The running event loop's pooled client (an httpx pool is bound to the
+    loop it was first used on). Under uvicorn that is one client per worker.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=transport_setting('ASYNC_MAX_CONNECTIONS'),
+            max_keepalive_connections=transport_setting('POOL_MAXSIZE'),
+        ))
+        _async_clients[loop] = client
+    return client
+
+
+async def apost_json(provider, url, payload, headers=None, timeout=None, max_retries=None, stream=False):
+    """
+    Async `post_json`: same breaker, retries and wait budget, returning the
+    successful `httpx.Response`. With `stream=True` the body is left unread
+    for `aiter_lines()` and the caller must `aclose()` the response.
+    """
+    breaker = get_breaker(provider)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{provider} circuit open")
+    trial = breaker.state == CircuitBreaker.HALF_OPEN
+    try:
+        return await _apost_json(breaker, provider, url, payload, headers, timeout, max_retries, stream)
+    except asyncio.CancelledError:
+        # A hedge loser or a client disconnect: no outcome to record, but a
+        # half-open trial must not hold the breaker shut
+        if trial:
+            breaker.abandon_trial()
+        raise
+
+
+async def _apost_json(breaker, provider, url, payload, headers, timeout, max_retries, stream):
+    # Waiting for a free pooled connection is not the provider's fault
+    timeout = httpx.Timeout(timeout or transport_setting('TIMEOUT'), pool=None)
+    max_retries = transport_setting('MAX_RETRIES') if max_retries is None else max_retries
+    wait_budget = transport_setting('MAX_RETRY_WAIT')
+    client = get_async_client()
+
+    attempt = 0
+    while True:
+        response, error = None, None
+        try:
+            request = client.build_request('POST', url, json=payload, headers=headers, timeout=timeout)
+            response = await client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            error = e
+
+        if response is not None and response.status_code == 200:
+            breaker.record_success()
+            return response
+
+        if response is not None:
+            await response.aread()  # error bodies are small; _retry_delay reads estimated_time
+            await response.aclose()
+            if response.status_code not in RETRIABLE_STATUS:
+                breaker.record_success()
+                raise ProviderError(f"{provider} returned {response.status_code}", status=response.status_code)
+
+        reason = error or f"status {response.status_code}"
+        delay = _retry_delay(response, attempt)
+        if attempt >= max_retries or delay > wait_budget:
+            breaker.record_failure()
+            raise ProviderError(
+                f"{provider} failed after {attempt + 1} attempt(s): {reason}",
+                status=response.status_code if response is not None else None,
+                timeout=isinstance(error, httpx.TimeoutException),
+            )
+
+        logger.info("%s attempt %s failed (%s), retrying in %.1fs", provider, attempt + 1, reason, delay)
+        wait_budget -= delay
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+# --- RATE LIMITING ---
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by all threads of a process.
+    `acquire()` blocks until a call may be made, `try_acquire()` answers
+    straight away; `rate` is calls per second.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            wait = self._take()
+            if wait is None:
+                return
+            self._sleep(wait)
+
+    def try_acquire(self):
+        return self._take() is None
+
+    def _take(self):
+        # None when a token was taken, else seconds until the next one
+        with self._lock:
+            now = self._clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate
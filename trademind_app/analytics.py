@@ -0,0 +1,309 @@
+# trademind_app/analytics.py
+"""
+Behavioral analytics over a trader's whole journal, vectorized with NumPy.
+
+A user's trades are loaded once (two queries) into a column snapshot:
+
+    ids             int64    trade id, in journal order (date, created_at, id)
+    pnl             float64  signed P&L: profit, or -loss
+    pre, post       int8     pre/post-trade emotion codes (EMOTIONS)
+    session         int8     session codes (SESSIONS)
+    pair            int16    index into the snapshot's own `pairs`
+    rules_followed  int16    rules ticked on the trade
+    day             int32    date as days since 1970-01-01
+
+Snapshots are cached per user under a version number (versioned_cache):
+any Trade write (or rules_followed change, or rule delete) bumps it. Bulk
+writes (bulk_create, queryset.update) bypass the signals; callers must call
+`invalidate()`.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import CharField, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import rule_cache, versioned_cache
+from .models import EMOTION_CHOICES, SESSION_CHOICES, StrategyRule, Trade
+
+EMOTIONS = [value for value, _ in EMOTION_CHOICES]
+SESSIONS = [value for value, _ in SESSION_CHOICES]
+_EMOTION_CODES = {value: code for code, value in enumerate(EMOTIONS)}
+_SESSION_CODES = {value: code for code, value in enumerate(SESSIONS)}
+_NEUTRAL = _EMOTION_CODES['neutral']
+
+NAMESPACE = 'analytics'
+SNAPSHOT_TIMEOUT = 24 * 3600
+
+
+# --- COLUMN SNAPSHOT ---
+@dataclass(eq=False)
+class Columns:
+    ids: np.ndarray
+    pnl: np.ndarray
+    pre: np.ndarray
+    post: np.ndarray
+    session: np.ndarray
+    pair: np.ndarray
+    rules_followed: np.ndarray
+    day: np.ndarray
+    pairs: tuple
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, mask):
+        """
+        The rows where `mask` is true (pair vocabulary unchanged).
+        """
+        return Columns(
+            self.ids[mask], self.pnl[mask], self.pre[mask], self.post[mask], self.session[mask],
+            self.pair[mask], self.rules_followed[mask], self.day[mask], self.pairs,
+        )
+
+    def since(self, date):
+        return self.select(self.day >= (np.datetime64(date, 'D') - np.datetime64(0, 'D')).astype(np.int32))
+
+    def rules_ratio(self, rules_total):
+        return rules_ratio(self.rules_followed, rules_total)
+
+
+def signed_pnl():
+    # profit when set, otherwise -loss; computed by the database as a float
+    return Coalesce(F('profit'), -F('loss'), Value(0), output_field=FloatField())
+
+
+def emotion_code(value):
+    return _EMOTION_CODES.get(value, _NEUTRAL)
+
+
+def session_code(value):
+    return _SESSION_CODES.get(value, 0)
+
+
+def rules_ratio(followed, rules_total):
+    """
+    Followed rules over the user's current rule count, capped at 1.
+    """
+    if not rules_total:
+        return np.zeros(len(followed), dtype=np.float32)
+    return np.minimum(followed / np.float32(rules_total), 1).astype(np.float32)
+
+
+def load_rows(user_id, *extra, after_id=None):
+    """
+    Column arrays for a user's trades in journal order (2 queries), only
+    those with id > after_id when given. Each `extra` values_list field or
+    expression comes back as a tuple, in order, under 'extra'.
+    """
+    trades = Trade.objects.filter(user_id=user_id)
+    links = Trade.rules_followed.through.objects.filter(trade__user_id=user_id)
+    if after_id is not None:
+        trades = trades.filter(id__gt=after_id)
+        links = links.filter(trade_id__gt=after_id)
+    rows = list(
+        trades.order_by('date', 'created_at', 'id')
+        .values_list('id', signed_pnl(), 'pre_trade_emotion', 'post_trade_emotion', 'session', 'pair',
+                     Cast('date', CharField()), *extra)
+    )
+    count = len(rows)
+    columns = list(zip(*rows)) if rows else [()] * (7 + len(extra))
+    ids, pnl, pre, post, session, pair, day = columns[:7]
+    ids = np.array(ids, dtype=np.int64)
+
+    # Followed rules per trade: count through rows, then scatter by trade id
+    followed = np.zeros(count, dtype=np.int16)
+    linked = np.fromiter(links.values_list('trade_id', flat=True), dtype=np.int64)
+    if count and len(linked):
+        order = np.argsort(ids)
+        positions = order[np.searchsorted(ids, linked, sorter=order)]
+        followed = np.bincount(positions, minlength=count).astype(np.int16)
+
+    return {
+        'ids': ids,
+        'pnl': np.array(pnl, dtype=np.float64),
+        'pre': np.fromiter((emotion_code(e) for e in pre), dtype=np.int8, count=count),
+        'post': np.fromiter((emotion_code(e) for e in post), dtype=np.int8, count=count),
+        'session': np.fromiter((session_code(s) for s in session), dtype=np.int8, count=count),
+        'pair': list(pair),
+        'day': (np.array(day, dtype='datetime64[D]') - np.datetime64(0, 'D')).astype(np.int32),
+        'followed': followed,
+        'extra': columns[7:],
+    }
+
+
+def load_columns(user_id):
+    """
+    Build a user's snapshot from the database (2 queries).
+    """
+    rows = load_rows(user_id)
+    pairs, pair_codes = np.unique(np.array(rows['pair'], dtype=object).astype(str), return_inverse=True) \
+        if rows['pair'] else (np.array([], dtype=str), np.array([], dtype=np.int64))
+    return Columns(
+        ids=rows['ids'],
+        pnl=rows['pnl'],
+        pre=rows['pre'],
+        post=rows['post'],
+        session=rows['session'],
+        pair=pair_codes.astype(np.int16),
+        rules_followed=rows['followed'],
+        day=rows['day'],
+        pairs=tuple(str(p) for p in pairs),
+    )
+
+
+def get_columns(user_id):
+    """
+    The user's snapshot, from the cache when it is current.
+    """
+    key = f"analytics:{user_id}:{versioned_cache.version(NAMESPACE, user_id)}"
+    columns = cache.get(key)
+    if columns is None:
+        columns = load_columns(user_id)
+        cache.set(key, columns, SNAPSHOT_TIMEOUT)
+    return columns
+
+
+def invalidate(user_id):
+    versioned_cache.bump(NAMESPACE, user_id)
+
+
+# --- METRICS ---
+def _ratio(numerator, denominator):
+    """
+    Elementwise numerator / denominator, NaN where the denominator is 0.
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def _json_number(value, digits=2):
+    # NaN (no trades) and inf (profit factor with no losses) aren't valid JSON
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def group_metrics(codes, pnl, size):
+    """
+    Per-code trades, win rate, expectancy, average win/loss and profit factor
+    for codes 0..size-1, as arrays (NaN where a group has no trades).
+    """
+    wins = pnl > 0
+    gross_profit = np.bincount(codes, weights=np.where(wins, pnl, 0), minlength=size)
+    gross_loss = np.bincount(codes, weights=np.where(pnl < 0, -pnl, 0), minlength=size)
+    trades = np.bincount(codes, minlength=size)
+    won = np.bincount(codes, weights=wins, minlength=size)
+    lost = np.bincount(codes, weights=pnl < 0, minlength=size)
+    net = gross_profit - gross_loss
+    return {
+        'trades': trades,
+        'win_rate': _ratio(won, trades),
+        'expectancy': _ratio(net, trades),
+        'avg_win': _ratio(gross_profit, won),
+        'avg_loss': _ratio(gross_loss, lost),
+        'profit_factor': np.where(gross_profit > 0, _ratio(gross_profit, gross_loss), np.nan),
+        'net_pnl': net,
+    }
+
+
+def _group_rows(labels, metrics):
+    return [
+        {
+            'key': label,
+            'trades': int(metrics['trades'][i]),
+            'win_rate': _json_number(metrics['win_rate'][i] * 100, 1),
+            'expectancy': _json_number(metrics['expectancy'][i]),
+            'avg_win': _json_number(metrics['avg_win'][i]),
+            'avg_loss': _json_number(metrics['avg_loss'][i]),
+            'profit_factor': _json_number(metrics['profit_factor'][i]),
+            'net_pnl': _json_number(metrics['net_pnl'][i]),
+        }
+        for i, label in enumerate(labels)
+    ]
+
+
+def transition_matrix(columns):
+    """
+    Pre -> post emotion counts (rows: pre, columns: post) and the row-wise
+    transition probabilities.
+    """
+    size = len(EMOTIONS)
+    counts = np.bincount(columns.pre.astype(np.int64) * size + columns.post, minlength=size * size).reshape(size, size)
+    probabilities = _ratio(counts, counts.sum(axis=1, keepdims=True))
+    return counts, probabilities
+
+
+def expectancy_grid(columns):
+    """
+    Expectancy per (pre-trade emotion, session) cell, NaN for empty cells.
+    """
+    size = len(EMOTIONS) * len(SESSIONS)
+    cells = columns.pre.astype(np.int64) * len(SESSIONS) + columns.session
+    trades = np.bincount(cells, minlength=size)
+    net = np.bincount(cells, weights=columns.pnl, minlength=size)
+    return _ratio(net, trades).reshape(len(EMOTIONS), len(SESSIONS)), trades.reshape(len(EMOTIONS), len(SESSIONS))
+
+
+def report(user_id, since=None):
+    """
+    Everything the analytics charts need, JSON-ready.
+    `since` (a date) restricts the report to trades on or after it.
+    """
+    columns = get_columns(user_id)
+    if since is not None:
+        columns = columns.since(since)
+
+    overall = group_metrics(np.zeros(len(columns), dtype=np.int64), columns.pnl, 1)
+    counts, probabilities = transition_matrix(columns)
+    grid, grid_trades = expectancy_grid(columns)
+
+    # Full rule compliance vs. any skipped rule
+    rules_total = rule_cache.rules_total(user_id)
+    disciplined = (columns.rules_ratio(rules_total) >= 1).astype(np.int64)
+    discipline = group_metrics(disciplined, columns.pnl, 2) if rules_total else None
+
+    return {
+        'trades': len(columns),
+        'overall': _group_rows(['all'], overall)[0],
+        'by_emotion': _group_rows(EMOTIONS, group_metrics(columns.pre, columns.pnl, len(EMOTIONS))),
+        'by_session': _group_rows(SESSIONS, group_metrics(columns.session, columns.pnl, len(SESSIONS))),
+        'by_pair': _group_rows(list(columns.pairs), group_metrics(columns.pair, columns.pnl, len(columns.pairs))),
+        'by_discipline': _group_rows(['skipped_rules', 'followed_all'], discipline) if discipline else [],
+        'emotion_transitions': {
+            'emotions': EMOTIONS,
+            'counts': counts.tolist(),
+            'probabilities': [[_json_number(p, 3) for p in row] for row in probabilities],
+        },
+        'expectancy_by_emotion_session': {
+            'emotions': EMOTIONS,
+            'sessions': SESSIONS,
+            'expectancy': [[_json_number(v) for v in row] for row in grid],
+            'trades': grid_trades.tolist(),
+        },
+    }
+
+
+# --- SIGNALS ---
+@receiver(post_save, sender=Trade)
+@receiver(post_delete, sender=Trade)
+def _trade_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Trade.rules_followed.through)
+def _rules_followed_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(post_delete, sender=StrategyRule)
+def _rule_deleted(sender, instance, **kwargs):
+    # The through rows go with it (no m2m_changed), changing rules_followed
+    versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
@@ -1,10 +1,13 @@
 # trademind_app/apps.py
+import logging
+
 from django.apps import AppConfig
 from django.core.cache import cache
 from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+logger = logging.getLogger(__name__)
 
 _signals_connected = False
 
@@ -17,32 +20,34 @@ def _create_profile_safe(user):
                 user=user,
                 defaults={'trader_type': 'day'}
             )
-            print(f"[Signal] Profile created for {user.username}")
-        except Exception as e:
-            print(f"[Signal] Failed: {e}")
+            logger.debug("[Signal] Profile created for %s", user.username)
+        except Exception:
+            logger.exception("[Signal] Profile creation failed for %s", user.pk)
         finally:
             cache.delete(lock_id)
     else:
-        print(f"[Signal] Duplicate blocked for {user.pk}")
+        logger.debug("[Signal] Duplicate blocked for %s", user.pk)
 
 def _save_user_profile(instance, **kwargs):
     try:
         if hasattr(instance, 'traderprofile'):
             instance.traderprofile.save()
-    except Exception as e:
-        print(f"[Signal] Save error: {e}")
+    except Exception:
+        logger.exception("[Signal] Profile save error for %s", instance.pk)
 
 class TrademindAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trademind_app'
 
     def ready(self):
+        from . import analytics, page_cache, rule_cache, similar, sqlite_tuning, stats  # noqa: F401  (connect the cache/TraderStats/SQLite signal handlers)
+
         global _signals_connected
         if not _signals_connected:
             post_save.connect(create_user_profile, sender='auth.User')
             post_save.connect(save_user_profile, sender='auth.User')
             _signals_connected = True
-            print("[Signal] Signals connected")
+            logger.debug("[Signal] Signals connected")
 
 @receiver(post_save, sender='auth.User')
 def create_user_profile(sender, instance, created, **kwargs):
@@ -0,0 +1,177 @@
+# trademind_app/backfill.py
+"""
+Bulk generation of missing AI insights (see `manage.py backfill_insights`).
+
+Trades are streamed in keyset pages ordered by id, provider calls run in a
+bounded thread pool under a process-wide rate limit, and each page is written
+back with one bulk_create/bulk_update in the main thread. Because pages are
+keyed by id, the last committed id is a complete resume point. With
+`prompt_batch` > 1 each pool task sends one packed prompt for that many
+trades (ai_coach.get_batch_insights) instead of one call per trade.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import ai_coach, page_cache
+from . import stats as trader_stats
+from .ai_transport import RateLimiter
+from .jobs import build_trade_data
+from .models import AIInsight, StrategyRule, Trade
+
+logger = logging.getLogger(__name__)
+
+# Tips written by _mock_insight_on_failure, used to spot mock insights created
+# before AIInsight.source existed.
+LEGACY_MOCK_TIPS = [
+    "Keep using your checklist to avoid FOMO entries.",
+    "Pause for 10 minutes after a loss. Recheck your rules before re-entering.",
+]
+
+INSIGHT_FIELDS = ['insight', 'risk_pattern', 'discipline_score', 'coaching_tip']
+
+
+@dataclass
+class BackfillStats:
+    processed: int = 0
+    created: int = 0
+    upgraded: int = 0      # mock insights replaced by a provider insight
+    mocked: int = 0        # trades that only got a mock insight this run
+    last_id: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+def pending_trades(regenerate_mock=False, user=None):
+    """
+    Trades without an insight, optionally plus trades that only have a mock one.
+    """
+    missing = Q(insight__isnull=True)
+    if regenerate_mock:
+        missing |= Q(insight__source='mock') | Q(insight__source='', insight__coaching_tip__in=LEGACY_MOCK_TIPS)
+    trades = Trade.objects.filter(missing)
+    if user is not None:
+        trades = trades.filter(user=user)
+    return trades
+
+
+def _pages(queryset, after_id, page_size):
+    """
+    Yield lists of trades in id order without holding a cursor open across
+    writes (SQLite gives no isolation between a live cursor and writes on the
+    same connection).
+    """
+    queryset = (
+        queryset.select_related('insight')
+        .annotate(rules_followed_n=Count('rules_followed'))
+        .order_by('id')
+    )
+    while True:
+        page = list(queryset.filter(id__gt=after_id)[:page_size])
+        if not page:
+            return
+        yield page
+        after_id = page[-1].id
+
+
+def _write_page(page, datas, results, write_mock, stats):
+    new, upgraded = [], []
+    for trade, trade_data, result in zip(page, datas, results):
+        existing = getattr(trade, 'insight', None)
+        if existing is not None:
+            if result:
+                for name in INSIGHT_FIELDS:
+                    setattr(existing, name, result[name])
+                existing.source = 'provider'
+                existing.generated_at = timezone.now()
+                upgraded.append(existing)
+            continue
+        source = 'provider'
+        if not result:
+            if not write_mock:
+                continue
+            result, source = ai_coach._mock_insight_on_failure(trade_data), 'mock'
+        new.append(AIInsight(trade=trade, source=source, **{name: result[name] for name in INSIGHT_FIELDS}))
+
+    with transaction.atomic():
+        # ignore_conflicts: a queue worker may have written the same trade meanwhile
+        AIInsight.objects.bulk_create(new, ignore_conflicts=True)
+        AIInsight.objects.bulk_update(upgraded, INSIGHT_FIELDS + ['source', 'generated_at'])
+
+    # bulk writes skip the TraderStats and page cache signal handlers
+    user_ids = {insight.trade.user_id for insight in new + upgraded}
+    trader_stats.refresh_discipline(user_ids)
+    for user_id in user_ids:
+        page_cache.bump(user_id)
+
+    stats.processed += len(page)
+    stats.created += len(new)
+    stats.upgraded += len(upgraded)
+    stats.mocked += sum(1 for insight in new if insight.source == 'mock')
+    stats.last_id = page[-1].id
+
+
+def run_backfill(queryset, concurrency=4, rate=None, page_size=100, after_id=0,
+                 write_mock=True, limit=None, on_page=None, prompt_batch=1):
+    """
+    Generate insights for every trade in `queryset` with id > `after_id`.
+    `on_page(stats)` is called after each committed page (progress/checkpoint).
+    `rate` limits provider calls: a packed prompt of `prompt_batch` trades
+    counts once.
+    """
+    stats = BackfillStats(last_id=after_id)
+    limiter = RateLimiter(rate) if rate else None
+    rules_totals = dict(
+        StrategyRule.objects.values('user_id').annotate(n=Count('id')).values_list('user_id', 'n')
+    )
+
+    def generate(trade_data):
+        try:
+            if limiter:
+                limiter.acquire()
+            return ai_coach.get_provider_insight(trade_data)
+        except Exception:
+            logger.exception("Backfill provider call failed")
+            return None
+        finally:
+            connection.close()  # pool threads touch the insight cache
+
+    def generate_batch(trade_datas):
+        try:
+            if limiter:
+                limiter.acquire()
+            return ai_coach.get_batch_insights(trade_datas, batch_size=len(trade_datas))
+        except Exception:
+            logger.exception("Backfill batch provider call failed")
+            return [None] * len(trade_datas)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='backfill') as pool:
+        for page in _pages(queryset, after_id, page_size):
+            if limit is not None:
+                page = page[:max(0, limit - stats.processed)]
+                if not page:
+                    break
+            datas = [build_trade_data(t, t.rules_followed_n, rules_totals.get(t.user_id, 0)) for t in page]
+            if prompt_batch > 1:
+                chunks = [datas[i:i + prompt_batch] for i in range(0, len(datas), prompt_batch)]
+                results = [result for chunk in pool.map(generate_batch, chunks) for result in chunk]
+            else:
+                results = list(pool.map(generate, datas))
+            _write_page(page, datas, results, write_mock, stats)
+            if on_page:
+                on_page(stats)
+    return stats
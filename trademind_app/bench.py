@@ -0,0 +1,420 @@
+# trademind_app/bench.py
+"""
+Shared helpers for the `bench_*` management commands.
+
+Benchmarks run inside `sandbox()`, a transaction that is always rolled back,
+so they can be pointed at a real database without leaving data behind.
+"""
+import json
+import random
+import os
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from . import metrics, rule_cache
+from .models import EMOTION_CHOICES, PAIR_CHOICES, SESSION_CHOICES, StrategyRule, Trade
+
+
+@contextmanager
+def scratch_metrics():
+    """
+    A throwaway metrics store (METRICS['PATH']) for the duration of a
+    benchmark or test run: counters of calls to stub providers must not add
+    up with the served ones on /metrics. Deltas still pending on exit are
+    flushed into the scratch store.
+    """
+    with tempfile.TemporaryDirectory(prefix='bench_metrics_') as scratch, override_settings(METRICS={
+        **getattr(settings, 'METRICS', {}),
+        'PATH': os.path.join(scratch, 'metrics.sqlite3'),
+    }):
+        try:
+            yield
+        finally:
+            metrics.flush()
+
+
+@contextmanager
+def scratch_cache():
+    """
+    A throwaway Django cache (and metrics store) for the duration of a
+    benchmark. The shared cache outlives the sandbox's data: ids reused
+    after a rollback must not meet rule snapshots, page generations or pages
+    cached by an earlier run.
+    """
+    with tempfile.TemporaryDirectory(prefix='bench_cache_') as scratch, scratch_metrics(), override_settings(CACHES={
+        'default': {
+            'BACKEND': 'trademind_app.cache_backend.SQLiteCache',
+            'LOCATION': os.path.join(scratch, 'cache.sqlite3'),
+        }
+    }):
+        yield
+
+
+@contextmanager
+def sandbox():
+    """
+    Run a benchmark in a rolled-back transaction with the test environment
+    enabled (test client host checks, template render signals) and a
+    scratch cache.
+    """
+    setup_test_environment()
+    try:
+        with scratch_cache(), transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+    finally:
+        teardown_test_environment()
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """
+    p50/p95/p99/mean of a list of durations, in milliseconds.
+    """
+    return {
+        'n': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+        'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+# --- DATA ---
+def make_user(username='bench_trader', rules=5):
+    user = User.objects.create_user(username=username, password='bench-password-123')
+    StrategyRule.objects.bulk_create(
+        StrategyRule(user=user, rule_text=f"Bench rule {i + 1}") for i in range(rules)
+    )
+    # bulk_create skips the signals, and ids reused after a sandbox rollback
+    # must not pick up a snapshot cached by an earlier run
+    rule_cache.invalidate(user.pk)
+    return user
+
+
+def make_trades(user, count, seed=42):
+    """
+    Bulk-insert `count` plausible trades for `user` (rules_followed left empty).
+    """
+    rng = random.Random(seed)
+    emotions = [value for value, _ in EMOTION_CHOICES]
+    sessions = [value for value, _ in SESSION_CHOICES]
+    pairs = [value for value, _ in PAIR_CHOICES]
+    start = date.today() - timedelta(days=count // 3 + 1)
+    trades = []
+    for i in range(count):
+        amount = Decimal(rng.randint(100, 50000)) / 100
+        won = rng.random() < 0.55
+        trades.append(Trade(
+            user=user,
+            date=start + timedelta(days=i // 3),
+            session=rng.choice(sessions),
+            pair=rng.choice(pairs),
+            entry=rng.choice(['BUY', 'SELL']),
+            profit=amount if won else None,
+            loss=None if won else amount,
+            pre_trade_emotion=rng.choice(emotions),
+            post_trade_emotion=rng.choice(emotions),
+            reason="Bench trade: waited for the setup, entered on confirmation.",
+        ))
+    return Trade.objects.bulk_create(trades, batch_size=1000)
+
+
+# Weights for seed_journal(): London/NY dominate, majors and crypto more than
+# commodities, and calm traders win more often and follow more rules.
+SESSION_WEIGHTS = {'london': 4, 'ny': 4, 'asia': 2}
+PAIR_WEIGHTS = {
+    'EUR/GBP': 3, 'GBP/USD': 5, 'USD/JPY': 4, 'BTC/USD': 5, 'ETH/USD': 3,
+    'XRP/USD': 1, 'SOL/USD': 2, 'Gold': 3, 'Oil': 1, 'Custom': 1,
+}
+EMOTION_PROFILES = {
+    # emotion: (weight, win rate, share of rules followed)
+    'chill': (3, 0.62, 0.85),
+    'neutral': (5, 0.55, 0.70),
+    'happy': (3, 0.50, 0.55),
+    'fear': (2, 0.42, 0.45),
+    'sad': (1, 0.40, 0.40),
+    'angry': (2, 0.30, 0.20),
+}
+SEED_REASONS = [
+    "Waited for the break of structure and entered on the retest.",
+    "Price rejected the daily support level with a strong wick.",
+    "Chased the move after missing the first entry.",
+    "Wanted to make back the last loss quickly.",
+    "News spike, entered without waiting for confirmation.",
+    "Followed the plan: trend, level, confirmation candle.",
+]
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def seed_journal(user, count, seed=42, days=365):
+    """
+    Bulk-insert `count` trades for `user` over the last `days` days with
+    realistic session/pair/emotion mixes, emotion-dependent win rates and
+    rules_followed links. Signals are bypassed; callers rebuild TraderStats.
+    """
+    rng = random.Random(seed)
+    rules = list(StrategyRule.objects.filter(user=user).values_list('id', flat=True))
+    emotion_weights = {emotion: profile[0] for emotion, profile in EMOTION_PROFILES.items()}
+    start = date.today() - timedelta(days=days)
+
+    trades, followed = [], []
+    for _ in range(count):
+        emotion = _weighted(rng, emotion_weights)
+        _, win_rate, discipline = EMOTION_PROFILES[emotion]
+        won = rng.random() < win_rate
+        amount = (Decimal(round(rng.lognormvariate(4, 0.8) * 100)) / 100).quantize(Decimal('0.01'))
+        trades.append(Trade(
+            user=user,
+            date=start + timedelta(days=rng.randrange(days + 1)),
+            session=_weighted(rng, SESSION_WEIGHTS),
+            pair=_weighted(rng, PAIR_WEIGHTS),
+            entry=rng.choice(['BUY', 'SELL']),
+            profit=amount if won else None,
+            loss=None if won else amount,
+            pre_trade_emotion=emotion,
+            post_trade_emotion=rng.choice(['happy', 'chill', 'neutral'] if won else ['sad', 'angry', 'fear', 'neutral']),
+            reason=rng.choice(SEED_REASONS),
+            lot_size=Decimal(rng.choice([1, 2, 5, 10, 20, 50])) / 100,
+        ))
+        followed.append([rule for rule in rules if rng.random() < discipline])
+
+    trades = Trade.objects.bulk_create(trades, batch_size=1000)
+    Through = Trade.rules_followed.through
+    Through.objects.bulk_create(
+        (Through(trade_id=trade.id, strategyrule_id=rule) for trade, rule_ids in zip(trades, followed) for rule in rule_ids),
+        batch_size=2000,
+    )
+    return trades
+
+
+def logged_in_client(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def trade_post_data(rules, pair='GBP/USD'):
+    """
+    trade_log form data for a losing trade that followed up to two of `rules`.
+    """
+    return {
+        'date': date.today().isoformat(), 'session': 'london', 'pair': pair, 'entry': 'SELL',
+        'loss': '25.00', 'pre_trade_emotion': 'angry', 'post_trade_emotion': 'sad',
+        'rules_followed': [rule.id for rule in rules[:2]], 'reason': "Logged by a check.",
+    }
+
+
+def stub_provider(latency=0.0):
+    """
+    Stand-in for ai_coach._call_providers: a fixed insight after `latency` seconds.
+    """
+    def call(trade_data):
+        time.sleep(latency)
+        return {
+            'insight': "Stub insight.",
+            'risk_pattern': "None",
+            'discipline_score': 7,
+            'coaching_tip': "Stub tip.",
+        }
+    return call
+
+
+# --- ASGI ---
+def session_cookie(user):
+    """
+    Cookie header value of a logged-in session, for raw ASGI requests.
+    """
+    return '; '.join(f"{name}={morsel.value}" for name, morsel in logged_in_client(user).cookies.items())
+
+
+@contextmanager
+def committed_sandbox(prefix):
+    """
+    sandbox() for requests served through core/asgi.py: the ASGI handler runs
+    views in its own thread with its own DB connection, which can't see an
+    open transaction. Data is committed instead, and users whose username
+    starts with `prefix` (with everything of theirs) are deleted on exit.
+    """
+    setup_test_environment()
+    try:
+        with scratch_cache():
+            yield
+    finally:
+        User.objects.filter(username__startswith=prefix).delete()
+        teardown_test_environment()
+
+
+async def asgi_get(path, cookie='', timeout=30, on_chunk=None):
+    """
+    GET `path` through core/asgi.py's application, the way an ASGI server
+    would. Returns (status, [(seconds since the request, body chunk), ...]).
+    `on_chunk(seconds, chunk)` returning False disconnects the client.
+    """
+    from asgiref.testing import ApplicationCommunicator
+    from core.asgi import application
+
+    raw_path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': raw_path, 'raw_path': raw_path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), (b'cookie', cookie.encode()), (b'accept', b'text/event-stream')],
+    }
+    communicator = ApplicationCommunicator(application, scope)
+    start = time.perf_counter()
+    await communicator.send_input({'type': 'http.request', 'body': b'', 'more_body': False})
+    status, chunks = None, []
+    while True:
+        message = await communicator.receive_output(timeout)
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            continue
+        body = message.get('body', b'')
+        if body:
+            elapsed = time.perf_counter() - start
+            chunks.append((elapsed, body))
+            if on_chunk and on_chunk(elapsed, body) is False:
+                await communicator.send_input({'type': 'http.disconnect'})
+                await communicator.wait(timeout)
+                break
+        if not message.get('more_body'):
+            break
+    return status, chunks
+
+
+# --- LOCAL PROVIDER STUB ---
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is observable
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        with self.server.stats_lock:
+            self.server.requests += 1
+        status, body, delay = self.server.respond(self.path, json.loads(raw or b'null'))
+        if delay:
+            time.sleep(delay)
+        if hasattr(body, '__next__'):
+            self._stream(status, body)
+            return
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the client gave up (e.g. a cancelled hedge)
+
+    def _stream(self, status, chunks):
+        # A generator body is sent as chunked Server-Sent Events, each chunk
+        # flushed as soon as the generator produces it (it paces itself).
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def token_stream(text, tokens=60, interval=0.03):
+    """
+    `text` as text-generation-inference streaming events: about `tokens`
+    pieces, one every `interval` seconds, then the final event.
+    """
+    size = max(1, -(-len(text) // tokens))
+    for start in range(0, len(text), size):
+        time.sleep(interval)
+        event = {'token': {'id': 0, 'text': text[start:start + size], 'special': False}, 'generated_text': None}
+        yield f"data:{json.dumps(event)}\n\n".encode()
+    yield f"data:{json.dumps({'token': {'id': 0, 'text': '', 'special': True}, 'generated_text': text})}\n\n".encode()
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # concurrency benches open many connections at once
+
+
+class StubServer:
+    """
+    Threaded local HTTP server standing in for an AI provider.
+    `respond(path, json_body)` returns `(status, body, delay_seconds)`; a
+    generator body is streamed as Server-Sent Events (see `token_stream`).
+    Counts accepted TCP connections and requests.
+    """
+
+    def __init__(self, respond):
+        self.httpd = _StubHTTPServer(('127.0.0.1', 0), _StubHandler)
+        self.httpd.respond = respond
+        self.httpd.stats_lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
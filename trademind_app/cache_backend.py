@@ -0,0 +1,214 @@
+# trademind_app/cache_backend.py
+"""
+Django cache backend shared by every worker process on a host, without an
+external service: one SQLite file in WAL mode (readers don't block the
+writer, each process keeps a connection per thread).
+
+    CACHES = {'default': {
+        'BACKEND': 'trademind_app.cache_backend.SQLiteCache',
+        'LOCATION': '/path/to/cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 4},
+    }}
+
+`add` and `incr` are single SQL statements, so they are atomic across
+processes (cache locks and version counters work with several gunicorn
+workers). Expired entries are dropped when read and when the cache is
+culled; culling runs every CULL_EVERY writes of a process and, over
+MAX_ENTRIES, removes 1/CULL_FREQUENCY of the entries, soonest to expire
+first (CULL_FREQUENCY 0 clears the cache). Integers are stored as SQLite
+integers so `incr` can add in place; everything else is pickled.
+
+For workers spread over several hosts use Redis instead (REDIS_URL, see
+core/settings.py).
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# SQLite INTEGER range; larger ints are pickled like any other value
+_INT_MIN, _INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get('OPTIONS', {})
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+    # --- Connection ---
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # a cache may lose its last writes on power loss
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL'
+                ') WITHOUT ROWID'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _encode(self, value):
+        if type(value) is int and _INT_MIN <= value <= _INT_MAX:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _decode(self, value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    # --- Reads ---
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connect()
+        row = conn.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            conn.execute('DELETE FROM cache WHERE key = ? AND expires <= ?', (key, time.time()))
+            return default
+        return self._decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self._connect().execute(
+            f"SELECT key, value FROM cache WHERE key IN ({', '.join('?' * len(keys))}) "
+            "AND (expires IS NULL OR expires > ?)",
+            [*keys, now],
+        ).fetchall()
+        return {keys[key]: self._decode(value) for key, value in rows}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connect().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    # --- Writes ---
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connect().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+        self._wrote()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [(self.make_and_validate_key(key, version=version), self._encode(value), expires)
+                for key, value in data.items()]
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)', rows)
+        self._wrote(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Set `key` only if it is missing or expired; True if it was set.
+        One upsert, so exactly one of several racing processes wins.
+        """
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connect().execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout), time.time()),
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._wrote()
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        """
+        Add `delta` in place (atomic across processes). Raises ValueError if
+        the key is missing, expired or not an integer, like Django's backends.
+        """
+        key = self.make_and_validate_key(key, version=version)
+        rows = self._connect().execute(
+            "UPDATE cache SET value = value + ? WHERE key = ? AND typeof(value) = 'integer' "
+            "AND (expires IS NULL OR expires > ?) RETURNING value",
+            (delta, key, time.time()),
+        ).fetchall()
+        if not rows:
+            raise ValueError(f"Key '{key}' not found")
+        return rows[0][0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connect().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connect().execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def delete_many(self, keys, version=None):
+        keys = [(self.make_and_validate_key(key, version=version),) for key in keys]
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+    # --- Eviction ---
+    def _wrote(self, count=1):
+        with self._writes_lock:
+            self._writes += count
+            if self._writes < self._cull_every:
+                return
+            self._writes = 0
+        self.cull()
+
+    def cull(self):
+        """
+        Drop expired entries, then, over MAX_ENTRIES, a 1/CULL_FREQUENCY
+        share of the rest (soonest to expire first, never-expiring last).
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            count = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            if count <= self._max_entries:
+                return
+            if self._cull_frequency == 0:
+                conn.execute('DELETE FROM cache')
+                return
+            conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def size(self):
+        # Live entries (for the benchmark and `manage.py shell` checks)
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM cache WHERE expires IS NULL OR expires > ?', (time.time(),)
+        ).fetchone()[0]
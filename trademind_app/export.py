@@ -0,0 +1,144 @@
+# trademind_app/export.py
+"""
+Streaming export of a trader's journal (trades + followed rules + AI insight)
+as CSV or JSON Lines, optionally gzipped on the fly.
+
+Rows come from QuerySet.iterator(chunk_size=...), which also runs the
+rules_followed prefetch once per chunk, so memory stays flat regardless
+of journal size. Output is coalesced into ~64 KiB chunks before being
+yielded to the response or file.
+
+Incremental exports: every export covers trades with since < id <= cursor,
+where `cursor` (the newest id at the start) is reported up front; pass it
+back as `since` next time to get only newer trades.
+"""
+import csv
+import io
+import json
+import zlib
+
+from django.db.models import Max, Prefetch
+
+from .models import StrategyRule, Trade
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+FIELDS = [
+    'id', 'date', 'session', 'pair', 'entry', 'profit', 'loss', 'lot_size',
+    'pre_trade_emotion', 'post_trade_emotion', 'reason', 'conclusion', 'created_at',
+    'rules_followed',
+    'insight', 'risk_pattern', 'discipline_score', 'coaching_tip', 'insight_source', 'insight_generated_at',
+]
+
+
+def export_queryset(user, since=None, cursor=None):
+    trades = Trade.objects.filter(user=user)
+    if since:
+        trades = trades.filter(id__gt=since)
+    if cursor is not None:
+        trades = trades.filter(id__lte=cursor)
+    return (
+        trades.select_related('insight')
+        .prefetch_related(Prefetch('rules_followed', queryset=StrategyRule.objects.only('id', 'rule_text')))
+        .order_by('id')
+    )
+
+
+def export_cursor(user):
+    """
+    The newest trade id right now: the upper bound of an export, and the
+    `since` of the next incremental one.
+    """
+    return Trade.objects.filter(user=user).aggregate(cursor=Max('id'))['cursor'] or 0
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def trade_record(trade):
+    insight = getattr(trade, 'insight', None)
+    return {
+        'id': trade.id,
+        'date': trade.date.isoformat(),
+        'session': trade.session,
+        'pair': trade.pair,
+        'entry': trade.entry,
+        'profit': _text(trade.profit) or None,
+        'loss': _text(trade.loss) or None,
+        'lot_size': _text(trade.lot_size) or None,
+        'pre_trade_emotion': trade.pre_trade_emotion,
+        'post_trade_emotion': trade.post_trade_emotion,
+        'reason': trade.reason,
+        'conclusion': trade.conclusion,
+        'created_at': trade.created_at.isoformat(),
+        'rules_followed': [rule.rule_text for rule in trade.rules_followed.all()],
+        'insight': insight.insight if insight else None,
+        'risk_pattern': insight.risk_pattern if insight else None,
+        'discipline_score': insight.discipline_score if insight else None,
+        'coaching_tip': insight.coaching_tip if insight else None,
+        'insight_source': insight.source if insight else None,
+        'insight_generated_at': insight.generated_at.isoformat() if insight else None,
+    }
+
+
+def _csv_lines(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(row):
+        writer.writerow(row)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line(FIELDS)
+    for record in records:
+        record['rules_followed'] = '; '.join(record['rules_followed'])
+        yield line([_text(record[name]) for name in FIELDS])
+
+
+def _jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _coalesce(lines):
+    """
+    Encode lines to UTF-8 and yield them in ~FLUSH_BYTES blocks.
+    """
+    parts, size = [], 0
+    for text in lines:
+        data = text.encode('utf-8')
+        parts.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b''.join(parts)
+
+
+def _gzip(blocks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(queryset, fmt='csv', gzip=False, chunk_size=CHUNK_SIZE):
+    """
+    Bytes blocks of the export of `queryset` (see export_queryset()).
+    """
+    records = (trade_record(trade) for trade in queryset.iterator(chunk_size=chunk_size))
+    lines = _csv_lines(records) if fmt == 'csv' else _jsonl_lines(records)
+    blocks = _coalesce(lines)
+    return _gzip(blocks) if gzip else blocks
@@ -4,6 +4,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
+from . import rule_cache
 from .models import Trade, StrategyRule
 
 
@@ -128,19 +129,10 @@ class TradeLogForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         if user:
-            rules = StrategyRule.objects.filter(user=user)
-            print(f"[DEBUG] User {user.username} has {rules.count()} rules: {[str(r) for r in rules]}")
-            # Limit rules_followed to user's own rules
-            
-            # Set the queryset
+            # Limit rules_followed to user's own rules. The queryset stays lazy
+            # (only used to validate POSTs); the choices come from the rule cache.
             self.fields['rules_followed'].queryset = StrategyRule.objects.filter(user=user)
-            
-            # Rebuild the choices to reflect the new queryset
-            self.fields['rules_followed'].choices = [
-                (rule.id, rule.rule_text) for rule in rules
-            ]
-            
-            print(f"[DEBUG] rules_followed choices: {self.fields['rules_followed'].choices}")
+            self.fields['rules_followed'].choices = rule_cache.rule_choices(user.pk)
 
         # Set default date to today
         if not self.instance.pk:
@@ -156,4 +148,23 @@ class TradeLogForm(forms.ModelForm):
         if not profit and not loss:
             raise forms.ValidationError("Please enter either profit or loss.")
 
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+# --- IMPORT FORM ---
+class ImportTradesForm(forms.Form):
+    statement = forms.FileField(
+        help_text="MT4/MT5 HTML statement or a CSV export from your broker."
+    )
+    format = forms.ChoiceField(
+        choices=[
+            ('auto', 'Detect automatically'),
+            ('csv', 'CSV'),
+            ('mt4-html', 'MT4 statement (HTML)'),
+            ('mt5-html', 'MT5 report (HTML)'),
+        ],
+        initial='auto',
+    )
+    tz_offset = forms.IntegerField(
+        min_value=-12, max_value=14, initial=0, label="Server time offset (hours from UTC)",
+        help_text="Used to place trades in the Asia / London / New York session."
+    )
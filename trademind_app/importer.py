@@ -0,0 +1,385 @@
+# trademind_app/importer.py
+"""
+Bulk import of broker trade history (see `manage.py import_trades` and the
+import_trades view).
+
+    file -> parse_rows() -> dict rows -> map_row() -> ImportedTrade tuples
+         -> batches of BATCH_SIZE: dedupe + bulk_create() per transaction
+
+Supported inputs, read as a stream:
+    csv        generic or MT4/MT5 CSV exports (columns matched by name)
+    mt4-html   MT4 "Detailed Statement" (closed transactions table)
+    mt5-html   MT5 "Trade History Report" (positions table)
+
+Each trade gets a natural key in Trade.external_id ("<source>:<ticket>",
+or a hash of its fields when the export has no ticket), so importing the
+same statement twice adds nothing the second time.
+"""
+import codecs
+import csv
+import hashlib
+import html
+import io
+import logging
+import re
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import analytics, page_cache, similar
+from . import stats as trader_stats
+from .models import PAIR_CHOICES, Trade
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+READ_SIZE = 64 * 1024
+MAX_ERRORS = 50  # row errors kept for the report
+
+FORMATS = ['csv', 'mt4-html', 'mt5-html']
+
+# Header aliases (lowercased) -> canonical column. The first matching column
+# wins, so "Time"/"Price" in MT5 reports map to the open time/price.
+COLUMN_ALIASES = {
+    'ticket': ['ticket', 'position', 'order', 'deal', 'id'],
+    'open_time': ['open time', 'time', 'open date', 'date', 'opentime'],
+    'type': ['type', 'direction', 'side', 'action'],
+    'volume': ['size', 'volume', 'lots', 'lot', 'lot size', 'quantity'],
+    'symbol': ['item', 'symbol', 'instrument', 'pair', 'market'],
+    'commission': ['commission', 'fee', 'fees'],
+    'swap': ['swap', 'rollover'],
+    'profit': ['profit', 'pnl', 'p/l', 'net profit', 'result'],
+}
+TIME_FORMATS = ['%Y.%m.%d %H:%M:%S', '%Y.%m.%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M',
+                '%Y-%m-%dT%H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%Y.%m.%d', '%Y-%m-%d']
+
+# Session by UTC hour of the open time
+SESSION_HOURS = [(0, 7, 'asia'), (7, 13, 'london'), (13, 22, 'ny'), (22, 24, 'asia')]
+
+SYMBOL_ALIASES = {
+    'XAUUSD': 'Gold', 'GOLD': 'Gold',
+    'XTIUSD': 'Oil', 'XBRUSD': 'Oil', 'USOIL': 'Oil', 'UKOIL': 'Oil', 'WTI': 'Oil', 'BRENT': 'Oil',
+}
+_PAIR_VALUES = {value for value, _ in PAIR_CHOICES}
+CENT = Decimal('0.01')
+MAX_AMOUNT = Decimal('1e8')  # Trade amounts are DecimalField(max_digits=10, decimal_places=2)
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+# Trade field values for one imported row. A plain tuple rather than a Trade
+# instance: model __init__ was half the mapping cost, so only the rows that
+# survive deduplication become Trades.
+ImportedTrade = namedtuple('ImportedTrade', [
+    'user_id', 'date', 'session', 'pair', 'entry', 'profit', 'loss', 'lot_size',
+    'pre_trade_emotion', 'post_trade_emotion', 'reason', 'conclusion', 'external_id',
+])
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    trades: int = 0           # rows that mapped to a trade
+    created: int = 0
+    duplicates: int = 0
+    skipped: int = 0          # non-trade rows (balance, deposits, pending orders)
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"row {line}: {message}")
+
+
+# --- PARSING ---
+def _text_stream(fileobj, encoding='utf-8-sig'):
+    """
+    Decode a binary file object incrementally (text files pass through).
+    """
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return codecs.getreader(encoding)(fileobj, errors='replace')
+
+
+def _column_index(header):
+    lowered = [cell.strip().lower() for cell in header]
+    index = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                index[column] = lowered.index(alias)
+                break
+    return index
+
+
+def _rows_from_table(cells_iter):
+    """
+    Turn raw table rows into dicts keyed by canonical column, starting after
+    the first row that looks like a trade header.
+    """
+    index = None
+    for line, cells in cells_iter:
+        if index is None:
+            candidate = _column_index(cells)
+            if {'open_time', 'type', 'symbol', 'profit'} <= candidate.keys():
+                index = candidate
+            continue
+        if len(cells) <= max(index.values()):
+            # Section footer/subheader: a new header may follow (MT5 has several tables)
+            candidate = _column_index(cells)
+            if {'open_time', 'type', 'symbol', 'profit'} <= candidate.keys():
+                index = candidate
+            continue
+        yield line, {column: cells[i].strip() for column, i in index.items()}
+
+
+def _csv_cells(fileobj):
+    text = _text_stream(fileobj)
+    sample = text.read(4096)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(_chain(sample, text), dialect)
+    for line, cells in enumerate(reader, start=1):
+        yield line, cells
+
+
+def _chain(first, rest):
+    """
+    Line iterator over `first` (already read) followed by the rest of `rest`.
+    """
+    pending = ''
+    for chunk in (first, *iter(lambda: rest.read(READ_SIZE), '')):
+        lines = (pending + chunk).splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    if pending:
+        yield pending
+
+
+_ROW_END = re.compile(r'</tr\s*>', re.I)
+_CELL = re.compile(r'<t[dh]\b([^>]*)>(.*?)</t[dh]\s*>', re.I | re.S)
+_COLSPAN = re.compile(r'colspan\s*=\s*["\']?(\d+)', re.I)
+_TAG = re.compile(r'<[^>]*>')
+
+
+def _row_cells(row_html):
+    cells = []
+    for attrs, content in _CELL.findall(row_html):
+        cells.append(' '.join(html.unescape(_TAG.sub('', content)).split()))
+        # Keep column positions aligned with the header when cells span columns
+        span = _COLSPAN.search(attrs)
+        if span:
+            cells.extend([''] * (int(span.group(1)) - 1))
+    return cells
+
+
+def _html_cells(fileobj):
+    """
+    Table rows of an HTML statement, read in chunks. MT4/MT5 reports are
+    generated markup (one <tr> per row, cells closed), so a regex over each
+    complete row is enough, and several times faster than html.parser.
+    """
+    text = _text_stream(fileobj)
+    pending, line = '', 0
+    for chunk in iter(lambda: text.read(READ_SIZE), ''):
+        pending += chunk
+        rows = _ROW_END.split(pending)
+        pending = rows.pop()  # incomplete row, completed by the next chunk
+        for row_html in rows:
+            line += 1
+            yield line, _row_cells(row_html)
+    if pending.strip():
+        line += 1
+        yield line, _row_cells(pending)
+
+
+def detect_format(filename, head=b''):
+    name = (filename or '').lower()
+    if name.endswith(('.htm', '.html')) or b'<html' in head.lower() or b'<table' in head.lower():
+        return 'mt5-html' if b'Trade History Report' in head or b'Positions' in head else 'mt4-html'
+    return 'csv'
+
+
+def parse_rows(fileobj, fmt):
+    """
+    Yield (line number, {canonical column: text}) for every table row after
+    the trade header.
+    """
+    cells = _html_cells(fileobj) if fmt.endswith('html') else _csv_cells(fileobj)
+    return _rows_from_table(cells)
+
+
+# --- MAPPING ---
+def _decimal(value, name):
+    cleaned = (value or '').replace(' ', '').replace(' ', '')
+    if not cleaned:
+        return Decimal('0')
+    try:
+        return Decimal(cleaned.replace(',', '') if '.' in cleaned else cleaned.replace(',', '.'))
+    except InvalidOperation:
+        raise ImportRowError(f"invalid {name} {value!r}")
+
+
+_MT_TIME = re.compile(r'(\d{4})[.-](\d\d)[.-](\d\d)[ T](\d\d):(\d\d)(?::(\d\d))?')
+
+
+def _time(value):
+    value = (value or '').strip()
+    # Fast path for the MT4/MT5 and ISO layouts; strptime is ~10x slower
+    match = _MT_TIME.fullmatch(value)
+    if match:
+        try:
+            return datetime(*(int(part or 0) for part in match.groups()))
+        except ValueError:
+            raise ImportRowError(f"unrecognised time {value!r}")
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ImportRowError(f"unrecognised time {value!r}")
+
+
+def normalize_pair(symbol):
+    # Broker suffixes: "EURUSD.r", "EURUSDm", "XAUUSD#"
+    raw = symbol.strip().split('.')[0].rstrip('#+!m').upper().replace('/', '').replace('_', '')
+    if raw in SYMBOL_ALIASES:
+        return SYMBOL_ALIASES[raw]
+    if len(raw) == 6 and raw.isalpha():
+        pair = f"{raw[:3]}/{raw[3:]}"
+    elif raw.endswith('USD') and raw[:-3].isalpha():
+        pair = f"{raw[:-3]}/USD"
+    else:
+        pair = symbol.strip()
+    return pair if pair in _PAIR_VALUES else pair[:20]
+
+
+def session_for(hour):
+    for start, end, session in SESSION_HOURS:
+        if start <= hour < end:
+            return session
+    return 'asia'
+
+
+def map_row(user, row, source, tz_offset=0):
+    """
+    An ImportedTrade for one parsed row, or None for rows that aren't closed trades.
+    Raises ImportRowError for rows that look like trades but can't be read.
+    """
+    kind = row.get('type', '').lower()
+    if 'buy' in kind:
+        entry = 'BUY'
+    elif 'sell' in kind:
+        entry = 'SELL'
+    else:
+        return None  # balance, credit, deposit...
+    if 'limit' in kind or 'stop' in kind:
+        return None  # pending orders never filled
+
+    opened = _time(row.get('open_time')) - timedelta(hours=tz_offset)
+    net = _decimal(row.get('profit'), 'profit') + _decimal(row.get('commission'), 'commission') \
+        + _decimal(row.get('swap'), 'swap')
+    net = net.quantize(CENT)
+    volume = _decimal(row.get('volume'), 'volume').quantize(CENT) if row.get('volume') else None
+    if abs(net) >= MAX_AMOUNT or (volume is not None and abs(volume) >= MAX_AMOUNT):
+        raise ImportRowError("amount out of range")
+    pair = normalize_pair(row.get('symbol') or '')
+    if not pair:
+        raise ImportRowError("missing symbol")
+
+    ticket = row.get('ticket')
+    if ticket:
+        external_id = f"{source}:{ticket}"
+    else:
+        fingerprint = f"{opened.isoformat()}|{pair}|{entry}|{volume}|{net}"
+        external_id = f"{source}:h{hashlib.sha1(fingerprint.encode()).hexdigest()[:20]}"
+
+    return ImportedTrade(
+        user_id=user.pk,
+        date=opened.date(),
+        session=session_for(opened.hour),
+        pair=pair,
+        entry=entry,
+        profit=net if net >= 0 else None,
+        loss=-net if net < 0 else None,
+        lot_size=volume,
+        pre_trade_emotion='neutral',
+        post_trade_emotion='neutral',
+        reason=f"Imported from {source.upper()} statement" + (f" (ticket {ticket})." if ticket else "."),
+        conclusion='',
+        external_id=external_id[:64],
+    )
+
+
+# --- WRITING ---
+def _write_batch(user, batch, result):
+    """
+    Insert one batch in its own transaction, skipping natural keys that are
+    already in the journal (or repeated within the batch).
+
+    As with any bulk_create(), no signals fire and fields not imported keep
+    their model defaults (no screenshot, no rules followed).
+    """
+    keys = {trade.external_id for trade in batch}
+    journal = Trade.objects.filter(user=user, external_id__in=keys)
+    with transaction.atomic():
+        existing = set(journal.values_list('external_id', flat=True))
+        fresh, seen = [], set(existing)
+        for trade in batch:
+            if trade.external_id in seen:
+                continue
+            seen.add(trade.external_id)
+            fresh.append(Trade(**trade._asdict()))
+        # ignore_conflicts: a concurrent import of the same file must not fail the batch
+        Trade.objects.bulk_create(fresh, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        # Conflicting rows are skipped silently, so count what is there now
+        inserted = journal.count() - len(existing) if fresh else 0
+    result.created += inserted
+    result.duplicates += len(batch) - inserted
+
+
+def import_trades(user, fileobj, fmt='csv', tz_offset=0, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Stream `fileobj` into `user`'s journal. Returns an ImportResult.
+    """
+    source = {'csv': 'csv', 'mt4-html': 'mt4', 'mt5-html': 'mt5'}[fmt]
+    result = ImportResult()
+    batch = []
+    for line, row in parse_rows(fileobj, fmt):
+        result.rows += 1
+        try:
+            trade = map_row(user, row, source, tz_offset)
+        except ImportRowError as e:
+            result.add_error(line, str(e))
+            continue
+        if trade is None:
+            result.skipped += 1
+            continue
+        result.trades += 1
+        batch.append(trade)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                _write_batch(user, batch, result)
+            batch = []
+    if batch and not dry_run:
+        _write_batch(user, batch, result)
+
+    if result.created:
+        # Batch inserts skip the signal handlers
+        trader_stats.rebuild(user.pk)
+        analytics.invalidate(user.pk)
+        # Statement trades are older than the journal they join: rebuild the
+        # similar-trades index rather than appending them after it
+        similar.invalidate(user.pk)
+        page_cache.bump(user.pk)
+    logger.info("Imported %s trades for user %s (%s duplicates, %s skipped, %s errors)",
+                result.created, user.pk, result.duplicates, result.skipped, result.error_count)
+    return result
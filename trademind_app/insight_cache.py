@@ -0,0 +1,227 @@
+# trademind_app/insight_cache.py
+"""
+Content-addressed cache for AI insight responses.
+
+Many trades produce near-identical prompts (same pair, entry, emotions and
+rules ratio with boilerplate reasons), so provider responses are cached under
+a fingerprint of the normalized `trade_data`:
+
+    lookup() -> in-process LRU -> InsightCacheEntry table -> miss
+    store()  -> both tiers; the table is trimmed by TTL and MAX_ENTRIES
+
+Only real provider responses are cached, never the mock fallback.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import metrics
+from .models import InsightCacheEntry
+
+# --- CONFIG ---
+DEFAULT_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TTL': 7 * 24 * 3600,     # seconds an entry stays valid
+    'MAX_ENTRIES': 10000,     # rows kept in the persistent table
+    'LRU_SIZE': 512,          # entries kept in each process
+    'TRIM_EVERY': 100,        # inserts between size-based evictions
+}
+
+
+def cache_setting(name):
+    return getattr(settings, 'INSIGHT_CACHE', {}).get(name, DEFAULT_CACHE_SETTINGS[name])
+
+
+# --- FINGERPRINT ---
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def _normalize_text(text):
+    return _NON_WORD.sub(' ', (text or '').lower()).strip()
+
+
+def fingerprint(trade_data):
+    """
+    Stable key for a prompt. Amounts are reduced to the outcome (the prompt
+    asks for behaviour, not P&L size) and the reason is case/punctuation
+    folded, so "Waited for BOS." and "waited for bos" share an entry.
+    History only contributes its coarse signature (repeat count, win rates).
+    """
+    rules_total = trade_data.get('rules_total') or 0
+    rules_followed = trade_data.get('rules_followed_count') or 0
+    normalized = {
+        'pair': trade_data.get('pair'),
+        'entry': trade_data.get('entry'),
+        'outcome': 'profit' if trade_data.get('profit') else 'loss' if trade_data.get('loss') else None,
+        'pre': _normalize_text(trade_data.get('pre_trade_emotion')),
+        'post': _normalize_text(trade_data.get('post_trade_emotion')),
+        'rules': f"{rules_followed}/{rules_total}",
+        'reason': _normalize_text(trade_data.get('reason')),
+    }
+    if trade_data.get('history'):
+        # Only when present, so keys of history-less prompts are unchanged
+        normalized['history'] = trade_data['history']['signature']
+    blob = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+# --- IN-PROCESS LRU ---
+class LRUCache:
+    """
+    Small thread-safe LRU with per-entry expiry.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_lru = LRUCache(cache_setting('LRU_SIZE'))
+
+_stats_lock = threading.Lock()
+_stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0}
+
+
+# Process-local counter -> `result` label of the shared lookups metric
+_METRIC_RESULTS = {'memory_hits': 'memory_hit', 'db_hits': 'db_hit', 'misses': 'miss'}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+    if name in _METRIC_RESULTS:
+        metrics.inc('insight_cache_lookups_total', result=_METRIC_RESULTS[name])
+
+
+# --- PUBLIC API ---
+def lookup(trade_data):
+    """
+    Cached insight dict for this prompt, or None.
+    """
+    if not cache_setting('ENABLED'):
+        return None
+    key = fingerprint(trade_data)
+
+    value = _lru.get(key)
+    if value is not None:
+        _count('memory_hits')
+        return dict(value)
+
+    cutoff = timezone.now() - timedelta(seconds=cache_setting('TTL'))
+    try:
+        entry = InsightCacheEntry.objects.filter(key=key, created_at__gte=cutoff).first()
+        if entry is None:
+            _count('misses')
+            return None
+        InsightCacheEntry.objects.filter(key=key).update(hits=F('hits') + 1, last_hit_at=timezone.now())
+    except DatabaseError:
+        # The cache must never be the reason an insight fails
+        _count('misses')
+        return None
+
+    remaining = cache_setting('TTL') - (timezone.now() - entry.created_at).total_seconds()
+    _lru.set(key, entry.payload, max(1, remaining))
+    _count('db_hits')
+    return dict(entry.payload)
+
+
+def store(trade_data, insight_dict):
+    if not cache_setting('ENABLED'):
+        return
+    key = fingerprint(trade_data)
+    payload = {k: insight_dict[k] for k in ('insight', 'risk_pattern', 'discipline_score', 'coaching_tip')}
+    _lru.set(key, payload, cache_setting('TTL'))
+    try:
+        InsightCacheEntry.objects.update_or_create(
+            key=key, defaults={'payload': payload, 'created_at': timezone.now()},
+        )
+    except DatabaseError:
+        return
+
+    _count('stores')
+    if _stats['stores'] % cache_setting('TRIM_EVERY') == 0:
+        evict()
+
+
+def evict():
+    """
+    Drop expired rows, then the least recently used rows beyond MAX_ENTRIES.
+    Returns the number of rows deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=cache_setting('TTL'))
+    deleted, _ = InsightCacheEntry.objects.filter(created_at__lt=cutoff).delete()
+
+    overflow = InsightCacheEntry.objects.count() - cache_setting('MAX_ENTRIES')
+    if overflow > 0:
+        stale_keys = list(
+            InsightCacheEntry.objects.order_by(F('last_hit_at').asc(nulls_first=True), 'created_at')
+            .values_list('key', flat=True)[:overflow]
+        )
+        extra, _ = InsightCacheEntry.objects.filter(key__in=stale_keys).delete()
+        deleted += extra
+    return deleted
+
+
+def clear():
+    """
+    Empty this process's LRU and the persistent table. Other processes keep
+    their LRU entries until they expire.
+    """
+    _lru.clear()
+    deleted, _ = InsightCacheEntry.objects.all().delete()
+    return deleted
+
+
+def stats():
+    """
+    Process-local hit/miss counters plus persistent-table totals.
+    """
+    with _stats_lock:
+        counters = dict(_stats)
+    lookups = counters['memory_hits'] + counters['db_hits'] + counters['misses']
+    hits = counters['memory_hits'] + counters['db_hits']
+    cutoff = timezone.now() - timedelta(seconds=cache_setting('TTL'))
+    return {
+        **counters,
+        'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+        'lru_entries': len(_lru),
+        'db_entries': InsightCacheEntry.objects.count(),
+        'db_expired': InsightCacheEntry.objects.filter(created_at__lt=cutoff).count(),
+        'db_total_hits': InsightCacheEntry.objects.aggregate(total=Sum('hits'))['total'] or 0,
+    }
@@ -0,0 +1,231 @@
+# trademind_app/insight_stream.py
+"""
+Server-Sent Events stream of a trade's AI insight, for the ai_insight page.
+
+    browser (EventSource) -> ai_insight_stream (async view, ASGI)
+      -> provider tokens (ai_coach.stream_provider_insight, async client)
+      -> InsightParser fills fields as their JSON values complete
+      -> AIInsight stored once (jobs.finish_job) -> "done"
+
+Events:
+
+    token     {"text": ...}                 raw completion text, as it arrives
+    field     {"name": ..., "value": ...}   a field's value is complete
+    done      {"insight": {...}}            stored insight (also for ready trades)
+    pending   {"status": ...}               nothing to stream here: poll ai_insight_status
+
+The stream leases the trade's InsightJob like a worker does, so a trade is
+generated once whichever gets there first; when the provider fails the job
+goes back to the queue (retries, then mock) and the page falls back to
+polling.
+"""
+import json
+import logging
+from contextlib import aclosing
+
+from asgiref.sync import sync_to_async
+
+from . import ai_coach, ai_transport, insight_cache, jobs
+from .models import Trade
+
+logger = logging.getLogger(__name__)
+
+INSIGHT_FIELDS = ('insight', 'risk_pattern', 'discipline_score', 'coaching_tip')
+_WHITESPACE = ' \t\r\n'
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+# --- INCREMENTAL JSON ---
+class InsightParser:
+    """
+    Incremental parser for the insight object in a streamed completion.
+    `feed(text)` returns the (name, value) pairs whose JSON values were
+    completed by that chunk. Text before the first '{' (preambles, ```json
+    fences) and after the closing '}' is ignored; nested values are
+    returned whole once closed.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect = 'key'         # at depth 1: key, colon, value, comma
+        self.key = None
+        self.token_start = None     # start of the key or value being read
+        self.done = False
+        self.end = None             # just past the object's closing brace
+
+    @property
+    def object_text(self):
+        """
+        The insight object's JSON once closed, else everything received.
+        """
+        return self.text[:self.end] if self.done else self.text
+
+    def feed(self, chunk):
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self.pos, len(text)):
+            if self.done:
+                break
+            char = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self._end_token(i + 1, completed)
+                continue
+
+            if self.depth == 0:
+                if char == '{':
+                    self.depth = 1
+                continue
+
+            if self.depth == 1:
+                if char in _WHITESPACE:
+                    continue
+                if self.expect == 'number' and char in ',}':
+                    self._end_token(i, completed)
+                if char == '}':
+                    self.done = True
+                    self.end = i + 1
+                elif char == ',':
+                    self.expect = 'key'
+                elif char == ':':
+                    self.expect = 'value'
+                elif self.expect in ('key', 'value'):
+                    self.token_start = i
+                    if char == '"':
+                        self.in_string = True
+                    elif char in '{[':
+                        self.depth += 1
+                    else:
+                        self.expect = 'number'  # numbers, true/false/null: end at , or }
+                continue
+
+            # Inside a nested value
+            if char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 1:
+                    self._end_token(i + 1, completed)
+        self.pos = len(text)
+        return completed
+
+    def _end_token(self, end, completed):
+        raw = self.text[self.token_start:end].strip()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = None
+        if self.expect == 'key':
+            self.key, self.expect = value, 'colon'
+            return
+        if self.key in INSIGHT_FIELDS:
+            completed.append((self.key, value))
+        self.key, self.expect = None, 'comma'
+
+
+def _display_value(name, value):
+    """
+    A field value as the page shows it (discipline_score as a 1-10 int).
+    """
+    if name == 'discipline_score':
+        try:
+            return max(1, min(10, int(round(float(value)))))
+        except (TypeError, ValueError):
+            return None
+    if value is None or isinstance(value, str):
+        return value or ''
+    return json.dumps(value)
+
+
+def _insight_data(insight):
+    return {name: getattr(insight, name) for name in INSIGHT_FIELDS}
+
+
+# --- DATABASE STEPS (sync, run via sync_to_async) ---
+def prepare(trade_id, user_id):
+    """
+    What the stream will do for this trade:
+    ('missing', None) | ('ready', insight) | ('pending', status) | ('stream', (trade, job, trade_data)).
+    'stream' holds the job's lease; pass the result to `insight_events`.
+    """
+    trade = Trade.objects.select_related('insight').filter(id=trade_id, user_id=user_id).first()
+    if trade is None:
+        return 'missing', None
+    insight = getattr(trade, 'insight', None)
+    if insight is not None:
+        return 'ready', insight
+    job = jobs.claim_trade_job(trade)
+    if job is None:
+        return 'pending', 'running'
+    return 'stream', (trade, job, jobs.build_trade_data(trade))
+
+
+def _finish(trade, job, trade_data, result, cached):
+    if not cached:
+        insight_cache.store(trade_data, result)
+    return jobs.finish_job(job, trade, result, 'provider')
+
+
+def _release(job, error):
+    jobs.release_job(job, error)
+
+
+# --- STREAM ---
+async def insight_events(state, value):
+    """
+    Async generator of SSE-encoded events for a `prepare()`d trade (see the
+    module docstring).
+    """
+    if state == 'ready':
+        yield sse('done', {'insight': _insight_data(value)})
+        return
+    if state != 'stream':
+        yield sse('pending', {'status': value or state})
+        return
+
+    trade, job, trade_data = value
+    finished = False
+    try:
+        cached = await sync_to_async(insight_cache.lookup)(trade_data)
+        if cached:
+            result = cached
+        else:
+            parser = InsightParser()
+            async with aclosing(ai_coach.stream_provider_insight(trade_data)) as tokens:
+                async for text in tokens:
+                    yield sse('token', {'text': text})
+                    for name, field_value in parser.feed(text):
+                        yield sse('field', {'name': name, 'value': _display_value(name, field_value)})
+            # Same validation as the non-streaming path
+            result = ai_coach._parse_json_response(parser.object_text)
+            if result is None:
+                raise ai_transport.ProviderError("Streamed completion is not a valid insight")
+
+        insight = await sync_to_async(_finish)(trade, job, trade_data, result, bool(cached))
+        finished = True
+        yield sse('done', {'insight': _insight_data(insight)})
+    except ai_transport.ProviderError as e:
+        logger.info("Insight stream for trade %s fell back to the queue: %s", trade.pk, e)
+        await sync_to_async(_release)(job, str(e))
+        finished = True
+        yield sse('pending', {'status': 'retrying'})
+    finally:
+        if not finished:
+            # Client disconnected (or a bug): let a worker pick the job up now
+            await sync_to_async(_release)(job, 'Stream interrupted')
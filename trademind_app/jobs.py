@@ -0,0 +1,243 @@
+# trademind_app/jobs.py
+"""
+Background generation of AI insights.
+
+`trade_log` enqueues an InsightJob when a trade is saved, the
+`run_insight_worker` management command claims and processes jobs, and
+`ai_insight` just renders whatever is there (or a pending state).
+
+Claiming uses a conditional UPDATE instead of SELECT ... FOR UPDATE so it
+works the same on SQLite and Postgres: only the worker whose UPDATE matched
+the row owns the lease.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import ai_coach, rule_cache, similar
+from .models import AIInsight, InsightJob
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIG ---
+DEFAULT_QUEUE_SETTINGS = {
+    'VISIBILITY_TIMEOUT': 60,   # seconds a claimed job stays invisible to other workers
+    'MAX_ATTEMPTS': 4,          # provider attempts before settling for the mock insight
+    'BACKOFF_BASE': 5,          # seconds, doubled per attempt
+    'BACKOFF_MAX': 300,
+}
+
+
+def queue_setting(name):
+    return getattr(settings, 'INSIGHT_QUEUE', {}).get(name, DEFAULT_QUEUE_SETTINGS[name])
+
+
+# --- TRADE -> PROMPT DATA ---
+def build_trade_data(trade, rules_followed_count=None, rules_total=None):
+    """
+    Shape a Trade into the dict the AI coach expects, including the trader's
+    history with similar past trades (see similar.history_for).
+    rules_total comes from the rule snapshot (rule_cache); bulk callers pass
+    precomputed rule counts to skip the COUNT query and the cache lookup.
+    """
+    if rules_followed_count is None:
+        rules_followed_count = trade.rules_followed.count()
+    if rules_total is None:
+        rules_total = rule_cache.rules_total(trade.user_id)
+    return {
+        'entry': trade.entry,
+        'pair': trade.pair,
+        'profit': str(trade.profit) if trade.profit else None,
+        'loss': str(trade.loss) if trade.loss else None,
+        'pre_trade_emotion': trade.get_pre_trade_emotion_display(),
+        'post_trade_emotion': trade.get_post_trade_emotion_display(),
+        'rules_followed_count': rules_followed_count,
+        'rules_total': rules_total,
+        'reason': trade.reason,
+        'history': similar.history_for(trade, rules_followed_count),
+    }
+
+
+# --- PRODUCER ---
+_UNKNOWN = object()
+
+
+def enqueue_insight(trade, job=_UNKNOWN):
+    """
+    Queue insight generation for a trade. Idempotent: an existing job is
+    reused, and a failed one is reset so it gets another round of attempts.
+    Callers that already loaded the trade's job (or know there is none)
+    pass it as `job` to skip the lookup.
+    """
+    if job is _UNKNOWN:
+        job = InsightJob.objects.filter(trade=trade).first()
+    if job is None:
+        try:
+            with transaction.atomic():
+                return InsightJob.objects.create(trade=trade)
+        except IntegrityError:
+            # A concurrent request queued it first
+            return InsightJob.objects.get(trade=trade)
+    if job.status == InsightJob.STATUS_FAILED:
+        InsightJob.objects.filter(pk=job.pk).update(
+            status=InsightJob.STATUS_PENDING, attempts=0,
+            run_after=timezone.now(), locked_until=None,
+        )
+        job.refresh_from_db()
+    return job
+
+
+# --- CONSUMER ---
+def _claimable(now):
+    return (
+        Q(status=InsightJob.STATUS_PENDING, run_after__lte=now)
+        | Q(status=InsightJob.STATUS_RUNNING, locked_until__lt=now)
+    )
+
+
+def claim_jobs(limit=10):
+    """
+    Lease up to `limit` due jobs. Jobs whose lease expired (their worker died
+    mid-flight) are picked up again.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=queue_setting('VISIBILITY_TIMEOUT'))
+    candidate_ids = list(
+        InsightJob.objects.filter(_claimable(now))
+        .order_by('run_after')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+    claimed = []
+    for pk in candidate_ids:
+        won = InsightJob.objects.filter(_claimable(now), pk=pk).update(
+            status=InsightJob.STATUS_RUNNING,
+            locked_until=lease_until,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if won:
+            claimed.append(pk)
+    return list(InsightJob.objects.filter(pk__in=claimed).select_related('trade'))
+
+
+def backoff_delay(attempts):
+    """
+    Exponential backoff with jitter, capped at BACKOFF_MAX.
+    """
+    ceiling = min(queue_setting('BACKOFF_MAX'), queue_setting('BACKOFF_BASE') * 2 ** max(0, attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _save_insight(trade, insight_dict, source):
+    try:
+        with transaction.atomic():
+            return AIInsight.objects.create(
+                trade=trade,
+                insight=insight_dict['insight'],
+                risk_pattern=insight_dict['risk_pattern'],
+                discipline_score=insight_dict['discipline_score'],
+                coaching_tip=insight_dict['coaching_tip'],
+                source=source,
+            )
+    except IntegrityError:
+        # Someone else (another worker after a lease expiry) got there first
+        return AIInsight.objects.get(trade=trade)
+
+
+def process_job(job):
+    """
+    Run one claimed job. Provider failures are retried with backoff until
+    MAX_ATTEMPTS, after which the mock insight is stored so the trader always
+    ends up with something.
+    Returns the job's new status.
+    """
+    trade = job.trade
+    if AIInsight.objects.filter(trade=trade).exists():
+        InsightJob.objects.filter(pk=job.pk).update(status=InsightJob.STATUS_DONE, locked_until=None)
+        return InsightJob.STATUS_DONE
+
+    trade_data = build_trade_data(trade)
+    error = ''
+    try:
+        insight_dict = ai_coach.get_provider_insight(trade_data)
+    except Exception as e:  # a provider bug must not kill the worker
+        logger.exception("Insight job %s crashed", job.pk)
+        insight_dict, error = None, repr(e)
+
+    if not insight_dict and job.attempts < queue_setting('MAX_ATTEMPTS'):
+        release_job(job, error or 'No provider returned a valid insight')
+        return InsightJob.STATUS_PENDING
+
+    source = 'provider'
+    if not insight_dict:
+        insight_dict, source = ai_coach._mock_insight_on_failure(trade_data), 'mock'
+
+    finish_job(job, trade, insight_dict, source, error)
+    return InsightJob.STATUS_DONE
+
+
+def release_job(job, error):
+    """
+    Give a leased job back to the queue, due again after backoff.
+    """
+    delay = backoff_delay(job.attempts)
+    InsightJob.objects.filter(pk=job.pk).update(
+        status=InsightJob.STATUS_PENDING,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        locked_until=None,
+        last_error=error,
+    )
+    logger.info("Insight job %s retrying in %.1fs (attempt %s)", job.pk, delay, job.attempts)
+
+
+def finish_job(job, trade, insight_dict, source, error=''):
+    """
+    Store the trade's insight (once) and mark its job done.
+    Returns the stored AIInsight.
+    """
+    insight = _save_insight(trade, insight_dict, source)
+    InsightJob.objects.filter(pk=job.pk).update(
+        status=InsightJob.STATUS_DONE, locked_until=None, last_error=error,
+    )
+    return insight
+
+
+def claim_trade_job(trade):
+    """
+    Lease one trade's job for an inline run (the streaming endpoint), queueing
+    it first if needed. Returns the job, or None when a worker holds the lease
+    or it is already done.
+    """
+    job = enqueue_insight(trade)
+    now = timezone.now()
+    won = InsightJob.objects.filter(_claimable(now), pk=job.pk).update(
+        status=InsightJob.STATUS_RUNNING,
+        locked_until=now + timedelta(seconds=queue_setting('VISIBILITY_TIMEOUT')),
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    if not won:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def process_job_safely(job):
+    """
+    Worker-thread wrapper: never raises, marks the job failed on unexpected
+    errors (recorded in last_error) instead of retrying forever.
+    """
+    try:
+        return process_job(job)
+    except Exception as e:
+        logger.exception("Insight job %s failed", job.pk)
+        InsightJob.objects.filter(pk=job.pk).update(
+            status=InsightJob.STATUS_FAILED, locked_until=None, last_error=repr(e),
+        )
+        return InsightJob.STATUS_FAILED
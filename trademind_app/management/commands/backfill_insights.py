@@ -0,0 +1,73 @@
+# trademind_app/management/commands/backfill_insights.py
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from trademind_app.backfill import pending_trades, run_backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate AI insights for trades that have none (or, with --regenerate-mock, only a mock one). "
+        "Safe to interrupt: rerun with the same --checkpoint file to resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Parallel provider calls (default: 4)")
+        parser.add_argument('--rate', type=float, default=None, help="Max provider calls per second across all threads")
+        parser.add_argument('--batch-size', type=int, default=100, help="Trades written per bulk_create/bulk_update")
+        parser.add_argument('--prompt-batch', type=int, default=1,
+                            help="Trades packed into one provider prompt (default: 1, one call per trade)")
+        parser.add_argument('--regenerate-mock', action='store_true', help="Also retry trades that only have a mock insight")
+        parser.add_argument('--no-mock', action='store_true', help="Leave a trade without insight if every provider fails")
+        parser.add_argument('--user', help="Only backfill this username")
+        parser.add_argument('--limit', type=int, default=None, help="Stop after this many trades")
+        parser.add_argument('--checkpoint', help="File recording the last committed trade id, for resuming")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}")
+
+        checkpoint = Path(options['checkpoint']) if options['checkpoint'] else None
+        after_id = 0
+        if checkpoint and checkpoint.exists():
+            after_id = int(checkpoint.read_text().strip() or 0)
+            self.stdout.write(f"[Backfill] Resuming after trade id {after_id}")
+
+        queryset = pending_trades(regenerate_mock=options['regenerate_mock'], user=user)
+        total = queryset.filter(id__gt=after_id).count()
+        self.stdout.write(
+            f"[Backfill] {total} trade(s) to process with concurrency {options['concurrency']}, "
+            f"{options['prompt_batch']} per prompt"
+        )
+
+        def on_page(stats):
+            if checkpoint:
+                checkpoint.write_text(str(stats.last_id))
+            self.stdout.write(
+                f"[Backfill] {stats.processed}/{total} trades, {stats.rate:.1f} trades/sec, "
+                f"last id {stats.last_id}"
+            )
+
+        stats = run_backfill(
+            queryset,
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            page_size=options['batch_size'],
+            after_id=after_id,
+            write_mock=not options['no_mock'],
+            limit=options['limit'],
+            on_page=on_page,
+            prompt_batch=options['prompt_batch'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"[Backfill] Done: {stats.processed} trades in {stats.elapsed:.1f}s ({stats.rate:.1f} trades/sec); "
+            f"{stats.created} created ({stats.mocked} mock), {stats.upgraded} mock insights upgraded"
+        ))
+        if checkpoint and checkpoint.exists() and stats.processed >= total:
+            checkpoint.unlink()
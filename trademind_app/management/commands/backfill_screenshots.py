@@ -0,0 +1,98 @@
+# trademind_app/management/commands/backfill_screenshots.py
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from trademind_app import screenshots
+from trademind_app.bench import Timer
+from trademind_app.models import Trade
+
+
+def _kib(size):
+    return f"{size / 1024:,.0f} KiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Process existing trade screenshots: store originals content-addressed (duplicates once), "
+        "render WebP thumbnails and display images, and report the bytes saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Images processed in parallel (default: 4)")
+        parser.add_argument('--user', help="Only this username's trades")
+        parser.add_argument('--limit', type=int, default=None, help="Stop after this many trades")
+        parser.add_argument('--rerender', action='store_true',
+                            help="Also re-render processed screenshots (after changing SCREENSHOTS sizes/quality)")
+
+    def handle(self, *args, **options):
+        trades = screenshots.pending_trades()
+        if options['rerender']:
+            trades = Trade.objects.filter(screenshot__gt='').order_by('id')
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}")
+            trades = trades.filter(user=user)
+        if options['limit']:
+            trades = trades[:options['limit']]
+        trades = list(trades.only('id', 'screenshot', 'screenshot_hash'))
+        self.stdout.write(f"[Screenshots] {len(trades)} trade(s) to process with {options['threads']} thread(s)")
+
+        rendered = set()
+
+        def work(trade):
+            try:
+                # Re-render each image once, however many trades share it
+                rerender = options['rerender'] and trade.screenshot_hash not in rendered
+                rendered.add(trade.screenshot_hash)
+                return trade, screenshots.process_trade(trade, rerender=rerender)
+            except (screenshots.ScreenshotError, OSError) as e:
+                screenshots.mark_unreadable(trade)
+                return trade, e
+
+        def work_in_thread(trade):
+            # Pool threads get their own DB connection; don't leave it open
+            try:
+                return work(trade)
+            finally:
+                connection.close()
+
+        results, failures = [], []
+        with Timer() as t, ThreadPoolExecutor(max_workers=max(1, options['threads'])) as pool:
+            outcomes = pool.map(work_in_thread, trades) if options['threads'] > 1 else map(work, trades)
+            for trade, result in outcomes:
+                if isinstance(result, Exception):
+                    failures.append(trade)
+                    self.stderr.write(f"trade {trade.pk}: {result}")
+                else:
+                    results.append(result)
+        self._report(results, failures, t.elapsed)
+
+    def _report(self, results, failures, elapsed):
+        if not results:
+            self.stdout.write(f"[Screenshots] Nothing processed ({len(failures)} failed)")
+            return
+        uploads = sum(r.upload_bytes for r in results)
+        stored = sum(r.stored_bytes for r in results)
+        images = {r.digest: r for r in results}  # one entry per distinct image
+        thumbs = sum(r.rendition_bytes['thumb'] for r in results)
+        displays = sum(r.rendition_bytes['display'] for r in results)
+        rendition_storage = sum(sum(r.rendition_bytes.values()) for r in images.values())
+        deduplicated = sum(1 for r in results if r.deduplicated)
+
+        self.stdout.write(
+            f"[Screenshots] {len(results)} processed in {elapsed:.1f}s "
+            f"({len(images)} distinct images, {deduplicated} duplicates, {len(failures)} failed)"
+        )
+        self.stdout.write(f"  uploads:               {_kib(uploads)}")
+        self.stdout.write(f"  originals stored:      {_kib(stored)} (dedupe saved {_kib(uploads - stored)})")
+        self.stdout.write(f"  renditions stored:     {_kib(rendition_storage)}")
+        # What pages send per screenshot: history shows the thumbnail, insight/View the display size
+        self.stdout.write(
+            f"  per screenshot served: original {_kib(uploads / len(results))} -> "
+            f"thumb {_kib(thumbs / len(results))} ({100 * (1 - thumbs / uploads):.1f}% smaller), "
+            f"display {_kib(displays / len(results))} ({100 * (1 - displays / uploads):.1f}% smaller)"
+        )
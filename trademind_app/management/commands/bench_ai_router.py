@@ -0,0 +1,184 @@
+# trademind_app/management/commands/bench_ai_router.py
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from trademind_app import ai_coach, ai_router, ai_transport
+from trademind_app.bench import StubServer, Timer, scratch_metrics, summarize
+
+COMPLETION = (
+    '{"insight": "Moving the stop after entry turned a planned loss into a larger one.", '
+    '"risk_pattern": "Loss aversion", "discipline_score": 3, '
+    '"coaching_tip": "Set the stop before entering and leave it where the plan put it."}'
+)
+
+TRADE_DATA = {
+    'entry': 'Breakout retest', 'pair': 'EURUSD', 'profit': None, 'loss': '42.50',
+    'pre_trade_emotion': 'Anxious', 'post_trade_emotion': 'Frustrated',
+    'rules_followed_count': 2, 'rules_total': 5, 'reason': "Moved my stop.", 'history': None,
+}
+
+
+def latency_sampler(spec, rng):
+    """
+    Seconds per call from a spec: fixed:S | uniform:A:B | lognormal:MEDIAN:SIGMA,
+    optionally followed by +slow:P:S (with probability P, S more seconds).
+    """
+    base, _, tail = spec.partition('+')
+    kind, *args = base.split(':')
+    try:
+        args = [float(a) for a in args]
+        if kind == 'fixed':
+            sample = lambda: args[0]
+        elif kind == 'uniform':
+            sample = lambda: rng.uniform(args[0], args[1])
+        elif kind == 'lognormal':
+            sample = lambda: rng.lognormvariate(0, args[1]) * args[0]
+        else:
+            raise ValueError(kind)
+        if tail:
+            name, p, extra = tail.split(':')
+            if name != 'slow':
+                raise ValueError(name)
+            p, extra = float(p), float(extra)
+            return lambda: sample() + (extra if rng.random() < p else 0)
+        return sample
+    except (ValueError, IndexError) as e:
+        raise CommandError(f"Bad latency spec {spec!r}: {e}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Tail latency of the AI provider router against local stub providers with configurable latency "
+        "distributions: one provider without hedging, hedged to itself, and Deepseek + Hugging Face "
+        "ranked and hedged (async, and the sync thread-pool path). Checks every call returns the parsed "
+        "insight and the losing hedged requests are cancelled. No database access."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--warmup', type=int, default=60, help="Calls before measuring (rolling stats)")
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--huggingface', default='lognormal:0.25:0.3+slow:0.06:2.0',
+                            help="Latency spec of the Hugging Face stub")
+        parser.add_argument('--deepseek', default='lognormal:0.3:0.3+slow:0.04:2.0',
+                            help="Latency spec of the Deepseek stub")
+        parser.add_argument('--seed', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        rng_lock = threading.Lock()
+        samplers = {
+            'huggingface': latency_sampler(options['huggingface'], rng),
+            'deepseek': latency_sampler(options['deepseek'], rng),
+        }
+
+        def responder(provider, body):
+            def respond(path, _):
+                with rng_lock:
+                    delay = samplers[provider]()
+                return 200, body, delay
+            return respond
+
+        scenarios = [
+            ('huggingface, no hedge', ('huggingface',), False, 'async'),
+            ('huggingface, hedged to itself', ('huggingface',), True, 'async'),
+            ('both, ranked, no hedge', ('deepseek', 'huggingface'), False, 'async'),
+            ('both, ranked + hedged', ('deepseek', 'huggingface'), True, 'async'),
+            ('both, hedged (sync pool)', ('deepseek', 'huggingface'), True, 'sync'),
+        ]
+
+        saved = ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT, ai_coach.DEEPSEEK_API_KEY, ai_coach.DEEPSEEK_ENDPOINT
+        rows = []
+        with scratch_metrics(), StubServer(responder('huggingface', [{'generated_text': COMPLETION}])) as hf, \
+                StubServer(responder('deepseek', {'choices': [{'message': {'content': COMPLETION}}]})) as deepseek:
+            ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = 'bench-key', hf.url + '/models/bench'
+            ai_coach.DEEPSEEK_API_KEY, ai_coach.DEEPSEEK_ENDPOINT = 'bench-key', deepseek.url + '/v1/chat/completions'
+            stubs = {'huggingface': hf, 'deepseek': deepseek}
+            try:
+                for label, providers, hedge, mode in scenarios:
+                    rows.append((label, *self._scenario(providers, hedge, mode, stubs, options)))
+            finally:
+                ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT, ai_coach.DEEPSEEK_API_KEY, ai_coach.DEEPSEEK_ENDPOINT = saved
+                ai_router.reset()
+
+        self.stdout.write(
+            f"Stub latency: huggingface {options['huggingface']}, deepseek {options['deepseek']}; "
+            f"{options['requests']} calls, {options['concurrency']} concurrent"
+        )
+        self.stdout.write(
+            f"{'':>30} | {'p50':>7} | {'p95':>7} | {'p99':>7} | {'max':>7} | {'extra calls':>11} | "
+            f"{'cancelled':>9} | answered by"
+        )
+        baseline = None
+        for label, latencies, extra, cancelled, winners in rows:
+            stats = summarize(latencies)
+            baseline = baseline or stats
+            self.stdout.write(
+                f"{label:>30} | {stats['p50_ms']:>4.0f} ms | {stats['p95_ms']:>4.0f} ms | "
+                f"{stats['p99_ms']:>4.0f} ms | {max(latencies) * 1000:>4.0f} ms | {extra:>10.1%} | "
+                f"{cancelled:>9} | " + ", ".join(f"{name} {count}" for name, count in sorted(winners.items()))
+            )
+        best = summarize(rows[3][1])
+        self.stdout.write(
+            f"p99 {baseline['p99_ms']:.0f} ms -> {best['p99_ms']:.0f} ms "
+            f"({1 - best['p99_ms'] / baseline['p99_ms']:.0%} lower) with hedged routing"
+        )
+
+    def _scenario(self, providers, hedge, mode, stubs, options):
+        provider_settings = {name: {'MAX_RETRIES': 0, 'EXPECTED_LATENCY': 0.5} for name in providers}
+        provider_settings['mock'] = {'FALLBACK': True}
+        ai_transport.reset_breakers()
+        with override_settings(AI_PROVIDERS=provider_settings, AI_ROUTER={'HEDGE': hedge}):
+            router = ai_router.get_router()
+            run = self._run_async if mode == 'async' else self._run_sync
+            run(router, options['warmup'], options['concurrency'])
+            before = sum(stubs[name].requests for name in providers)
+            cancelled_before = sum(s['cancelled'] for s in router.snapshot().values())
+            latencies, winners = run(router, options['requests'], options['concurrency'])
+            calls = sum(stubs[name].requests for name in providers) - before
+            cancelled = sum(s['cancelled'] for s in router.snapshot().values()) - cancelled_before
+
+        extra = calls / options['requests'] - 1
+        if hedge and mode == 'async' and calls > options['requests'] and not cancelled:
+            raise CommandError("Hedged requests were sent but no loser was cancelled")
+        return latencies, extra, cancelled, winners
+
+    def _check(self, result, provider, winners):
+        if not result or result['discipline_score'] != 3:
+            raise CommandError(f"Router returned {result!r}")
+        winners[provider] = winners.get(provider, 0) + 1
+
+    def _run_async(self, router, n, concurrency):
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            winners = {}
+
+            async def one():
+                async with semaphore:
+                    with Timer() as t:
+                        result, provider = await router.aroute(TRADE_DATA)
+                    self._check(result, provider, winners)
+                    return t.elapsed
+
+            latencies = await asyncio.gather(*(one() for _ in range(n)))
+            return list(latencies), winners
+
+        return async_to_sync(main)()
+
+    def _run_sync(self, router, n, concurrency):
+        winners = {}
+
+        def one(_):
+            with Timer() as t:
+                result, provider = router.route(TRADE_DATA)
+            self._check(result, provider, winners)
+            return t.elapsed
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(one, range(n))), winners
@@ -0,0 +1,87 @@
+# trademind_app/management/commands/bench_ai_transport.py
+import itertools
+
+import requests
+from django.core.management.base import BaseCommand
+
+from trademind_app import ai_transport
+from trademind_app.bench import StubServer, Timer, summarize
+
+OK_BODY = [{'generated_text': '{"insight": "x", "risk_pattern": "None", "discipline_score": 7, "coaching_tip": "y"}'}]
+
+
+class Command(BaseCommand):
+    help = (
+        "Exercise the pooled AI transport against a local stub provider: connection reuse, "
+        "cold-model (503 estimated_time) retries, and latency saved while the circuit breaker is open."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=50)
+        parser.add_argument('--failure-latency', type=float, default=0.2,
+                            help="Seconds the stub takes to return each 503 in the breaker scenario")
+
+    def handle(self, *args, **options):
+        calls = options['calls']
+        self._connection_reuse(calls)
+        self._cold_model()
+        self._breaker(calls, options['failure_latency'])
+
+    def _connection_reuse(self, calls):
+        self.stdout.write("== Connection reuse ==")
+        for label, post in (
+            ('bare requests.post', lambda url: requests.post(url, json={'inputs': 'x'}, timeout=5)),
+            ('pooled session', lambda url: ai_transport.post_json('bench-pool', url, {'inputs': 'x'})),
+        ):
+            ai_transport.reset_session()
+            with StubServer(lambda path, body: (200, OK_BODY, 0)) as stub:
+                samples = []
+                for _ in range(calls):
+                    with Timer() as t:
+                        post(stub.url + '/models/bench')
+                    samples.append(t.elapsed)
+                stats = summarize(samples)
+                self.stdout.write(
+                    f"{label:>20}: {stub.connections:>3} TCP connections for {stub.requests} calls, "
+                    f"p50 {stats['p50_ms']}ms, total {sum(samples) * 1000:.1f}ms"
+                )
+
+    def _cold_model(self):
+        self.stdout.write("== Cold model (503 + estimated_time) ==")
+        counter = itertools.count()
+
+        def respond(path, body):
+            if next(counter) < 2:
+                return 503, {'error': 'Model is currently loading', 'estimated_time': 0.3}, 0
+            return 200, OK_BODY, 0
+
+        ai_transport.reset_breakers()
+        with StubServer(respond) as stub, Timer() as t:
+            response = ai_transport.post_json('bench-cold', stub.url + '/models/bench', {'inputs': 'x'})
+        self.stdout.write(
+            f"status {response.status_code} after {stub.requests} attempts, waited {t.elapsed:.2f}s "
+            "(would have fallen through to the mock insight before)"
+        )
+
+    def _breaker(self, calls, failure_latency):
+        self.stdout.write("== Circuit breaker ==")
+        ai_transport.reset_breakers()
+        breaker = ai_transport.get_breaker('bench-breaker')
+        closed, opened = [], []
+        with StubServer(lambda path, body: (503, {'error': 'overloaded'}, failure_latency)) as stub:
+            for _ in range(calls):
+                state = breaker.state
+                with Timer() as t:
+                    try:
+                        ai_transport.post_json('bench-breaker', stub.url + '/models/bench', {'inputs': 'x'}, max_retries=0)
+                    except ai_transport.ProviderError:
+                        pass
+                (opened if state == breaker.OPEN else closed).append(t.elapsed)
+            sent = stub.requests
+
+        closed_stats, open_stats = summarize(closed), summarize(opened)
+        self.stdout.write(f"breaker closed: {closed_stats['n']:>3} calls hit the provider, p50 {closed_stats['p50_ms']}ms")
+        self.stdout.write(f"breaker open:   {open_stats['n']:>3} calls skipped,           p50 {open_stats['p50_ms']}ms")
+        self.stdout.write(
+            f"requests sent: {sent}/{calls}, time saved ~{(closed_stats['mean_ms'] - open_stats['mean_ms']) * open_stats['n'] / 1000:.2f}s"
+        )
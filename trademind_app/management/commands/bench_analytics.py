@@ -0,0 +1,135 @@
+# trademind_app/management/commands/bench_analytics.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from trademind_app import analytics
+from trademind_app.bench import Timer, logged_in_client, make_user, sandbox, seed_journal, summarize
+from trademind_app.models import Trade
+from trademind_app.pagination import RULES_FOLLOWED_N
+
+
+def orm_report(user, rules_total):
+    """
+    The same numbers as analytics.report() from ORM GROUP BY queries (one per
+    breakdown), for comparison.
+    """
+    trades = Trade.objects.filter(user=user).annotate(pnl=analytics.signed_pnl())
+    metrics = dict(
+        trades=Count('id'),
+        won=Count('id', filter=Q(pnl__gt=0)),
+        lost=Count('id', filter=Q(pnl__lt=0)),
+        gross_profit=Coalesce(Sum('pnl', filter=Q(pnl__gt=0)), 0, output_field=FloatField()),
+        gross_loss=Coalesce(Sum(-F('pnl'), filter=Q(pnl__lt=0)), 0, output_field=FloatField()),
+    )
+    return {
+        'overall': trades.aggregate(**metrics),
+        'by_emotion': list(trades.values('pre_trade_emotion').annotate(**metrics).order_by()),
+        'by_session': list(trades.values('session').annotate(**metrics).order_by()),
+        'by_pair': list(trades.values('pair').annotate(**metrics).order_by()),
+        'by_discipline': list(
+            trades.alias(rules_followed_n=RULES_FOLLOWED_N)
+            .annotate(followed_all=Q(rules_followed_n__gte=rules_total))
+            .values('followed_all').annotate(**metrics).order_by()
+        ) if rules_total else [],
+        'transitions': list(trades.values('pre_trade_emotion', 'post_trade_emotion').annotate(n=Count('id')).order_by()),
+        'grid': list(trades.values('pre_trade_emotion', 'session').annotate(n=Count('id'), net=Sum('pnl')).order_by()),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare analytics.report() (cached NumPy column snapshot) with the equivalent ORM GROUP BY "
+        "queries at several journal sizes, and check both agree. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help="Comma-separated trades per user")
+        parser.add_argument('--samples', type=int, default=10)
+
+    def handle(self, *args, **options):
+        n = options['samples']
+        self.stdout.write(
+            f"{'trades':>8} | {'ORM queries p50':>15} | {'snapshot load':>13} | {'report (cached) p50':>19} | "
+            f"{'endpoint p50':>12} | {'snapshot KiB':>12}"
+        )
+        with sandbox():
+            for size in [int(x) for x in options['sizes'].split(',')]:
+                user = make_user(f'bench_analytics_{size}')
+                seed_journal(user, size, seed=size)
+                analytics.invalidate(user.pk)  # bulk inserts skip the signal handlers
+                rules_total = analytics.rule_cache.rules_total(user.pk)
+
+                orm = []
+                for _ in range(n):
+                    with Timer() as t:
+                        expected = orm_report(user, rules_total)
+                    orm.append(t.elapsed)
+
+                with Timer() as load:
+                    columns = analytics.load_columns(user.pk)
+                analytics.get_columns(user.pk)  # warm the cache
+                cached = []
+                for _ in range(n):
+                    with Timer() as t:
+                        report = analytics.report(user.pk)
+                    cached.append(t.elapsed)
+                self._check(report, expected)
+
+                client = logged_in_client(user)
+                url = reverse('trademind_app:analytics_data')
+                endpoint = []
+                for _ in range(n):
+                    with Timer() as t:
+                        client.get(url)
+                    endpoint.append(t.elapsed)
+
+                size_kib = sum(getattr(columns, name).nbytes for name in
+                               ('ids', 'pnl', 'pre', 'post', 'session', 'pair', 'rules_followed', 'day')) / 1024
+                self.stdout.write(
+                    f"{size:>8} | {summarize(orm)['p50_ms']:>12.1f} ms | {load.elapsed * 1000:>10.1f} ms | "
+                    f"{summarize(cached)['p50_ms']:>16.2f} ms | {summarize(endpoint)['p50_ms']:>9.1f} ms | "
+                    f"{size_kib:>12.0f}"
+                )
+
+                # A logged trade must show up in the next report
+                trade = Trade.objects.filter(user=user).first()
+                trade.pk = None
+                trade.save()
+                if analytics.report(user.pk)['trades'] != size + 1:
+                    raise CommandError("Snapshot was not invalidated by a trade write")
+
+    def _check(self, report, expected):
+        """
+        The vectorized and ORM numbers must agree.
+        """
+        def close(a, b):
+            return abs((a or 0) - (b or 0)) < 0.01
+
+        overall = expected['overall']
+        problems = []
+        if report['overall']['trades'] != overall['trades']:
+            problems.append('overall trades')
+        if not close(report['overall']['net_pnl'], overall['gross_profit'] - overall['gross_loss']):
+            problems.append('overall net P&L')
+        for row in expected['by_emotion']:
+            mine = next(r for r in report['by_emotion'] if r['key'] == row['pre_trade_emotion'])
+            if mine['trades'] != row['trades'] or not close(mine['win_rate'], round(100 * row['won'] / row['trades'], 1)) \
+                    or not close(mine['expectancy'], round((row['gross_profit'] - row['gross_loss']) / row['trades'], 2)):
+                problems.append(f"emotion {row['pre_trade_emotion']}")
+        for row in expected['by_pair']:
+            mine = next(r for r in report['by_pair'] if r['key'] == row['pair'])
+            if row['gross_loss'] and not close(mine['profit_factor'], round(row['gross_profit'] / row['gross_loss'], 2)):
+                problems.append(f"pair {row['pair']}")
+        counts = report['emotion_transitions']['counts']
+        emotions = analytics.EMOTIONS
+        for row in expected['transitions']:
+            if counts[emotions.index(row['pre_trade_emotion'])][emotions.index(row['post_trade_emotion'])] != row['n']:
+                problems.append('transition matrix')
+                break
+        followed = {row['followed_all']: row['trades'] for row in expected['by_discipline']}
+        if report['by_discipline'] and report['by_discipline'][1]['trades'] != followed.get(True, 0):
+            problems.append('discipline split')
+        if problems:
+            raise CommandError("NumPy and ORM analytics disagree: " + ", ".join(problems))
@@ -0,0 +1,179 @@
+# trademind_app/management/commands/bench_async_insight.py
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from trademind_app import ai_coach, ai_transport, jobs
+from trademind_app.bench import (
+    StubServer, Timer, asgi_get, committed_sandbox, make_trades, make_user, session_cookie, summarize,
+    token_stream,
+)
+from trademind_app.models import AIInsight
+
+COMPLETION = (
+    '{"insight": "Sizing up after two wins turned a planned setup into an overconfident entry.", '
+    '"risk_pattern": "Overconfidence", "discipline_score": 5, '
+    '"coaching_tip": "Keep position size fixed for the session, whatever the last result."}'
+)
+
+
+def app_threads():
+    # Threads of the app process, not the stub's one-per-connection handlers
+    return sum(1 for thread in threading.enumerate() if 'process_request_thread' not in thread.name)
+
+
+def peak_overlap(intervals):
+    """
+    Most intervals open at the same time.
+    """
+    edges = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    peak = current = 0
+    for _, step in edges:
+        current += step
+        peak = max(peak, current)
+    return peak
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent AI insight requests served by one process against a stub provider that takes "
+        "2-5 s per call: the blocking client on a worker's thread pool (before) vs. the asyncio client "
+        "on one event loop (after), then end to end through core/asgi.py (insight page + stream). "
+        "Its data is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=40, help="Concurrent insight requests")
+        parser.add_argument('--threads', type=int, default=8, help="Threads of a sync worker (gthread)")
+        parser.add_argument('--min-latency', type=float, default=2.0)
+        parser.add_argument('--max-latency', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        n, threads = options['requests'], options['threads']
+        rng = random.Random(19)
+        calls, calls_lock = [], threading.Lock()
+
+        def respond(path, body):
+            delay = rng.uniform(options['min_latency'], options['max_latency'])
+            now = time.perf_counter()
+            with calls_lock:
+                calls.append((now, now + delay))
+            if body.get('stream'):
+                return 200, token_stream(COMPLETION, tokens=20, interval=0.01), delay
+            return 200, [{'generated_text': COMPLETION}], delay
+
+        saved = ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT
+        ai_transport.reset_breakers()
+        # No insight cache: identical prompts must still reach the provider
+        with committed_sandbox('bench_async'), override_settings(INSIGHT_CACHE={'ENABLED': False}), \
+                StubServer(respond) as stub:
+            ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = 'bench-key', stub.url + '/models/bench'
+            try:
+                user = make_user('bench_async')
+                trades = make_trades(user, n)
+                trade_data = [jobs.build_trade_data(trade) for trade in trades]
+
+                rows = []
+                calls.clear()
+                sync_wall, sync_latency = self._sync(trade_data, threads)
+                rows.append(('before: blocking client', f"{threads} threads", sync_wall, sync_latency,
+                             peak_overlap(calls)))
+
+                calls.clear()
+                async_wall, async_latency = async_to_sync(self._async)(trade_data)
+                rows.append(('after: asyncio client', '1 event loop', async_wall, async_latency,
+                             peak_overlap(calls)))
+
+                calls.clear()
+                e2e_wall, e2e_latency, peak_threads = async_to_sync(self._asgi)(user, trades)
+                rows.append(('after: ASGI page + stream', '1 event loop', e2e_wall, e2e_latency,
+                             peak_overlap(calls)))
+
+                stored = AIInsight.objects.filter(trade__in=trades, source='provider').count()
+                if stored != n:
+                    raise CommandError(f"Expected {n} stored provider insights, found {stored}")
+            finally:
+                ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = saved
+
+        self.stdout.write(
+            f"{n} concurrent insight requests, provider latency "
+            f"{options['min_latency']:.0f}-{options['max_latency']:.0f} s"
+        )
+        self.stdout.write(
+            f"{'':>27} | {'runs on':>18} | {'wall':>7} | {'p50':>7} | {'p95':>7} | "
+            f"{'in flight':>9} | {'req/s':>6}"
+        )
+        for label, runs_on, wall, latency, in_flight in rows:
+            stats = summarize(latency)
+            self.stdout.write(
+                f"{label:>27} | {runs_on:>18} | {wall:>5.1f} s | {stats['p50_ms'] / 1000:>5.1f} s | "
+                f"{stats['p95_ms'] / 1000:>5.1f} s | {in_flight:>9} | {n / wall:>6.1f}"
+            )
+        self.stdout.write(
+            f"ASGI peak: {peak_threads} threads in the process, Django's per-request sync_to_async executors "
+            f"(ORM, render); none of them waits on the provider."
+        )
+
+    def _sync(self, trade_data, threads):
+        # A gthread worker: each request holds a thread while the provider thinks
+        latencies = []
+
+        def one(data):
+            with Timer() as t:
+                ai_coach.get_ai_insight(data)
+            return t
+
+        with Timer() as wall, ThreadPoolExecutor(max_workers=threads) as pool:
+            start = time.perf_counter()
+            for t in pool.map(one, trade_data):
+                latencies.append(t.start + t.elapsed - start)  # including the wait for a free thread
+        return wall.elapsed, latencies
+
+    async def _async(self, trade_data):
+        async def one(data):
+            with Timer() as t:
+                result = await ai_coach.aget_ai_insight(data)
+            if result['discipline_score'] != 5:
+                raise CommandError("Async client fell back to the mock insight")
+            return t.elapsed
+
+        with Timer() as wall:
+            latencies = await asyncio.gather(*(one(data) for data in trade_data))
+        return wall.elapsed, latencies
+
+    async def _asgi(self, user, trades):
+        # What a browser does: load the insight page, then open its stream
+        cookie = await asyncio.to_thread(session_cookie, user)
+        peak_threads = app_threads()
+
+        async def one(trade):
+            with Timer() as t:
+                status, _ = await asgi_get(reverse('trademind_app:ai_insight', args=[trade.id]), cookie)
+                if status != 200:
+                    raise CommandError(f"ai_insight returned {status}")
+                path = reverse('trademind_app:ai_insight_stream', args=[trade.id])
+                status, chunks = await asgi_get(path, cookie)
+                if status != 200 or b'event: done' not in chunks[-1][1]:
+                    raise CommandError(f"Stream for trade {trade.id} did not finish")
+            return t.elapsed
+
+        async def sample_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, app_threads())
+                await asyncio.sleep(0.05)
+
+        sampler = asyncio.create_task(sample_threads())
+        try:
+            with Timer() as wall:
+                latencies = await asyncio.gather(*(one(trade) for trade in trades))
+        finally:
+            sampler.cancel()
+        return wall.elapsed, latencies, peak_threads
@@ -0,0 +1,40 @@
+# trademind_app/management/commands/bench_backfill.py
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from trademind_app import ai_coach
+from trademind_app.backfill import pending_trades, run_backfill
+from trademind_app.bench import make_trades, make_user, sandbox, stub_provider
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure backfill_insights throughput (trades/sec) at several concurrency levels "
+        "against a stubbed provider. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=200, help="Trades per concurrency level")
+        parser.add_argument('--latency', type=float, default=0.05, help="Stub provider latency in seconds")
+        parser.add_argument('--concurrency', default='1,4,16', help="Comma-separated thread counts")
+        parser.add_argument('--rate', type=float, default=None, help="Optional global calls/sec limit")
+
+    def handle(self, *args, **options):
+        levels = [int(x) for x in options['concurrency'].split(',')]
+        self.stdout.write(
+            f"{options['trades']} trades per level, stub latency {options['latency'] * 1000:.0f}ms"
+            + (f", rate limit {options['rate']}/s" if options['rate'] else "")
+        )
+        self.stdout.write(f"{'threads':>8} | {'seconds':>8} | {'trades/sec':>10}")
+
+        with sandbox(), override_settings(INSIGHT_CACHE={'ENABLED': False}), \
+                mock.patch.object(ai_coach, '_call_providers', stub_provider(options['latency'])):
+            for level in levels:
+                user = make_user(f'bench_backfill_{level}')
+                make_trades(user, options['trades'], seed=level)
+                stats = run_backfill(
+                    pending_trades(user=user), concurrency=level, rate=options['rate'], page_size=100,
+                )
+                self.stdout.write(f"{level:>8} | {stats.elapsed:>8.2f} | {stats.rate:>10.1f}")
@@ -0,0 +1,152 @@
+# trademind_app/management/commands/bench_batch_prompts.py
+import json
+import random
+import re
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from trademind_app import ai_coach, ai_router, ai_transport, insight_cache
+from trademind_app.backfill import pending_trades, run_backfill
+from trademind_app.bench import StubServer, make_trades, make_user, sandbox
+from trademind_app.jobs import build_trade_data
+from trademind_app.models import AIInsight, Trade
+
+BATCH_ID = re.compile(r'^\s*\[([0-9a-f]{8})\]', re.MULTILINE)
+
+INSIGHT = {
+    'insight': "Entering before the confirmation candle closed shows anticipation overriding the plan's "
+               "trigger, a small emotional leak that erodes edge over many trades",
+    'risk_pattern': "Early entry",
+    'discipline_score': 6,
+    'coaching_tip': "Wait for the candle to close and say the trigger out loud before clicking buy or sell.",
+}
+
+LONG_REASON = (
+    "Saw the level hold twice on the hourly, but I was still annoyed about the morning loss and "
+    "kept telling myself this one would make it back. " * 12
+)
+
+
+def completion(ids, rng, malformed):
+    """
+    The stub model's answer: one insight for a single prompt, else a JSON
+    array with an item per id, some of them broken (unclosed object or a
+    missing key) with probability `malformed`.
+    """
+    if not ids:
+        return json.dumps(INSIGHT)
+    items = []
+    for trade_id in ids:
+        item = json.dumps({'id': trade_id, **INSIGHT, 'insight': f"{INSIGHT['insight']} [{trade_id}]"})
+        if rng.random() < malformed:
+            item = item[:-1] if rng.random() < 0.5 else item.replace('"coaching_tip"', '"tip"')
+        items.append(item)
+    return "[\n" + ",\n".join(items) + "\n]"
+
+
+class Command(BaseCommand):
+    help = (
+        "Batch prompt packing (ai_coach.get_batch_insights) through backfill_insights --prompt-batch "
+        "against a local stub model whose latency grows with prompt and completion tokens: provider "
+        "calls, tokens per trade and wall time per batch size. Some array items come back malformed "
+        "and must be retried alone. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=40)
+        parser.add_argument('--sizes', default='1,5,20', help="Comma-separated trades per prompt")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--rate', type=float, default=2.0, help="Provider calls/sec (a free-tier limit)")
+        parser.add_argument('--overhead', type=float, default=0.3, help="Stub seconds per call")
+        parser.add_argument('--prefill', type=float, default=5000, help="Stub prompt tokens read per second")
+        parser.add_argument('--decode', type=float, default=150, help="Stub completion tokens per second")
+        parser.add_argument('--malformed', type=float, default=0.05, help="Share of broken array items")
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options['sizes'].split(',')]
+        rng = random.Random(21)
+        calls, lock = [], threading.Lock()
+
+        def respond(path, body):
+            prompt = body['inputs']
+            ids = BATCH_ID.findall(prompt)
+            with lock:
+                text = completion(ids, rng, options['malformed'])
+            # Generation stops at the completion budget, mid-item if need be
+            text = text[:body['parameters']['max_new_tokens'] * 4]
+            prompt_tokens, completion_tokens = ai_coach._estimate_tokens(prompt), ai_coach._estimate_tokens(text)
+            with lock:
+                calls.append((len(ids), prompt_tokens, completion_tokens))
+            delay = (options['overhead'] + prompt_tokens / options['prefill']
+                     + completion_tokens / options['decode'])
+            return 200, [{'generated_text': text}], delay
+
+        saved = ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT
+        providers = {'huggingface': {'MAX_RETRIES': 0}, 'mock': {'FALLBACK': True}}
+        rows = []
+        # No insight cache, no hedging: every trade reaches the stub exactly as routed
+        with sandbox(), StubServer(respond) as stub, override_settings(
+                INSIGHT_CACHE={'ENABLED': False}, AI_PROVIDERS=providers, AI_ROUTER={'HEDGE': False}):
+            ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = 'bench-key', stub.url + '/models/bench'
+            ai_transport.reset_breakers()
+            try:
+                for size in sizes:
+                    user = make_user(f'bench_batch_{size}')
+                    trades = make_trades(user, options['trades'], seed=size)
+                    # Every 4th trade has a long journal entry, trimmed to REASON_TOKENS
+                    Trade.objects.filter(id__in=[t.id for t in trades[::4]]).update(reason=LONG_REASON)
+                    calls.clear()
+                    stats = run_backfill(
+                        pending_trades(user=user), concurrency=options['concurrency'], rate=options['rate'],
+                        write_mock=False, prompt_batch=size,
+                    )
+                    self._check(user, options['trades'])
+                    rows.append((size, stats.elapsed, list(calls)))
+            finally:
+                ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = saved
+                ai_router.reset()
+
+        n = options['trades']
+        self.stdout.write(
+            f"{n} trades, {options['concurrency']} concurrent, {options['rate']:g} calls/s; stub "
+            f"{options['overhead']:g} s + {options['prefill']:g} prompt / {options['decode']:g} completion "
+            f"tokens/s, {options['malformed']:.0%} malformed items"
+        )
+        self.stdout.write(
+            f"{'per prompt':>10} | {'calls':>5} | {'retried':>7} | {'prompt tok/trade':>16} | "
+            f"{'completion tok/trade':>20} | {'total tok/trade':>15} | {'wall':>7}"
+        )
+        baseline = None
+        for size, wall, made in rows:
+            prompt_tokens = sum(c[1] for c in made) / n
+            completion_tokens = sum(c[2] for c in made) / n
+            retried = sum(1 for c in made if not c[0]) if size > 1 else 0
+            baseline = baseline or (prompt_tokens + completion_tokens, wall)
+            self.stdout.write(
+                f"{size:>10} | {len(made):>5} | {retried:>7} | {prompt_tokens:>16.0f} | "
+                f"{completion_tokens:>20.0f} | {prompt_tokens + completion_tokens:>15.0f} | {wall:>5.1f} s"
+            )
+        for size, wall, made in rows[1:]:
+            tokens = sum(c[1] + c[2] for c in made) / n
+            self.stdout.write(
+                f"{size} per prompt: {1 - tokens / baseline[0]:.0%} fewer tokens per trade, "
+                f"wall {wall / baseline[1]:.2f}x"
+            )
+        self.stdout.write(
+            f"Long reason: {ai_coach._estimate_tokens(LONG_REASON)} tokens -> "
+            f"{ai_coach._estimate_tokens(ai_coach._trim_reason(LONG_REASON))} in the prompt"
+        )
+
+    def _check(self, user, n):
+        insights = AIInsight.objects.filter(trade__user=user, source='provider').select_related('trade')
+        if len(insights) != n:
+            raise CommandError(f"Expected {n} provider insights, found {len(insights)}")
+        # Batched answers carry their id: each one must have landed on its own trade
+        for insight in insights:
+            match = re.search(r'\[([0-9a-f]{8})\]$', insight.insight)
+            if match:
+                trade_id = ai_coach._batch_id(insight_cache.fingerprint(build_trade_data(insight.trade)))
+                if match.group(1) != trade_id:
+                    raise CommandError(f"Trade {insight.trade_id} got the answer for {match.group(1)}")
@@ -0,0 +1,155 @@
+# trademind_app/management/commands/bench_cache.py
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from trademind_app.bench import percentile
+
+BACKENDS = {
+    'sqlite': 'trademind_app.cache_backend.SQLiteCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+
+def make_cache(name, location, max_entries):
+    return import_string(BACKENDS[name])(location, {'OPTIONS': {'MAX_ENTRIES': max_entries}})
+
+
+def worker(name, location, options, barrier, results):
+    """
+    One worker process: mixed get/set throughput, then racing `add` locks,
+    then `incr` on a shared counter. LocMem starts from nothing in every
+    process: that is the point of comparing it.
+    """
+    cache = make_cache(name, location, options['keys'] * 2)
+    rng = random.Random(os.getpid())
+    value = 'x' * options['value_size']
+    if name == 'locmem':
+        cache.set_many({f'bench:{i}': value for i in range(options['keys'])})
+        cache.add('bench:counter', 0, timeout=None)
+
+    barrier.wait()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(options['ops']):
+        key = f"bench:{rng.randrange(options['keys'])}"
+        t = time.perf_counter()
+        if rng.random() < options['write_ratio']:
+            cache.set(key, value)
+        else:
+            cache.get(key)
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+
+    barrier.wait()
+    won = [i for i in range(options['locks']) if cache.add(f'bench:lock:{i}', os.getpid(), timeout=30)]
+
+    barrier.wait()
+    for _ in range(options['increments']):
+        cache.incr('bench:counter')
+    barrier.wait()
+    results.put((elapsed, latencies, won, cache.get('bench:counter')))
+
+
+class Command(BaseCommand):
+    help = (
+        "Cache backends under several worker processes: get/set throughput, then lock correctness "
+        "(each racing cache.add lock must have exactly one winner) and incr atomicity (the shared "
+        "counter must end at processes x increments), plus TTL and size-cap checks. LocMem (one cache "
+        "per process) is shown for comparison; add Redis with --redis-url. Uses a scratch cache file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--ops', type=int, default=5000, help="get/set calls per process")
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--value-size', type=int, default=200, help="Bytes per value")
+        parser.add_argument('--write-ratio', type=float, default=0.1)
+        parser.add_argument('--locks', type=int, default=500, help="Lock keys every process races for")
+        parser.add_argument('--increments', type=int, default=1000, help="incr calls per process")
+        parser.add_argument('--redis-url', default=os.getenv('REDIS_URL'))
+
+    def handle(self, *args, **options):
+        scratch = tempfile.mkdtemp(prefix='bench_cache_')
+        locations = {'sqlite': os.path.join(scratch, 'cache.sqlite3'), 'locmem': 'bench-cache'}
+        if options['redis_url']:
+            locations['redis'] = options['redis_url']
+
+        self._check_ttl_and_cap(os.path.join(scratch, 'cap.sqlite3'))
+
+        procs = options['processes']
+        self.stdout.write(
+            f"{procs} processes x {options['ops']} ops ({options['write_ratio']:.0%} writes) on "
+            f"{options['keys']} keys of {options['value_size']} bytes; {options['locks']} locks, "
+            f"{options['increments']} incr per process"
+        )
+        self.stdout.write(
+            f"{'backend':>7} | {'ops/s':>8} | {'p50':>8} | {'p99':>8} | {'locks with 1 winner':>19} | "
+            f"{'counter':>15} | shared"
+        )
+        failures = []
+        for name, location in locations.items():
+            ops_per_sec, latencies, single_winner, counter = self._run(name, location, options)
+            expected = procs * options['increments']
+            correct = single_winner == options['locks'] and counter == expected
+            self.stdout.write(
+                f"{name:>7} | {ops_per_sec:>8.0f} | {percentile(latencies, 50) * 1e6:>5.1f} us | "
+                f"{percentile(latencies, 99) * 1e6:>5.1f} us | {single_winner:>8}/{options['locks']:<10} | "
+                f"{counter:>6}/{expected:<8} | {'yes' if correct else 'no'}"
+            )
+            if name != 'locmem' and not correct:
+                failures.append(name)
+        if failures:
+            raise CommandError(f"Locks or counters not shared across processes: {', '.join(failures)}")
+
+    def _run(self, name, location, options):
+        cache = make_cache(name, location, options['keys'] * 2)
+        if name != 'locmem':
+            cache.clear()
+            value = 'x' * options['value_size']
+            cache.set_many({f'bench:{i}': value for i in range(options['keys'])})
+            cache.add('bench:counter', 0, timeout=None)
+
+        ctx = multiprocessing.get_context('fork')
+        barrier = ctx.Barrier(options['processes'])
+        results = ctx.Queue()
+        workers = [
+            ctx.Process(target=worker, args=(name, location, options, barrier, results))
+            for _ in range(options['processes'])
+        ]
+        for process in workers:
+            process.start()
+        outcomes = [results.get(timeout=300) for _ in workers]
+        for process in workers:
+            process.join()
+
+        elapsed = max(outcome[0] for outcome in outcomes)
+        latencies = [latency for outcome in outcomes for latency in outcome[1]]
+        winners = {}
+        for outcome in outcomes:
+            for lock in outcome[2]:
+                winners[lock] = winners.get(lock, 0) + 1
+        single_winner = sum(1 for count in winners.values() if count == 1)
+        counter = max(outcome[3] for outcome in outcomes)
+        return len(latencies) / elapsed, latencies, single_winner, counter
+
+    def _check_ttl_and_cap(self, location):
+        cache = make_cache('sqlite', location, 1000)
+        cache.set('bench:short', 'gone soon', timeout=1)
+        cache.set('bench:long', 'stays', timeout=60)
+        time.sleep(1.1)
+        if cache.get('bench:short') is not None or cache.get('bench:long') != 'stays':
+            raise CommandError("TTL not honoured")
+        for i in range(5000):
+            cache.set(f'bench:cap:{i}', i)
+        size = cache.size()
+        # Culled every CULL_EVERY (100) writes: at most that many over the cap
+        if size > 1000 + 100:
+            raise CommandError(f"Size cap of 1000 exceeded: {size} entries")
+        self.stdout.write(f"TTL expiry ok; 5000 sets into MAX_ENTRIES=1000 left {size} entries")
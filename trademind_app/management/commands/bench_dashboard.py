@@ -0,0 +1,70 @@
+# trademind_app/management/commands/bench_dashboard.py
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Case, FloatField, When
+from django.urls import reverse
+
+from trademind_app import stats as trader_stats
+from trademind_app.bench import Timer, logged_in_client, make_trades, make_user, sandbox, summarize
+from trademind_app.models import Trade
+
+
+def legacy_aggregates(user):
+    """
+    The per-request queries the dashboard used to run before TraderStats.
+    """
+    trades = Trade.objects.filter(user=user)
+    total = trades.count()
+    winning = trades.filter(profit__isnull=False).count()
+    losing = trades.filter(loss__isnull=False, profit__isnull=True).count()
+    emotion_pnl = list(trades.values('pre_trade_emotion').annotate(
+        avg_pnl=Avg(Case(
+            When(profit__isnull=False, then='profit'),
+            When(loss__isnull=False, then='loss'),
+            output_field=FloatField(),
+        ))
+    ))
+    return total, winning, losing, emotion_pnl
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare dashboard aggregate cost before (COUNT + GROUP BY per request) and after "
+        "(one TraderStats lookup) at several journal sizes. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,10000,100000', help="Comma-separated trades per user")
+        parser.add_argument('--requests', type=int, default=20, help="Samples per measurement")
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options['sizes'].split(',')]
+        n = options['requests']
+        self.stdout.write(
+            f"{'trades':>8} | {'legacy aggs p50':>15} | {'stats row p50':>13} | {'dashboard GET p50':>17} | {'p99':>8}"
+        )
+
+        with sandbox():
+            for size in sizes:
+                user = make_user(f'bench_dash_{size}')
+                make_trades(user, size, seed=size)
+                trader_stats.rebuild(user.pk)  # bulk_create bypasses the signal handlers
+                client = logged_in_client(user)
+                url = reverse('trademind_app:dashboard')
+
+                legacy, lookup, view = [], [], []
+                for _ in range(n):
+                    with Timer() as t:
+                        legacy_aggregates(user)
+                    legacy.append(t.elapsed)
+                    with Timer() as t:
+                        trader_stats.for_user(user)
+                    lookup.append(t.elapsed)
+                    with Timer() as t:
+                        client.get(url)
+                    view.append(t.elapsed)
+
+                legacy_s, lookup_s, view_s = summarize(legacy), summarize(lookup), summarize(view)
+                self.stdout.write(
+                    f"{size:>8} | {legacy_s['p50_ms']:>13.2f}ms | {lookup_s['p50_ms']:>11.2f}ms | "
+                    f"{view_s['p50_ms']:>15.2f}ms | {view_s['p99_ms']:>6.1f}ms"
+                )
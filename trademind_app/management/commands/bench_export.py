@@ -0,0 +1,67 @@
+# trademind_app/management/commands/bench_export.py
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from trademind_app import export
+from trademind_app.bench import Timer, logged_in_client, make_user, sandbox, seed_journal
+from trademind_app.models import AIInsight
+
+
+class Command(BaseCommand):
+    help = (
+        "Show that journal export memory stays flat as the journal grows: peak allocated memory "
+        "and throughput of the streamed export at several sizes. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,10000,50000', help="Comma-separated trades per journal")
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options['sizes'].split(',')]
+        fmt, gzip = options['format'], options['gzip']
+        self.stdout.write(f"format={fmt} gzip={gzip}")
+        self.stdout.write(
+            f"{'trades':>8} | {'bytes':>12} | {'seconds':>8} | {'trades/sec':>10} | "
+            f"{'peak KiB (stream)':>17} | {'peak KiB (view)':>15}"
+        )
+
+        with sandbox():
+            for size in sizes:
+                user = make_user(f'bench_export_{size}')
+                trades = seed_journal(user, size, seed=size)
+                AIInsight.objects.bulk_create(
+                    (AIInsight(trade=trade, insight="Seeded insight.", risk_pattern="None", discipline_score=6,
+                               coaching_tip="Seeded tip.", source='provider') for trade in trades[::2]),
+                    batch_size=1000,
+                )
+                del trades
+
+                # Export consumed the way the response/command does: block by block.
+                # Timed without tracemalloc, which slows allocation-heavy code a lot.
+                with Timer() as t:
+                    written = sum(len(block) for block in export.stream_export(
+                        export.export_queryset(user), fmt, gzip=gzip))
+                tracemalloc.start()
+                for _ in export.stream_export(export.export_queryset(user), fmt, gzip=gzip):
+                    pass
+                _, stream_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                # Through the view (StreamingHttpResponse + test client)
+                client = logged_in_client(user)
+                url = reverse('trademind_app:export_trades', args=[fmt])
+                tracemalloc.start()
+                response = client.get(url, {'gzip': '1'} if gzip else {})
+                for _ in response.streaming_content:
+                    pass
+                _, view_peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{size:>8} | {written:>12} | {t.elapsed:>8.2f} | {size / t.elapsed:>10.0f} | "
+                    f"{stream_peak / 1024:>17.0f} | {view_peak / 1024:>15.0f}"
+                )
@@ -0,0 +1,90 @@
+# trademind_app/management/commands/bench_import.py
+import io
+import random
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from trademind_app import importer
+from trademind_app.bench import Timer, make_user, sandbox
+from trademind_app.models import Trade
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD', 'AUDUSD.r', 'BTCUSD', 'USOIL']
+CSV_HEADER = ['Position', 'Time', 'Type', 'Volume', 'Symbol', 'Price', 'Close Time', 'Commission', 'Swap', 'Profit']
+
+
+def synthetic_rows(count, seed):
+    rng = random.Random(seed)
+    opened = datetime(2024, 1, 1)
+    for ticket in range(10_000_000, 10_000_000 + count):
+        opened += timedelta(minutes=rng.randint(5, 600))
+        closed = opened + timedelta(minutes=rng.randint(1, 300))
+        yield [
+            str(ticket), f"{opened:%Y.%m.%d %H:%M:%S}", rng.choice(['buy', 'sell']),
+            f"{rng.choice([0.01, 0.1, 0.5, 1.0, 2.0]):.2f}", rng.choice(SYMBOLS), f"{rng.uniform(1, 2000):.5f}",
+            f"{closed:%Y.%m.%d %H:%M:%S}", f"{-rng.uniform(0, 5):.2f}", f"{rng.uniform(-2, 1):.2f}",
+            f"{rng.gauss(5, 120):.2f}",
+        ]
+
+
+def synthetic_csv(count, seed=42):
+    lines = [','.join(CSV_HEADER)]
+    lines.extend(','.join(row) for row in synthetic_rows(count, seed))
+    # A deposit row, like real statements have
+    lines.append(f"1,2024.01.01 00:00:00,balance,,,,,0.00,0.00,1000.00")
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def synthetic_html(count, seed=42):
+    header = ''.join(f"<td>{name}</td>" for name in CSV_HEADER)
+    rows = ''.join(
+        '<tr>' + ''.join(f"<td>{cell}</td>" for cell in row) + '</tr>\n' for row in synthetic_rows(count, seed)
+    )
+    return (
+        "<html><body><div>Trade History Report</div><table>"
+        f"<tr><th colspan=\"10\">Positions</th></tr><tr>{header}</tr>\n{rows}"
+        "<tr><td colspan=\"10\">Orders</td></tr></table></body></html>"
+    ).encode()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import throughput for broker statements: fresh import and idempotent re-import of "
+        "synthetic MT5-style CSV and HTML statements. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000', help="Comma-separated trades per statement")
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+        parser.add_argument('--target', type=int, default=10_000, help="Trades/sec to flag as met")
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options['sizes'].split(',')]
+        self.stdout.write(
+            f"{'format':>8} | {'trades':>7} | {'bytes':>10} | {'fresh s':>8} | {'trades/sec':>10} | "
+            f"{'re-import s':>11} | {'trades/sec':>10} | {'created':>7} | {'dupes':>7}"
+        )
+        with sandbox():
+            for fmt, build in (('csv', synthetic_csv), ('mt5-html', synthetic_html)):
+                for size in sizes:
+                    user = make_user(f'bench_import_{fmt}_{size}')
+                    data = build(size, seed=size)
+                    with Timer() as fresh:
+                        first = importer.import_trades(user, io.BytesIO(data), fmt,
+                                                       batch_size=options['batch_size'])
+                    with Timer() as again:
+                        second = importer.import_trades(user, io.BytesIO(data), fmt,
+                                                        batch_size=options['batch_size'])
+                    assert Trade.objects.filter(user=user).count() == first.created
+                    assert second.created == 0 and second.duplicates == first.created, "re-import duplicated trades"
+                    self.stdout.write(
+                        f"{fmt:>8} | {size:>7} | {len(data):>10} | {fresh.elapsed:>8.2f} | "
+                        f"{self._rate(size, fresh.elapsed, options['target'])} | {again.elapsed:>11.2f} | "
+                        f"{self._rate(size, again.elapsed, options['target'])} | {first.created:>7} | "
+                        f"{second.duplicates:>7}"
+                    )
+
+    def _rate(self, size, seconds, target):
+        rate = size / seconds
+        text = f"{rate:>10.0f}"
+        return self.style.SUCCESS(text) if rate >= target else self.style.WARNING(text)
@@ -0,0 +1,64 @@
+# trademind_app/management/commands/bench_insight_queue.py
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from trademind_app import ai_coach
+from trademind_app.bench import Timer, logged_in_client, make_trades, make_user, sandbox, stub_provider, summarize
+from trademind_app.jobs import build_trade_data, claim_jobs, process_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Show that ai_insight latency no longer depends on LLM latency: compares the "
+        "old inline generation with the queued path under a stubbed provider. "
+        "Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10, help="Requests per latency level")
+        parser.add_argument('--latencies', default='0,0.5,2', help="Comma-separated stub LLM latencies in seconds")
+
+    def handle(self, *args, **options):
+        latencies = [float(x) for x in options['latencies'].split(',')]
+        n = options['requests']
+
+        with sandbox():
+            user = make_user('bench_queue_trader')
+            client = logged_in_client(user)
+            self.stdout.write(f"{'LLM latency':>12} | {'inline p50':>11} | {'queued p50':>11} | {'queued p99':>11}")
+
+            for latency in latencies:
+                trades = make_trades(user, 2 * n, seed=int(latency * 1000))
+                inline_trades, queued_trades = trades[:n], trades[n:]
+
+                with mock.patch.object(ai_coach, '_call_providers', stub_provider(latency)):
+                    # Before: the view generated the insight inline
+                    inline = []
+                    for trade in inline_trades:
+                        with Timer() as t:
+                            ai_coach.get_ai_insight(build_trade_data(trade))
+                            client.get(reverse('trademind_app:ai_insight', args=[trade.id]))
+                        inline.append(t.elapsed)
+
+                    # After: the view only enqueues and renders the pending state
+                    queued = []
+                    for trade in queued_trades:
+                        with Timer() as t:
+                            client.get(reverse('trademind_app:ai_insight', args=[trade.id]))
+                        queued.append(t.elapsed)
+
+                    # The worker still does the work, off the request path
+                    while True:
+                        jobs = claim_jobs(limit=50)
+                        if not jobs:
+                            break
+                        for job in jobs:
+                            process_job(job)
+
+                inline_stats, queued_stats = summarize(inline), summarize(queued)
+                self.stdout.write(
+                    f"{latency:>11.2f}s | {inline_stats['p50_ms']:>9.1f}ms | "
+                    f"{queued_stats['p50_ms']:>9.1f}ms | {queued_stats['p99_ms']:>9.1f}ms"
+                )
@@ -0,0 +1,138 @@
+# trademind_app/management/commands/bench_insight_stream.py
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from trademind_app import ai_coach, ai_transport, jobs
+from trademind_app.bench import (
+    StubServer, Timer, asgi_get, committed_sandbox, logged_in_client, make_trades, make_user,
+    session_cookie, summarize, token_stream,
+)
+from trademind_app.models import AIInsight, InsightJob
+
+COMPLETION = (
+    'Here is the analysis:\n{"insight": "Entering angry after a loss turned a planned setup into a revenge trade.", '
+    '"risk_pattern": "Revenge trading", "discipline_score": 4, '
+    '"coaching_tip": "After a loss, step away for ten minutes and re-read your checklist before the next entry."}'
+)
+
+
+def parse_events(chunks):
+    """
+    [(seconds, event, data)] from timed SSE body chunks.
+    """
+    events, buffer = [], b''
+    for elapsed, chunk in chunks:
+        buffer += chunk
+        while b'\n\n' in buffer:
+            block, buffer = buffer.split(b'\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.decode().splitlines() if ': ' in line)
+            events.append((elapsed, fields.get('event'), json.loads(fields.get('data', 'null'))))
+    return events
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare time-to-first-byte of the streamed insight endpoint (SSE through core/asgi.py) with a "
+        "blocking provider call, against a local token-streaming stub. Checks fields arrive in order, the "
+        "insight is stored once, and a disconnect hands the job back to the queue. Its data is deleted "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--tokens', type=int, default=60)
+        parser.add_argument('--interval', type=float, default=0.03, help="Seconds between streamed tokens")
+
+    def handle(self, *args, **options):
+        runs, tokens, interval = options['runs'], options['tokens'], options['interval']
+        generation = tokens * interval
+
+        def respond(path, body):
+            if body.get('stream'):
+                return 200, token_stream(COMPLETION, tokens, interval), 0
+            return 200, [{'generated_text': COMPLETION}], generation
+
+        saved = ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT
+        ai_transport.reset_breakers()
+        # No insight cache: every run must reach the provider (and leave no entries behind)
+        with committed_sandbox('bench_stream'), override_settings(INSIGHT_CACHE={'ENABLED': False}), \
+                StubServer(respond) as stub:
+            ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = 'bench-key', stub.url + '/models/bench'
+            try:
+                user = make_user('bench_stream')
+                cookie = session_cookie(user)
+                trades = make_trades(user, runs + 2)
+
+                blocking = []
+                for trade in trades[:runs]:
+                    with Timer() as t:
+                        ai_coach._call_huggingface(jobs.build_trade_data(trade))
+                    blocking.append(t.elapsed)
+
+                first_byte, first_token, first_field, done = [], [], [], []
+                for trade in trades[:runs]:
+                    events = self._stream(trade, cookie)
+                    first_byte.append(events[0][0])
+                    first_token.append(next(e[0] for e in events if e[1] == 'token'))
+                    first_field.append(next(e[0] for e in events if e[1] == 'field'))
+                    done.append(events[-1][0])
+                    self._check_stored(trade, events)
+
+                # A stored insight is replayed without calling the provider
+                requests_before = stub.requests
+                events = self._stream(trades[0], cookie)
+                if [e[1] for e in events] != ['done'] or stub.requests != requests_before:
+                    raise CommandError("Ready insight was regenerated instead of replayed")
+
+                released = self._disconnect(trades[runs], cookie)
+                wsgi = logged_in_client(user).get(reverse('trademind_app:ai_insight_stream', args=[trades[-1].id]))
+            finally:
+                ai_coach.HF_API_KEY, ai_coach.HF_ENDPOINT = saved
+
+        self.stdout.write(f"Stub: {tokens} tokens every {interval * 1000:.0f} ms ({generation:.2f} s generation)")
+        for label, samples in (
+            ('blocking call, whole response', blocking),
+            ('SSE first byte', first_byte),
+            ('SSE first token event', first_token),
+            ('SSE first complete field', first_field),
+            ('SSE done (stored)', done),
+        ):
+            stats = summarize(samples)
+            self.stdout.write(f"{label:>32}: p50 {stats['p50_ms']:>8.1f} ms   p95 {stats['p95_ms']:>8.1f} ms")
+        self.stdout.write(f"Disconnect mid-stream hands the job back to the queue: {released}")
+        self.stdout.write(f"WSGI request is told to poll: {wsgi.content.decode().strip().splitlines()[0]}")
+
+    def _stream(self, trade, cookie):
+        path = reverse('trademind_app:ai_insight_stream', args=[trade.id])
+        status, chunks = async_to_sync(asgi_get)(path, cookie)
+        if status != 200:
+            raise CommandError(f"Stream returned {status}")
+        return parse_events(chunks)
+
+    def _check_stored(self, trade, events):
+        fields = [data['name'] for _, event, data in events if event == 'field']
+        if fields != ['insight', 'risk_pattern', 'discipline_score', 'coaching_tip']:
+            raise CommandError(f"Fields streamed out of order or missing: {fields}")
+        insights = AIInsight.objects.filter(trade=trade)
+        if insights.count() != 1 or insights[0].source != 'provider':
+            raise CommandError("Streamed insight was not stored exactly once")
+        if InsightJob.objects.get(trade=trade).status != InsightJob.STATUS_DONE:
+            raise CommandError("Job not marked done after streaming")
+        if events[-1][1] != 'done' or events[-1][2]['insight']['discipline_score'] != 4:
+            raise CommandError("Final event does not carry the stored insight")
+
+    def _disconnect(self, trade, cookie):
+        path = reverse('trademind_app:ai_insight_stream', args=[trade.id])
+        seen = []
+
+        def on_chunk(elapsed, chunk):
+            seen.append(chunk)
+            return len(seen) < 5  # leave after a few tokens
+
+        async_to_sync(asgi_get)(path, cookie, on_chunk=on_chunk)
+        job = InsightJob.objects.get(trade=trade)
+        return job.status == InsightJob.STATUS_PENDING and not AIInsight.objects.filter(trade=trade).exists()
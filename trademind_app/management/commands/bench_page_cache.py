@@ -0,0 +1,64 @@
+# trademind_app/management/commands/bench_page_cache.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from trademind_app import page_cache
+from trademind_app import stats as trader_stats
+from trademind_app.bench import Timer, logged_in_client, make_trades, make_user, sandbox, summarize
+
+PAGES = ['dashboard', 'trade_history']
+
+
+class Command(BaseCommand):
+    help = (
+        "Dashboard and history response times with the per-user page cache: uncached (PAGE_CACHE "
+        "disabled), cold (generation bumped before every request, as after a write) and warm "
+        "(repeated refreshes), with SQL queries per request. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,10000', help="Comma-separated trades per user")
+        parser.add_argument('--requests', type=int, default=50, help="Samples per measurement")
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options['sizes'].split(',')]
+        self.stdout.write(
+            f"{'trades':>7} | {'page':<13} | {'uncached p50':>12} | {'cold p50':>9} | {'warm p50':>9} | "
+            f"{'warm p99':>9} | {'queries cold/warm':>17} | {'saved':>6}"
+        )
+        with sandbox():
+            for size in sizes:
+                user = make_user(f'bench_page_{size}')
+                make_trades(user, size, seed=size)
+                trader_stats.rebuild(user.pk)  # bulk writes skip the signal handlers
+                client = logged_in_client(user)
+                for page in PAGES:
+                    url = reverse(f'trademind_app:{page}')
+                    client.get(url)  # rule snapshot, stats row, template loading
+                    with override_settings(PAGE_CACHE={'ENABLED': False}):
+                        uncached, _ = self._measure(client, url, options['requests'])
+                    cold, cold_queries = self._measure(
+                        client, url, options['requests'], before=lambda: page_cache.bump(user.pk))
+                    warm, warm_queries = self._measure(client, url, options['requests'])
+                    uncached_s, cold_s, warm_s = summarize(uncached), summarize(cold), summarize(warm)
+                    self.stdout.write(
+                        f"{size:>7} | {page:<13} | {uncached_s['p50_ms']:>10.2f}ms | {cold_s['p50_ms']:>7.2f}ms | "
+                        f"{warm_s['p50_ms']:>7.2f}ms | {warm_s['p99_ms']:>7.2f}ms | "
+                        f"{f'{cold_queries}/{warm_queries}':>17} | "
+                        f"{1 - warm_s['p50_ms'] / uncached_s['p50_ms']:>6.0%}"
+                    )
+
+    def _measure(self, client, url, n, before=None):
+        """
+        Durations of `n` GETs of `url`, and the SQL queries of the last one.
+        """
+        samples = []
+        for _ in range(n):
+            if before:
+                before()
+            with CaptureQueriesContext(connection) as queries, Timer() as t:
+                client.get(url)
+            samples.append(t.elapsed)
+        return samples, len(queries)
@@ -0,0 +1,188 @@
+# trademind_app/management/commands/bench_page_weight.py
+import gzip
+import os
+import re
+import urllib.request
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from trademind_app import stats as trader_stats
+from trademind_app.bench import logged_in_client, make_trades, make_user, sandbox
+from trademind_app.models import AIInsight
+
+try:
+    import brotli
+except ImportError:  # WhiteNoise then serves gzip only
+    brotli = None
+
+FONT_URL = re.compile(r'url\(\s*["\']?([^"\')]+\.(?:woff2?|ttf|otf))', re.IGNORECASE)
+
+
+class AssetParser(HTMLParser):
+    """
+    Assets a page makes the browser fetch: (kind, url, blocking). Blocking
+    ones (stylesheets, scripts without defer/async) hold the first render;
+    `lazy` are fetched by our own scripts later (data-chart-src).
+    """
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        rel = (attrs.get('rel') or '').lower().split()
+        if tag == 'link' and 'stylesheet' in rel and attrs.get('href'):
+            self.assets.append(('css', attrs['href'], attrs.get('media', 'all') != 'print'))
+        elif tag == 'link' and 'preload' in rel and attrs.get('as') == 'font':
+            self.assets.append(('font', attrs['href'], False))
+        elif tag == 'script' and attrs.get('src'):
+            deferred = 'defer' in attrs or 'async' in attrs or attrs.get('type') == 'module'
+            self.assets.append(('js', attrs['src'], not deferred))
+        if attrs.get('data-chart-src'):
+            self.assets.append(('lazy', attrs['data-chart-src'], False))
+
+
+def compressed_size(data):
+    # What WhiteNoise's precompressed copies (or a CDN) would send
+    if brotli is not None:
+        return len(brotli.compress(data, quality=11))
+    return len(gzip.compress(data, 9))
+
+
+class Command(BaseCommand):
+    help = (
+        "Page weight of the main pages: HTML plus every stylesheet, script and font they load, "
+        "transfer sizes (brotli, else gzip, as WhiteNoise serves them), render-blocking requests "
+        "and third-party origins, and a first-render estimate on a slow connection (a simple "
+        "round-trip + bandwidth model; in-browser work such as a runtime CSS compiler is not "
+        "included). Third-party files are only sized with --fetch. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rtt', type=float, default=150, help="Round trip, ms (slow 4G)")
+        parser.add_argument('--bandwidth', type=float, default=1.6, help="Download, Mbit/s (slow 4G)")
+        parser.add_argument('--fetch', action='store_true', help="Download third-party assets to size them")
+        parser.add_argument('--show-assets', action='store_true')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.sizes = {}
+        self.missing = set()
+        with sandbox():
+            user = make_user('page_weight_trader')
+            trades = make_trades(user, 30)
+            AIInsight.objects.create(
+                trade=trades[0], insight="Measured.", risk_pattern="None", discipline_score=7,
+                coaching_tip="Measured.", source='mock',
+            )
+            trader_stats.rebuild(user.pk)  # bulk writes skip the signal handlers
+            client = logged_in_client(user)
+            pages = [
+                ('landing', reverse('trademind_app:landing')),
+                ('dashboard', reverse('trademind_app:dashboard')),
+                ('trade_history', reverse('trademind_app:trade_history')),
+                ('trade_log', reverse('trademind_app:trade_log')),
+                ('ai_insight', reverse('trademind_app:ai_insight', args=[trades[0].id])),
+            ]
+            rows = [(name, self._measure(client, url)) for name, url in pages]
+
+        self.stdout.write(
+            f"{'page':<14} | {'html':>7} | {'css':>7} | {'js':>7} | {'fonts':>7} | {'total':>8} | "
+            f"{'lazy js':>7} | {'blocking':>8} | {'3rd-party':>9} | {'first render':>12}"
+        )
+        for name, row in rows:
+            unknown = '+?' if row['unsized'] else ''
+            self.stdout.write(
+                f"{name:<14} | {row['html'] / 1024:>5.1f}KB | {row['css'] / 1024:>5.1f}KB | "
+                f"{row['js'] / 1024:>5.1f}KB | {row['font'] / 1024:>5.1f}KB | "
+                f"{row['total'] / 1024:>6.1f}KB{unknown} | {row['lazy'] / 1024:>5.1f}KB | {row['blocking']:>8} | "
+                f"{row['origins']:>9} | {row['render_ms']:>8.0f} ms{unknown}"
+            )
+            if options['show_assets']:
+                for kind, url, blocking, size in row['assets']:
+                    size_text = f"{size / 1024:.1f}KB" if size is not None else "?"
+                    self.stdout.write(f"    {kind:<5} {size_text:>9} {'blocking' if blocking else '':<8} {url}")
+        self.stdout.write(
+            f"Transfer sizes {'brotli' if brotli else 'gzip'}; first render: {options['rtt']:g} ms RTT, "
+            f"{options['bandwidth']:g} Mbit/s. '+?': files not sized (third-party without --fetch, or not built)."
+        )
+        if self.missing:
+            self.stdout.write(self.style.WARNING(
+                "Not found (run `npm install && python manage.py build_assets`): " + ", ".join(sorted(self.missing))
+            ))
+
+    def _measure(self, client, url):
+        response = client.get(url)
+        parser = AssetParser()
+        parser.feed(response.content.decode())
+        assets, seen = [], set()
+        queue = list(parser.assets)
+        while queue:
+            kind, asset_url, blocking = queue.pop(0)
+            if asset_url in seen:
+                continue
+            seen.add(asset_url)
+            data = self._load(asset_url)
+            size = compressed_size(data) if data is not None else None
+            if asset_url.startswith('http') and data is not None and not self.options['fetch']:
+                size = None
+            assets.append((kind, asset_url, blocking, size))
+            if kind == 'css' and data is not None:
+                # Fonts the stylesheet declares (an upper bound: browsers fetch the faces used)
+                for font in FONT_URL.findall(data.decode(errors='replace')):
+                    queue.append(('font', urljoin(asset_url, font), False))
+
+        row = {'html': len(response.content), 'assets': assets, 'css': 0, 'js': 0, 'font': 0, 'lazy': 0}
+        for kind, _, _, size in assets:
+            row[kind] += size or 0
+        row['total'] = row['html'] + row['css'] + row['js'] + row['font']
+        row['unsized'] = any(size is None for _, _, _, size in assets)
+        blocking = [(asset_url, size) for _, asset_url, is_blocking, size in assets if is_blocking]
+        third_party = {urlsplit(asset_url).netloc for _, asset_url, _, _ in assets if urlsplit(asset_url).netloc}
+        row['blocking'] = len(blocking)
+        row['origins'] = len(third_party)
+        row['render_ms'] = self._first_render(row['html'], blocking)
+        return row
+
+    def _first_render(self, html_bytes, blocking):
+        """
+        HTML, then the blocking requests in parallel: each pays a round trip
+        (three more for DNS/TCP/TLS to a new origin), the bytes share the
+        bandwidth.
+        """
+        rtt, bytes_per_ms = self.options['rtt'], self.options['bandwidth'] * 1e6 / 8 / 1000
+        elapsed = rtt + html_bytes / bytes_per_ms
+        if blocking:
+            setup = max((4 if urlsplit(url).netloc else 1) * rtt for url, _ in blocking)
+            elapsed += setup + sum(size or 0 for _, size in blocking) / bytes_per_ms
+        return elapsed
+
+    def _load(self, url):
+        if url.startswith(('http://', 'https://', '//')):
+            return self._fetch(url) if self.options['fetch'] else b''
+        path = urlsplit(url).path
+        if not path.startswith(settings.STATIC_URL):
+            return None
+        name = path[len(settings.STATIC_URL):]
+        found = finders.find(name) or os.path.join(settings.STATIC_ROOT, name)
+        if not os.path.exists(found):
+            self.missing.add(name)
+            return None
+        with open(found, 'rb') as fileobj:
+            return fileobj.read()
+
+    def _fetch(self, url):
+        if url not in self.sizes:
+            request = urllib.request.Request(urljoin('https:', url), headers={'User-Agent': 'Mozilla/5.0'})
+            try:
+                with urllib.request.urlopen(request, timeout=20) as response:
+                    self.sizes[url] = response.read()
+            except OSError as exc:
+                self.stderr.write(f"Could not fetch {url}: {exc}")
+                self.sizes[url] = None
+        return self.sizes[url]
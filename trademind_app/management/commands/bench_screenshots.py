@@ -0,0 +1,129 @@
+# trademind_app/management/commands/bench_screenshots.py
+import io
+import random
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image, ImageDraw, PngImagePlugin
+
+from trademind_app import screenshots
+from trademind_app.bench import Timer, logged_in_client, make_trades, make_user, sandbox
+from trademind_app.models import Trade
+
+
+def synthetic_chart(seed, size=(2560, 1440)):
+    """
+    PNG resembling a chart-platform screenshot: dark background, grid,
+    candles, price labels, plus the metadata such tools embed. A light noise
+    layer stands in for the gradients and anti-aliasing that make real
+    screenshots compress poorly as PNG.
+    """
+    rng = random.Random(seed)
+    width, height = size
+    noise = Image.effect_noise(size, 24).convert('RGB')
+    image = Image.blend(Image.new('RGB', size, (19, 23, 34)), noise, 0.08)
+    draw = ImageDraw.Draw(image)
+    for x in range(0, width, 80):
+        draw.line([(x, 0), (x, height)], fill=(35, 40, 55))
+    for y in range(0, height, 60):
+        draw.line([(0, y), (width, y)], fill=(35, 40, 55))
+        draw.text((width - 70, y + 4), f"{1.08 + y / 100000:.5f}", fill=(150, 150, 160))
+    price = height / 2
+    for x in range(10, width - 100, 14):
+        close = min(height - 40, max(40, price + rng.gauss(0, 12)))
+        high, low = min(price, close) - rng.uniform(2, 20), max(price, close) + rng.uniform(2, 20)
+        color = (38, 166, 154) if close < price else (239, 83, 80)
+        draw.line([(x + 4, high), (x + 4, low)], fill=color)
+        draw.rectangle([x, min(price, close), x + 8, max(price, close) + 1], fill=color)
+        price = close
+    info = PngImagePlugin.PngInfo()
+    info.add_text('Software', 'MetaTrader 5')
+    info.add_text('Comment', 'EURUSD,H1 ' + 'x' * 2000)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG', pnginfo=info, exif=Image.Exif())
+    return buffer.getvalue()
+
+
+def _fetch(client, url):
+    response = client.get(url)
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return response, len(body)
+
+
+class Command(BaseCommand):
+    help = (
+        "Screenshot pipeline benchmark: processing time, storage saved by WebP renditions and "
+        "dedupe, and page weight of trade history / insight pages. Uses a temporary MEDIA_ROOT "
+        "and a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=10, help="Trades with screenshots")
+        parser.add_argument('--duplicate-every', type=int, default=3,
+                            help="Every Nth trade re-uploads an earlier screenshot (0: never)")
+
+    def handle(self, *args, **options):
+        count, every = options['images'], options['duplicate_every']
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), sandbox():
+            user = make_user('bench_screenshots')
+            trades = make_trades(user, count)
+            charts = []
+            for i, trade in enumerate(trades):
+                png = charts[i // every] if every and i and i % every == 0 else synthetic_chart(i)
+                charts.append(png)
+                trade.screenshot.save(f"chart_{i}.png", ContentFile(png), save=False)
+                Trade.objects.filter(pk=trade.pk).update(screenshot=trade.screenshot.name)
+            client = logged_in_client(user)
+            history = reverse('trademind_app:trade_history')
+            insight = reverse('trademind_app:ai_insight', args=[trades[0].pk])
+
+            # Before: history links the uploads, "View" downloads the full image
+            _, history_html_before = _fetch(client, history)
+            uploads = [Trade.objects.get(pk=t.pk).screenshot.size for t in trades]
+
+            timings = []
+            with Timer() as total:
+                for trade in screenshots.pending_trades():
+                    with Timer() as t:
+                        result = screenshots.process_trade(trade)
+                    timings.append((t.elapsed, result))
+
+            # After: thumbnails inline, display size on click / on the insight page
+            response, history_html_after = _fetch(client, history)
+            processed = list(Trade.objects.filter(user=user).order_by('-date', '-created_at')[:10])
+            thumb_bytes = sum(_fetch(client, t.screenshot_thumb_url)[1] for t in processed)
+            display_response, display_bytes = _fetch(client, Trade.objects.get(pk=trades[0].pk).screenshot_display_url)
+            revalidate = client.get(Trade.objects.get(pk=trades[0].pk).screenshot_display_url,
+                                    HTTP_IF_NONE_MATCH=display_response['ETag'])
+            _, insight_html = _fetch(client, insight)
+
+        fresh = [(s, r) for s, r in timings if not r.deduplicated]
+        stored = sum(r.stored_bytes for _, r in timings)
+        renditions = sum(sum(r.rendition_bytes.values()) for _, r in fresh)
+        first_upload = uploads[0]
+        self.stdout.write(f"{count} screenshots ({len(fresh)} distinct), {total.elapsed:.2f}s total")
+        self.stdout.write(
+            f"  per distinct image:  {1000 * sum(s for s, _ in fresh) / len(fresh):.0f} ms, "
+            f"upload {sum(uploads) / count / 1024:.0f} KiB -> thumb "
+            f"{sum(r.rendition_bytes['thumb'] for _, r in fresh) / len(fresh) / 1024:.1f} KiB, display "
+            f"{sum(r.rendition_bytes['display'] for _, r in fresh) / len(fresh) / 1024:.1f} KiB"
+        )
+        self.stdout.write(
+            f"  storage:             uploads {sum(uploads) / 1024:.0f} KiB -> originals {stored / 1024:.0f} KiB "
+            f"+ renditions {renditions / 1024:.0f} KiB"
+        )
+        self.stdout.write(
+            f"  history page:        {history_html_before / 1024:.1f} KiB HTML + full images on click "
+            f"({sum(uploads[:10]) / 1024:.0f} KiB for 10) -> {history_html_after / 1024:.1f} KiB HTML + "
+            f"{thumb_bytes / 1024:.1f} KiB thumbnails"
+        )
+        self.stdout.write(
+            f"  insight / View:      {first_upload / 1024:.0f} KiB -> {display_bytes / 1024:.1f} KiB "
+            f"({100 * (1 - display_bytes / first_upload):.1f}% smaller), page HTML {insight_html / 1024:.1f} KiB"
+        )
+        self.stdout.write(
+            f"  cache headers:       {display_response['Cache-Control']!r}, revalidation -> {revalidate.status_code}"
+        )
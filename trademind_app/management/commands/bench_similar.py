@@ -0,0 +1,94 @@
+# trademind_app/management/commands/bench_similar.py
+import random
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from trademind_app import ai_coach, similar
+from trademind_app.bench import Timer, make_user, sandbox, seed_journal, summarize
+from trademind_app.jobs import build_trade_data
+from trademind_app.models import Trade
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure similar-trade index build time and top-k query latency at several journal sizes, "
+        "check results against a brute-force sort and that new trades are appended without a rebuild. "
+        "Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000,100000', help="Comma-separated trades per user")
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('-k', type=int, default=similar.similar_setting('TOP_K'))
+
+    def handle(self, *args, **options):
+        k, n = options['k'], options['queries']
+        self.stdout.write(
+            f"{'trades':>8} | {'build':>9} | {'top-k p50':>10} | {'top-k p99':>10} | "
+            f"{'history_for p50':>15} | {'append 1':>9} | {'index KiB':>9}"
+        )
+        with sandbox():
+            for size in [int(x) for x in options['sizes'].split(',')]:
+                user = make_user(f'bench_similar_{size}')
+                seed_journal(user, size, seed=size)
+                similar.invalidate(user.pk)  # bulk inserts skip the signal handlers
+                similar.clear()
+
+                with Timer() as build:
+                    index = similar.get_index(user.pk)
+                rng = random.Random(size)
+                rows = [rng.randrange(index.size) for _ in range(n)]
+
+                # The numeric part: table lookup, 4-wide product, argpartition
+                topk = []
+                for row in rows:
+                    with Timer() as t:
+                        index.nearest(index.key(row), row, k)
+                    topk.append(t.elapsed)
+                self._check(index, rows[:50], k)
+
+                # The whole lookup the AI coach does, including the summary
+                trades = {t.pk: t for t in Trade.objects.filter(pk__in=[int(index.ids[r]) for r in rows[:100]])}
+                lookups = []
+                for trade in trades.values():
+                    with Timer() as t:
+                        similar.history_for(trade, rules_followed_count=0)
+                    lookups.append(t.elapsed)
+
+                # Logging a trade on the newest journal day appends it (delta query), no rebuild
+                trade = Trade.objects.filter(user=user).order_by('-date', '-created_at', '-id').first()
+                trade.pk = None
+                trade.save()
+                with Timer() as append:
+                    history = similar.history_for(trade, rules_followed_count=0)
+                fresh = similar.get_index(user.pk)
+                if fresh is not index or fresh.size != size + 1:
+                    raise CommandError("New trade was not appended to the existing index")
+                if history and history['similar']['count'] != min(k, size):
+                    raise CommandError("History of the new trade is missing neighbours")
+
+                size_kib = (index.dense[:, :index.size].nbytes
+                            + sum(getattr(index, name)[:index.size].nbytes for name, _ in index._COLUMNS)) / 1024
+                topk_stats = summarize(topk)
+                self.stdout.write(
+                    f"{size:>8} | {build.elapsed * 1000:>6.1f} ms | {topk_stats['p50_ms']:>7.3f} ms | "
+                    f"{topk_stats['p99_ms']:>7.3f} ms | {summarize(lookups)['p50_ms']:>12.3f} ms | "
+                    f"{append.elapsed * 1000:>6.2f} ms | {size_kib:>9.0f}"
+                )
+
+            # What the coach gets for the last trade
+            insight = ai_coach._mock_insight_on_failure(build_trade_data(trade))
+            self.stdout.write(f"\nMock insight with history: {insight['insight']}")
+
+    def _check(self, index, rows, k):
+        """
+        Top-k distances must match a full sort of brute-force distances over
+        the explicit feature vectors.
+        """
+        for row in rows:
+            found, distances = index.nearest(index.key(row), row, k)
+            vectors = index.feature_vectors(np.arange(row + 1))
+            expected = np.sort(((vectors[:row] - vectors[row]) ** 2).sum(axis=1))[:k]
+            if len(found) != len(expected) or not np.allclose(distances, expected, atol=1e-3):
+                raise CommandError(f"Top-k mismatch for row {row}")
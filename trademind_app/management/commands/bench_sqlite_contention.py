@@ -0,0 +1,158 @@
+# trademind_app/management/commands/bench_sqlite_contention.py
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from trademind_app import sqlite_tuning
+from trademind_app import stats as trader_stats
+from trademind_app.bench import logged_in_client, make_trades, make_user, percentile, scratch_cache
+from trademind_app.models import StrategyRule, Trade
+
+# Django's defaults (rollback journal, a connection per request, deferred
+# transactions) against the production profile.
+PROFILES = {
+    'default': {'SQLITE': {'ENABLED': False}, 'CONN_MAX_AGE': 0},
+    'tuned': {'SQLITE': {}, 'CONN_MAX_AGE': 600},
+}
+READ_PAGES = ['dashboard', 'trade_history']
+
+
+def _trade_post_data(rule_ids, rng):
+    loss = rng.random() < 0.45
+    return {
+        'date': time.strftime('%Y-%m-%d'), 'session': rng.choice(['asia', 'london', 'ny']),
+        'pair': rng.choice(['BTC/USD', 'GBP/USD', 'Gold']), 'entry': rng.choice(['BUY', 'SELL']),
+        'loss' if loss else 'profit': f"{rng.uniform(5, 200):.2f}",
+        'pre_trade_emotion': 'neutral', 'post_trade_emotion': 'chill',
+        'rules_followed': rule_ids[:rng.randrange(len(rule_ids) + 1)], 'reason': "Contention bench trade.",
+    }
+
+
+def worker(user_id, options, barrier, results):
+    """
+    One worker process serving its trader's requests back to back: trade_log
+    POSTs with probability `write_ratio`, else a dashboard or history GET.
+    Connections are closed (or kept) after each request the way the request
+    cycle does it, per CONN_MAX_AGE.
+    """
+    connection.close()  # never share the parent's connection
+    rng = random.Random(user_id)
+    from django.contrib.auth.models import User
+    client = logged_in_client(User.objects.get(pk=user_id))
+    rule_ids = list(StrategyRule.objects.filter(user_id=user_id).values_list('id', flat=True))
+    close_old_connections()
+
+    barrier.wait()
+    writes, reads, locked, errors = [], [], 0, []
+    deadline = time.perf_counter() + options['seconds']
+    while time.perf_counter() < deadline:
+        write = rng.random() < options['write_ratio']
+        start = time.perf_counter()
+        try:
+            if write:
+                response = client.post(reverse('trademind_app:trade_log'), _trade_post_data(rule_ids, rng))
+            else:
+                response = client.get(reverse(f'trademind_app:{rng.choice(READ_PAGES)}'))
+            if response.status_code >= 400 or (write and response.status_code != 302):
+                errors.append(f"HTTP {response.status_code}")
+            else:
+                (writes if write else reads).append(time.perf_counter() - start)
+        except OperationalError as exc:
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise
+            locked += 1
+        finally:
+            close_old_connections()  # request_finished
+    results.put((writes, reads, locked, errors[:5]))
+
+
+class Command(BaseCommand):
+    help = (
+        "Write/read contention on SQLite: several processes log trades (trade_log POST) and load "
+        "the dashboard and history at once, with Django's defaults and with the production profile "
+        "(trademind_app/sqlite_tuning.py: WAL, pragmas, persistent connections, immediate write "
+        "transactions). Reports throughput, latency and 'database is locked' errors. Each profile "
+        "runs against a fresh scratch database; the page cache is off so reads reach SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0, help="Per profile")
+        parser.add_argument('--write-ratio', type=float, default=0.3)
+        parser.add_argument('--trades', type=int, default=500, help="Seeded trades per trader")
+        parser.add_argument('--profiles', default='default,tuned')
+
+    def handle(self, *args, **options):
+        scratch = tempfile.mkdtemp(prefix='bench_sqlite_')
+        saved = dict(connection.settings_dict)
+        self.stdout.write(
+            f"{options['processes']} processes x {options['seconds']:g} s, {options['write_ratio']:.0%} "
+            f"trade_log POSTs, the rest dashboard/history GETs; {options['trades']} trades per trader"
+        )
+        self.stdout.write(
+            f"{'profile':>8} | {'req/s':>6} | {'writes/s':>8} | {'write p50':>9} | {'write p99':>9} | "
+            f"{'read p50':>8} | {'read p99':>8} | {'locked':>6} | journal"
+        )
+        setup_test_environment()
+        try:
+            with scratch_cache(), override_settings(PAGE_CACHE={'ENABLED': False}):
+                for name in options['profiles'].split(','):
+                    self._run(name, os.path.join(scratch, f'{name}.sqlite3'), options)
+        finally:
+            teardown_test_environment()
+            connection.close()
+            connection.settings_dict.clear()
+            connection.settings_dict.update(saved)
+
+    def _run(self, name, path, options):
+        profile = PROFILES[name]
+        connection.close()
+        connection.settings_dict.update(NAME=path, CONN_MAX_AGE=profile['CONN_MAX_AGE'])
+        with override_settings(SQLITE=profile['SQLITE']):
+            call_command('migrate', verbosity=0, interactive=False)
+            user_ids = []
+            for i in range(options['processes']):
+                user = make_user(f'bench_contention_{i}', rules=4)
+                make_trades(user, options['trades'], seed=i)
+                trader_stats.rebuild(user.pk)  # bulk writes skip the signal handlers
+                user_ids.append(user.pk)
+            seeded = Trade.objects.count()
+            journal = sqlite_tuning.current_pragmas(connection)['journal_mode']
+            connection.close()
+
+            ctx = multiprocessing.get_context('fork')
+            barrier = ctx.Barrier(len(user_ids))
+            results = ctx.Queue()
+            workers = [ctx.Process(target=worker, args=(user_id, options, barrier, results)) for user_id in user_ids]
+            for process in workers:
+                process.start()
+            outcomes = [results.get(timeout=options['seconds'] + 120) for _ in workers]
+            for process in workers:
+                process.join()
+
+            writes = [latency for outcome in outcomes for latency in outcome[0]]
+            reads = [latency for outcome in outcomes for latency in outcome[1]]
+            locked = sum(outcome[2] for outcome in outcomes)
+            errors = [error for outcome in outcomes for error in outcome[3]]
+            if errors:
+                raise CommandError(f"{name}: requests failed: {', '.join(errors)}")
+            logged = Trade.objects.count() - seeded
+            connection.close()
+        if logged != len(writes):
+            raise CommandError(f"{name}: {len(writes)} trade_log POSTs succeeded but {logged} trades were written")
+
+        seconds = options['seconds']
+        self.stdout.write(
+            f"{name:>8} | {(len(writes) + len(reads)) / seconds:>6.0f} | {len(writes) / seconds:>8.1f} | "
+            f"{percentile(writes, 50) * 1000:>7.1f}ms | {percentile(writes, 99) * 1000:>7.1f}ms | "
+            f"{percentile(reads, 50) * 1000:>6.1f}ms | {percentile(reads, 99) * 1000:>6.1f}ms | "
+            f"{locked:>6} | {journal}"
+        )
@@ -0,0 +1,71 @@
+# trademind_app/management/commands/bench_trade_history.py
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db.models import Count
+from django.urls import reverse
+
+from trademind_app.bench import Timer, logged_in_client, make_trades, make_user, sandbox, summarize
+from trademind_app.models import Trade
+from trademind_app.pagination import NEWEST_FIRST, encode_cursor, paginate_trades
+
+
+def legacy_page(user, page_number):
+    """
+    What trade_history did before keyset pagination: COUNT(*) + OFFSET page,
+    plus the whole journal materialized for the balance tracker script.
+    """
+    trades = Trade.objects.filter(user=user).annotate(rules_followed_n=Count('rules_followed')).order_by('-date')
+    page = Paginator(trades, 10).get_page(page_number)
+    list(page)
+    running = 0
+    for trade in trades:
+        running += (trade.profit or 0) - (trade.loss or 0)
+    return running
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare trade history pagination before (COUNT + OFFSET + full journal for the balance) "
+        "and after (keyset page + window-function running P&L) on the first and a deep page. "
+        "Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=50000)
+        parser.add_argument('--requests', type=int, default=20, help="Samples per measurement")
+
+    def handle(self, *args, **options):
+        size, n = options['trades'], options['requests']
+
+        with sandbox():
+            user = make_user('bench_history')
+            make_trades(user, size)
+            client = logged_in_client(user)
+            url = reverse('trademind_app:trade_history')
+
+            deep_number = max(1, (size // 10) * 9 // 10)
+            deep_trade = Trade.objects.filter(user=user).order_by(*NEWEST_FIRST)[(deep_number - 1) * 10 - 1] \
+                if deep_number > 1 else None
+            deep_cursor = encode_cursor(deep_trade) if deep_trade else None
+
+            cases = [
+                ('legacy first page', lambda: legacy_page(user, 1)),
+                (f'legacy page {deep_number}', lambda: legacy_page(user, deep_number)),
+                ('keyset first page', lambda: paginate_trades(Trade.objects.filter(user=user))),
+                (f'keyset page {deep_number}', lambda: paginate_trades(Trade.objects.filter(user=user), after=deep_cursor)),
+                ('view GET first page', lambda: client.get(url)),
+                (f'view GET page {deep_number}', lambda: client.get(url, {'after': deep_cursor} if deep_cursor else {})),
+            ]
+
+            self.stdout.write(f"{size} trades, {n} samples each")
+            self.stdout.write(f"{'case':<26} {'p50':>10} {'p95':>10} {'p99':>10}")
+            for name, run in cases:
+                samples = []
+                for _ in range(n):
+                    with Timer() as t:
+                        run()
+                    samples.append(t.elapsed)
+                s = summarize(samples)
+                self.stdout.write(
+                    f"{name:<26} {s['p50_ms']:>8.2f}ms {s['p95_ms']:>8.2f}ms {s['p99_ms']:>8.2f}ms"
+                )
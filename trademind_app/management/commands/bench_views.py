@@ -0,0 +1,205 @@
+# trademind_app/management/commands/bench_views.py
+import itertools
+import json
+import platform
+import tracemalloc
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from trademind_app import ai_coach
+from trademind_app import stats as trader_stats
+from trademind_app.bench import (
+    Timer, logged_in_client, make_user, sandbox, seed_journal, stub_provider, summarize,
+)
+from trademind_app.jobs import enqueue_insight, process_job
+from trademind_app.models import AIInsight, StrategyRule
+
+# trade_history filters and the value used for each; every subset is benchmarked
+HISTORY_FILTERS = {
+    'pair': 'USD',
+    'session': 'london',
+    'profit': '50',
+    'loss': '50',
+    'date': None,  # filled with a date that has trades
+}
+
+
+def _history_scenarios(client, filter_values):
+    url = reverse('trademind_app:trade_history')
+    names = list(HISTORY_FILTERS)
+    for r in range(len(names) + 1):
+        for combo in itertools.combinations(names, r):
+            params = {name: filter_values[name] for name in combo}
+            label = 'trade_history' + (f"[{'+'.join(combo)}]" if combo else '')
+            yield label, (lambda params=params: client.get(url, params))
+
+
+def _scenarios(user, client):
+    """
+    (name, callable) pairs. Each call must be repeatable: POSTs create a new
+    trade every time, ai_insight pending uses a fresh trade per call.
+    """
+    rules = list(StrategyRule.objects.filter(user=user).values_list('id', flat=True))
+    trades = user.trade_set.order_by('-date', '-created_at')
+    with_insight = trades.filter(insight__isnull=False).first()
+    without_insight = list(trades.filter(insight__isnull=True).only('id')[:200])
+    for_view, for_worker = iter(without_insight[::2]), iter(without_insight[1::2])
+    some_date = trades.values_list('date', flat=True)[trades.count() // 2]
+    filter_values = dict(HISTORY_FILTERS, date=some_date.isoformat())
+
+    post_data = {
+        'date': date.today().isoformat(), 'session': 'london', 'pair': 'GBP/USD', 'entry': 'SELL',
+        'loss': '25.00', 'pre_trade_emotion': 'angry', 'post_trade_emotion': 'sad',
+        'rules_followed': rules[:2], 'reason': "Benchmark trade.",
+    }
+
+    def insight_pending():
+        return client.get(reverse('trademind_app:ai_insight', args=[next(for_view).id]))
+
+    def insight_generate():
+        # What the worker does for one trade, against the stubbed coach
+        process_job(enqueue_insight(next(for_worker), job=None))
+
+    yield 'dashboard', lambda: client.get(reverse('trademind_app:dashboard'))
+    yield from _history_scenarios(client, filter_values)
+    yield 'trade_log GET', lambda: client.get(reverse('trademind_app:trade_log'))
+    yield 'trade_log POST', lambda: client.post(reverse('trademind_app:trade_log'), post_data)
+    yield 'ai_insight ready', lambda: client.get(reverse('trademind_app:ai_insight', args=[with_insight.id]))
+    yield 'ai_insight pending', insight_pending
+    yield 'ai_insight_status', lambda: client.get(reverse('trademind_app:ai_insight_status', args=[with_insight.id]))
+    yield 'insight generation (worker)', insight_generate
+
+
+def measure(run, requests, warmup):
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(requests):
+        with Timer() as t:
+            response = run()
+        if response is not None and response.status_code >= 400:
+            raise CommandError(f"HTTP {response.status_code}")
+        samples.append(t.elapsed)
+    result = summarize(samples)
+
+    with CaptureQueriesContext(connection) as queries:
+        run()
+    result['queries'] = len(queries)
+
+    # Separate pass: tracemalloc slows everything down, so it never overlaps the timings
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result['peak_kib'] = round(peak / 1024, 1)
+    return result
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Regressions of `results` against `baseline`: p95 slower by more than
+    `threshold` (fraction) and `min_delta_ms`, or more queries.
+    """
+    regressions = []
+    for size, views in results.items():
+        for name, current in views.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            slower = current['p95_ms'] - before['p95_ms']
+            if slower > min_delta_ms and current['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f"{name} @ {size} trades: p95 {before['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms"
+                )
+            if current['queries'] > before['queries']:
+                regressions.append(
+                    f"{name} @ {size} trades: queries {before['queries']} -> {current['queries']}"
+                )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every trademind_app view (p50/p95/p99 latency, query count, peak allocated memory) "
+        "on seeded journals of several sizes, with the AI coach stubbed. Writes JSON and can fail on "
+        "regressions against a saved baseline. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000', help="Comma-separated trades per journal")
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per view")
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--views', default='', help="Only views whose name contains one of these (comma-separated)")
+        parser.add_argument('--ai-latency', type=float, default=0.0, help="Stub AI provider latency in seconds")
+        parser.add_argument('--output', default='bench_views.json', help="Where to write the results")
+        parser.add_argument('--baseline', help="Results JSON to compare against")
+        parser.add_argument('--threshold', type=float, default=0.25, help="Allowed p95 slowdown (0.25 = 25%%)")
+        parser.add_argument('--min-delta-ms', type=float, default=5.0, help="Ignore slowdowns smaller than this")
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options['sizes'].split(',')]
+        only = [x for x in options['views'].split(',') if x]
+        baseline = None
+        if options['baseline']:
+            try:
+                baseline = json.loads(Path(options['baseline']).read_text())['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Could not read baseline {options['baseline']}: {e}")
+
+        results = {}
+        with sandbox(), mock.patch.object(ai_coach, '_call_providers', stub_provider(options['ai_latency'])):
+            for size in sizes:
+                user = make_user(f'bench_views_{size}', rules=6)
+                trades = seed_journal(user, size, seed=size)
+                AIInsight.objects.bulk_create(
+                    AIInsight(trade=trade, insight="Seeded.", risk_pattern="None", discipline_score=7,
+                              coaching_tip="Seeded.", source='provider')
+                    for trade in trades[::2]
+                )
+                trader_stats.rebuild(user.pk)  # bulk inserts skip the signal handlers
+                client = logged_in_client(user)
+
+                self.stdout.write(f"\n{size} trades")
+                self.stdout.write(
+                    f"{'view':<44} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>7} {'peak KiB':>9}"
+                )
+                results[str(size)] = {}
+                for name, run in _scenarios(user, client):
+                    if only and not any(part in name for part in only):
+                        continue
+                    result = measure(run, options['requests'], options['warmup'])
+                    results[str(size)][name] = result
+                    self.stdout.write(
+                        f"{name:<44} {result['p50_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms "
+                        f"{result['p99_ms']:>7.2f}ms {result['queries']:>7} {result['peak_kib']:>9.1f}"
+                    )
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'requests': options['requests'],
+                'ai_latency': options['ai_latency'],
+            },
+            'results': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"\nResults written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['threshold'], options['min_delta_ms'])
+            if regressions:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
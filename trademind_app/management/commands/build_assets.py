@@ -0,0 +1,63 @@
+# trademind_app/management/commands/build_assets.py
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# node_modules path -> path under static/ (build outputs, not committed)
+VENDORED = {
+    'chart.js/dist/chart.umd.js': 'vendor/chart.js/chart.umd.js',
+    'chart.js/LICENSE.md': 'vendor/chart.js/LICENSE.md',
+    '@fontsource/poppins/files/poppins-latin-400-normal.woff2': 'fonts/poppins-latin-400-normal.woff2',
+    '@fontsource/poppins/files/poppins-latin-500-normal.woff2': 'fonts/poppins-latin-500-normal.woff2',
+    '@fontsource/poppins/files/poppins-latin-600-normal.woff2': 'fonts/poppins-latin-600-normal.woff2',
+    '@fontsource/poppins/LICENSE': 'fonts/LICENSE-poppins.txt',
+    '@fontsource/jetbrains-mono/files/jetbrains-mono-latin-300-normal.woff2': 'fonts/jetbrains-mono-latin-300-normal.woff2',
+    '@fontsource/jetbrains-mono/files/jetbrains-mono-latin-400-normal.woff2': 'fonts/jetbrains-mono-latin-400-normal.woff2',
+    '@fontsource/jetbrains-mono/LICENSE': 'fonts/LICENSE-jetbrains-mono.txt',
+}
+CSS_SOURCE = 'assets/css/app.css'
+CSS_OUTPUT = 'css/app.css'
+
+
+def _kib(size):
+    return f"{size / 1024:,.1f} KiB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the static bundle from the npm packages in package.json (run `npm install` first): "
+        "copy Chart.js and the font files into static/, and compile assets/css/app.css with the "
+        "Tailwind CLI into a purged, minified static/css/app.css. Then run collectstatic, which "
+        "hashes the names and writes the gzip/brotli copies WhiteNoise serves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-minify', action='store_true', help="Readable CSS, for debugging styles")
+
+    def handle(self, *args, **options):
+        base_dir = settings.BASE_DIR
+        node_modules = base_dir / 'node_modules'
+        static_dir = base_dir / 'static'
+        tailwind = node_modules / '.bin' / 'tailwindcss'
+        if not tailwind.exists():
+            raise CommandError(f"{tailwind} not found: run `npm install` in {base_dir} first.")
+
+        for source, target in VENDORED.items():
+            source, target = node_modules / source, static_dir / target
+            if not source.exists():
+                raise CommandError(f"{source} not found: run `npm install` (package.json changed?)")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, target)
+            self.stdout.write(f"  {target.relative_to(base_dir)}  {_kib(target.stat().st_size)}")
+
+        output = static_dir / CSS_OUTPUT
+        command = [str(tailwind), '-c', 'tailwind.config.js', '-i', CSS_SOURCE, '-o', str(output)]
+        if not options['no_minify']:
+            command.append('--minify')
+        result = subprocess.run(command, cwd=base_dir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"Tailwind build failed:\n{result.stderr}")
+        self.stdout.write(f"  {output.relative_to(base_dir)}  {_kib(output.stat().st_size)}")
+        self.stdout.write(self.style.SUCCESS("Assets built; run `python manage.py collectstatic` to publish them."))
@@ -0,0 +1,50 @@
+# trademind_app/management/commands/check_query_budgets.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from trademind_app.bench import sandbox
+from trademind_app.query_budgets import QUERY_BUDGETS, RULE_QUERY_BUDGETS, rule_queries, scenarios, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Report each view's SQL queries against its budget on a journal seeded in a rolled-back "
+        "transaction; exits non-zero when one is over. The budgets and scenarios live in "
+        "trademind_app/query_budgets.py; trademind_app/tests/test_query_budgets.py holds them in CI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=60, help="Seeded trades (budgets must hold at any size)")
+        parser.add_argument('--rules', type=int, default=8)
+        parser.add_argument('--show-sql', action='store_true', help="Print the queries of views over budget")
+
+    def handle(self, *args, **options):
+        failures = []
+        with sandbox():
+            user, rules, trades = seed(options['trades'], options['rules'])
+            self.stdout.write(f"{'view':<32} {'queries':>7} {'budget':>7} {'rule queries':>13}")
+            for name, request in scenarios(user, rules, trades):
+                with CaptureQueriesContext(connection) as queries:
+                    response = request()
+                if response.status_code >= 400:
+                    failures.append(f"{name}: HTTP {response.status_code}")
+                budget = QUERY_BUDGETS[name]
+                rule_count = rule_queries(queries.captured_queries)
+                rule_budget = RULE_QUERY_BUDGETS.get(name)
+                over = len(queries) > budget
+                rules_over = rule_budget is not None and rule_count > rule_budget
+                rule_text = f"{rule_count}/{rule_budget}" if rule_budget is not None else str(rule_count)
+                line = f"{name:<32} {len(queries):>7} {budget:>7} {rule_text:>13}"
+                self.stdout.write(self.style.ERROR(line + "  OVER") if over or rules_over else line)
+                if over:
+                    failures.append(f"{name}: {len(queries)} queries > budget {budget}")
+                if rules_over:
+                    failures.append(f"{name}: {rule_count} StrategyRule queries > budget {rule_budget}")
+                if (over or rules_over) and options['show_sql']:
+                    for query in queries.captured_queries:
+                        self.stdout.write(f"    {query['sql']}")
+
+        if failures:
+            raise CommandError("Query budget check failed:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All views within their query budgets."))
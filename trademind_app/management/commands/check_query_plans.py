@@ -0,0 +1,41 @@
+# trademind_app/management/commands/check_query_plans.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from trademind_app.bench import sandbox
+from trademind_app.query_plans import explain, plan_problems, plans, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN QUERY PLAN the hot Trade/AIInsight queries and fail if one stops using its index "
+        "or sorts in a temp B-tree. SQLite only; runs in a rolled-back transaction. The checks live "
+        "in trademind_app/query_plans.py; trademind_app/tests/test_query_plans.py holds them in CI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, default=200)
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not only failures")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Query plan checks are written for SQLite, not {connection.vendor}.")
+
+        failures = []
+        with sandbox():
+            checks = plans(*seed(options['trades']))
+            for name, queryset, index, sort_ok in checks:
+                plan = explain(queryset)
+                problems = plan_problems(plan, index, sort_ok)
+
+                status = self.style.ERROR("FAIL") if problems else self.style.SUCCESS("ok")
+                self.stdout.write(f"{status:<4} {name}" + (f" ({', '.join(problems)})" if problems else ""))
+                if problems or options['verbose_plans']:
+                    for step in plan:
+                        self.stdout.write(f"       {step}")
+                if problems:
+                    failures.append(f"{name}: {', '.join(problems)}")
+
+        if failures:
+            raise CommandError("Query plan check failed:\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"All {len(checks)} query plans use their indexes."))
@@ -0,0 +1,47 @@
+# trademind_app/management/commands/export_trades.py
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from trademind_app import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a trader's journal (trades, followed rules, AI insights) to CSV or JSON Lines. "
+        "Prints the cursor to pass as --since for the next incremental export."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--output', default='-', help="File path, or - for stdout")
+        parser.add_argument('--since', type=int, default=0, help="Cursor from a previous export")
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']!r}")
+
+        cursor = export.export_cursor(user)
+        queryset = export.export_queryset(user, since=options['since'], cursor=cursor)
+        blocks = export.stream_export(queryset, options['format'], gzip=options['gzip'],
+                                      chunk_size=options['chunk_size'])
+
+        written = 0
+        out = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for block in blocks:
+                out.write(block)
+                written += len(block)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+            else:
+                out.flush()
+
+        # Status goes to stderr so stdout stays a clean export
+        self.stderr.write(f"Wrote {written} bytes. Next incremental export: --since {cursor}")
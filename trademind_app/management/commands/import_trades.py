@@ -0,0 +1,49 @@
+# trademind_app/management/commands/import_trades.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from trademind_app import importer
+from trademind_app.bench import Timer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a broker statement (MT4/MT5 HTML or CSV) into a trader's journal. "
+        "Trades already imported from the same statement are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['auto'] + importer.FORMATS, default='auto')
+        parser.add_argument('--tz-offset', type=int, default=0, help="Broker server time offset from UTC, in hours")
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Parse and validate without writing")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']!r}")
+
+        try:
+            statement = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+        with statement:
+            fmt = options['format']
+            if fmt == 'auto':
+                fmt = importer.detect_format(options['path'], statement.read(4096))
+                statement.seek(0)
+            with Timer() as t:
+                result = importer.import_trades(user, statement, fmt, tz_offset=options['tz_offset'],
+                                                batch_size=options['batch_size'], dry_run=options['dry_run'])
+
+        for error in result.errors:
+            self.stderr.write(error)
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... and {result.error_count - len(result.errors)} more")
+        self.stdout.write(self.style.SUCCESS(
+            f"{fmt}: {result.rows} rows, {result.trades} trades in {t.elapsed:.2f}s — {result.created} imported, "
+            f"{result.duplicates} duplicates, {result.skipped} skipped, {result.error_count} errors"
+            + (" (dry run)" if options['dry_run'] else "")
+        ))
@@ -0,0 +1,42 @@
+# trademind_app/management/commands/insight_cache.py
+from django.core.management.base import BaseCommand
+
+from trademind_app import insight_cache
+from trademind_app.models import InsightCacheEntry
+
+
+class Command(BaseCommand):
+    help = "Inspect, trim or clear the AI insight response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['stats', 'list', 'evict', 'clear'], nargs='?', default='stats')
+        parser.add_argument('--limit', type=int, default=20, help="Rows shown by `list`")
+
+    def handle(self, *args, **options):
+        action = options['action']
+
+        if action == 'stats':
+            stats = insight_cache.stats()
+            self.stdout.write(f"Entries:       {stats['db_entries']} ({stats['db_expired']} expired)")
+            self.stdout.write(f"Lifetime hits: {stats['db_total_hits']} (persistent table)")
+            self.stdout.write(f"TTL:           {insight_cache.cache_setting('TTL')}s, max {insight_cache.cache_setting('MAX_ENTRIES')} entries")
+            self.stdout.write(
+                "Hit/miss counters are per process; see a worker's or web process's "
+                "insight_cache.stats() for memory_hits/db_hits/misses."
+            )
+
+        elif action == 'list':
+            entries = InsightCacheEntry.objects.order_by('-hits', '-created_at')[:options['limit']]
+            for entry in entries:
+                self.stdout.write(
+                    f"{entry.key[:16]}  hits={entry.hits:<5} created={entry.created_at:%Y-%m-%d %H:%M}  "
+                    f"{entry.payload.get('risk_pattern')}: {entry.payload.get('insight', '')[:60]}"
+                )
+
+        elif action == 'evict':
+            deleted = insight_cache.evict()
+            self.stdout.write(self.style.SUCCESS(f"Evicted {deleted} expired/overflow entries."))
+
+        elif action == 'clear':
+            deleted = insight_cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Cleared {deleted} entries."))
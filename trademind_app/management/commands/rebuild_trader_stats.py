@@ -0,0 +1,42 @@
+# trademind_app/management/commands/rebuild_trader_stats.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from trademind_app import stats as trader_stats
+from trademind_app.models import TraderStats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized TraderStats rows from scratch, or verify them against the journal."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only compare; exit non-zero on drift")
+        parser.add_argument('--user', help="Only this username")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError(f"No user named {options['user']!r}")
+
+        drifted = 0
+        for user in users.iterator():
+            if not options['verify']:
+                trader_stats.rebuild(user.pk)
+                continue
+            stored = TraderStats.objects.filter(user=user).first()
+            if stored is None:
+                continue  # built lazily on the next dashboard visit
+            mismatches = trader_stats.diff(stored)
+            if mismatches:
+                drifted += 1
+                for name, (have, want) in mismatches.items():
+                    self.stdout.write(self.style.WARNING(f"{user.username}.{name}: stored {have!r}, actual {want!r}"))
+
+        if options['verify']:
+            if drifted:
+                raise CommandError(f"{drifted} user(s) have drifted stats; run without --verify to rebuild.")
+            self.stdout.write(self.style.SUCCESS("All TraderStats rows match the journal."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {users.count()} user(s)."))
@@ -0,0 +1,56 @@
+# trademind_app/management/commands/run_insight_worker.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from trademind_app import screenshots
+from trademind_app.jobs import claim_jobs, process_job_safely
+
+
+def _run_in_thread(job):
+    # Each pool thread gets its own DB connection; close it so long-running
+    # workers don't accumulate stale connections.
+    try:
+        return process_job_safely(job)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Process queued AI insight jobs with a thread pool, and pending trade screenshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Concurrent provider calls (default: 4)")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Drain due jobs once and exit")
+        parser.add_argument('--no-screenshots', action='store_true', help="Leave screenshots to another worker")
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        self.stdout.write(f"[Worker] Started with {threads} thread(s)")
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='insight') as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    jobs = claim_jobs(limit=threads)
+                    if jobs:
+                        statuses = list(pool.map(_run_in_thread, jobs))
+                        self.stdout.write(
+                            f"[Worker] Processed {len(jobs)} job(s): "
+                            + ", ".join(f"{job.pk}={status}" for job, status in zip(jobs, statuses))
+                        )
+                    # A few screenshots per round, so a busy insight queue can't starve them
+                    images = 0 if options['no_screenshots'] else screenshots.process_pending(limit=threads)
+                    if images:
+                        self.stdout.write(f"[Worker] Processed {images} screenshot(s)")
+                    if jobs or images:
+                        continue
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                # Leased jobs become claimable again once their visibility timeout expires
+                self.stdout.write("[Worker] Interrupted, shutting down")
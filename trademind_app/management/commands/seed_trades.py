@@ -0,0 +1,52 @@
+# trademind_app/management/commands/seed_trades.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from trademind_app import analytics, page_cache
+from trademind_app import stats as trader_stats
+from trademind_app.bench import Timer, make_user, seed_journal
+
+
+class Command(BaseCommand):
+    help = (
+        "Create N synthetic traders with M trades each (realistic session, pair, emotion and "
+        "rule distributions) for measuring query performance locally. Writes to the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--trades', type=int, default=1000, help="Trades per user")
+        parser.add_argument('--rules', type=int, default=6, help="Strategy rules per user")
+        parser.add_argument('--days', type=int, default=365, help="Spread trades over this many past days")
+        parser.add_argument('--prefix', default='seed_trader', help="Usernames are <prefix>_<n>")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--replace', action='store_true', help="Delete existing users with the same names first")
+
+    def handle(self, *args, **options):
+        usernames = [f"{options['prefix']}_{i + 1}" for i in range(options['users'])]
+        existing = User.objects.filter(username__in=usernames)
+        if existing.exists():
+            if not options['replace']:
+                raise CommandError(
+                    f"{existing.count()} seed users already exist (e.g. {existing.first().username}); "
+                    "use --replace or another --prefix."
+                )
+            existing.delete()
+
+        total = 0
+        with Timer() as t:
+            for i, username in enumerate(usernames):
+                with transaction.atomic():
+                    user = make_user(username, rules=options['rules'])
+                    trades = seed_journal(user, options['trades'], seed=options['seed'] + i, days=options['days'])
+                    trader_stats.rebuild(user.pk)  # bulk inserts skip the signal handlers
+                    analytics.invalidate(user.pk)
+                    page_cache.bump(user.pk)
+                total += len(trades)
+                self.stdout.write(f"  {username}: {len(trades)} trades")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total} trades for {len(usernames)} users in {t.elapsed:.1f}s "
+            f"(password for every seed user: bench-password-123)."
+        ))
@@ -0,0 +1,223 @@
+# trademind_app/metrics.py
+"""
+Counters and latency histograms for the AI coach, exported in Prometheus
+text format on /metrics.
+
+Each process accumulates deltas in memory and flushes them into a small
+SQLite file shared by every worker (METRICS['PATH']) at most every
+FLUSH_INTERVAL seconds, so gunicorn workers add up instead of each
+reporting its own numbers. A scrape flushes the serving process first.
+
+    ai_requests_total{provider, outcome}            counter
+    ai_request_duration_seconds{provider, outcome}  histogram
+    insight_cache_lookups_total{result}             counter
+    ai_hedges_total{result}                         counter
+    ai_batch_items_total{result}                    counter
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIG ---
+DEFAULT_METRICS_SETTINGS = {
+    'ENABLED': True,
+    'PATH': os.path.join(tempfile.gettempdir(), 'trademind_metrics.sqlite3'),
+    'FLUSH_INTERVAL': 1.0,  # seconds between flushes of a process's deltas
+    'TOKEN': '',            # if set, /metrics also accepts "Authorization: Bearer <token>"
+}
+
+# Seconds; upper bounds of the latency histogram buckets (+Inf is implicit)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30)
+
+HELP = {
+    'ai_requests_total': ('counter', "AI coach calls by provider and outcome."),
+    'ai_request_duration_seconds': ('histogram', "AI coach call latency by provider and outcome."),
+    'insight_cache_lookups_total': ('counter', "Insight cache lookups by result."),
+    'ai_hedges_total': ('counter', "Hedged AI coach calls by which request answered first."),
+    'ai_batch_items_total': ('counter', "Trades in packed batch prompts: parsed from the answer, or sent again alone."),
+}
+
+# Outcomes used in the `outcome` label
+SUCCESS = 'success'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+CIRCUIT_OPEN = 'circuit_open'
+BAD_PAYLOAD = 'bad_payload'
+PARSE_ERROR = 'parse_error'
+NOT_CONFIGURED = 'not_configured'
+MOCK_FALLBACK = 'mock_fallback'
+CANCELLED = 'cancelled'  # abandoned by the client, or the losing request of a hedge
+BUDGET_EXHAUSTED = 'budget_exhausted'  # skipped: the provider's calls-per-minute budget is spent
+
+
+def metrics_setting(name):
+    return getattr(settings, 'METRICS', {}).get(name, DEFAULT_METRICS_SETTINGS[name])
+
+
+def http_outcome(status):
+    return f'http_{status}'
+
+
+# --- IN-PROCESS DELTAS ---
+_lock = threading.Lock()
+_pending = defaultdict(float)  # (sample name, labels json) -> delta
+_last_flush = time.monotonic()
+
+
+def _labels(**labels):
+    return json.dumps(labels, sort_keys=True, separators=(',', ':'))
+
+
+def inc(name, amount=1, **labels):
+    if not metrics_setting('ENABLED'):
+        return
+    with _lock:
+        _pending[(name, _labels(**labels))] += amount
+    _maybe_flush()
+
+
+def observe(name, seconds, **labels):
+    """
+    Add one observation to a histogram (cumulative buckets, sum and count).
+    """
+    if not metrics_setting('ENABLED'):
+        return
+    first_bucket = bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        # Every bucket gets a row (0 below the observation) so series are never missing
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            _pending[(f'{name}_bucket', _labels(le=str(bound), **labels))] += int(i >= first_bucket)
+        _pending[(f'{name}_bucket', _labels(le='+Inf', **labels))] += 1
+        _pending[(f'{name}_sum', _labels(**labels))] += seconds
+        _pending[(f'{name}_count', _labels(**labels))] += 1
+    _maybe_flush()
+
+
+def record_ai_call(provider, outcome, seconds=None):
+    inc('ai_requests_total', provider=provider, outcome=outcome)
+    if seconds is not None:
+        observe('ai_request_duration_seconds', seconds, provider=provider, outcome=outcome)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ai_call provider=%s outcome=%s duration_ms=%.1f",
+                     provider, outcome, (seconds or 0) * 1000)
+
+
+# --- SHARED STORE ---
+_local = threading.local()
+
+
+def _connect():
+    path = metrics_setting('PATH')
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != path or getattr(_local, 'pid', None) != os.getpid():
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')  # metrics may lose the last second on power loss
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS samples ('
+            ' name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,'
+            ' PRIMARY KEY (name, labels))'
+        )
+        _local.conn, _local.path, _local.pid = conn, path, os.getpid()
+    return conn
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= metrics_setting('FLUSH_INTERVAL'):
+        flush()
+
+
+def flush():
+    """
+    Add this process's pending deltas to the shared store.
+    """
+    global _pending, _last_flush
+    with _lock:
+        batch, _pending = _pending, defaultdict(float)
+        _last_flush = time.monotonic()
+    if not batch:
+        return
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT INTO samples (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value) for (name, labels), value in batch.items()],
+            )
+    except sqlite3.Error:
+        # Metrics must never break a request: put the deltas back for the next flush
+        logger.warning("Could not flush metrics to %s", metrics_setting('PATH'), exc_info=True)
+        with _lock:
+            for key, value in batch.items():
+                _pending[key] += value
+
+
+atexit.register(flush)
+
+
+def samples():
+    """
+    All stored samples as (name, labels dict, value), after flushing this process.
+    """
+    flush()
+    rows = _connect().execute('SELECT name, labels, value FROM samples ORDER BY name, labels').fetchall()
+    return [(name, json.loads(labels), value) for name, labels, value in rows]
+
+
+def reset():
+    with _lock:
+        _pending.clear()
+    _connect().execute('DELETE FROM samples')
+
+
+# --- EXPOSITION ---
+def _family(sample_name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if sample_name.endswith(suffix) and sample_name[:-len(suffix)] in HELP:
+            return sample_name[:-len(suffix)]
+    return sample_name
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(prefix='trademind_'):
+    """
+    Prometheus text exposition (format 0.0.4) of every stored sample.
+    """
+    def order(sample):
+        name, labels, _ = sample
+        other = {k: v for k, v in labels.items() if k != 'le'}
+        le = float(labels.get('le', 'inf'))
+        return _family(name), json.dumps(other, sort_keys=True), name, le
+
+    lines, seen = [], set()
+    for name, labels, value in sorted(samples(), key=order):
+        family = _family(name)
+        if family not in seen:
+            seen.add(family)
+            kind, text = HELP.get(family, ('untyped', ''))
+            lines.append(f"# HELP {prefix}{family} {text}")
+            lines.append(f"# TYPE {prefix}{family} {kind}")
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        lines.append(f"{prefix}{name}{{{label_text}}} {_format_value(value)}" if label_text
+                     else f"{prefix}{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,43 @@
+# trademind_app/middleware.py
+"""
+Middleware adapted for the async (ASGI) request chain.
+
+Django runs a sync-only middleware under ASGI by wrapping it in
+sync_to_async, and everything below it in async_to_sync: every request
+would then hold a thread for its whole duration, including a slow AI call
+awaited by an async view. Keeping each middleware async-capable lets a
+worker's event loop carry the request end to end.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise (sync only in 6.x) usable in both chains. Static requests
+    are matched against WhiteNoise's in-memory file table on the event loop;
+    only a hit (or, with autorefresh in DEBUG, the filesystem lookup) goes
+    to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
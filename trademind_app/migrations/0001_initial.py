@@ -0,0 +1,83 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrategyRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule_text', models.CharField(help_text="e.g., 'RSI < 30', 'Price at support', 'Risk < 2%'", max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='strategy_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Strategy Rule',
+                'verbose_name_plural': 'Strategy Rules',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Trade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('session', models.CharField(choices=[('asia', 'Asia Session'), ('london', 'London Session'), ('ny', 'New York Session')], max_length=10)),
+                ('pair', models.CharField(choices=[('BTC/USD', 'BTC/USD'), ('ETH/USD', 'ETH/USD'), ('XRP/USD', 'XRP/USD'), ('SOL/USD', 'SOL/USD'), ('Gold', 'Gold'), ('Oil', 'Oil'), ('GBP/USD', 'GBP/USD'), ('EUR/GBP', 'EUR/GBP'), ('USD/JPY', 'USD/JPY'), ('Custom', 'Custom Pair')], max_length=20)),
+                ('entry', models.CharField(choices=[('BUY', 'BUY'), ('SELL', 'SELL')], max_length=4)),
+                ('profit', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('loss', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('pre_trade_emotion', models.CharField(choices=[('fear', '😨 Fear'), ('angry', '😡 Angry'), ('sad', '😢 Sad'), ('neutral', '😐 Neutral'), ('happy', '😊 Happy'), ('chill', '🧘\u200d♂️ Chill')], help_text='Emotion BEFORE entering the trade', max_length=10)),
+                ('post_trade_emotion', models.CharField(choices=[('fear', '😨 Fear'), ('angry', '😡 Angry'), ('sad', '😢 Sad'), ('neutral', '😐 Neutral'), ('happy', '😊 Happy'), ('chill', '🧘\u200d♂️ Chill')], help_text='Emotion AFTER exiting the trade', max_length=10)),
+                ('reason', models.TextField(help_text='Why did you take this trade? What was your mindset?')),
+                ('lot_size', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('conclusion', models.TextField(blank=True, help_text='What did you learn from this trade?')),
+                ('screenshot', models.ImageField(blank=True, null=True, upload_to='trade_screenshots/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('rules_followed', models.ManyToManyField(blank=True, help_text='Which rules did you follow in this trade?', to='trademind_app.strategyrule')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trade',
+                'verbose_name_plural': 'Trades',
+                'ordering': ['-date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AIInsight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('insight', models.TextField(help_text='AI-generated behavioral insight')),
+                ('risk_pattern', models.CharField(help_text="e.g., 'Revenge trading after loss', 'FOMO entry'", max_length=100)),
+                ('discipline_score', models.IntegerField(choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 6), (7, 7), (8, 8), (9, 9), (10, 10)], help_text='1-10: How disciplined was this trade?')),
+                ('coaching_tip', models.TextField(help_text='Actionable tip from AI coach')),
+                ('generated_at', models.DateTimeField(auto_now_add=True)),
+                ('trade', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='insight', to='trademind_app.trade')),
+            ],
+            options={
+                'verbose_name': 'AI Insight',
+                'verbose_name_plural': 'AI Insights',
+                'ordering': ['-generated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TraderProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trader_type', models.CharField(choices=[('day', 'Day Trader'), ('swing', 'Swing Trader'), ('scalper', 'Scalper')], default='day', max_length=10)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trademind_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Not claimable before this time (retry backoff)')),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Visibility timeout of the current lease', null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('trade', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='insight_job', to='trademind_app.trade')),
+            ],
+            options={
+                'verbose_name': 'Insight Job',
+                'verbose_name_plural': 'Insight Jobs',
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='insightjob_status_run_after')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trademind_app', '0002_insightjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsightCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('payload', models.JSONField(help_text='Parsed provider insight dict')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Insight Cache Entry',
+                'verbose_name_plural': 'Insight Cache Entries',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trademind_app', '0003_insightcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiinsight',
+            name='source',
+            field=models.CharField(blank=True, choices=[('provider', 'AI Provider'), ('mock', 'Mock Fallback')], help_text='Where the insight came from (blank for insights created before this was tracked)', max_length=10),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('trademind_app', '0004_aiinsight_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraderStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trader_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_trades', models.PositiveIntegerField(default=0)),
+                ('winning_trades', models.PositiveIntegerField(default=0)),
+                ('losing_trades', models.PositiveIntegerField(default=0)),
+                ('profit_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('loss_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rules_followed_total', models.PositiveIntegerField(default=0, help_text='Sum of rules followed across trades')),
+                ('emotion_stats', models.JSONField(default=dict)),
+                ('insight_count', models.PositiveIntegerField(default=0)),
+                ('discipline_score_total', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trader Stats',
+                'verbose_name_plural': 'Trader Stats',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trademind_app', '0005_traderstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='trade_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['user', 'session', 'date', 'created_at'], name='trade_user_session_date'),
+        ),
+        migrations.AddIndex(
+            model_name='trade',
+            index=models.Index(fields=['user', 'pre_trade_emotion'], name='trade_user_emotion'),
+        ),
+    ]
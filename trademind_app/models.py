@@ -45,6 +45,11 @@ PAIR_CHOICES = [
     
 ]
 
+INSIGHT_SOURCES = [
+    ('provider', 'AI Provider'),
+    ('mock', 'Mock Fallback'),
+]
+
 
 # --- PROFILE: Trader Type ---
 class TraderProfile(models.Model):
@@ -120,6 +125,12 @@ class Trade(models.Model):
     lot_size = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     conclusion = models.TextField(blank=True, help_text="What did you learn from this trade?")
     screenshot = models.ImageField(upload_to='trade_screenshots/', null=True, blank=True)
+    # SHA-256 of the screenshot once screenshots.py has stored it content-addressed
+    # and rendered its WebP renditions; blank while processing is pending
+    screenshot_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+
+    # Natural key of imported trades (e.g. "mt5:123456"); blank for trades logged by hand
+    external_id = models.CharField(max_length=64, blank=True, default='', editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -133,10 +144,45 @@ class Trade(models.Model):
         verbose_name = "Trade"
         verbose_name_plural = "Trades"
         ordering = ['-date', '-created_at']
+        # SQLite appends the rowid (id) to every index, so these also serve the
+        # (date, created_at, id) keyset order and the running-balance window.
+        indexes = [
+            # Journal listing, keyset pages and date filter: user_id = ? ORDER BY date, created_at
+            models.Index(fields=['user', 'date', 'created_at'], name='trade_user_date'),
+            # Trade history filtered by session, still in journal order
+            models.Index(fields=['user', 'session', 'date', 'created_at'], name='trade_user_session_date'),
+            # Per-emotion aggregates (TraderStats.compute, analytics)
+            models.Index(fields=['user', 'pre_trade_emotion'], name='trade_user_emotion'),
+            # pair__icontains and the P&L thresholds are range/LIKE filters applied
+            # while walking trade_user_date in journal order; they get no index.
+            # Screenshots waiting for the worker (screenshots.pending_trades)
+            models.Index(
+                fields=['id'], condition=models.Q(screenshot_hash='', screenshot__gt=''),
+                name='trade_screenshot_pending',
+            ),
+        ]
+        constraints = [
+            # Re-importing a broker statement must not duplicate trades
+            models.UniqueConstraint(
+                fields=['user', 'external_id'], condition=~models.Q(external_id=''),
+                name='trade_unique_external_id',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.pair} | {self.entry} | {self.date}"
 
+    # Screenshot renditions (see screenshots.py); the upload itself until processed
+    @property
+    def screenshot_thumb_url(self):
+        from .screenshots import rendition_url
+        return rendition_url(self, 'thumb')
+
+    @property
+    def screenshot_display_url(self):
+        from .screenshots import rendition_url
+        return rendition_url(self, 'display')
+
 
 # --- AI INSIGHT: Behavioral Analysis ---
 class AIInsight(models.Model):
@@ -152,6 +198,12 @@ class AIInsight(models.Model):
         choices=[(i, i) for i in range(1, 11)]
     )
     coaching_tip = models.TextField(help_text="Actionable tip from AI coach")
+    source = models.CharField(
+        max_length=10,
+        choices=INSIGHT_SOURCES,
+        blank=True,
+        help_text="Where the insight came from (blank for insights created before this was tracked)"
+    )
 
     generated_at = models.DateTimeField(auto_now_add=True)
 
@@ -159,6 +211,134 @@ class AIInsight(models.Model):
         verbose_name = "AI Insight"
         verbose_name_plural = "AI Insights"
         ordering = ['-generated_at']
+        # No extra indexes: every AIInsight access is by trade_id (the OneToOne's
+        # unique index), which SQLite prefers over any composite one.
 
     def __str__(self):
         return f"Insight: {self.trade.pair} - {self.discipline_score}/10"
+
+
+# --- AI INSIGHT JOB: Background Generation Queue ---
+class InsightJob(models.Model):
+    """
+    DB-backed queue entry for generating a trade's AIInsight off the request path.
+    Workers claim jobs by leasing them until `locked_until`; a lease that expires
+    (crashed worker) makes the job claimable again.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    trade = models.OneToOneField(Trade, on_delete=models.CASCADE, related_name='insight_job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now, help_text="Not claimable before this time (retry backoff)")
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="Visibility timeout of the current lease")
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Insight Job"
+        verbose_name_plural = "Insight Jobs"
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='insightjob_status_run_after'),
+        ]
+
+    def __str__(self):
+        return f"InsightJob #{self.pk} ({self.status}) for trade {self.trade_id}"
+
+
+# --- AI INSIGHT CACHE: Content-Addressed Responses ---
+class InsightCacheEntry(models.Model):
+    """
+    Persistent tier of the insight cache (see insight_cache.py).
+    Keyed by a SHA-256 fingerprint of the normalized prompt inputs.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    payload = models.JSONField(help_text="Parsed provider insight dict")
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_hit_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Insight Cache Entry"
+        verbose_name_plural = "Insight Cache Entries"
+
+    def __str__(self):
+        return f"{self.key[:12]}… ({self.hits} hits)"
+
+
+# --- TRADER STATS: Materialized Dashboard Numbers ---
+class TraderStats(models.Model):
+    """
+    Per-user aggregates kept up to date by the signal handlers in stats.py,
+    so the dashboard reads one row instead of counting the whole journal.
+    Money is stored in cents inside `emotion_stats` to keep sums exact.
+    Rebuild/verify with `python manage.py rebuild_trader_stats`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='trader_stats')
+
+    total_trades = models.PositiveIntegerField(default=0)
+    winning_trades = models.PositiveIntegerField(default=0)
+    losing_trades = models.PositiveIntegerField(default=0)
+    profit_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    loss_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rules_followed_total = models.PositiveIntegerField(default=0, help_text="Sum of rules followed across trades")
+
+    # {"fear": {"count": 3, "pnl_cents": -12050}, ...} keyed by pre-trade emotion
+    emotion_stats = models.JSONField(default=dict)
+
+    insight_count = models.PositiveIntegerField(default=0)
+    discipline_score_total = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Trader Stats"
+        verbose_name_plural = "Trader Stats"
+
+    def __str__(self):
+        return f"{self.user.username}: {self.total_trades} trades"
+
+    @property
+    def net_pnl(self):
+        return self.profit_total - self.loss_total
+
+    @property
+    def win_rate(self):
+        if not self.total_trades:
+            return 0
+        return round(self.winning_trades / self.total_trades * 100, 1)
+
+    @property
+    def avg_discipline_score(self):
+        if not self.insight_count:
+            return None
+        return round(self.discipline_score_total / self.insight_count, 1)
+
+    @property
+    def avg_rules_followed(self):
+        if not self.total_trades:
+            return 0
+        return round(self.rules_followed_total / self.total_trades, 2)
+
+    def emotion_avg_pnl(self):
+        """
+        Average signed P&L per pre-trade emotion, every emotion present.
+        """
+        data = {}
+        for emotion, _ in EMOTION_CHOICES:
+            bucket = self.emotion_stats.get(emotion) or {}
+            count = bucket.get('count', 0)
+            data[emotion] = round(bucket.get('pnl_cents', 0) / count / 100, 2) if count else 0
+        return data
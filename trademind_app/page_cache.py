@@ -0,0 +1,134 @@
+# trademind_app/page_cache.py
+"""
+Per-user generation counters for caching rendered pages, kept by
+versioned_cache:
+
+    page_generation:version:<user_id>     -> generation
+
+Any Trade, StrategyRule or AIInsight write of a user (and rules_followed
+changes) bumps their generation. Rendered HTML is cached under it, so a
+trader who hasn't logged anything new gets the page for one counter lookup
+plus the cached copy, and after a write every old copy is simply never
+asked for again (it expires):
+
+    {% cache cache_timeout 'dashboard' user.pk generation %}   template fragments
+    @cache_per_generation                                       whole GET responses
+
+Bulk writes (bulk_create/bulk_update, queryset.update) bypass the signals;
+callers must call `bump()`.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from . import versioned_cache
+from .models import AIInsight, StrategyRule, Trade
+
+# --- CONFIG ---
+DEFAULT_PAGE_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TIMEOUT': 3600,  # seconds a rendered page/fragment is kept (stale ones are never read)
+}
+
+
+def page_cache_setting(name):
+    return getattr(settings, 'PAGE_CACHE', {}).get(name, DEFAULT_PAGE_CACHE_SETTINGS[name])
+
+
+def fragment_timeout():
+    """
+    Timeout for {% cache %} fragments; 0 when disabled (templates then
+    render the fragment without the cache tag, which would still read).
+    """
+    return page_cache_setting('TIMEOUT') if page_cache_setting('ENABLED') else 0
+
+
+# --- GENERATIONS ---
+NAMESPACE = 'page_generation'
+
+
+def generation(user_id):
+    return versioned_cache.version(NAMESPACE, user_id)
+
+
+def bump(user_id):
+    versioned_cache.bump(NAMESPACE, user_id)
+
+
+# --- WHOLE VIEWS ---
+def cache_per_generation(view):
+    """
+    Cache an async view's 200 GET responses per user and generation. The
+    key also has the session (the page's CSRF token belongs to it) and the
+    full path (filters, cursors). Requests with flash messages waiting are
+    not served from, nor stored in, the cache: messages render once.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if request.method != 'GET' or not user.is_authenticated or not page_cache_setting('ENABLED'):
+            return await view(request, *args, **kwargs)
+
+        key, cached = await sync_to_async(_lookup)(request, view, user)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = await view(request, *args, **kwargs)
+        if key and response.status_code == 200 and not response.streaming and not response.cookies:
+            await sync_to_async(cache.set)(
+                key, (response.content, response['Content-Type']), page_cache_setting('TIMEOUT')
+            )
+        return response
+
+    return wrapper
+
+
+def _lookup(request, view, user):
+    # (key, cached (content, content_type) or None); key None: don't cache this one
+    if len(messages.get_messages(request)):
+        return None, None
+    scope = hashlib.md5(f"{request.session.session_key}|{request.get_full_path()}".encode()).hexdigest()
+    key = f"page:{view.__module__}.{view.__name__}:{user.pk}:{generation(user.pk)}:{scope}"
+    return key, cache.get(key)
+
+
+# --- SIGNALS ---
+@receiver(post_save, sender=Trade)
+@receiver(post_delete, sender=Trade)
+def _trade_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Trade.rules_followed.through)
+def _rules_followed_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(post_save, sender=StrategyRule)
+@receiver(post_delete, sender=StrategyRule)
+def _rule_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(post_save, sender=AIInsight)
+@receiver(post_delete, sender=AIInsight)
+def _insight_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if AIInsight.trade.is_cached(instance):
+        user_id = instance.trade.user_id
+    else:
+        user_id = Trade.objects.filter(pk=instance.trade_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, user_id)
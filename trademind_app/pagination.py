@@ -0,0 +1,179 @@
+# trademind_app/pagination.py
+"""
+Keyset (cursor) pagination for the trade journal.
+
+Trades are listed newest first on (date, created_at, id). A page is "the N
+rows older than cursor X", which the (user, date, created_at, id) ordering
+answers without OFFSET scans or a COUNT(*) on every request.
+
+Running P&L comes from a window function in the same query: with the rows
+older than the cursor as the window's input, SUM(...) OVER (ORDER BY key)
+for each row on the page is exactly its cumulative P&L since the first trade.
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.db.models import (
+    Case, Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When, Window,
+)
+from django.db.models.expressions import RowRange
+
+from .models import Trade
+
+KEY_FIELDS = ('date', 'created_at', 'id')
+NEWEST_FIRST = ['-date', '-created_at', '-id']
+OLDEST_FIRST = ['date', 'created_at', 'id']
+
+SIGNED_PNL = Case(
+    When(profit__isnull=False, then=F('profit')),
+    When(loss__isnull=False, then=-F('loss')),
+    default=Value(0),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+# Per-row count of rules followed. A correlated subquery rather than
+# Count('rules_followed'): the JOIN + GROUP BY would stop SQLite from walking
+# the (user, date, created_at) index in key order.
+RULES_FOLLOWED_N = Subquery(
+    Trade.rules_followed.through.objects.filter(trade_id=OuterRef('pk'))
+    .values('trade_id').annotate(n=Count('*')).values('n'),
+    output_field=IntegerField(),
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(trade):
+    raw = f"{trade.date.isoformat()}|{trade.created_at.isoformat()}|{trade.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        day, created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return date.fromisoformat(day), datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(token) from e
+
+
+def _older_than(key, inclusive=False):
+    day, created_at, pk = key
+    last = Q(date=day, created_at=created_at, id__lte=pk) if inclusive else Q(date=day, created_at=created_at, id__lt=pk)
+    return Q(date__lt=day) | Q(date=day, created_at__lt=created_at) | last
+
+
+def _newer_than(key):
+    day, created_at, pk = key
+    return Q(date__gt=day) | Q(date=day, created_at__gt=created_at) | Q(date=day, created_at=created_at, id__gt=pk)
+
+
+def with_running_pnl(queryset):
+    """
+    Annotate `signed_pnl` and `cumulative_pnl` (running total, oldest first).
+    """
+    return queryset.annotate(
+        signed_pnl=SIGNED_PNL,
+        cumulative_pnl=Window(
+            expression=Sum(SIGNED_PNL),
+            order_by=[F(name).asc() for name in KEY_FIELDS],
+            frame=RowRange(start=None, end=0),
+        ),
+    )
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    has_next: bool
+    is_first: bool
+    next_cursor: str = None     # `after` for the next (older) page
+    newer_cursor: str = None    # `start` for the previous (newer) page; None means the first page
+    total_pnl: object = 0       # cumulative P&L of the whole (filtered) journal
+    latest_pnl: object = 0      # P&L of the newest trade
+    extra: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_previous(self):
+        return not self.is_first
+
+
+def paginate_trades(queryset, after=None, start=None, per_page=10, page_annotations=None):
+    """
+    One page of `queryset` (already filtered to a user) newest first.
+    `after` is exclusive (older page), `start` inclusive (newer page).
+    `page_annotations` are only applied to the page query (e.g. per-row counts).
+    Raises InvalidCursor for tampered tokens.
+    """
+    cursor = _cursor(after, start)
+    rows = list(_page_rows(queryset, cursor, per_page, page_annotations))
+    head, newer = (rows[0] if rows else None), []
+    if cursor is not None:
+        head = _head(queryset).first()
+        if rows:
+            newer = list(_newer_rows(queryset, rows[0], per_page))
+    return _build_page(rows, cursor, per_page, head, newer)
+
+
+async def apaginate_trades(queryset, after=None, start=None, per_page=10, page_annotations=None):
+    """
+    `paginate_trades` for async views: the same queries, run with the async
+    ORM (`async for`, `afirst`).
+    """
+    cursor = _cursor(after, start)
+    rows = [row async for row in _page_rows(queryset, cursor, per_page, page_annotations)]
+    head, newer = (rows[0] if rows else None), []
+    if cursor is not None:
+        head = await _head(queryset).afirst()
+        if rows:
+            newer = [row async for row in _newer_rows(queryset, rows[0], per_page)]
+    return _build_page(rows, cursor, per_page, head, newer)
+
+
+def _cursor(after, start):
+    if start:
+        return _older_than(decode_cursor(start), inclusive=True)
+    if after:
+        return _older_than(decode_cursor(after))
+    return None
+
+
+def _page_rows(queryset, cursor, per_page, page_annotations):
+    page_qs = queryset.filter(cursor) if cursor is not None else queryset
+    return with_running_pnl(page_qs).annotate(**(page_annotations or {})).order_by(*NEWEST_FIRST)[:per_page + 1]
+
+
+def _head(queryset):
+    # Newest row of the whole (filtered) journal: its running P&L is the total
+    return with_running_pnl(queryset).order_by(*NEWEST_FIRST)
+
+
+def _newer_rows(queryset, first, per_page):
+    # Cursor of the newer page: the row `per_page` steps newer than this page's first row
+    first_key = tuple(getattr(first, name) for name in KEY_FIELDS)
+    return queryset.filter(_newer_than(first_key)).order_by(*OLDEST_FIRST).only(*KEY_FIELDS)[:per_page]
+
+
+def _build_page(rows, cursor, per_page, head, newer):
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    page = KeysetPage(object_list=rows, has_next=has_next, is_first=cursor is None)
+    if has_next:
+        page.next_cursor = encode_cursor(rows[-1])
+    if len(newer) == per_page and head and newer[-1].id != head.id:
+        page.newer_cursor = encode_cursor(newer[-1])
+    if head is not None:
+        page.total_pnl = head.cumulative_pnl
+        page.latest_pnl = head.signed_pnl
+    return page
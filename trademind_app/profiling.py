@@ -0,0 +1,260 @@
+# trademind_app/profiling.py
+"""
+Opt-in per-request profiling (enable with PROFILING['ENABLED']).
+
+For a sampled request, ProfilingMiddleware records:
+    sql  -> query count and time, via an execute wrapper on each connection
+    tpl  -> time inside Django template render() calls
+    ai   -> time inside the AI coach (see `ai_timer()` in ai_coach.py)
+and reports them in a Server-Timing header. Every sampled request also goes
+into a per-process ring buffer; the staff page (`profiling_report` view)
+lists the slowest of them. Unsampled requests pay one random() call.
+"""
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+# --- CONFIG ---
+DEFAULT_PROFILING_SETTINGS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.1,     # fraction of requests profiled
+    'BUFFER_SIZE': 500,     # sampled requests kept per process
+    'SLOWEST': 50,          # rows shown on the staff page
+    'SERVER_TIMING': True,  # add the Server-Timing header to sampled responses
+}
+
+
+def profiling_setting(name):
+    return getattr(settings, 'PROFILING', {}).get(name, DEFAULT_PROFILING_SETTINGS[name])
+
+
+# --- PROFILE ---
+@dataclass
+class RequestProfile:
+    method: str
+    path: str
+    started_at: object = field(default_factory=timezone.now)
+    status: int = 0
+    total_ms: float = 0.0
+    sql_count: int = 0
+    sql_ms: float = 0.0
+    template_ms: float = 0.0
+    ai_calls: int = 0
+    ai_ms: float = 0.0
+
+    @property
+    def other_ms(self):
+        return max(0.0, self.total_ms - self.sql_ms - self.template_ms - self.ai_ms)
+
+    def server_timing(self):
+        return ", ".join([
+            f'sql;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'ai;dur={self.ai_ms:.1f};desc="{self.ai_calls} calls"',
+            f'app;dur={self.other_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+
+_current = ContextVar('trademind_request_profile', default=None)
+
+
+def current_profile():
+    return _current.get()
+
+
+def _time_sql(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection: adds each query's duration
+    to the current request's profile. The profile lives in a context
+    variable, so queries an async view runs through sync_to_async (the async
+    ORM) count too, whichever thread's connection they use.
+    """
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_count += 1
+        profile.sql_ms += (time.perf_counter() - start) * 1000
+
+
+def _add_sql_timer(sender, connection, **kwargs):
+    if _time_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_sql)
+
+
+def _instrument_connections():
+    connection_created.connect(_add_sql_timer, dispatch_uid='trademind_profiling_sql')
+    for connection in connections.all(initialized_only=True):
+        _add_sql_timer(None, connection)
+
+
+@contextmanager
+def ai_timer():
+    """
+    Time an AI coach call into the current request's profile (no-op outside
+    a profiled request, e.g. in queue workers).
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.ai_calls += 1
+        profile.ai_ms += (time.perf_counter() - start) * 1000
+
+
+# --- TEMPLATE TIMING ---
+_template_patch_lock = threading.Lock()
+_template_patched = False
+
+
+def _instrument_templates():
+    """
+    Wrap the Django template backend's render() once per process. It is the
+    entry point of render()/render_to_string(); {% include %}/{% extends %}
+    go through the engine's internal Template, so nothing is counted twice.
+    """
+    global _template_patched
+    with _template_patch_lock:
+        if _template_patched:
+            return
+        from django.template.backends.django import Template
+
+        original = Template.render
+
+        def render(self, context=None, request=None):
+            profile = _current.get()
+            if profile is None:
+                return original(self, context, request)
+            # Lazy querysets run during rendering; keep their time under sql only
+            start, sql_before = time.perf_counter(), profile.sql_ms
+            try:
+                return original(self, context, request)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                profile.template_ms += elapsed - (profile.sql_ms - sql_before)
+
+        Template.render = render
+        _template_patched = True
+
+
+# --- RING BUFFER ---
+_buffer = deque(maxlen=DEFAULT_PROFILING_SETTINGS['BUFFER_SIZE'])
+_buffer_lock = threading.Lock()
+
+
+def _record(profile):
+    global _buffer
+    size = profiling_setting('BUFFER_SIZE')
+    with _buffer_lock:
+        if _buffer.maxlen != size:
+            _buffer = deque(_buffer, maxlen=size)
+        _buffer.append(profile)
+
+
+def slowest(limit=None):
+    """
+    The slowest sampled requests still in this process's buffer.
+    """
+    with _buffer_lock:
+        profiles = list(_buffer)
+    profiles.sort(key=lambda p: p.total_ms, reverse=True)
+    return profiles[:limit or profiling_setting('SLOWEST')]
+
+
+def buffer_summary():
+    with _buffer_lock:
+        profiles = list(_buffer)
+    return {
+        'sampled': len(profiles),
+        'capacity': _buffer.maxlen,
+        'sample_rate': profiling_setting('SAMPLE_RATE'),
+        'oldest': min((p.started_at for p in profiles), default=None),
+    }
+
+
+def clear():
+    with _buffer_lock:
+        _buffer.clear()
+
+
+def as_dicts(profiles):
+    return [dict(asdict(p), other_ms=p.other_ms) for p in profiles]
+
+
+# --- MIDDLEWARE ---
+class ProfilingMiddleware:
+    """
+    Add 'trademind_app.profiling.ProfilingMiddleware' near the top of
+    MIDDLEWARE and set PROFILING['ENABLED'] = True.
+    Works in both sync (WSGI) and async (ASGI) chains, so it never forces an
+    async view onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        if profiling_setting('ENABLED'):
+            _instrument_templates()
+            _instrument_connections()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile(method=request.method, path=request.path)
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.total_ms = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+        return self._finish(profile, response)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile(method=request.method, path=request.path)
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile.total_ms = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+        return self._finish(profile, response)
+
+    def _sampled(self):
+        return profiling_setting('ENABLED') and random.random() < profiling_setting('SAMPLE_RATE')
+
+    def _finish(self, profile, response):
+        profile.status = response.status_code
+        _record(profile)
+        if profiling_setting('SERVER_TIMING'):
+            response['Server-Timing'] = profile.server_timing()
+        return response
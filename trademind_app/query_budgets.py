@@ -0,0 +1,110 @@
+# trademind_app/query_budgets.py
+"""
+SQL query budgets per view, and the seeded journal and requests they are
+measured on. Held exactly by trademind_app/tests/test_query_budgets.py and
+reported by `python manage.py check_query_budgets`.
+"""
+from django.urls import reverse
+
+from . import rule_cache
+from . import stats as trader_stats
+from .bench import logged_in_client, make_trades, make_user, trade_post_data
+from .models import AIInsight, StrategyRule
+from .pagination import NEWEST_FIRST, encode_cursor
+
+# SQL queries per view, including the session + user lookups every
+# authenticated request pays (and SAVEPOINT/RELEASE pairs, since the check
+# runs inside a transaction). Budgets must not grow with journal size. The
+# tests hold them exactly, so a saved query lowers the budget too.
+QUERY_BUDGETS = {
+    'landing': 2,
+    'dashboard': 5,
+    'dashboard (cached)': 2,
+    'trade_log GET (cold rule cache)': 3,
+    'trade_log GET (warm rule cache)': 2,
+    'trade_log POST': 18,  # trade, rules followed, stats deltas and job in one transaction
+    'ai_insight (ready)': 3,
+    'ai_insight (pending)': 6,
+    'ai_insight_status': 3,
+    'trade_history': 3,
+    'trade_history (cached)': 2,
+    'trade_history filtered': 3,
+    'trade_history deep page': 5,
+    'add_rule GET': 2,
+    'add_rule POST': 3,
+    'edit_rule GET': 3,
+    'edit_rule POST': 4,
+    'delete_rule POST': 6,
+}
+
+# Max queries on the StrategyRule table itself (the per-user rule cache
+# serves choices, lists and counts). Views not listed are unchecked.
+RULE_QUERY_BUDGETS = {
+    'dashboard': 1,  # first view after seeding: cold cache
+    'dashboard (cached)': 0,
+    'trade_log GET (cold rule cache)': 1,
+    'trade_log GET (warm rule cache)': 0,
+    'trade_history': 0,
+}
+RULE_TABLE = '"trademind_app_strategyrule"'
+
+
+def seed(trades_count=60, rules_count=8):
+    """
+    A realistic journal: rules, trades with some followed rules, and
+    insights on roughly half of them.
+    """
+    user = make_user('budget_trader', rules=rules_count)
+    rules = list(StrategyRule.objects.filter(user=user))
+    trades = make_trades(user, trades_count)
+    Through = trades[0].rules_followed.through
+    Through.objects.bulk_create(
+        Through(trade_id=trade.id, strategyrule_id=rule.id)
+        for i, trade in enumerate(trades) for rule in rules[: i % 4]
+    )
+    AIInsight.objects.bulk_create(
+        AIInsight(trade=trade, insight="Seeded.", risk_pattern="None", discipline_score=7,
+                  coaching_tip="Seeded.", source='mock')
+        for trade in trades[::2]
+    )
+    trader_stats.rebuild(user.pk)  # bulk writes skip the signal handlers
+    return user, rules, trades
+
+
+def scenarios(user, rules, trades):
+    """
+    (name, request) for every budgeted view, in the order they must run:
+    the cached scenarios follow the request that fills the cache.
+    """
+    client = logged_in_client(user)
+    with_insight, without_insight = trades[0], trades[1]
+    spare_rule = rules[-1]
+    deep_cursor = encode_cursor(user.trade_set.order_by(*NEWEST_FIRST)[len(trades) // 2])
+    return [
+        ('landing', lambda: client.get(reverse('trademind_app:landing'))),
+        ('dashboard', lambda: client.get(reverse('trademind_app:dashboard'))),
+        ('dashboard (cached)', lambda: client.get(reverse('trademind_app:dashboard'))),
+        ('trade_log GET (cold rule cache)', lambda: (
+            rule_cache.invalidate(user.pk), client.get(reverse('trademind_app:trade_log')))[1]),
+        ('trade_log GET (warm rule cache)', lambda: client.get(reverse('trademind_app:trade_log'))),
+        ('trade_log POST', lambda: client.post(reverse('trademind_app:trade_log'), trade_post_data(rules))),
+        ('ai_insight (ready)', lambda: client.get(reverse('trademind_app:ai_insight', args=[with_insight.id]))),
+        ('ai_insight (pending)', lambda: client.get(reverse('trademind_app:ai_insight', args=[without_insight.id]))),
+        ('ai_insight_status', lambda: client.get(reverse('trademind_app:ai_insight_status', args=[without_insight.id]))),
+        ('trade_history', lambda: client.get(reverse('trademind_app:trade_history'))),
+        ('trade_history (cached)', lambda: client.get(reverse('trademind_app:trade_history'))),
+        ('trade_history filtered', lambda: client.get(
+            reverse('trademind_app:trade_history'), {'pair': 'GBP', 'session': 'london'})),
+        ('trade_history deep page', lambda: client.get(
+            reverse('trademind_app:trade_history'), {'after': deep_cursor})),
+        ('add_rule GET', lambda: client.get(reverse('trademind_app:add_rule'))),
+        ('add_rule POST', lambda: client.post(reverse('trademind_app:add_rule'), {'rule_text': "Budget rule"})),
+        ('edit_rule GET', lambda: client.get(reverse('trademind_app:edit_rule', args=[rules[0].id]))),
+        ('edit_rule POST', lambda: client.post(
+            reverse('trademind_app:edit_rule', args=[rules[0].id]), {'rule_text': "Edited rule"})),
+        ('delete_rule POST', lambda: client.post(reverse('trademind_app:delete_rule', args=[spare_rule.id]))),
+    ]
+
+
+def rule_queries(captured_queries):
+    return sum(1 for query in captured_queries if RULE_TABLE in query['sql'])
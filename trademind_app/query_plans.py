@@ -0,0 +1,79 @@
+# trademind_app/query_plans.py
+"""
+EXPLAIN QUERY PLAN checks for the hot Trade/AIInsight queries: the index
+each plan must use, on a seeded journal. Held by
+trademind_app/tests/test_query_plans.py and reported by
+`python manage.py check_query_plans`. SQLite only.
+"""
+from django.db import connection
+from django.db.models import Count, Sum
+
+from . import screenshots
+from .bench import make_trades, make_user
+from .models import AIInsight, Trade
+from .pagination import NEWEST_FIRST, RULES_FOLLOWED_N, _older_than, with_running_pnl
+
+
+def seed(trades_count=200):
+    """
+    A journal shaped like production for the planner; returns the user and
+    a trade from the middle of it.
+    """
+    user = make_user('plan_trader')
+    trades = make_trades(user, trades_count)
+    middle = Trade.objects.get(pk=trades[len(trades) // 2].pk)
+    # Mostly provider insights with a few mocks, as in a backfilled journal
+    AIInsight.objects.bulk_create(
+        AIInsight(trade=trade, insight="Plan check.", risk_pattern="None", discipline_score=5,
+                  coaching_tip="Plan check.", source='mock' if i % 20 == 0 else 'provider')
+        for i, trade in enumerate(trades)
+    )
+    # Every 10th trade has a screenshot, the newest of them not processed yet
+    with_screenshots = [trade.pk for trade in trades[::10]]
+    Trade.objects.filter(pk__in=with_screenshots).update(screenshot='trade_screenshots/chart.png')
+    Trade.objects.filter(pk__in=with_screenshots[:-3]).update(screenshot_hash='0' * 64)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return user, middle
+
+
+def plans(user, trade):
+    """
+    (name, queryset, index the plan must use, whether an extra sort is allowed)
+    for the hot Trade/AIInsight queries.
+    """
+    trades = Trade.objects.filter(user=user)
+    key = (trade.date, trade.created_at, trade.id)
+    return [
+        ('journal page', trades.order_by(*NEWEST_FIRST)[:11], 'trade_user_date', False),
+        ('keyset page', trades.filter(_older_than(key)).order_by(*NEWEST_FIRST)[:11], 'trade_user_date', False),
+        ('date filter', trades.filter(date=trade.date).order_by(*NEWEST_FIRST)[:11], 'trade_user_date', False),
+        ('session filter', trades.filter(session='london').order_by(*NEWEST_FIRST)[:11], 'trade_user_session_date', False),
+        # The window runs oldest first; only the 11-row page is re-sorted newest first
+        ('running balance page',
+         with_running_pnl(trades).annotate(rules_followed_n=RULES_FOLLOWED_N).order_by(*NEWEST_FIRST)[:11],
+         'trade_user_date', True),
+        ('emotion aggregates', trades.values('pre_trade_emotion').annotate(n=Count('id'), pnl=Sum('profit')),
+         'trade_user_emotion', False),
+        ('discipline aggregates',
+         AIInsight.objects.filter(trade__user=user).values('trade__user').annotate(total=Sum('discipline_score')),
+         'sqlite_autoindex_trademind_app_aiinsight_1', False),
+        ('insight by trade', AIInsight.objects.filter(trade=trade), 'sqlite_autoindex_trademind_app_aiinsight_1', False),
+        ('pending screenshots', screenshots.pending_trades(10), 'trade_screenshot_pending', False),
+    ]
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, index, sort_ok):
+    problems = []
+    if not any(index in step for step in plan):
+        problems.append(f"does not use {index}")
+    if not sort_ok and any('TEMP B-TREE' in step for step in plan):
+        problems.append("sorts in a temp B-tree")
+    return problems
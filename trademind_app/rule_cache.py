@@ -0,0 +1,61 @@
+# trademind_app/rule_cache.py
+"""
+Per-user snapshot of StrategyRules served from the Django cache.
+
+A snapshot is a tuple of (id, rule_text, is_active) tuples in the model's
+default order, stored under a per-user version number:
+
+    strategy_rules:version:<user_id>       -> version
+    strategy_rules:<user_id>:<version>     -> snapshot
+
+StrategyRule save/delete bumps the version (versioned_cache), so readers
+never see a stale snapshot and old ones simply expire. Bulk writes
+(bulk_create, update()) bypass the signals; callers must call `invalidate()`.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import versioned_cache
+from .models import StrategyRule
+
+NAMESPACE = 'strategy_rules'
+
+CachedRule = namedtuple('CachedRule', ['id', 'rule_text', 'is_active'])
+
+SNAPSHOT_TIMEOUT = 24 * 3600
+
+
+def get_rules(user_id):
+    """
+    The user's rules as a tuple of CachedRule (one query on a cold cache).
+    """
+    key = f"strategy_rules:{user_id}:{versioned_cache.version(NAMESPACE, user_id)}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = tuple(
+            StrategyRule.objects.filter(user_id=user_id).values_list('id', 'rule_text', 'is_active')
+        )
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return tuple(CachedRule(*row) for row in snapshot)
+
+
+def rule_choices(user_id):
+    return [(rule.id, rule.rule_text) for rule in get_rules(user_id)]
+
+
+def rules_total(user_id):
+    return len(get_rules(user_id))
+
+
+def invalidate(user_id):
+    versioned_cache.bump(NAMESPACE, user_id)
+
+
+# --- SIGNALS ---
+@receiver(post_save, sender=StrategyRule)
+@receiver(post_delete, sender=StrategyRule)
+def _rule_changed(sender, instance, **kwargs):
+    versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
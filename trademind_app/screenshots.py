@@ -0,0 +1,210 @@
+# trademind_app/screenshots.py
+"""
+Trade screenshot pipeline, run by the worker (run_insight_worker) and
+`manage.py backfill_screenshots`, never inside a request.
+
+    upload (trade_screenshots/<name>)         saved as-is by trade_log
+      -> original, content-addressed          trade_screenshots/originals/ab/<sha256>.png
+      -> WebP renditions, metadata stripped   trade_screenshots/renditions/<kind>/ab/<sha256>.webp
+      -> Trade.screenshot points at the original, Trade.screenshot_hash = <sha256>
+
+The same image uploaded twice is stored (and rendered) once. Rendition URLs
+contain the hash, so they are served with immutable cache headers.
+"""
+import hashlib
+import io
+import logging
+import os
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import page_cache
+from .models import Trade
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIG ---
+DEFAULT_SCREENSHOT_SETTINGS = {
+    'THUMB_SIZE': (320, 200),       # trade history
+    'DISPLAY_SIZE': (1280, 800),    # insight page / "View"
+    'THUMB_QUALITY': 70,
+    'DISPLAY_QUALITY': 82,
+    'MAX_PIXELS': 50_000_000,       # refuse decompression bombs
+    'CACHE_MAX_AGE': 365 * 24 * 3600,
+}
+
+RENDITIONS = {
+    'thumb': ('THUMB_SIZE', 'THUMB_QUALITY'),
+    'display': ('DISPLAY_SIZE', 'DISPLAY_QUALITY'),
+}
+ORIGINALS_DIR = 'trade_screenshots/originals'
+RENDITIONS_DIR = 'trade_screenshots/renditions'
+
+
+def screenshot_setting(name):
+    return getattr(settings, 'SCREENSHOTS', {}).get(name, DEFAULT_SCREENSHOT_SETTINGS[name])
+
+
+class ScreenshotError(Exception):
+    pass
+
+
+@dataclass
+class ProcessResult:
+    digest: str
+    upload_bytes: int         # size of the file as uploaded
+    stored_bytes: int         # new bytes written (0 for an original already stored)
+    rendition_bytes: dict     # {kind: size}
+    deduplicated: bool
+
+
+# --- NAMES ---
+def original_name(digest, ext):
+    return f"{ORIGINALS_DIR}/{digest[:2]}/{digest}{ext}"
+
+
+def rendition_name(digest, kind):
+    return f"{RENDITIONS_DIR}/{kind}/{digest[:2]}/{digest}.webp"
+
+
+# --- IMAGES ---
+def file_digest(fileobj):
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(1024 * 1024), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def open_image(fileobj):
+    try:
+        image = Image.open(fileobj)
+        if image.width * image.height > screenshot_setting('MAX_PIXELS'):
+            raise ScreenshotError(f"{image.width}x{image.height} exceeds MAX_PIXELS")
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ScreenshotError(str(e))
+    return image
+
+
+def render(image, kind):
+    """
+    WebP bytes of `image` scaled to fit the rendition's box. Only pixels are
+    written: EXIF, ICC and text chunks are dropped (orientation is applied
+    first so rotated phone photos stay upright).
+    """
+    size_setting, quality_setting = RENDITIONS[kind]
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.thumbnail(screenshot_setting(size_setting), Image.Resampling.LANCZOS, reducing_gap=3.0)
+    buffer = io.BytesIO()
+    image.save(buffer, 'WEBP', quality=screenshot_setting(quality_setting), method=4)
+    return buffer.getvalue()
+
+
+# --- PIPELINE ---
+def _store_once(name, content):
+    """
+    Save `content` under `name` unless it is already there. Returns the bytes
+    written (0 when deduplicated).
+    """
+    if default_storage.exists(name):
+        return 0
+    saved = default_storage.save(name, content)
+    if saved != name:
+        # Another worker stored the same content meanwhile; keep theirs
+        default_storage.delete(saved)
+        return 0
+    return content.size
+
+
+def process_trade(trade, rerender=False):
+    """
+    Store a trade's screenshot content-addressed and render its WebP
+    renditions. Idempotent; safe to run concurrently for the same trade.
+    """
+    upload = trade.screenshot.name
+    with default_storage.open(upload, 'rb') as fileobj:
+        digest = file_digest(fileobj)
+        image = open_image(fileobj)
+        fileobj.seek(0)
+        ext = os.path.splitext(upload)[1].lower() or f".{(image.format or 'png').lower()}"
+        original = original_name(digest, ext)
+        upload_bytes = default_storage.size(upload)
+        stored = 0 if upload == original else _store_once(original, ContentFile(fileobj.read()))
+
+    rendition_bytes = {}
+    for kind in RENDITIONS:
+        name = rendition_name(digest, kind)
+        if rerender and default_storage.exists(name):
+            default_storage.delete(name)
+        if default_storage.exists(name):
+            rendition_bytes[kind] = default_storage.size(name)
+        else:
+            data = render(image, kind)
+            _store_once(name, ContentFile(data))
+            rendition_bytes[kind] = len(data)
+
+    # Only if nobody replaced the screenshot meanwhile
+    Trade.objects.filter(pk=trade.pk, screenshot=upload).update(screenshot=original, screenshot_hash=digest)
+    page_cache.bump(trade.user_id)  # the history page shows the thumbnail now
+    if upload != original and not Trade.objects.filter(screenshot=upload).exists():
+        default_storage.delete(upload)
+    trade.screenshot.name, trade.screenshot_hash = original, digest
+
+    return ProcessResult(digest, upload_bytes, stored, rendition_bytes, deduplicated=upload != original and not stored)
+
+
+def pending_trades(limit=None):
+    # Same terms as the trade_screenshot_pending partial index, so SQLite uses it
+    trades = Trade.objects.filter(screenshot_hash='', screenshot__gt='').order_by('id')
+    return trades[:limit] if limit else trades
+
+
+def mark_unreadable(trade):
+    """
+    Keep an unreadable upload as-is but take it off the pending list (the
+    rendition view falls back to the upload for it).
+    """
+    try:
+        with default_storage.open(trade.screenshot.name, 'rb') as fileobj:
+            digest = file_digest(fileobj)
+    except OSError:
+        digest = hashlib.sha256(trade.screenshot.name.encode()).hexdigest()
+    Trade.objects.filter(pk=trade.pk, screenshot_hash='').update(screenshot_hash=digest)
+    page_cache.bump(trade.user_id)
+
+
+def process_pending(limit=10):
+    """
+    Worker step: process up to `limit` pending screenshots.
+    Returns the number of trades handled.
+    """
+    handled = 0
+    for trade in pending_trades(limit):
+        try:
+            process_trade(trade)
+        except (ScreenshotError, OSError) as e:
+            logger.warning("Screenshot of trade %s not processed: %s", trade.pk, e)
+            mark_unreadable(trade)
+        handled += 1
+    return handled
+
+
+# --- TEMPLATES ---
+def rendition_url(trade, kind):
+    """
+    URL of a processed screenshot's rendition, or the upload itself while
+    processing is still pending.
+    """
+    if not trade.screenshot_hash:
+        return trade.screenshot.url
+    return reverse('trademind_app:screenshot_rendition', args=[trade.pk, trade.screenshot_hash, kind])
@@ -0,0 +1,541 @@
+# trademind_app/similar.py
+"""
+Per-user nearest-neighbour index over past trades, used to give the AI coach
+(and the mock fallback) some history: "this is the 3rd time you entered
+angry on GBP/USD in the New York session".
+
+Each trade becomes a small weighted feature vector:
+
+    pre emotion     one-hot (6)     post emotion    one-hot (6)
+    session         one-hot (3)     pair            one-hot (PAIR_SLOTS)
+    rules ratio     followed / total
+    signed P&L      tanh(pnl / the user's median |pnl|)
+    time of day     sin/cos of created_at (UTC)
+
+Rows live in growable NumPy arrays in journal order, (date, created_at, id)
+as pagination and analytics sort trades, so "past trades" of a trade are a
+prefix of the index and a top-k query is a few vectorized passes plus an
+argpartition (see TradeIndex). Indexes are kept per process:
+
+    new trades (id > max_id)          appended by one delta query when they
+                                      sort after the last row (logged today);
+                                      a backdated one means a rebuild
+    edits, deletes, rules_followed,   bump similar:version:<user_id> -> rebuild
+    statement imports
+    rule added/removed                rules ratio column recomputed in place
+"""
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import rule_cache, versioned_cache
+from .analytics import EMOTIONS, SESSIONS, emotion_code, load_rows, rules_ratio, session_code
+from .models import EMOTION_CHOICES, PAIR_CHOICES, SESSION_CHOICES, StrategyRule, Trade
+
+# --- CONFIG ---
+DEFAULT_SIMILAR_SETTINGS = {
+    'ENABLED': True,
+    'TOP_K': 5,             # neighbours summarised for the coach
+    'MAX_INDEXES': 256,     # users kept in memory per process
+}
+
+# Feature weights: what makes two trades "the same setup" for the coach
+WEIGHTS = {
+    'pre': 1.0,
+    'post': 0.5,
+    'session': 0.8,
+    'pair': 1.0,
+    'rules': 0.6,
+    'pnl': 0.6,
+    'time': 0.3,
+}
+
+PAIRS = [value for value, _ in PAIR_CHOICES]
+PAIR_SLOTS = len(PAIRS) + 6    # known pairs, then hashed buckets for the rest
+_PAIR_SLOT = {value: slot for slot, value in enumerate(PAIRS)}
+
+_PRE = 0
+_POST = _PRE + len(EMOTIONS)
+_SESSION = _POST + len(EMOTIONS)
+_PAIR = _SESSION + len(SESSIONS)
+_RULES = _PAIR + PAIR_SLOTS
+_PNL = _RULES + 1
+_TIME = _PNL + 1
+DIMENSIONS = _TIME + 2
+DENSE = DIMENSIONS - _RULES    # rules, P&L, time of day (sin, cos)
+
+_EPOCH = date(1970, 1, 1)
+_EPOCH_DATETIME = datetime(1970, 1, 1)
+_EMOTION_LABELS = dict(EMOTION_CHOICES)
+_SESSION_LABELS = dict(SESSION_CHOICES)
+
+Neighbour = namedtuple('Neighbour', ['id', 'date', 'pair', 'session', 'pre', 'post', 'pnl', 'distance'])
+
+
+def similar_setting(name):
+    return getattr(settings, 'SIMILAR_TRADES', {}).get(name, DEFAULT_SIMILAR_SETTINGS[name])
+
+
+def pair_slot(pair):
+    slot = _PAIR_SLOT.get(pair)
+    if slot is None:
+        slot = len(PAIRS) + zlib.crc32((pair or '').upper().encode()) % (PAIR_SLOTS - len(PAIRS))
+    return slot
+
+
+# --- FEATURES ---
+def _combo(pre, post, session, slot):
+    # One code for all one-hot blocks of a row
+    return ((pre * len(EMOTIONS) + post) * len(SESSIONS) + session) * PAIR_SLOTS + slot
+
+
+# Block codes of every combination, for per-query distance tables
+_COMBO_PRE, _COMBO_POST, _COMBO_SESSION, _COMBO_SLOT = (
+    codes.ravel() for codes in np.meshgrid(
+        np.arange(len(EMOTIONS)), np.arange(len(EMOTIONS)), np.arange(len(SESSIONS)), np.arange(PAIR_SLOTS),
+        indexing='ij',
+    )
+)
+
+
+def _combo_distances(combo):
+    """
+    Squared distance between the one-hot blocks of `combo` and those of
+    every combination: 2 * weight^2 for each block whose code differs.
+    """
+    pre, post, session, slot = (codes[combo] for codes in (_COMBO_PRE, _COMBO_POST, _COMBO_SESSION, _COMBO_SLOT))
+    return 2 * (
+        WEIGHTS['pre'] ** 2 * (_COMBO_PRE != pre)
+        + WEIGHTS['post'] ** 2 * (_COMBO_POST != post)
+        + WEIGHTS['session'] ** 2 * (_COMBO_SESSION != session)
+        + WEIGHTS['pair'] ** 2 * (_COMBO_SLOT != slot)
+    ).astype(np.float32)
+
+
+def _dense(ratio, pnl, minute, pnl_scale):
+    """
+    The non-categorical features, weighted, as a (DENSE, count) block.
+    """
+    angle = minute * (2 * np.pi / 1440)
+    return np.stack([
+        WEIGHTS['rules'] * ratio,
+        WEIGHTS['pnl'] * np.tanh(pnl / pnl_scale),
+        WEIGHTS['time'] * np.sin(angle),
+        WEIGHTS['time'] * np.cos(angle),
+    ]).astype(np.float32)
+
+
+def _minute_of_day(created_at):
+    # 'YYYY-MM-DD HH:MM...' in UTC: sessions are defined on the UTC clock
+    return int(created_at[11:13]) * 60 + int(created_at[14:16]) if created_at else 0
+
+
+def _created_us(created_at):
+    # 'YYYY-MM-DD HH:MM:SS[.ffffff]' (UTC) -> microseconds since the epoch
+    return np.array([c[:26] for c in created_at], dtype='datetime64[us]').astype(np.int64)
+
+
+def _load_rows(user_id, after_id=None):
+    """
+    analytics.load_rows for a user's trades (with id > after_id), plus the
+    creation-time columns the index sorts and scores by (2 queries).
+    """
+    rows = load_rows(user_id, Cast('created_at', CharField()), after_id=after_id)
+    (created,) = rows.pop('extra')
+    rows['pnl'] = rows['pnl'].astype(np.float32)
+    rows['created'] = _created_us(created)
+    rows['minute'] = np.fromiter((_minute_of_day(c) for c in created), dtype=np.float32, count=len(created))
+    return rows
+
+
+# --- INDEX ---
+class TradeIndex:
+    """
+    One user's trades, grown in place (capacity doubles, so appending a
+    trade is amortised O(1)).
+
+    Feature vectors are stored factored: the one-hot blocks as one `combo`
+    code per row (their distance only depends on which codes differ, so a
+    query looks it up in a small per-query table) and the rest as a
+    column-major `dense` block. A query reads ~22 bytes per trade instead
+    of a 37-float row, which keeps top-k at 100k trades well under 1 ms.
+    """
+
+    _COLUMNS = (('ids', np.int64), ('pnl', np.float32), ('pre', np.int8), ('post', np.int8),
+                ('session', np.int8), ('pair', np.int16), ('slot', np.int8), ('combo', np.int16),
+                ('day', np.int32), ('created', np.int64), ('minute', np.float32), ('followed', np.int16), ('dense_norms', np.float32))
+
+    def __init__(self, user_id, version, rules_total, pnl_scale=1.0):
+        self.user_id = user_id
+        self.version = version
+        self.rules_total = rules_total
+        self.pnl_scale = pnl_scale
+        self.size = 0
+        self.max_id = 0
+        self._by_id = None          # row order by id, for position()
+        self.pairs = []             # pair code -> pair name
+        self._pair_codes = {}
+        self.dense = np.zeros((DENSE, 0), dtype=np.float32)
+        for name, dtype in self._COLUMNS:
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, user_id, version):
+        rows = _load_rows(user_id)
+        absolute = np.abs(rows['pnl'][rows['pnl'] != 0])
+        pnl_scale = float(np.median(absolute)) if len(absolute) else 1.0
+        index = cls(user_id, version, rule_cache.rules_total(user_id), pnl_scale or 1.0)
+        index.extend(rows)
+        return index
+
+    def _grow(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        # Headroom, so the first trades logged after a build don't copy the index
+        capacity = max(needed + needed // 8, capacity * 2, 64)
+        for name, dtype in self._COLUMNS:
+            column = np.zeros(capacity, dtype=dtype)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        dense = np.zeros((DENSE, capacity), dtype=np.float32)
+        dense[:, :self.size] = self.dense[:, :self.size]
+        self.dense = dense
+
+    def _pair_code(self, pair):
+        code = self._pair_codes.get(pair)
+        if code is None:
+            code = self._pair_codes[pair] = len(self.pairs)
+            self.pairs.append(pair)
+        return code
+
+    def sort_key(self, row):
+        return int(self.day[row]), int(self.created[row]), int(self.ids[row])
+
+    def follows(self, rows):
+        """
+        Whether column arrays from `_load_rows` sort after every indexed row,
+        so `extend` keeps the index in journal order.
+        """
+        if not self.size or not len(rows['ids']):
+            return True
+        first = int(rows['day'][0]), int(rows['created'][0]), int(rows['ids'][0])
+        return first > self.sort_key(self.size - 1)
+
+    def extend(self, rows):
+        """
+        Append column arrays from `_load_rows` (see `follows`).
+        """
+        count = len(rows['ids'])
+        if not count:
+            return
+        start, end = self.size, self.size + count
+        self._grow(end)
+        pair_names = rows['pair']
+        slot = np.fromiter((pair_slot(p) for p in pair_names), dtype=np.int8, count=count)
+        dense = _dense(rules_ratio(rows['followed'], self.rules_total), rows['pnl'], rows['minute'], self.pnl_scale)
+        columns = dict(
+            rows,
+            pair=np.array([self._pair_code(p) for p in pair_names], dtype=np.int16),
+            slot=slot,
+            combo=_combo(rows['pre'].astype(np.int16), rows['post'], rows['session'], slot),
+            dense_norms=(dense ** 2).sum(axis=0),
+        )
+        for name, _ in self._COLUMNS:
+            getattr(self, name)[start:end] = columns[name]
+        self.dense[:, start:end] = dense
+        self.size = end
+        self.max_id = max(self.max_id, int(rows['ids'].max()))
+        self._by_id = None
+
+    def set_rules_total(self, rules_total):
+        """
+        Recompute the rules ratio feature after rules were added or removed.
+        """
+        self.rules_total = rules_total
+        n = self.size
+        column = WEIGHTS['rules'] * rules_ratio(self.followed[:n], rules_total)
+        self.dense_norms[:n] += column ** 2 - self.dense[0, :n] ** 2
+        self.dense[0, :n] = column
+
+    def position(self, trade_id):
+        """
+        Row of `trade_id`, or None when it isn't indexed.
+        """
+        ids = self.ids[:self.size]
+        if self._by_id is None:
+            self._by_id = np.argsort(ids)
+        at = int(np.searchsorted(ids, trade_id, sorter=self._by_id))
+        if at < self.size and ids[self._by_id[at]] == trade_id:
+            return int(self._by_id[at])
+        return None
+
+    def rows_before(self, day, created, trade_id):
+        """
+        How many rows sort before (day, created, trade_id): the past of a
+        trade that isn't indexed.
+        """
+        n = self.size
+        days, times, ids = self.day[:n], self.created[:n], self.ids[:n]
+        earlier = (days < day) | ((days == day) & ((times < created) | ((times == created) & (ids < trade_id))))
+        return int(np.count_nonzero(earlier))
+
+    def key(self, row):
+        """
+        Query key (combo code, dense features) of an indexed row.
+        """
+        return int(self.combo[row]), self.dense[:, row].copy()
+
+    def key_for(self, trade, rules_followed_count):
+        """
+        Query key of a trade that isn't indexed (e.g. not saved yet).
+        """
+        # As analytics.signed_pnl(): a zero profit is still the profit
+        pnl = float(trade.profit) if trade.profit is not None else -float(trade.loss or 0)
+        created = trade.created_at.astimezone(dt_timezone.utc) if trade.created_at else None
+        minute = created.hour * 60 + created.minute if created else 0
+        combo = _combo(
+            emotion_code(trade.pre_trade_emotion), emotion_code(trade.post_trade_emotion),
+            session_code(trade.session), pair_slot(trade.pair),
+        )
+        dense = _dense(
+            rules_ratio(np.array([rules_followed_count or 0]), self.rules_total),
+            np.array([pnl], dtype=np.float32), np.array([minute], dtype=np.float32), self.pnl_scale,
+        )[:, 0]
+        return combo, dense
+
+    def nearest(self, key, before, k):
+        """
+        Rows of the k trades closest to `key` among the first `before` rows
+        (the trades logged earlier), nearest first, and their squared
+        distances.
+        """
+        k = min(k, before)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        combo, dense = key
+        # |x - q|^2 = categorical part (table lookup) + |x|^2 - 2 x.q + |q|^2 over the dense part
+        distances = _combo_distances(combo)[self.combo[:before]]
+        distances += self.dense_norms[:before]
+        distances -= 2 * (dense @ self.dense[:, :before])
+        rows = np.argpartition(distances, k - 1)[:k] if k < before else np.arange(before)
+        rows = rows[np.argsort(distances[rows], kind='stable')]
+        return rows, np.maximum(distances[rows] + dense @ dense, 0)
+
+    def feature_vectors(self, rows):
+        """
+        The explicit (unfactored) feature vectors of `rows`, for checks.
+        """
+        rows = np.asarray(rows)
+        vectors = np.zeros((len(rows), DIMENSIONS), dtype=np.float32)
+        at = np.arange(len(rows))
+        vectors[at, _PRE + self.pre[rows]] = WEIGHTS['pre']
+        vectors[at, _POST + self.post[rows]] = WEIGHTS['post']
+        vectors[at, _SESSION + self.session[rows]] = WEIGHTS['session']
+        vectors[at, _PAIR + self.slot[rows]] = WEIGHTS['pair']
+        vectors[:, _RULES:] = self.dense[:, rows].T
+        return vectors
+
+    def same_setup(self, before, pre, pair, session):
+        """
+        Mask over the first `before` rows: same pre-trade emotion, pair and
+        session.
+        """
+        code = self._pair_codes.get(pair, -1)
+        return (self.pre[:before] == pre) & (self.pair[:before] == code) & (self.session[:before] == session)
+
+
+# --- REGISTRY ---
+NAMESPACE = 'similar'
+_indexes = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def invalidate(user_id):
+    versioned_cache.bump(NAMESPACE, user_id)
+
+
+def get_index(user_id, through_id=None):
+    """
+    The user's index, current as of the cache version. Trades with ids up to
+    `through_id` are guaranteed to be included: when it is above max_id the
+    missing trades are appended with one delta query instead of a rebuild.
+    """
+    version = versioned_cache.version(NAMESPACE, user_id)
+    with _registry_lock:
+        index = _indexes.get(user_id)
+        if index is not None:
+            _indexes.move_to_end(user_id)
+
+    rebuild = index is None or index.version != version
+    if not rebuild:
+        with index.lock:
+            if through_id is not None and through_id > index.max_id:
+                rows = _load_rows(user_id, after_id=index.max_id)
+                # A backdated trade belongs mid-index
+                rebuild = not index.follows(rows)
+                if not rebuild:
+                    index.extend(rows)
+            if not rebuild:
+                rules_total = rule_cache.rules_total(user_id)
+                if rules_total != index.rules_total:
+                    index.set_rules_total(rules_total)
+    if rebuild:
+        index = TradeIndex.build(user_id, version)
+        with _registry_lock:
+            _indexes[user_id] = index
+            while len(_indexes) > similar_setting('MAX_INDEXES'):
+                _indexes.popitem(last=False)
+    return index
+
+
+def clear():
+    with _registry_lock:
+        _indexes.clear()
+
+
+# --- QUERIES ---
+def similar_trades(trade, k=None, rules_followed_count=None):
+    """
+    The k past trades (earlier in journal order: date, created_at, id) most
+    similar to it, nearest first, as Neighbour tuples.
+    """
+    neighbours, _ = _query(trade, k, rules_followed_count)
+    return neighbours
+
+
+def _query(trade, k, rules_followed_count):
+    k = similar_setting('TOP_K') if k is None else k
+    index = get_index(trade.user_id, through_id=trade.pk)
+    with index.lock:
+        row = index.position(trade.pk) if trade.pk else None
+        if row is not None:
+            key, before = index.key(row), row
+        else:
+            if rules_followed_count is None:
+                rules_followed_count = trade.rules_followed.count() if trade.pk else 0
+            key = index.key_for(trade, rules_followed_count)
+            before = index.rows_before(*_sort_key(trade))
+        rows, distances = index.nearest(key, before, k)
+        neighbours = [
+            Neighbour(
+                id=int(index.ids[r]),
+                date=_EPOCH + timedelta(days=int(index.day[r])),
+                pair=index.pairs[index.pair[r]],
+                session=SESSIONS[index.session[r]],
+                pre=EMOTIONS[index.pre[r]],
+                post=EMOTIONS[index.post[r]],
+                pnl=round(float(index.pnl[r]), 2),
+                distance=round(float(d), 4),
+            )
+            for r, d in zip(rows, distances)
+        ]
+        setup = index.same_setup(
+            before, emotion_code(trade.pre_trade_emotion), trade.pair,
+            session_code(trade.session),
+        )
+        setup_pnl = index.pnl[:before][setup]
+    return neighbours, setup_pnl
+
+
+def _sort_key(trade):
+    # (day, created_at in microseconds, id) as indexed; an unsaved trade is
+    # being logged now and sorts after everything else that day
+    created = trade.created_at or timezone.now()
+    created_us = (created.astimezone(dt_timezone.utc).replace(tzinfo=None) - _EPOCH_DATETIME) // timedelta(microseconds=1)
+    return (trade.date - _EPOCH).days, created_us, trade.pk or np.iinfo(np.int64).max
+
+
+def history_for(trade, rules_followed_count=None):
+    """
+    JSON-ready history for the AI coach, or None when the trader has no
+    earlier trades (or the index is disabled):
+
+        same_setup      earlier trades with the same pre-trade emotion, pair
+                        and session: count, wins, net P&L
+        similar         the TOP_K nearest past trades: count, wins, avg P&L,
+                        and the trades themselves
+        signature       coarse summary used in the insight cache key
+    """
+    if not similar_setting('ENABLED'):
+        return None
+    neighbours, setup_pnl = _query(trade, None, rules_followed_count)
+    if not neighbours:
+        return None
+
+    similar_wins = sum(1 for n in neighbours if n.pnl > 0)
+    setup_count = len(setup_pnl)
+    setup_wins = int((setup_pnl > 0).sum())
+    history = {
+        'setup': {
+            'pre_trade_emotion': _EMOTION_LABELS.get(trade.pre_trade_emotion, trade.pre_trade_emotion),
+            'pair': trade.pair,
+            'session': _SESSION_LABELS.get(trade.session, trade.session),
+        },
+        'same_setup': {
+            'count': setup_count,
+            'wins': setup_wins,
+            'net_pnl': round(float(setup_pnl.sum()), 2),
+        },
+        'similar': {
+            'count': len(neighbours),
+            'wins': similar_wins,
+            'avg_pnl': round(sum(n.pnl for n in neighbours) / len(neighbours), 2),
+            'trades': [
+                {'id': n.id, 'date': n.date.isoformat(), 'pair': n.pair, 'session': n.session,
+                 'pre': n.pre, 'post': n.post, 'pnl': n.pnl}
+                for n in neighbours
+            ],
+        },
+    }
+    # Repeat count (exact up to 5) and win-rate quartiles: enough for cached
+    # responses to stay truthful without keying on every number.
+    setup_bucket = str(setup_count) if setup_count < 5 else '5+'
+    history['signature'] = f"{setup_bucket}:{_quartile(setup_wins, setup_count)}:{_quartile(similar_wins, len(neighbours))}"
+    return history
+
+
+def _quartile(wins, count):
+    return 'n/a' if not count else min(3, int(4 * wins / count))
+
+
+# --- SIGNALS ---
+@receiver(post_save, sender=Trade)
+def _trade_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # New ids are appended by the next query's delta load; no rebuild
+        instance._similar_created = True
+    else:
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(post_delete, sender=Trade)
+def _trade_deleted(sender, instance, **kwargs):
+    versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Trade.rules_followed.through)
+def _rules_followed_changed(sender, instance, action, **kwargs):
+    # Ticking rules right after creating the trade (trade_log's save_m2m) is
+    # part of logging it; later changes alter an indexed row.
+    if action in ('post_add', 'post_remove', 'post_clear') and not getattr(instance, '_similar_created', False):
+        versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
+
+
+@receiver(post_delete, sender=StrategyRule)
+def _rule_deleted(sender, instance, **kwargs):
+    # The through rows go with it (no m2m_changed), changing followed counts
+    versioned_cache.bump_now_and_on_commit(NAMESPACE, instance.user_id)
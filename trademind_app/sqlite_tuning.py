@@ -0,0 +1,90 @@
+# trademind_app/sqlite_tuning.py
+"""
+Production profile for the SQLite database (settings.SQLITE).
+
+Every new connection gets, through the connection_created signal:
+
+    journal_mode=WAL       readers don't block the writer nor it them
+    synchronous=NORMAL     fsync at checkpoints, not every commit (safe in WAL)
+    busy_timeout           wait for the write lock instead of failing at once
+    mmap_size, cache_size  pages served from memory instead of read() calls
+
+Connections are kept between requests (DATABASES CONN_MAX_AGE, with
+CONN_HEALTH_CHECKS) so a request doesn't pay for opening the file and
+these pragmas again.
+
+A deferred transaction that reads first and writes later can't wait for
+the write lock: if another connection committed meanwhile, SQLite fails it
+with "database is locked" whatever the busy timeout. Write paths use
+`immediate_atomic()`, which takes the lock at BEGIN, where waiting works.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# --- CONFIG ---
+DEFAULT_SQLITE_SETTINGS = {
+    'ENABLED': True,
+    'JOURNAL_MODE': 'WAL',
+    'SYNCHRONOUS': 'NORMAL',
+    'BUSY_TIMEOUT': 5000,             # ms
+    'MMAP_SIZE': 256 * 1024 * 1024,   # bytes of the file memory-mapped
+    'CACHE_SIZE': -64000,             # page cache per connection; negative: KiB
+}
+
+PRAGMAS = ['JOURNAL_MODE', 'SYNCHRONOUS', 'BUSY_TIMEOUT', 'MMAP_SIZE', 'CACHE_SIZE']
+
+
+def sqlite_setting(name):
+    return getattr(settings, 'SQLITE', {}).get(name, DEFAULT_SQLITE_SETTINGS[name])
+
+
+# --- CONNECTIONS ---
+@receiver(connection_created, dispatch_uid='trademind_sqlite_pragmas')
+def _apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not sqlite_setting('ENABLED'):
+        return
+    with connection.cursor() as cursor:
+        for name in PRAGMAS:
+            cursor.execute(f"PRAGMA {name.lower()} = {sqlite_setting(name)}")
+
+
+def current_pragmas(connection):
+    """
+    {pragma: value} as the connection reports them (checks, benchmarks).
+    """
+    with connection.cursor() as cursor:
+        values = {}
+        for name in PRAGMAS:
+            cursor.execute(f"PRAGMA {name.lower()}")
+            values[name.lower()] = cursor.fetchone()[0]
+    return values
+
+
+# --- TRANSACTIONS ---
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    transaction.atomic() that starts with BEGIN IMMEDIATE on SQLite, so the
+    write lock is waited for (busy_timeout) up front. Inside an existing
+    transaction it is a plain savepoint. Keep the block short: other
+    writers queue behind it.
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block or not sqlite_setting('ENABLED'):
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    saved = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN has been sent: nested and later blocks use the configured mode
+            connection.transaction_mode = saved
+            yield
+    finally:
+        connection.transaction_mode = saved
@@ -0,0 +1,288 @@
+# trademind_app/stats.py
+"""
+Incremental maintenance of TraderStats.
+
+Every Trade/AIInsight write applies a delta to the owner's stats row:
+the old contribution (captured in pre_save/pre_delete) is subtracted and the
+new one added. Bulk operations (bulk_create/bulk_update, queryset.update)
+bypass signals; callers that use them must call `rebuild()` or
+`refresh_discipline()` for the affected users.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import AIInsight, StrategyRule, Trade, TraderStats
+
+ZERO = Decimal('0.00')
+CENT = Decimal('0.01')
+TRADE_SNAPSHOT_FIELDS = ('user_id', 'profit', 'loss', 'pre_trade_emotion')
+
+
+# --- DELTAS ---
+def _snapshot(trade):
+    return {name: getattr(trade, name) for name in TRADE_SNAPSHOT_FIELDS}
+
+
+def _decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _signed_cents(profit, loss):
+    if profit is not None:
+        return int(_decimal(profit) * 100)
+    if loss is not None:
+        return -int(_decimal(loss) * 100)
+    return 0
+
+
+def _trade_deltas(snapshot, sign):
+    """
+    A trade's contribution to the stats, times `sign`: ({counter: delta},
+    {emotion: (count delta, pnl_cents delta)}).
+    """
+    profit, loss = snapshot['profit'], snapshot['loss']
+    counters = {'total_trades': sign}
+    if profit is not None:
+        counters['winning_trades'] = sign
+        counters['profit_total'] = sign * _decimal(profit)
+    elif loss is not None:
+        counters['losing_trades'] = sign
+    if loss is not None:
+        counters['loss_total'] = sign * _decimal(loss)
+    emotions = {snapshot['pre_trade_emotion']: (sign, sign * _signed_cents(profit, loss))}
+    return counters, emotions
+
+
+def _merge(counters, emotions, more_counters, more_emotions):
+    for name, delta in more_counters.items():
+        counters[name] = counters.get(name, 0) + delta
+    for emotion, (count, cents) in more_emotions.items():
+        old_count, old_cents = emotions.get(emotion, (0, 0))
+        emotions[emotion] = (old_count + count, old_cents + cents)
+
+
+def _update_stats(user_id, counters, emotions, create=True):
+    """
+    Apply trade deltas to the stats row. The counters go first, as one
+    UPDATE with F() expressions: that statement takes the write lock (the
+    row lock elsewhere; the database lock on SQLite, waiting busy_timeout,
+    where select_for_update is a no-op), so the emotion_stats
+    read-modify-write after it can't interleave with another writer. Rows
+    are only created on additive changes, so a cascading user delete never
+    resurrects one.
+    """
+    with transaction.atomic():
+        updated = TraderStats.objects.filter(user_id=user_id).update(
+            **{name: F(name) + delta for name, delta in counters.items()}
+        )
+        if not updated:
+            if create:
+                # First write for this user: start from the real totals, not zero
+                rebuild(user_id)
+            return
+        emotion_stats = TraderStats.objects.filter(user_id=user_id).values_list('emotion_stats', flat=True).get()
+        for emotion, (count, cents) in emotions.items():
+            bucket = emotion_stats.setdefault(emotion, {'count': 0, 'pnl_cents': 0})
+            bucket['count'] += count
+            bucket['pnl_cents'] += cents
+        TraderStats.objects.filter(user_id=user_id).update(emotion_stats=emotion_stats)
+
+
+def _increment(user_id, create=True, **deltas):
+    """
+    Counter-only change: one UPDATE with F() expressions, no read first.
+    """
+    if not deltas:
+        return
+    updated = TraderStats.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if not updated and create:
+        rebuild(user_id)
+
+
+# --- TRADE ---
+@receiver(pre_save, sender=Trade)
+def _capture_old_trade(sender, instance, raw=False, **kwargs):
+    instance._stats_old = None
+    if instance.pk and not raw:
+        instance._stats_old = Trade.objects.filter(pk=instance.pk).values(*TRADE_SNAPSHOT_FIELDS).first()
+
+
+@receiver(post_save, sender=Trade)
+def _trade_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old, new = getattr(instance, '_stats_old', None), _snapshot(instance)
+
+    if old and old['user_id'] != new['user_id']:
+        _update_stats(old['user_id'], *_trade_deltas(old, -1), create=False)
+        old = None
+
+    counters, emotions = _trade_deltas(new, +1)
+    if old:
+        _merge(counters, emotions, *_trade_deltas(old, -1))
+    _update_stats(new['user_id'], counters, emotions)
+
+
+@receiver(pre_delete, sender=Trade)
+def _capture_deleted_trade_rules(sender, instance, **kwargs):
+    # The through rows are cascaded without m2m_changed, so count them now
+    instance._stats_rules_followed = instance.rules_followed.count()
+
+
+@receiver(post_delete, sender=Trade)
+def _trade_deleted(sender, instance, **kwargs):
+    snapshot = _snapshot(instance)
+    rules = getattr(instance, '_stats_rules_followed', 0)
+
+    counters, emotions = _trade_deltas(snapshot, -1)
+    counters['rules_followed_total'] = -rules
+    _update_stats(instance.user_id, counters, emotions, create=False)
+
+
+# --- RULES FOLLOWED (M2M) ---
+@receiver(m2m_changed, sender=Trade.rules_followed.through)
+def _rules_followed_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Forward (trade.rules_followed) or reverse (rule.trade_set): either way
+    # every affected trade belongs to instance.user, so only the link count matters.
+    related = instance.trade_set if reverse else instance.rules_followed
+    if action == 'pre_clear':
+        instance._stats_cleared = related.count()
+        return
+    if action in ('post_add', 'post_remove'):
+        delta = len(pk_set or ())
+    elif action == 'post_clear':
+        delta = getattr(instance, '_stats_cleared', 0)
+    else:
+        return
+    if action != 'post_add':
+        delta = -delta
+
+    if delta:
+        _increment(instance.user_id, rules_followed_total=delta)
+
+
+@receiver(pre_delete, sender=StrategyRule)
+def _rule_deleted(sender, instance, **kwargs):
+    followed = instance.trade_set.count()
+    if followed:
+        _increment(instance.user_id, create=False, rules_followed_total=-followed)
+
+
+# --- AI INSIGHT (discipline score) ---
+@receiver(pre_save, sender=AIInsight)
+def _capture_old_score(sender, instance, raw=False, **kwargs):
+    instance._stats_old_score = None
+    if instance.pk and not raw:
+        instance._stats_old_score = AIInsight.objects.filter(pk=instance.pk).values_list('discipline_score', flat=True).first()
+
+
+@receiver(post_save, sender=AIInsight)
+def _insight_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_score = getattr(instance, '_stats_old_score', None)
+    user_id = Trade.objects.filter(pk=instance.trade_id).values_list('user_id', flat=True).first()
+    if user_id is None:
+        return
+    if old_score is None:
+        _increment(user_id, insight_count=1, discipline_score_total=instance.discipline_score)
+    elif old_score != instance.discipline_score:
+        _increment(user_id, discipline_score_total=instance.discipline_score - old_score)
+
+
+@receiver(post_delete, sender=AIInsight)
+def _insight_deleted(sender, instance, **kwargs):
+    user_id = Trade.objects.filter(pk=instance.trade_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        _increment(user_id, create=False, insight_count=-1, discipline_score_total=-instance.discipline_score)
+
+
+# --- FROM SCRATCH ---
+def compute(user_id):
+    """
+    The stats for a user computed directly from the journal (4 queries).
+    Returns a dict of TraderStats field values.
+    """
+    trades = Trade.objects.filter(user_id=user_id)
+    totals = trades.aggregate(
+        total_trades=Count('id'),
+        winning_trades=Count('id', filter=Q(profit__isnull=False)),
+        losing_trades=Count('id', filter=Q(profit__isnull=True, loss__isnull=False)),
+        profit_total=Sum('profit'),
+        loss_total=Sum('loss'),
+    )
+    rules_followed_total = Trade.rules_followed.through.objects.filter(trade__user_id=user_id).count()
+
+    emotion_stats = {}
+    for row in trades.values('pre_trade_emotion').annotate(
+        count=Count('id'), profit_sum=Sum('profit'), loss_sum=Sum('loss', filter=Q(profit__isnull=True)),
+    ):
+        emotion_stats[row['pre_trade_emotion']] = {
+            'count': row['count'],
+            'pnl_cents': _signed_cents(row['profit_sum'] or 0, None) + _signed_cents(None, row['loss_sum'] or 0),
+        }
+
+    discipline = AIInsight.objects.filter(trade__user_id=user_id).aggregate(
+        insight_count=Count('id'), discipline_score_total=Sum('discipline_score'),
+    )
+    return {
+        'total_trades': totals['total_trades'],
+        'winning_trades': totals['winning_trades'],
+        'losing_trades': totals['losing_trades'],
+        # SQLite sums decimals as floats; round back to the column's precision
+        'profit_total': (totals['profit_total'] or ZERO).quantize(CENT),
+        'loss_total': (totals['loss_total'] or ZERO).quantize(CENT),
+        'rules_followed_total': rules_followed_total,
+        'emotion_stats': emotion_stats,
+        'insight_count': discipline['insight_count'],
+        'discipline_score_total': discipline['discipline_score_total'] or 0,
+    }
+
+
+def rebuild(user_id):
+    stats, _ = TraderStats.objects.update_or_create(user_id=user_id, defaults=compute(user_id))
+    return stats
+
+
+def refresh_discipline(user_ids):
+    """
+    Recompute only the insight aggregates, after bulk AIInsight writes.
+    """
+    for user_id in set(user_ids):
+        discipline = AIInsight.objects.filter(trade__user_id=user_id).aggregate(
+            insight_count=Count('id'), discipline_score_total=Sum('discipline_score'),
+        )
+        TraderStats.objects.filter(user_id=user_id).update(
+            insight_count=discipline['insight_count'],
+            discipline_score_total=discipline['discipline_score_total'] or 0,
+        )
+
+
+def diff(stats):
+    """
+    Fields where a stored TraderStats disagrees with the journal:
+    {field: (stored, actual)}.
+    """
+    expected = compute(stats.user_id)
+    mismatches = {}
+    for name, actual in expected.items():
+        stored = getattr(stats, name)
+        if name == 'emotion_stats':
+            stored = {k: v for k, v in stored.items() if v.get('count')}
+        if stored != actual:
+            mismatches[name] = (stored, actual)
+    return mismatches
+
+
+def for_user(user):
+    """
+    The user's stats row (one primary-key lookup), built on first access.
+    """
+    stats = TraderStats.objects.filter(user=user).first()
+    return stats or rebuild(user.pk)
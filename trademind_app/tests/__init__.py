@@ -0,0 +1,35 @@
+# trademind_app/tests/__init__.py
+"""
+Run with `python manage.py test` (TEST_RUNNER is TestRunner below).
+"""
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from trademind_app.bench import scratch_metrics
+
+# The test runner sets DEBUG=False, where the manifest storage wants a
+# collectstatic build for every {% static %} URL; tests that render pages
+# use unhashed URLs instead.
+without_manifest = override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The default runner, with METRICS['PATH'] pointed at a scratch store for
+    the whole run: tests calling stub providers must not write their
+    counters into the shared one.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch = ExitStack()
+        self._scratch.enter_context(scratch_metrics())
+
+    def teardown_test_environment(self, **kwargs):
+        self._scratch.close()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,168 @@
+# trademind_app/tests/test_ai_router.py
+import asyncio
+import time
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from trademind_app import ai_coach, ai_router, ai_transport
+from trademind_app.bench import stub_provider
+
+STUB = 'trademind_app.tests.test_ai_router.StubProvider'
+TRADE_DATA = {
+    'entry': 'BUY', 'pair': 'GBP/USD', 'profit': None, 'loss': '25.00',
+    'pre_trade_emotion': 'angry', 'post_trade_emotion': 'sad',
+    'rules_followed_count': 1, 'rules_total': 3, 'reason': "Chased the move.", 'history': None,
+}
+
+# Provider name -> seconds before it answers (None: it fails); set per test
+LATENCY = {}
+# Provider name -> calls started, calls cancelled before answering
+CALLS, CANCELLED = {}, {}
+
+
+class StubProvider(ai_router.Provider):
+    """
+    A remote backend answering bench.stub_provider's insight after
+    LATENCY[name] seconds, or failing when that is None.
+    """
+    def call(self, trade_data):
+        CALLS[self.name] = CALLS.get(self.name, 0) + 1
+        latency = LATENCY[self.name]
+        return None if latency is None else stub_provider(latency)(trade_data)
+
+    async def acall(self, trade_data):
+        CALLS[self.name] = CALLS.get(self.name, 0) + 1
+        latency = LATENCY[self.name]
+        try:
+            await asyncio.sleep(latency or 0)
+        except asyncio.CancelledError:
+            CANCELLED[self.name] = CANCELLED.get(self.name, 0) + 1
+            raise
+        return None if latency is None else stub_provider()(trade_data)
+
+
+def stubs(*names, **settings):
+    return {name: {'BACKEND': STUB, **settings} for name in names}
+
+
+def warm(router, name, latency, ok=True, samples=5):
+    for _ in range(samples):
+        router.stats[name].record(latency, ok)
+
+
+@override_settings(INSIGHT_CACHE={'ENABLED': False})
+class RouterTestCase(SimpleTestCase):
+    def setUp(self):
+        LATENCY.clear()
+        CALLS.clear()
+        CANCELLED.clear()
+        ai_transport.reset_breakers()
+        self.addCleanup(ai_transport.reset_breakers)
+        ai_router.reset()
+        self.addCleanup(ai_router.reset)
+
+
+class FallbackTests(RouterTestCase):
+    def test_mock_is_a_fallback_without_a_settings_entry(self):
+        LATENCY['primary'] = None
+        with override_settings(AI_PROVIDERS={**stubs('primary'), 'mock': {}}):
+            router = ai_router.get_router()
+            self.assertEqual([provider.name for provider in router.ranked()], ['primary'])
+            self.assertEqual(router.route(TRADE_DATA), (None, None))
+            insight = ai_coach.get_ai_insight(TRADE_DATA)
+        self.assertEqual(set(insight), {'insight', 'risk_pattern', 'discipline_score', 'coaching_tip'})
+        self.assertEqual(CALLS['primary'], 2)
+
+    def test_fallback_setting_overrides_the_backend(self):
+        LATENCY.update(primary=None, backup=0)
+        with override_settings(AI_PROVIDERS={**stubs('primary'), **stubs('backup', FALLBACK=True),
+                                             'mock': {'FALLBACK': False, 'ENABLED': False}}):
+            router = ai_router.get_router()
+            self.assertEqual([provider.name for provider in router.ranked()], ['primary'])
+            self.assertEqual(router.fallback(TRADE_DATA)['insight'], "Stub insight.")
+
+    def test_insight_without_any_fallback_backend(self):
+        LATENCY['primary'] = None
+        with override_settings(AI_PROVIDERS=stubs('primary')):
+            self.assertIsNone(ai_router.fallback(TRADE_DATA))
+            insight = ai_coach.get_ai_insight(TRADE_DATA)
+            self.assertEqual(insight, ai_coach._mock_insight_on_failure(TRADE_DATA))
+            self.assertEqual(asyncio.run(ai_coach.aget_ai_insight(TRADE_DATA)), insight)
+
+
+@override_settings(AI_ROUTER={'MIN_SAMPLES': 5})
+class HedgingTests(RouterTestCase):
+    """
+    `primary` ranks first on its rolling p50 (0.02s); `secondary` has only
+    its 1s prior.
+    """
+    def router(self, **latency):
+        LATENCY.update(latency)
+        self.enterContext(override_settings(AI_PROVIDERS=stubs('primary', 'secondary', EXPECTED_LATENCY=1.0)))
+        router = ai_router.get_router()
+        warm(router, 'primary', 0.02)
+        self.assertEqual([provider.name for provider in router.ranked()], ['primary', 'secondary'])
+        return router
+
+    def aroute(self, router):
+        start = time.perf_counter()
+        result, name = asyncio.run(router.aroute(TRADE_DATA))
+        return result, name, time.perf_counter() - start
+
+    def test_hedge_fires_past_p95_and_the_loser_is_cancelled(self):
+        router = self.router(primary=1.0, secondary=0.05)
+        result, name, elapsed = self.aroute(router)
+        self.assertEqual((name, result['insight']), ('secondary', "Stub insight."))
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(CALLS, {'primary': 1, 'secondary': 1})
+        self.assertEqual(CANCELLED, {'primary': 1})
+        self.assertEqual(router.stats['primary'].cancelled, 1)
+
+    def test_no_hedge_within_p95(self):
+        router = self.router(primary=0.01, secondary=0.01)
+        warm(router, 'primary', 0.5, samples=1)  # p95 is now 0.5s
+        _, name, _ = self.aroute(router)
+        self.assertEqual(name, 'primary')
+        self.assertEqual(CALLS, {'primary': 1})
+
+    def test_first_valid_answer_wins(self):
+        # The hedge answers first, but with no insight: the primary's answer is awaited
+        router = self.router(primary=0.2, secondary=None)
+        result, name, elapsed = self.aroute(router)
+        self.assertEqual(name, 'primary')
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual(CALLS, {'primary': 1, 'secondary': 1})
+        self.assertEqual(CANCELLED, {})
+
+    def test_sync_route_hedges_on_the_pool(self):
+        router = self.router(primary=0.5, secondary=0.05)
+        start = time.perf_counter()
+        _, name = router.route(TRADE_DATA)
+        self.assertEqual(name, 'secondary')
+        self.assertLess(time.perf_counter() - start, 0.4)  # the blocking loser is left to finish
+
+    def test_failed_provider_fails_over_to_the_next(self):
+        router = self.router(primary=None, secondary=0.01)
+        with override_settings(AI_ROUTER={'MIN_SAMPLES': 5, 'HEDGE': False}):
+            _, name, _ = self.aroute(router)
+        self.assertEqual(name, 'secondary')
+        self.assertEqual(CALLS, {'primary': 1, 'secondary': 1})
+
+    def test_unhealthy_provider_ranks_last(self):
+        router = self.router(primary=0.01, secondary=0.01)
+        warm(router, 'primary', 0.02, ok=False, samples=10)  # error rate 2/3
+        self.assertEqual([provider.name for provider in router.ranked()], ['secondary', 'primary'])
+        _, name, _ = self.aroute(router)
+        self.assertEqual((name, CALLS), ('secondary', {'secondary': 1}))
+
+    def test_open_breaker_ranks_last_then_everything_falls_back(self):
+        router = self.router(primary=0.01, secondary=None)
+        breaker = ai_transport.get_breaker('primary')
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        self.assertEqual([provider.name for provider in router.ranked()], ['secondary', 'primary'])
+        LATENCY['primary'] = None
+        self.assertEqual(router.route(TRADE_DATA), (None, None))
+        self.assertEqual(CALLS, {'secondary': 1, 'primary': 1})
+        self.assertEqual(ai_coach.get_ai_insight(TRADE_DATA), ai_coach._mock_insight_on_failure(TRADE_DATA))
@@ -0,0 +1,300 @@
+# trademind_app/tests/test_ai_transport.py
+import asyncio
+import itertools
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from trademind_app import ai_transport
+from trademind_app.ai_transport import CircuitBreaker, CircuitOpenError, ProviderError
+from trademind_app.bench import StubServer
+
+OK_BODY = {'generated_text': 'ok'}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def scripted(*responses):
+    """
+    A stub `respond` answering (status, body) pairs in order, the last one
+    repeated. Records the paths it was called with.
+    """
+    counter = itertools.count()
+    calls = []
+
+    def respond(path, body):
+        calls.append(path)
+        status, payload = responses[min(next(counter), len(responses) - 1)]
+        return status, payload, 0
+    respond.calls = calls
+    return respond
+
+
+class PostJsonRetryTests(SimpleTestCase):
+    def setUp(self):
+        ai_transport.reset_breakers()
+        ai_transport.reset_session()
+        self.sleeps = []
+
+    def post(self, stub, **kwargs):
+        return ai_transport.post_json('test-provider', stub.url + '/models/test', {'inputs': 'x'},
+                                      sleep=self.sleeps.append, **kwargs)
+
+    def test_retries_429_with_backoff(self):
+        respond = scripted((429, {'error': 'rate limited'}), (429, {'error': 'rate limited'}), (200, OK_BODY))
+        with StubServer(respond) as stub:
+            response = self.post(stub, max_retries=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(respond.calls), 3)
+        self.assertEqual(len(self.sleeps), 2)
+        base = ai_transport.transport_setting('BACKOFF_BASE')
+        self.assertTrue(base / 2 <= self.sleeps[0] <= base)
+        self.assertTrue(base <= self.sleeps[1] <= 2 * base)  # doubled per retry
+
+    def test_retry_after_header_is_honoured(self):
+        class Response:
+            status_code = 429
+            headers = {'Retry-After': '7'}
+        self.assertEqual(ai_transport._retry_delay(Response(), 0), 7.0)
+
+    def test_cold_model_503_waits_for_estimated_time(self):
+        respond = scripted((503, {'error': 'Model is loading', 'estimated_time': 4}), (200, OK_BODY))
+        with StubServer(respond) as stub:
+            response = self.post(stub)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(respond.calls), 2)
+        self.assertTrue(4 <= self.sleeps[0] <= 4.8)
+
+    def test_gives_up_after_max_retries(self):
+        respond = scripted((503, {'error': 'overloaded'}))
+        with StubServer(respond) as stub, self.assertRaises(ProviderError) as raised:
+            self.post(stub, max_retries=2)
+        self.assertEqual(raised.exception.status, 503)
+        self.assertEqual(len(respond.calls), 3)
+        self.assertEqual(ai_transport.get_breaker('test-provider').failures, 1)
+
+    def test_estimated_time_over_the_wait_budget_is_not_waited_for(self):
+        respond = scripted((503, {'error': 'Model is loading', 'estimated_time': 600}))
+        with StubServer(respond) as stub, self.assertRaises(ProviderError):
+            self.post(stub)
+        self.assertEqual(len(respond.calls), 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_4xx_is_not_retried(self):
+        for status in (400, 401, 404, 422):
+            with self.subTest(status=status):
+                respond = scripted((status, {'error': 'bad request'}))
+                with StubServer(respond) as stub, self.assertRaises(ProviderError) as raised:
+                    self.post(stub)
+                self.assertEqual(raised.exception.status, status)
+                self.assertEqual(len(respond.calls), 1)
+                self.assertEqual(self.sleeps, [])
+        # The provider answered: a bad request doesn't count towards the breaker
+        self.assertEqual(ai_transport.get_breaker('test-provider').state, CircuitBreaker.CLOSED)
+
+
+
+class ConnectionReuseTests(SimpleTestCase):
+    def setUp(self):
+        ai_transport.reset_breakers()
+        ai_transport.reset_session()
+        self.addCleanup(ai_transport.reset_session)
+
+    def test_sync_calls_share_one_connection(self):
+        with StubServer(scripted((200, OK_BODY))) as stub:
+            for _ in range(20):
+                response = ai_transport.post_json('test-provider', stub.url + '/models/test', {'inputs': 'x'})
+                self.assertEqual(response.json(), OK_BODY)
+        self.assertEqual((stub.requests, stub.connections), (20, 1))
+
+    async def test_async_calls_share_one_connection(self):
+        with StubServer(scripted((200, OK_BODY))) as stub:
+            for _ in range(20):
+                response = await ai_transport.apost_json('test-provider', stub.url + '/models/test', {'inputs': 'x'})
+                self.assertEqual(response.json(), OK_BODY)
+        self.assertEqual((stub.requests, stub.connections), (20, 1))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=30, trial_timeout=60, clock=self.clock)
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_opens_after_threshold_and_blocks_until_reset_timeout(self):
+        self.open_breaker()
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 29.9
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_trial_success_closes(self):
+        self.open_breaker()
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())  # a single trial at a time
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+        self.assertTrue(self.breaker.allow())
+
+    def test_half_open_trial_failure_reopens(self):
+        self.open_breaker()
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 59.9
+        self.assertFalse(self.breaker.allow())  # a fresh cool-down from the failed trial
+        self.clock.now = 60
+        self.assertTrue(self.breaker.allow())
+
+    def test_trial_without_an_outcome_expires(self):
+        self.open_breaker()
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.clock.now = 89
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 90
+        self.assertTrue(self.breaker.allow())  # the trial timed out: a new one
+        self.assertFalse(self.breaker.allow())
+
+    def test_abandoned_trial_lets_the_next_call_try(self):
+        self.open_breaker()
+        self.breaker.abandon_trial()  # not half-open: nothing to abandon
+        self.assertFalse(self.breaker.allow())
+        self.clock.now = 30
+        self.assertTrue(self.breaker.allow())
+        self.breaker.abandon_trial()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_success_resets_the_failure_count(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class BreakerOverHttpTests(SimpleTestCase):
+    def setUp(self):
+        ai_transport.reset_breakers()
+        ai_transport.reset_session()
+
+    def test_open_breaker_skips_the_network_then_recovers(self):
+        clock = FakeClock()
+        ai_transport._breakers['test-breaker'] = CircuitBreaker(
+            'test-breaker', failure_threshold=2, reset_timeout=30, clock=clock,
+        )
+        healthy = [False]
+
+        def respond(path, body):
+            respond.requests += 1
+            return (200, OK_BODY, 0) if healthy[0] else (503, {'error': 'overloaded'}, 0)
+        respond.requests = 0
+
+        def post():
+            return ai_transport.post_json('test-breaker', stub.url + '/models/test', {'inputs': 'x'},
+                                          max_retries=0, sleep=lambda seconds: None)
+
+        with StubServer(respond) as stub:
+            for _ in range(2):
+                with self.assertRaises(ProviderError):
+                    post()
+            with self.assertRaises(CircuitOpenError):
+                post()
+            self.assertEqual(respond.requests, 2)  # open: nothing sent
+
+            clock.now = 30
+            with self.assertRaises(ProviderError) as raised:
+                post()  # half-open trial fails: open again
+            self.assertNotIsInstance(raised.exception, CircuitOpenError)
+            self.assertEqual(respond.requests, 3)
+            with self.assertRaises(CircuitOpenError):
+                post()
+
+            clock.now = 60
+            healthy[0] = True
+            self.assertEqual(post().status_code, 200)  # trial succeeds: closed
+            self.assertEqual(post().status_code, 200)
+            self.assertEqual(respond.requests, 5)
+        self.assertEqual(ai_transport.get_breaker('test-breaker').state, CircuitBreaker.CLOSED)
+
+
+class CancelledTrialTests(SimpleTestCase):
+    def setUp(self):
+        ai_transport.reset_breakers()
+        self.addCleanup(ai_transport.reset_breakers)
+        self.clock = FakeClock()
+        self.breaker = ai_transport._breakers['test-trial'] = CircuitBreaker(
+            'test-trial', failure_threshold=1, reset_timeout=30, clock=self.clock,
+        )
+
+    async def test_cancelled_half_open_trial_reopens_the_breaker(self):
+        arrived = threading.Event()
+
+        def respond(path, body):
+            arrived.set()
+            return 200, OK_BODY, 2  # slower than the caller is willing to wait
+
+        with StubServer(respond) as stub:
+            self.breaker.record_failure()
+            self.clock.now = 30
+            trial = asyncio.create_task(ai_transport.apost_json(
+                'test-trial', stub.url + '/models/test', {'inputs': 'x'}, max_retries=0,
+            ))
+            await asyncio.to_thread(arrived.wait, 5)
+            self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+            trial.cancel()  # e.g. the losing request of a hedge
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(self.breaker.allow())  # the next call is a new trial, not refused forever
+
+
+class OpenBreakerFailsFastTests(SimpleTestCase):
+    """
+    While the breaker is open a call fails straight away, however slow the
+    provider is, and never touches the network.
+    """
+    def setUp(self):
+        ai_transport.reset_breakers()
+        self.addCleanup(ai_transport.reset_breakers)
+        ai_transport.reset_session()
+        breaker = ai_transport.get_breaker('test-open')
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+
+    def slow_stub(self):
+        return StubServer(lambda path, body: (200, OK_BODY, 2))
+
+    def test_post_json(self):
+        with self.slow_stub() as stub:
+            start = time.perf_counter()
+            with self.assertRaises(CircuitOpenError):
+                ai_transport.post_json('test-open', stub.url + '/models/test', {'inputs': 'x'})
+            self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual((stub.requests, stub.connections), (0, 0))
+
+    async def test_apost_json(self):
+        with self.slow_stub() as stub:
+            start = time.perf_counter()
+            with self.assertRaises(CircuitOpenError):
+                await ai_transport.apost_json('test-open', stub.url + '/models/test', {'inputs': 'x'})
+            self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual((stub.requests, stub.connections), (0, 0))
@@ -0,0 +1,77 @@
+# trademind_app/tests/test_importer.py
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from trademind_app.bench import make_user, scratch_cache
+from trademind_app.importer import import_trades
+from trademind_app.models import Trade
+
+STATEMENT = (
+    "Position,Time,Type,Volume,Symbol,Commission,Swap,Profit\n"
+    "1001,2024.03.04 08:15:00,buy,0.50,EURUSD.r,-1.50,0.00,41.50\n"
+    "1002,2024.03.04 14:30:00,sell,1.00,XAUUSD,-2.00,-0.50,-20.00\n"
+    "1003,2024.03.05 02:00:00,buy,0.10,GBPUSD,0.00,0.00,0.00\n"
+    "1,2024.03.01 00:00:00,balance,,,0.00,0.00,1000.00\n"
+    "1004,2024.03.05 09:00:00,buy limit,0.10,GBPUSD,0.00,0.00,0.00\n"
+    "1001,2024.03.04 08:15:00,buy,0.50,EURUSD.r,-1.50,0.00,41.50\n"
+    "1005,not a time,buy,0.10,GBPUSD,0.00,0.00,5.00\n"
+)
+HTML_STATEMENT = (
+    "<html><body><div>Trade History Report</div><table>"
+    "<tr><th colspan=\"6\">Positions</th></tr>"
+    "<tr><td>Position</td><td>Time</td><td>Type</td><td>Volume</td><td>Symbol</td><td>Profit</td></tr>\n"
+    "<tr><td>2001</td><td>2024.03.06 15:00:00</td><td>sell</td><td>0.20</td><td>USDJPY</td><td>12.00</td></tr>\n"
+    "<tr><td colspan=\"6\">Orders</td></tr></table></body></html>"
+)
+
+
+class ImportTradesTests(TestCase):
+    """
+    A statement file in, the journal rows out, and the same file again
+    adds nothing.
+    """
+    def setUp(self):
+        self.enterContext(scratch_cache())
+        self.user = make_user('import_trader', rules=0)
+
+    def test_statement_round_trip(self):
+        result = import_trades(self.user, io.BytesIO(STATEMENT.encode()), fmt='csv', batch_size=2)
+        self.assertEqual(
+            (result.rows, result.trades, result.created, result.duplicates, result.skipped, result.error_count),
+            (7, 4, 3, 1, 2, 1),
+        )
+        trades = {trade.external_id: trade for trade in Trade.objects.filter(user=self.user)}
+        self.assertEqual(set(trades), {'csv:1001', 'csv:1002', 'csv:1003'})
+
+        win, loss, flat = trades['csv:1001'], trades['csv:1002'], trades['csv:1003']
+        self.assertEqual(
+            (win.date, win.session, win.pair, win.entry, win.profit, win.loss, win.lot_size),
+            (date(2024, 3, 4), 'london', 'EUR/USD', 'BUY', Decimal('40.00'), None, Decimal('0.50')),
+        )
+        self.assertEqual((loss.session, loss.pair, loss.entry, loss.profit, loss.loss),
+                         ('ny', 'Gold', 'SELL', None, Decimal('22.50')))
+        self.assertEqual((flat.session, flat.profit, flat.loss), ('asia', Decimal('0.00'), None))
+        for trade in trades.values():
+            # Fields the statement doesn't carry keep their model defaults
+            self.assertEqual((trade.screenshot_hash, trade.pre_trade_emotion), ('', 'neutral'))
+            self.assertIsNotNone(trade.created_at)
+            self.assertFalse(trade.rules_followed.exists())
+
+        again = import_trades(self.user, io.BytesIO(STATEMENT.encode()), fmt='csv')
+        self.assertEqual((again.created, again.duplicates), (0, 4))
+        self.assertEqual(Trade.objects.filter(user=self.user).count(), 3)
+
+    def test_html_statement(self):
+        result = import_trades(self.user, io.BytesIO(HTML_STATEMENT.encode()), fmt='mt5-html')
+        self.assertEqual(result.created, 1)
+        trade = Trade.objects.get(user=self.user)
+        self.assertEqual((trade.external_id, trade.pair, trade.entry, trade.profit),
+                         ('mt5:2001', 'USD/JPY', 'SELL', Decimal('12.00')))
+
+    def test_dry_run_writes_nothing(self):
+        result = import_trades(self.user, io.BytesIO(STATEMENT.encode()), fmt='csv', dry_run=True)
+        self.assertEqual((result.trades, result.created), (4, 0))
+        self.assertFalse(Trade.objects.filter(user=self.user).exists())
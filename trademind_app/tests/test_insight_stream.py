@@ -0,0 +1,180 @@
+# trademind_app/tests/test_insight_stream.py
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from trademind_app import ai_coach, ai_router, ai_transport, insight_stream
+from trademind_app.bench import StubServer, make_trades, make_user, scratch_cache, token_stream
+from trademind_app.insight_stream import InsightParser
+from trademind_app.models import AIInsight, InsightJob
+
+INSIGHT = {
+    'insight': "Entering angry after a loss turned a planned setup into a revenge trade.",
+    'risk_pattern': "Revenge trading",
+    'discipline_score': 4,
+    'coaching_tip': "After a loss, step away for ten minutes.",
+}
+COMPLETION = 'Here is the analysis:\n```json\n' + json.dumps(INSIGHT) + '\n```'
+
+
+def feed_all(parser, chunks):
+    completed = []
+    for chunk in chunks:
+        completed += parser.feed(chunk)
+    return completed
+
+
+class InsightParserTests(SimpleTestCase):
+    def test_fenced_object_after_a_preamble(self):
+        parser = InsightParser()
+        completed = parser.feed(COMPLETION)
+        self.assertEqual(completed, list(INSIGHT.items()))
+        self.assertTrue(parser.done)
+        self.assertEqual(json.loads(parser.object_text[parser.object_text.index('{'):]), INSIGHT)
+
+    def test_text_after_the_closing_brace_is_ignored(self):
+        parser = InsightParser()
+        completed = parser.feed('{"insight": "a"} and {"coaching_tip": "b"}')
+        self.assertEqual(completed, [('insight', 'a')])
+        self.assertEqual(parser.object_text, '{"insight": "a"}')
+
+    def test_escapes_and_braces_inside_strings(self):
+        text = r'{"insight": "He said \"wait\" {not} [now] \\", "coaching_tip": "a\\\"b}"}'
+        completed = InsightParser().feed(text)
+        self.assertEqual(completed, [('insight', 'He said "wait" {not} [now] \\'), ('coaching_tip', 'a\\"b}')])
+
+    def test_nested_values_are_returned_whole(self):
+        text = ('{"risk_pattern": {"name": "FOMO", "tags": ["late", {"x": "}]"}]}, '
+                '"insight": ["one", "two"], "discipline_score": 6}')
+        completed = InsightParser().feed(text)
+        self.assertEqual(completed, [
+            ('risk_pattern', {'name': 'FOMO', 'tags': ['late', {'x': '}]'}]}),
+            ('insight', ['one', 'two']),
+            ('discipline_score', 6),
+        ])
+
+    def test_numbers_and_literals_end_at_comma_or_brace(self):
+        completed = InsightParser().feed('{"discipline_score": 7.5, "insight": null, "coaching_tip": true, "risk_pattern": 3}')
+        self.assertEqual(completed, [
+            ('discipline_score', 7.5), ('insight', None), ('coaching_tip', True), ('risk_pattern', 3),
+        ])
+
+    def test_number_is_not_complete_until_its_terminator(self):
+        parser = InsightParser()
+        self.assertEqual(parser.feed('{"discipline_score": 1'), [])
+        self.assertEqual(parser.feed('0'), [])
+        self.assertEqual(parser.feed('}'), [('discipline_score', 10)])
+
+    def test_unknown_keys_are_skipped(self):
+        completed = InsightParser().feed('{"model": "x", "insight": "a", "extra": {"b": 1}}')
+        self.assertEqual(completed, [('insight', 'a')])
+
+    def test_any_chunk_boundaries_give_the_same_fields(self):
+        text = (r'Sure! ```json' '\n'
+                r'{"insight": "Quote \" and slash \\ and brace }", "risk_pattern": {"a": ["}", 1]}, '
+                r'"discipline_score": 4, "coaching_tip": "Breathe."}' '\n```')
+        expected = InsightParser().feed(text)
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(feed_all(InsightParser(), text), expected)  # one character at a time
+        for size in (2, 3, 5, 7, 11):
+            with self.subTest(chunk=size):
+                chunks = [text[i:i + size] for i in range(0, len(text), size)]
+                self.assertEqual(feed_all(InsightParser(), chunks), expected)
+
+    def test_fields_complete_as_soon_as_their_value_closes(self):
+        parser = InsightParser()
+        self.assertEqual(parser.feed('{"insight": "Calm'), [])
+        self.assertEqual(parser.feed(' entry", "risk'), [('insight', 'Calm entry')])
+
+
+def deepseek_stream(text, pieces=20):
+    size = max(1, -(-len(text) // pieces))
+    for start in range(0, len(text), size):
+        chunk = {'choices': [{'delta': {'content': text[start:start + size]}, 'index': 0}]}
+        yield f"data: {json.dumps(chunk)}\n\n".encode()
+    yield b"data: [DONE]\n\n"
+
+
+@override_settings(
+    INSIGHT_CACHE={'ENABLED': False},
+    AI_TRANSPORT={'MAX_RETRIES': 0},
+    AI_PROVIDERS={'deepseek': {}, 'huggingface': {}, 'mock': {'FALLBACK': True}},
+)
+class InsightEventsTests(TestCase):
+    """
+    insight_events end to end against local token-streaming stub providers.
+    """
+    def setUp(self):
+        self.enterContext(scratch_cache())
+        ai_transport.reset_breakers()
+        self.addCleanup(ai_transport.reset_breakers)
+        ai_router.reset()
+        self.user = make_user('stream_trader', rules=3)
+        self.trade = make_trades(self.user, 1)[0]
+
+    def providers(self, deepseek=None, huggingface=None):
+        """
+        Point the providers that get a `respond` at a stub server; the
+        others have no API key.
+        """
+        servers = {}
+        for name, respond in (('deepseek', deepseek), ('huggingface', huggingface)):
+            if respond is not None:
+                servers[name] = self.enterContext(StubServer(respond))
+        self.enterContext(mock.patch.multiple(
+            ai_coach,
+            DEEPSEEK_API_KEY='test-key' if deepseek else None,
+            DEEPSEEK_ENDPOINT=servers['deepseek'].url + '/chat' if deepseek else ai_coach.DEEPSEEK_ENDPOINT,
+            HF_API_KEY='test-key' if huggingface else None,
+            HF_ENDPOINT=servers['huggingface'].url + '/models/test' if huggingface else ai_coach.HF_ENDPOINT,
+        ))
+        return servers
+
+    async def events(self):
+        state, value = await sync_to_async(insight_stream.prepare)(self.trade.id, self.user.pk)
+        events = []
+        async for chunk in insight_stream.insight_events(state, value):
+            lines = chunk.decode().splitlines()
+            events.append((lines[0][len('event: '):], json.loads(lines[1][len('data: '):])))
+        return events
+
+    def assertStored(self, events):
+        fields = [data['name'] for event, data in events if event == 'field']
+        self.assertEqual(fields, list(INSIGHT))
+        self.assertEqual(events[-1][0], 'done')
+        self.assertEqual(events[-1][1]['insight']['discipline_score'], 4)
+        insight = AIInsight.objects.get(trade=self.trade)
+        self.assertEqual((insight.source, insight.risk_pattern), ('provider', INSIGHT['risk_pattern']))
+        self.assertEqual(InsightJob.objects.get(trade=self.trade).status, InsightJob.STATUS_DONE)
+
+    async def test_streams_huggingface_tokens(self):
+        self.providers(huggingface=lambda path, body: (200, token_stream(COMPLETION, 30, 0), 0))
+        events = await self.events()
+        self.assertGreater(sum(1 for event, _ in events if event == 'token'), 10)
+        await sync_to_async(self.assertStored)(events)
+
+    async def test_streams_deepseek_chunks(self):
+        self.providers(deepseek=lambda path, body: (200, deepseek_stream(COMPLETION), 0))
+        events = await self.events()
+        self.assertEqual(''.join(data['text'] for event, data in events if event == 'token'), COMPLETION)
+        await sync_to_async(self.assertStored)(events)
+
+    async def test_fails_over_before_the_first_token(self):
+        servers = self.providers(
+            deepseek=lambda path, body: (503, {'error': 'overloaded'}, 0),
+            huggingface=lambda path, body: (200, token_stream(COMPLETION, 30, 0), 0),
+        )
+        events = await self.events()
+        await sync_to_async(self.assertStored)(events)
+        self.assertEqual((servers['deepseek'].requests, servers['huggingface'].requests), (1, 1))
+
+    async def test_no_provider_streams_hands_the_job_back(self):
+        self.providers(huggingface=lambda path, body: (503, {'error': 'overloaded'}, 0))
+        events = await self.events()
+        self.assertEqual(events, [('pending', {'status': 'retrying'})])
+        job = await InsightJob.objects.aget(trade=self.trade)
+        self.assertEqual(job.status, InsightJob.STATUS_PENDING)
+        self.assertFalse(await AIInsight.objects.filter(trade=self.trade).aexists())
@@ -0,0 +1,34 @@
+# trademind_app/tests/test_metrics.py
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from trademind_app import metrics
+from trademind_app.bench import logged_in_client, make_user
+
+
+class MetricsStoreTests(TestCase):
+    def test_tests_write_to_a_scratch_store(self):
+        self.assertNotEqual(metrics.metrics_setting('PATH'), str(settings.BASE_DIR / 'metrics.sqlite3'))
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.url = reverse('trademind_app:metrics')
+
+    def test_staff_only_without_a_token(self):
+        with override_settings(METRICS={**settings.METRICS, 'TOKEN': ''}):
+            self.assertEqual(self.client.get(self.url).status_code, 403)
+            self.assertEqual(logged_in_client(make_user('metrics_trader', rules=0)).get(self.url).status_code, 403)
+            staff = User.objects.create_user('metrics_staff', password='x', is_staff=True)
+            self.assertEqual(logged_in_client(staff).get(self.url).status_code, 200)
+
+    def test_bearer_token(self):
+        with override_settings(METRICS={**settings.METRICS, 'TOKEN': 'scrape'}):
+            self.assertEqual(self.client.get(self.url).status_code, 401)
+            self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape')
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response['Content-Type'].startswith('text/plain'))
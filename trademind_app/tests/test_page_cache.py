@@ -0,0 +1,158 @@
+# trademind_app/tests/test_page_cache.py
+"""
+Invalidation of the per-user page cache (trademind_app/page_cache.py):
+every kind of write to a trader's journal bumps their generation, after
+which the cached dashboard and history equal an uncached render. Render
+times cold vs. warm: `python manage.py bench_page_cache`.
+"""
+import io
+import re
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from trademind_app import importer, page_cache
+from trademind_app import stats as trader_stats
+from trademind_app.bench import logged_in_client, make_trades, make_user, scratch_cache, trade_post_data
+from trademind_app.models import AIInsight, StrategyRule, Trade
+from trademind_app.query_budgets import QUERY_BUDGETS
+from trademind_app.tests import without_manifest
+
+PAGES = ['dashboard', 'trade_history']
+# A cached page is served for the session and user lookups alone
+HIT_QUERIES = 2
+# Masked CSRF tokens differ on every render
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]+"')
+
+STATEMENT = (
+    b"Position,Time,Type,Volume,Symbol,Price,Close Time,Commission,Swap,Profit\n"
+    b"90000001,2024.03.04 09:15:00,buy,0.10,EURUSD,1.08500,2024.03.04 11:00:00,-0.70,0.00,42.10\n"
+    b"90000002,2024.03.05 14:30:00,sell,0.20,XAUUSD,2150.00000,2024.03.05 15:10:00,-1.40,0.00,-18.60\n"
+)
+
+
+@without_manifest
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.enterContext(scratch_cache())
+        self.user = make_user('page_cache_trader', rules=3)
+        self.other = make_user('page_cache_other', rules=1)
+        for trader in (self.user, self.other):
+            make_trades(trader, 12)
+            trader_stats.rebuild(trader.pk)  # bulk writes skip the signal handlers
+            page_cache.bump(trader.pk)
+        self.client = logged_in_client(self.user)
+        self.rules = list(StrategyRule.objects.filter(user=self.user))
+
+    def get(self, page, client=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = (client or self.client).get(reverse(f'trademind_app:{page}'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries), CSRF_TOKEN.sub(b'', response.content)
+
+    def newest(self):
+        return Trade.objects.filter(user=self.user).order_by('-date', '-created_at').first()
+
+    def assertWriteInvalidates(self, write):
+        for page in PAGES:
+            self.get(page)  # cached before the write
+        before = page_cache.generation(self.user.pk)
+        write()
+        # Flash messages set by the write render (and are consumed) on this page
+        self.client.get(reverse('trademind_app:add_rule'))
+        self.assertNotEqual(page_cache.generation(self.user.pk), before)
+        for page in PAGES:
+            with self.subTest(page=page):
+                _, served = self.get(page)
+                with override_settings(PAGE_CACHE={'ENABLED': False}):
+                    _, fresh = self.get(page)
+                self.assertEqual(served, fresh)  # never the stale copy
+                queries, hit = self.get(page)
+                self.assertEqual((queries, hit), (HIT_QUERIES, served))  # cached again
+
+    def test_trade_writes(self):
+        def edit():
+            trade = self.newest()
+            trade.pair, trade.profit, trade.loss = 'Oil', None, 99
+            trade.save()
+
+        writes = {
+            'trade_log POST': lambda: self.client.post(
+                reverse('trademind_app:trade_log'), trade_post_data(self.rules)),
+            'Trade save': edit,
+            'Trade delete': lambda: self.newest().delete(),
+            'import_trades (bulk)': lambda: importer.import_trades(self.user, io.BytesIO(STATEMENT), 'csv'),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                self.assertWriteInvalidates(write)
+
+    def test_rules_followed_writes(self):
+        self.assertWriteInvalidates(lambda: self.newest().rules_followed.add(*self.rules))
+        self.assertWriteInvalidates(lambda: self.newest().rules_followed.remove(self.rules[0]))
+        self.assertWriteInvalidates(lambda: self.newest().rules_followed.clear())
+
+    def test_strategy_rule_writes(self):
+        rule = self.rules[0]
+        writes = {
+            'add_rule POST': lambda: self.client.post(reverse('trademind_app:add_rule'), {'rule_text': "New rule"}),
+            'edit_rule POST': lambda: self.client.post(
+                reverse('trademind_app:edit_rule', args=[rule.id]), {'rule_text': "Edited rule"}),
+            'delete_rule POST': lambda: self.client.post(reverse('trademind_app:delete_rule', args=[self.rules[-1].id])),
+            'StrategyRule create': lambda: StrategyRule.objects.create(user=self.user, rule_text="ORM rule"),
+        }
+        for name, write in writes.items():
+            with self.subTest(write=name):
+                self.assertWriteInvalidates(write)
+
+    def test_ai_insight_writes(self):
+        insight = AIInsight(trade=self.newest(), insight="Checked.", risk_pattern="None", discipline_score=3,
+                            coaching_tip="Checked.", source='mock')
+
+        def update():
+            insight.discipline_score = 9
+            insight.save()
+
+        for name, write in {'create': insight.save, 'save': update, 'delete': insight.delete}.items():
+            with self.subTest(write=name):
+                self.assertWriteInvalidates(write)
+
+    def test_other_users_writes_keep_pages_cached(self):
+        for page in PAGES:
+            self.get(page)
+        before = page_cache.generation(self.user.pk)
+        other_client = logged_in_client(self.other)
+        other_rules = list(StrategyRule.objects.filter(user=self.other))
+        other_client.post(reverse('trademind_app:trade_log'), trade_post_data(other_rules))
+        other_client.post(reverse('trademind_app:add_rule'), {'rule_text': "Other rule"})
+        self.assertEqual(page_cache.generation(self.user.pk), before)
+        for page in PAGES:
+            with self.subTest(page=page):
+                self.assertEqual(self.get(page)[0], HIT_QUERIES)
+
+    def test_history_is_cached_per_session(self):
+        self.get('trade_history')
+        # Another session of the same user gets its own page (CSRF token)
+        queries, _ = self.get('trade_history', client=logged_in_client(self.user))
+        self.assertGreater(queries, HIT_QUERIES)
+
+    def test_cached_pages_skip_the_render(self):
+        for page in PAGES:
+            with self.subTest(page=page):
+                self.get(page)
+                with override_settings(PAGE_CACHE={'ENABLED': False}):
+                    uncached = self.best_of(page)
+                warm = self.best_of(page)
+                self.assertEqual(self.get(page)[0], QUERY_BUDGETS[f'{page} (cached)'])
+                self.assertLess(warm, uncached)
+
+    def best_of(self, page, runs=5):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.get(page)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,31 @@
+# trademind_app/tests/test_query_budgets.py
+"""
+SQL query budgets per view (trademind_app/query_budgets.py), on a seeded
+journal. Also reported by `python manage.py check_query_budgets`.
+"""
+from django.test import TestCase
+
+from trademind_app.bench import scratch_cache
+from trademind_app.query_budgets import QUERY_BUDGETS, RULE_QUERY_BUDGETS, rule_queries, scenarios, seed
+from trademind_app.tests import without_manifest
+
+
+@without_manifest
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.enterContext(scratch_cache())
+
+    def run_scenarios(self, trades_count):
+        for name, request in scenarios(*seed(trades_count)):
+            with self.subTest(view=name):
+                with self.assertNumQueries(QUERY_BUDGETS[name]) as queries:
+                    response = request()
+                self.assertLess(response.status_code, 400)
+                if name in RULE_QUERY_BUDGETS:
+                    self.assertLessEqual(rule_queries(queries.captured_queries), RULE_QUERY_BUDGETS[name])
+
+    def test_views_within_budgets(self):
+        self.run_scenarios(60)
+
+    def test_budgets_hold_on_a_larger_journal(self):
+        self.run_scenarios(400)
@@ -0,0 +1,26 @@
+# trademind_app/tests/test_query_plans.py
+"""
+EXPLAIN QUERY PLAN of the hot Trade/AIInsight queries
+(trademind_app/query_plans.py): a dropped or unusable index fails here.
+Also reported by `python manage.py check_query_plans`. SQLite only.
+"""
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+from trademind_app.bench import scratch_cache
+from trademind_app.query_plans import explain, plan_problems, plans, seed
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Query plans are checked on SQLite")
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        self.enterContext(scratch_cache())
+
+    def test_hot_queries_use_their_indexes(self):
+        user, trade = seed()
+        for name, queryset, index, sort_ok in plans(user, trade):
+            with self.subTest(query=name):
+                plan = explain(queryset)
+                self.assertEqual(plan_problems(plan, index, sort_ok), [], "\n".join(plan))
@@ -0,0 +1,53 @@
+# trademind_app/tests/test_rule_cache.py
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from trademind_app import jobs, rule_cache
+from trademind_app.bench import logged_in_client, make_trades, make_user, scratch_cache
+from trademind_app.models import StrategyRule
+from trademind_app.query_budgets import rule_queries
+from trademind_app.tests import without_manifest
+
+
+class RuleCacheTests(TestCase):
+    def setUp(self):
+        self.enterContext(scratch_cache())
+        self.user = make_user('rule_cache_trader', rules=4)
+
+    def rule_queries(self, call):
+        with CaptureQueriesContext(connection) as queries:
+            result = call()
+        return rule_queries(queries.captured_queries), result
+
+    @without_manifest
+    def test_trade_log_get_cold_then_warm(self):
+        client = logged_in_client(self.user)
+        url = reverse('trademind_app:trade_log')
+        rule_cache.invalidate(self.user.pk)
+        count, response = self.rule_queries(lambda: client.get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 1)
+        count, response = self.rule_queries(lambda: client.get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 0)
+
+    def test_build_trade_data_serves_rules_total_from_the_snapshot(self):
+        trade = make_trades(self.user, 1)[0]
+        rule_cache.get_rules(self.user.pk)  # warm
+        count, data = self.rule_queries(lambda: jobs.build_trade_data(trade))
+        self.assertEqual(data['rules_total'], 4)
+        # rules_followed_count still counts the through table, never the rules
+        self.assertEqual(count, 0)
+
+    def test_rule_writes_invalidate_the_snapshot(self):
+        self.assertEqual(rule_cache.rules_total(self.user.pk), 4)
+        rule = StrategyRule.objects.create(user=self.user, rule_text="Wait for the retest")
+        self.assertEqual(rule_cache.rules_total(self.user.pk), 5)
+        rule.rule_text = "Wait for the close"
+        rule.save()
+        self.assertIn((rule.id, "Wait for the close"), rule_cache.rule_choices(self.user.pk))
+        rule.delete()
+        self.assertEqual(rule_cache.rules_total(self.user.pk), 4)
+        self.assertEqual(self.rule_queries(lambda: rule_cache.get_rules(self.user.pk))[0], 0)
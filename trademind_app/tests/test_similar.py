@@ -0,0 +1,103 @@
+# trademind_app/tests/test_similar.py
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+
+from trademind_app import similar
+from trademind_app.bench import make_user, scratch_cache, seed_journal
+from trademind_app.importer import import_trades
+from trademind_app.models import Trade
+
+
+def log_trade(user, day, **fields):
+    values = {
+        'date': day, 'session': 'london', 'pair': 'GBP/USD', 'entry': 'BUY', 'profit': Decimal('10.00'),
+        'pre_trade_emotion': 'angry', 'post_trade_emotion': 'sad', 'reason': "Logged by hand.",
+    }
+    values.update(fields)
+    return Trade.objects.create(user=user, **values)
+
+
+class SimilarIndexOrderTests(TestCase):
+    """
+    A trade's past is what comes before it in journal order (date,
+    created_at, id), not the trades with lower ids.
+    """
+    def setUp(self):
+        self.enterContext(scratch_cache())
+        similar.clear()
+        self.addCleanup(similar.clear)
+        self.user = make_user('similar_trader', rules=2)
+
+    def past_ids(self, trade):
+        return {neighbour.id for neighbour in similar.similar_trades(trade, k=50)}
+
+    def test_imported_history_is_in_the_past_of_manual_trades(self):
+        today = date.today()
+        manual = log_trade(self.user, today)
+        similar.get_index(self.user.pk, through_id=manual.pk)  # index built before the import
+        statement = "Ticket,Open Time,Type,Volume,Symbol,Profit\n" + "".join(
+            f"{900 + i},{(today - timedelta(days=30 + i)).strftime('%Y.%m.%d')} 10:00:00,buy,0.10,GBPUSD,-5.00\n"
+            for i in range(3)
+        )
+        result = import_trades(self.user, io.StringIO(statement), fmt='csv')
+        self.assertEqual(result.created, 3)
+        imported = list(Trade.objects.filter(user=self.user, external_id__startswith='csv:'))
+        self.assertTrue(all(trade.id > manual.id for trade in imported))
+
+        self.assertEqual(self.past_ids(manual), {trade.id for trade in imported})
+        oldest = min(imported, key=lambda trade: trade.date)
+        self.assertEqual(self.past_ids(oldest), set())
+        newest = max(imported, key=lambda trade: trade.date)
+        self.assertNotIn(manual.id, self.past_ids(newest))
+
+    def test_trade_logged_today_is_appended(self):
+        today = date.today()
+        first = log_trade(self.user, today - timedelta(days=2))
+        index = similar.get_index(self.user.pk, through_id=first.pk)
+        second = log_trade(self.user, today)
+        self.assertEqual(self.past_ids(second), {first.id})
+        self.assertIs(similar.get_index(self.user.pk), index)
+        self.assertEqual(index.size, 2)
+
+    def test_backdated_trade_rebuilds_in_journal_order(self):
+        today = date.today()
+        recent = log_trade(self.user, today)
+        index = similar.get_index(self.user.pk, through_id=recent.pk)
+        backdated = log_trade(self.user, today - timedelta(days=10))
+        self.assertEqual(self.past_ids(backdated), set())
+        rebuilt = similar.get_index(self.user.pk)
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(list(rebuilt.ids[:rebuilt.size]), [backdated.id, recent.id])
+        self.assertEqual(self.past_ids(recent), {backdated.id})
+
+    def test_unsaved_trade_sees_trades_up_to_its_date(self):
+        today = date.today()
+        before = log_trade(self.user, today - timedelta(days=3))
+        log_trade(self.user, today)
+        draft = Trade(user=self.user, date=today - timedelta(days=1), session='london', pair='GBP/USD',
+                      entry='BUY', pre_trade_emotion='angry', post_trade_emotion='sad')
+        self.assertEqual(self.past_ids(draft), {before.id})
+
+    def test_top_k_matches_brute_force(self):
+        seed_journal(self.user, 300, seed=7)
+        similar.invalidate(self.user.pk)
+        index = similar.get_index(self.user.pk)
+        keys = [index.sort_key(row) for row in range(index.size)]
+        self.assertEqual(keys, sorted(keys))
+        for row in (1, 57, 150, 299):
+            found, distances = index.nearest(index.key(row), row, 5)
+            vectors = index.feature_vectors(np.arange(row + 1))
+            expected = np.sort(((vectors[:row] - vectors[row]) ** 2).sum(axis=1))[:5]
+            self.assertTrue(np.allclose(distances, expected, atol=1e-3))
+
+    def test_key_for_matches_the_indexed_row(self):
+        breakeven = log_trade(self.user, date.today(), profit=Decimal('0.00'), loss=Decimal('5.00'))
+        index = similar.get_index(self.user.pk)
+        combo, dense = index.key(index.position(breakeven.pk))
+        query_combo, query_dense = index.key_for(breakeven, 0)
+        self.assertEqual(query_combo, combo)
+        self.assertTrue(np.allclose(query_dense, dense, atol=1e-6))
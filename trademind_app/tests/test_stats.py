@@ -0,0 +1,81 @@
+# trademind_app/tests/test_stats.py
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from trademind_app import stats as trader_stats
+from trademind_app.bench import make_user, scratch_cache
+from trademind_app.models import AIInsight, StrategyRule, Trade, TraderStats
+
+
+def new_trade(user, **fields):
+    values = {
+        'date': date(2026, 1, 5), 'session': 'london', 'pair': 'GBP/USD', 'entry': 'BUY',
+        'profit': Decimal('12.50'), 'pre_trade_emotion': 'chill', 'post_trade_emotion': 'happy',
+        'reason': "Test trade.",
+    }
+    values.update(fields)
+    return Trade.objects.create(user=user, **values)
+
+
+class TraderStatsSignalTests(TestCase):
+    """
+    Every journal write keeps TraderStats equal to a from-scratch compute().
+    """
+    def setUp(self):
+        self.enterContext(scratch_cache())
+        self.user = make_user('stats_trader', rules=3)
+        trader_stats.rebuild(self.user.pk)
+
+    def assertInSync(self, user=None):
+        stored = TraderStats.objects.get(user=user or self.user)
+        self.assertEqual(trader_stats.diff(stored), {})
+        return stored
+
+    def test_create_edit_and_delete_trades(self):
+        win = new_trade(self.user)
+        loss = new_trade(self.user, profit=None, loss=Decimal('7.25'), pre_trade_emotion='angry')
+        stored = self.assertInSync()
+        self.assertEqual((stored.total_trades, stored.winning_trades, stored.losing_trades), (2, 1, 1))
+
+        win.profit, win.pre_trade_emotion = None, 'fear'
+        win.loss = Decimal('3.10')
+        win.save()
+        stored = self.assertInSync()
+        self.assertEqual(stored.emotion_stats['chill']['count'], 0)
+
+        loss.delete()
+        stored = self.assertInSync()
+        self.assertEqual(stored.total_trades, 1)
+
+    def test_rules_followed_and_insights(self):
+        trade = new_trade(self.user)
+        trade.rules_followed.set(StrategyRule.objects.filter(user=self.user))
+        AIInsight.objects.create(
+            trade=trade, insight="x", risk_pattern="None", discipline_score=6, coaching_tip="y", source='mock',
+        )
+        stored = self.assertInSync()
+        self.assertEqual((stored.rules_followed_total, stored.discipline_score_total), (3, 6))
+        StrategyRule.objects.filter(user=self.user).first().delete()
+        trade.delete()
+        self.assertInSync()
+
+    def test_trade_moved_to_another_user(self):
+        other = make_user('stats_other', rules=0)
+        trader_stats.rebuild(other.pk)
+        trade = new_trade(self.user)
+        trade.user = other
+        trade.save()
+        self.assertEqual(self.assertInSync().total_trades, 0)
+        self.assertEqual(self.assertInSync(other).total_trades, 1)
+
+    def test_write_lock_taken_before_reading_the_row(self):
+        # A read first would leave SQLite unable to wait for the write lock
+        # (SQLITE_BUSY_SNAPSHOT) when another writer got in between.
+        with CaptureQueriesContext(connection) as queries:
+            new_trade(self.user)
+        stats_sql = [query['sql'] for query in queries if 'trademind_app_traderstats' in query['sql']]
+        self.assertTrue(stats_sql[0].startswith('UPDATE'), stats_sql[0])
@@ -15,6 +15,10 @@ urlpatterns = [
     # Trade Flow
     path('trade/log/', views.trade_log, name='trade_log'),
     path('trade/<int:trade_id>/insight/', views.ai_insight, name='ai_insight'),
+    path('trade/<int:trade_id>/insight/status/', views.ai_insight_status, name='ai_insight_status'),
+    path('trade/<int:trade_id>/insight/stream/', views.ai_insight_stream, name='ai_insight_stream'),
+    path('trade/<int:trade_id>/screenshot/<str:digest>/<str:kind>.webp', views.screenshot_rendition,
+         name='screenshot_rendition'),
     
     # Rule Management
     path('rule/add/', views.add_strategy_rule, name='add_rule'),
@@ -23,5 +27,16 @@ urlpatterns = [
     
     #Trade History
     path('trades/', views.trade_history, name='trade_history'),
+    path('trades/export.<str:fmt>', views.export_trades, name='export_trades'),
+    path('trades/import/', views.import_trades, name='import_trades'),
+
+    # Analytics
+    path('analytics/data/', views.analytics_data, name='analytics_data'),
+
+    # Staff
+    path('staff/profiling/', views.profiling_report, name='profiling_report'),
+
+    # Monitoring
+    path('metrics', views.metrics_endpoint, name='metrics'),
     
 ]
\ No newline at end of file
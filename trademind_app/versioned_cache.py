@@ -0,0 +1,45 @@
+# trademind_app/versioned_cache.py
+"""
+Per-user version numbers for invalidating cached snapshots.
+
+    <namespace>:version:<user_id>     -> version
+
+A cache (rule_cache, analytics, similar, page_cache) stores its entries
+under the user's current version and bumps it on a write, so readers never
+see a stale entry and old ones simply expire.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _key(namespace, user_id):
+    return f"{namespace}:version:{user_id}"
+
+
+def version(namespace, user_id):
+    key = _key(namespace, user_id)
+    current = cache.get(key)
+    if current is None:
+        # Time-based start, so a lost version key can't resurrect old entries
+        current = time.time_ns()
+        if not cache.add(key, current, timeout=None):
+            current = cache.get(key, current)
+    return current
+
+
+def bump(namespace, user_id):
+    try:
+        cache.incr(_key(namespace, user_id))
+    except ValueError:
+        cache.set(_key(namespace, user_id), time.time_ns(), timeout=None)
+
+
+def bump_now_and_on_commit(namespace, user_id):
+    """
+    Bump now for this request, and again after commit so an entry cached by
+    another request mid-transaction can't outlive the change.
+    """
+    bump(namespace, user_id)
+    transaction.on_commit(lambda: bump(namespace, user_id))
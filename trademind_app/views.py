@@ -4,19 +4,36 @@ from django.shortcuts import render
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.urls import reverse
-from django.db import transaction
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 
-from .forms import TraderSignupForm, TradeLogForm, StrategyRuleForm
-from .models import Trade, StrategyRule, AIInsight
+from .forms import TraderSignupForm, TradeLogForm, StrategyRuleForm, ImportTradesForm
+from .models import Trade, StrategyRule, InsightJob
 from django.conf import settings
 #from intasend import APIService
-from django.db.models import Avg, Case, When, Value, FloatField
 import os
+import logging
+import time
+from datetime import date as date_cls
 
-from .ai_coach import get_ai_insight,_mock_insight_on_failure #Updated import
+from .jobs import enqueue_insight
+from .pagination import RULES_FOLLOWED_N, InvalidCursor, apaginate_trades
+from .sqlite_tuning import immediate_atomic
+from . import analytics, export, importer, insight_stream, metrics, page_cache, profiling, rule_cache, screenshots
+from . import stats as trader_stats
+
+logger = logging.getLogger(__name__)
+
+# Async views render in a thread: templates may still touch lazy relations,
+# the session or messages, which can't run on the event loop.
+arender = sync_to_async(render)
 
 # --- PUBLIC: Landing Page ---
 def landing(request):
@@ -38,12 +55,12 @@ def signup(request):
         form = TraderSignupForm(request.POST)
         if form.is_valid():
             user = form.save()
-            print(f"[DEBUG] User created: {user.username}")  # ✅ Debug line
+            logger.info("User created: %s", user.username)
             login(request, user)
             messages.success(request, "Welcome to TradeMind! Your Psychee journey begins.")
             return redirect('trademind_app:dashboard')
         else:
-            print(f"[DEBUG] Form errors: {form.errors}")  # ✅ See what’s failing
+            logger.debug("Signup form errors: %s", form.errors.as_json())
     else:
         form = TraderSignupForm()
     return render(request, 'signup.html', {'form': form})
@@ -51,7 +68,7 @@ def signup(request):
 
 # --- DASHBOARD: Main Hub ---
 @login_required
-def dashboard(request):
+async def dashboard(request):
     """
     User's main hub.
     Shows:
@@ -60,28 +77,24 @@ def dashboard(request):
     - Emotion trends
     - CTA: Log a new trade
     - AI Insight Nudge (if available)
+    Aggregates come from the materialized TraderStats row (one PK lookup).
+    The page body is a {% cache %} fragment keyed on the user's generation
+    (page_cache.py): the data below is lazy and only loaded when the
+    fragment has to be rendered again after a write.
     """
-    trades = Trade.objects.filter(user=request.user).order_by('-date', '-created_at')[:5]
-    rules = StrategyRule.objects.filter(user=request.user)
-    
-    total_trades = Trade.objects.filter(user=request.user).count()
-    winning_trades = Trade.objects.filter(user=request.user, profit__isnull=False).count()
-    losing_trades = Trade.objects.filter(user=request.user, loss__isnull=False, profit__isnull=True).count()
-    
-    # ✅ Calculate win rate in Python
-    win_rate = 0
-    if total_trades > 0:
-        win_rate = (winning_trades / total_trades) * 100
-    
+    request.user = user = await request.auser()
+    cache_timeout = page_cache.fragment_timeout()
+    generation = await sync_to_async(page_cache.generation)(user.pk) if cache_timeout else None
+
     context = {
-        'trades': trades,
-        'rules': rules,
-        'total_trades': Trade.objects.filter(user=request.user).count(),
-        'winning_trades': Trade.objects.filter(user=request.user, profit__isnull=False).count(),
-        'losing_trades': losing_trades,
-        'win_rate': round(win_rate, 1),  # e.g., 66.7
+        'generation': generation,
+        'cache_timeout': cache_timeout,
+        'trades': Trade.objects.filter(user=user).order_by('-date', '-created_at')[:5],
+        'rules': SimpleLazyObject(lambda: rule_cache.get_rules(user.pk)),
+        # total/winning/losing trades, win rate, avg discipline score, emotion_avg_pnl
+        'stats': SimpleLazyObject(lambda: trader_stats.for_user(user)),
     }
-    return render(request, 'dashboard.html', context)
+    return await arender(request, 'dashboard.html', context)
 
 
 # --- TRADE LOG: Create or Edit ---
@@ -90,15 +103,21 @@ def trade_log(request):
     """
     Form to log a new trade.
     Pre-fills rules for the user.
-    On POST: saves trade, redirects to AI insight.
+    On POST: saves trade, rules followed and the insight job in one short
+    immediate transaction, redirects to AI insight.
     """
     if request.method == 'POST':
-        form = TradeLogForm(request.POST, user=request.user)
+        form = TradeLogForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
             trade = form.save(commit=False)
             trade.user = request.user
-            trade.save()
-            form.save_m2m()  # Save ManyToMany (rules_followed)
+            if trade.screenshot and not trade.screenshot._committed:
+                # Store the upload before taking the write lock
+                trade.screenshot.save(trade.screenshot.name, trade.screenshot.file, save=False)
+            with immediate_atomic():
+                trade.save()
+                form.save_m2m()  # Save ManyToMany (rules_followed)
+                enqueue_insight(trade, job=None)  # Generated in the background by run_insight_worker
             messages.success(request, "Trade logged. Time to analyze your Psychee.")
             return redirect('trademind_app:ai_insight', trade_id=trade.id)
     else:
@@ -109,68 +128,64 @@ def trade_log(request):
 
 # --- AI INSIGHT: Behavioral Analysis (Monetizable) ---
 @login_required
-def ai_insight(request, trade_id):
+async def ai_insight(request, trade_id):
     """
     Shows AI-generated insight on a trade.
     - Free: Basic insight
     - Premium (IntaSend): Deep analysis, PDF, coaching
     This is the monetization gate.
     """
-    trade = get_object_or_404(Trade, id=trade_id, user=request.user)
+    request.user = user = await request.auser()
+    try:
+        trade = await Trade.objects.select_related('insight', 'insight_job').aget(id=trade_id, user=user)
+    except Trade.DoesNotExist:
+        raise Http404("No Trade matches the given query.")
     
     # Try to get existing insight
     insight = getattr(trade, 'insight', None)
+    job = getattr(trade, 'insight_job', None)
     
-    if not insight:
-        # ✅ Prepare data for AI Coach
-        trade_data = {
-            'entry': trade.entry,
-            'pair': trade.pair,
-            'profit': str(trade.profit) if trade.profit else None,
-            'loss': str(trade.loss) if trade.loss else None,
-            'pre_trade_emotion': trade.get_pre_trade_emotion_display(),
-            'post_trade_emotion': trade.get_post_trade_emotion_display(),
-            'rules_followed_count': trade.rules_followed.count(),
-            'rules_total': StrategyRule.objects.filter(user=request.user).count(),
-            'reason': trade.reason,
-        }
-
-        # ✅ Call the real AI Coach
-        try:
-            insight_dict = get_ai_insight(trade_data)
-            
-            
-            # ✅ Save to database
-            insight = AIInsight.objects.create(
-                trade=trade,
-                insight=insight_dict['insight'],
-                risk_pattern=insight_dict['risk_pattern'],
-                discipline_score=insight_dict['discipline_score'],
-                coaching_tip=insight_dict['coaching_tip']
-            )
-            messages.success(request, "AI insight generated from behavioral patterns.")
-            
-        except Exception as e:
-            # messages.error(request, "AI temporarily busy. Try again later.")
-            
-            # Fallback to mock if needed
-#            insight_dict = {
-#                "insight": "High emotional volatility detected after losing trade.",
-#                "risk_pattern": "Revenge trading",
-#                "discipline_score": 4,
-#                "coaching_tip": "Pause for 10 minutes after a loss. Recheck your rules before re-entering."
-#            }
-            insight_dict = _mock_insight_on_failure(trade_data)
-            insight = AIInsight.objects.create(trade=trade, **insight_dict)
+    if not insight and (job is None or job.status == InsightJob.STATUS_FAILED):
+        # Never call the AI coach inline: queue it (older trades may have no job yet)
+        # and let the page stream it (ASGI) or poll ai_insight_status until the worker is done.
+        await sync_to_async(enqueue_insight)(trade, job=job)
 
     context = {
         'trade': trade,
         'insight': insight,
+        'insight_pending': insight is None,
         'intasend_public_key': os.getenv('INTASEND_PUBLISHABLE_KEY', 'ISPubKey_test_d2b2b1b1-d54e-4359-a693-2115db931170'),
         'insight_cost_kes': 5000,
         'debug':settings.DEBUG,
     }
-    return render(request, 'ai_insight.html', context)
+    return await arender(request, 'ai_insight.html', context)
+
+
+@login_required
+def ai_insight_status(request, trade_id):
+    """
+    Lightweight JSON poll target for the pending state of ai_insight.
+    Returns the job status and, once available, the insight fields.
+    """
+    trade = get_object_or_404(Trade.objects.select_related('insight', 'insight_job'), id=trade_id, user=request.user)
+    insight = getattr(trade, 'insight', None)
+    job = getattr(trade, 'insight_job', None)
+
+    if insight:
+        return JsonResponse({
+            'status': 'done',
+            'insight': {
+                'insight': insight.insight,
+                'risk_pattern': insight.risk_pattern,
+                'discipline_score': insight.discipline_score,
+                'coaching_tip': insight.coaching_tip,
+            },
+        })
+    return JsonResponse({
+        'status': job.status if job else 'missing',
+        'attempts': job.attempts if job else 0,
+        'insight': None,
+    })
 
 
 # --- STRATEGY RULES: Add/Delete ---
@@ -234,12 +249,17 @@ def delete_strategy_rule(request, rule_id):
 #     request.session['dark_mode'] = not current
 #     return redirect(request.META.get('HTTP_REFERER', '/'))
 
-# trademind_app/views.py
-from django.core.paginator import Paginator
-from django.db.models import Q
-
-def trade_history(request):
-    trades = Trade.objects.filter(user=request.user).order_by('-date')
+@login_required
+@page_cache.cache_per_generation
+async def trade_history(request):
+    """
+    Filterable journal, 10 rows per page with keyset pagination.
+    Running P&L per row is computed in the database (window function),
+    so the balance tracker never needs the whole journal in the page.
+    Whole pages are cached per user generation, filters and cursor.
+    """
+    request.user = user = await request.auser()
+    trades = Trade.objects.filter(user=user)
 
     # Filters
     pair = request.GET.get('pair')
@@ -259,62 +279,181 @@ def trade_history(request):
     if date:
         trades = trades.filter(date=date)
 
-    paginator = Paginator(trades, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_annotations = {'rules_followed_n': RULES_FOLLOWED_N}
+    try:
+        page_obj = await apaginate_trades(
+            trades, after=request.GET.get('after'), start=request.GET.get('start'),
+            per_page=10, page_annotations=page_annotations,
+        )
+    except InvalidCursor:
+        page_obj = await apaginate_trades(trades, per_page=10, page_annotations=page_annotations)
+
+    # Keep the filters on the pagination links
+    filter_query = request.GET.copy()
+    for key in ('after', 'start', 'page'):
+        filter_query.pop(key, None)
 
-    return render(request, 'trade_history.html', {
+    return await arender(request, 'trade_history.html', {
         'page_obj': page_obj,
-        'trades': trades,  # For balance calc
+        'filter_query': filter_query.urlencode(),
+        'rules_total': await sync_to_async(rule_cache.rules_total)(user.pk),
         'filter_form': TradeLogForm(request.GET)  # Reuse form for filters
     })
-    
-    
-    
+
+
+@staff_member_required
+def profiling_report(request):
+    """
+    Slowest sampled requests in this process (see trademind_app/profiling.py).
+    POST clears the buffer; ?format=json returns the rows as JSON.
+    """
+    if request.method == 'POST':
+        profiling.clear()
+        messages.success(request, "Profiling buffer cleared.")
+        return redirect('trademind_app:profiling_report')
+
+    slowest = profiling.slowest()
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'summary': profiling.buffer_summary(), 'slowest': profiling.as_dicts(slowest)})
+
+    return render(request, 'profiling.html', {
+        'enabled': profiling.profiling_setting('ENABLED'),
+        'summary': profiling.buffer_summary(),
+        'slowest': slowest,
+    })
+
+
+def metrics_endpoint(request):
+    """
+    Prometheus scrape target: AI coach and insight cache metrics aggregated
+    across all worker processes. Readable by staff sessions, or by scrapers
+    sending METRICS['TOKEN'] as a bearer token.
+    """
+    token = metrics.metrics_setting('TOKEN')
+    scraper = bool(token) and request.headers.get('Authorization') == f"Bearer {token}"
+    if not scraper and not (request.user.is_active and request.user.is_staff):
+        return HttpResponse(status=401 if token else 403)
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 
 @login_required
-def dashboard(request):
-    trades = Trade.objects.filter(user=request.user).order_by('-date', '-created_at')[:5]
-    rules = StrategyRule.objects.filter(user=request.user)
-    
-    total_trades = Trade.objects.filter(user=request.user).count()
-    winning_trades = Trade.objects.filter(user=request.user, profit__isnull=False).count()
-    losing_trades = Trade.objects.filter(user=request.user, loss__isnull=False, profit__isnull=True).count()
-    
-    win_rate = 0
-    if total_trades > 0:
-        win_rate = (winning_trades / total_trades) * 100
-
-    #  Calculate average P&L by pre-trade emotion
-    emotion_pnl = Trade.objects.filter(user=request.user).values('pre_trade_emotion').annotate(
-        avg_pnl=Avg(
-            Case(
-                When(profit__isnull=False, then='profit'),
-                When(loss__isnull=False, then='loss'),
-                output_field=FloatField()
-            )
-        )
+def export_trades(request, fmt):
+    """
+    Stream the whole journal (or trades after ?since=<cursor>) as CSV or
+    JSON Lines; ?gzip=1 compresses on the fly. The X-Export-Cursor header is
+    the `since` for the next incremental export.
+    """
+    if fmt not in export.FORMATS:
+        raise Http404("Unknown export format")
+    try:
+        since = int(request.GET.get('since') or 0)
+    except ValueError:
+        since = 0
+    gzip = request.GET.get('gzip') in ('1', 'true', 'yes')
+
+    cursor = export.export_cursor(request.user)
+    queryset = export.export_queryset(request.user, since=since, cursor=cursor)
+    response = StreamingHttpResponse(
+        export.stream_export(queryset, fmt, gzip=gzip),
+        content_type='application/gzip' if gzip else f"{export.FORMATS[fmt]}; charset=utf-8",
     )
+    filename = f"trademind-{request.user.username}-{timezone.now():%Y%m%d}.{fmt}" + ('.gz' if gzip else '')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Export-Cursor'] = str(cursor)
+    return response
 
-    # Convert to dictionary for template
-    emotion_pnl_data = {
-        item['pre_trade_emotion']: item['avg_pnl'] or 0
-        for item in emotion_pnl
-    }
 
-    # Ensure all emotions are present
-    default_emotions = ['fear', 'angry', 'sad', 'neutral', 'happy', 'chill']
-    for emo in default_emotions:
-        if emo not in emotion_pnl_data:
-            emotion_pnl_data[emo] = 0
+@login_required
+def import_trades(request):
+    """
+    Upload a broker statement (MT4/MT5 HTML or CSV) into the journal.
+    Trades already imported from the same statement are skipped.
+    """
+    form = ImportTradesForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['statement']
+        fmt = form.cleaned_data['format']
+        if fmt == 'auto':
+            head = next(upload.chunks(4096), b'')
+            upload.seek(0)
+            fmt = importer.detect_format(upload.name, head)
 
-    context = {
-        'trades': trades,
-        'rules': rules,
-        'total_trades': total_trades,
-        'winning_trades': winning_trades,
-        'losing_trades': losing_trades,
-        'win_rate': round(win_rate, 1),
-        'emotion_pnl_data': emotion_pnl_data,  # Pass to template
-    }
-    return render(request, 'dashboard.html', context)
\ No newline at end of file
+        result = importer.import_trades(request.user, upload, fmt, tz_offset=form.cleaned_data['tz_offset'])
+        if result.created:
+            messages.success(request, f"Imported {result.created} trades.")
+        if result.duplicates:
+            messages.info(request, f"{result.duplicates} trades were already in your journal.")
+        if result.error_count:
+            messages.warning(request, f"{result.error_count} rows could not be read: " + '; '.join(result.errors[:3]))
+        if not (result.created or result.duplicates or result.error_count):
+            messages.warning(request, "No trades found in that file.")
+        return redirect('trademind_app:trade_history')
+
+    return render(request, 'import_trades.html', {'form': form})
+
+
+@login_required
+@require_GET
+def screenshot_rendition(request, trade_id, digest, kind):
+    """
+    A trade screenshot's WebP rendition. The URL carries the content hash,
+    so the response never changes and is cached by the browser for a year.
+    """
+    if kind not in screenshots.RENDITIONS:
+        raise Http404("Unknown rendition")
+    trade = get_object_or_404(
+        Trade.objects.only('id', 'user_id', 'screenshot', 'screenshot_hash'), id=trade_id, user=request.user
+    )
+    if not trade.screenshot or trade.screenshot_hash != digest:
+        raise Http404("Screenshot changed")
+
+    if request.headers.get('If-None-Match') == f'"{digest}-{kind}"':
+        response = HttpResponse(status=304)
+    else:
+        name = screenshots.rendition_name(digest, kind)
+        if not screenshots.default_storage.exists(name):
+            # Unreadable image: no renditions, send the upload as-is (not cached)
+            return redirect(trade.screenshot.url)
+        response = FileResponse(screenshots.default_storage.open(name, 'rb'), content_type='image/webp')
+    max_age = screenshots.screenshot_setting('CACHE_MAX_AGE')
+    response['Cache-Control'] = f"private, max-age={max_age}, immutable"
+    response['ETag'] = f'"{digest}-{kind}"'
+    response['Expires'] = http_date(time.time() + max_age)
+    return response
+
+
+@login_required
+def analytics_data(request):
+    """
+    Chart data: win rate, expectancy and profit factor by emotion, session,
+    pair and rule compliance, plus the pre -> post emotion transition matrix.
+    ?since=YYYY-MM-DD limits it to recent trades.
+    """
+    since = None
+    if request.GET.get('since'):
+        try:
+            since = date_cls.fromisoformat(request.GET['since'])
+        except ValueError:
+            return JsonResponse({'error': "since must be YYYY-MM-DD"}, status=400)
+    return JsonResponse(analytics.report(request.user.pk, since=since))
+
+
+@login_required
+async def ai_insight_stream(request, trade_id):
+    """
+    Server-Sent Events for the ai_insight page: provider tokens and insight
+    fields as they complete, then the stored insight (see insight_stream.py).
+    Streaming needs the ASGI entry point (core/asgi.py); under WSGI the page
+    is told to poll ai_insight_status as before.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(insight_stream.sse('pending', {'status': 'polling'}), content_type='text/event-stream')
+
+    user = await request.auser()
+    state, value = await sync_to_async(insight_stream.prepare)(trade_id, user.pk)
+    if state == 'missing':
+        raise Http404("Trade not found")
+    response = StreamingHttpResponse(insight_stream.insight_events(state, value), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+    return response